@@ -0,0 +1,87 @@
+# /app/backend/api/markets.py
+"""
+API endpoint pour marchés dérivés (1X2, double chance, plus/moins, BTTS, handicap asiatique)
+calculés depuis la distribution des scores d'une prédiction
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, List, Optional, Union
+import time
+import sys
+
+sys.path.insert(0, '/app/backend')
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 10000
+
+Distribution = Union[Dict[str, Any], List[Any]]
+
+
+def _lines(ou_lines, ah_lines):
+    from markets import DEFAULT_OU_LINES, DEFAULT_AH_LINES
+    return (ou_lines or DEFAULT_OU_LINES), (ah_lines if ah_lines is not None else DEFAULT_AH_LINES)
+
+
+@router.post("/api/markets/price")
+def price_markets(
+    prediction: Distribution,
+    ou_lines: Optional[List[float]] = Query(default=None, description="Lignes plus/moins (ex: 2.5)"),
+    ah_lines: Optional[List[float]] = Query(default=None, description="Lignes de handicap asiatique domicile (ex: -0.75)")
+):
+    """
+    Marchés dérivés d'une prédiction.
+
+    Corps: {score: probabilité}, un résultat de prédiction ({"probabilities": {...}})
+    ou un top-k [["2-1", 0.12], ...]
+
+    Usage:
+        curl -X POST "http://localhost:8001/api/markets/price?ou_lines=2.5&ah_lines=-0.5" \\
+             -H "Content-Type: application/json" -d '{"1-0": 12.5, "1-1": 10.2, "0-0": 8.1}'
+    """
+    try:
+        from markets import price_markets as run_price
+
+        ou, ah = _lines(ou_lines, ah_lines)
+        markets = run_price(prediction, ou, ah)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Market pricing error: {str(e)}")
+
+    if markets is None:
+        raise HTTPException(status_code=400, detail="Aucun score exact exploitable dans la distribution")
+    return markets
+
+
+@router.post("/api/markets/price/batch")
+def price_markets_batch(
+    predictions: List[Distribution],
+    ou_lines: Optional[List[float]] = Query(default=None, description="Lignes plus/moins (ex: 2.5)"),
+    ah_lines: Optional[List[float]] = Query(default=None, description="Lignes de handicap asiatique domicile (ex: -0.75)")
+):
+    """
+    Marchés dérivés d'un lot de prédictions (résultats dans l'ordre, null si inexploitable).
+    """
+    if len(predictions) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(predictions)} predictions (max {MAX_BATCH_SIZE})"
+        )
+
+    t0 = time.time()
+
+    try:
+        from markets import price_markets_batch as run_batch
+
+        ou, ah = _lines(ou_lines, ah_lines)
+        results = run_batch(predictions, ou, ah)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Market pricing error: {str(e)}")
+
+    return {
+        "count": len(results),
+        "duration_sec": round(time.time() - t0, 3),
+        "results": results
+    }
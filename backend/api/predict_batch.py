@@ -0,0 +1,68 @@
+# /app/backend/api/predict_batch.py
+"""
+API endpoint pour prédictions par lots à partir de grilles de cotes déjà extraites (sans OCR)
+"""
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Union
+import time
+import sys
+
+sys.path.insert(0, '/app/backend')
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 10000
+
+
+class BatchMatch(BaseModel):
+    scores: Union[List[Dict[str, Any]], Dict[str, Any]] = []
+    home_team: Optional[str] = None
+    away_team: Optional[str] = None
+    league: Optional[str] = None
+    algo: str = "classic"
+    disable_league_coeff: bool = False
+
+
+@router.post("/api/predict/batch")
+def predict_batch(
+    matches: List[BatchMatch],
+    topk: int = Query(default=10, ge=1, le=25, description="Nombre de scores retournés pour l'algorithme UFA v3")
+):
+    """
+    Prédit une liste de matchs en un seul appel.
+
+    Chaque élément: {scores, home_team, away_team, league, algo}
+    avec algo = "classic" (défaut), "combined" ou "ufa".
+
+    Returns:
+        Résultats dans l'ordre de la requête (un élément "error" par match invalide)
+
+    Usage:
+        curl -X POST "http://localhost:8001/api/predict/batch" -H "Content-Type: application/json" \\
+             -d '[{"scores": [{"score": "1-0", "odds": 6.5}], "home_team": "PSG", "away_team": "Marseille", "league": "Ligue1"}]'
+    """
+    if len(matches) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(matches)} matches (max {MAX_BATCH_SIZE})"
+        )
+
+    t0 = time.time()
+
+    try:
+        from batch_predictor import predict_batch as run_batch
+
+        results = run_batch([m.model_dump() for m in matches], topk=topk)
+
+        return {
+            "count": len(results),
+            "duration_sec": round(time.time() - t0, 3),
+            "results": results
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch prediction error: {str(e)}"
+        )
@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+# /app/backend/backtest.py
+"""
+Backtesting des algorithmes de prédiction sur l'historique.
+
+- Jointure analyses (cache d'analyses, matches_memory) ↔ scores réels
+  (real_scores.jsonl) par équipes normalisées et proximité de date
+- Rejoue chaque algorithme sur un pool de processus :
+    classic   → score_predictor.calculate_probabilities
+    combined  → score_predictor.predict_combined
+    predictor → predictor.predict_score
+    ufa_v3    → ufa_v3_for_emergent.predict_batch (un seul passage, pas de grille requise)
+    recorded  → probabilités enregistrées au moment de l'analyse
+- Métriques : score exact, 1X2, différence de buts, log-loss (score exact)
+  et Brier (1X2), globales, par ligue et par période
+- Cache par (algorithme, paramètres, empreinte des données lues par
+  l'algorithme : classements de ligue, classement FIFA, coefficients
+  mondiaux, stats d'équipes) dans BACKTEST_DIR : seules les analyses
+  nouvelles sont recalculées ; le rapport d'un instantané de données déjà
+  évalué est retourné directement ; une mise à jour des classements ou de
+  l'apprentissage invalide le cache
+- combined rejoue avec les stats d'équipes actuelles (5 derniers résultats,
+  non datés) qui peuvent déjà contenir le match évalué : biais d'anticipation
+  signalé dans le rapport (lookahead_bias)
+
+Usage:
+    python /app/backend/backtest.py --algos classic,combined,recorded --workers 4
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import hashlib
+import logging
+import argparse
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, '/app/backend')
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE = "/app/data/analysis_cache.jsonl"
+REAL_SCORES = "/app/data/real_scores.jsonl"
+MATCHES_MEMORY_FILES = ["/app/data/matches_memory.json"]   # mémoire du backend : store de matches_memory
+BACKTEST_DIR = "/app/data/backtests"
+
+ALGORITHMS = ("classic", "combined", "predictor", "ufa_v3", "recorded")
+GRID_ALGORITHMS = ("classic", "combined", "predictor")   # nécessitent la grille de cotes
+JOIN_WINDOW_DAYS = 10      # écart max analyse → score réel
+CHUNK_SIZE = 64            # analyses par tâche du pool
+LOGLOSS_FLOOR = 1e-4       # probabilité min du score réel (log-loss)
+MAX_CACHED_REPORTS = 5     # rapports conservés par (algorithme, paramètres)
+LOOKAHEAD_NOTE = ("combined: stats d'équipes actuelles (teams_data.json, 5 derniers résultats non datés), "
+                  "qui peuvent inclure le match évalué — résultats optimistes")
+
+
+# ============================================================================
+# OUTILS
+# ============================================================================
+
+def _hash(obj):
+    return hashlib.blake2b(json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"),
+                           digest_size=12).hexdigest()
+
+
+def _file_digest(path):
+    """Empreinte du contenu d'un fichier, None s'il n'existe pas"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=12).hexdigest()
+    except OSError:
+        return None
+
+
+def _norm_team(name):
+    """Nom d'équipe comparable (minuscules, sans accents ni ponctuation)"""
+    s = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode().lower()
+    return re.sub(r"[^a-z0-9]+", " ", s).strip()
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)[:19])
+    except ValueError:
+        return None
+
+
+def _parse_score(score):
+    """(home, away) pour "X-Y" ou "X:Y", None sinon (ex: "Autre")"""
+    parts = str(score).replace(":", "-").split("-")
+    if len(parts) != 2:
+        return None
+    try:
+        return int(parts[0]), int(parts[1])
+    except ValueError:
+        return None
+
+
+def _period(date, period):
+    if date is None:
+        return "unknown"
+    if period == "week":
+        year, week, _ = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    return date.strftime("%Y-%m")
+
+
+def _load_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    out.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return out
+
+
+def _atomic_write_json(path, obj):
+    """Écriture atomique avec tmp + rename"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ============================================================================
+# CHARGEMENT ET JOINTURE
+# ============================================================================
+
+def load_analyses():
+    """Analyses avant-match : [{home, away, league, timestamp, scores, recorded, source}]"""
+    analyses = []
+    try:
+        # cache d'analyses indexé (l'ancien JSONL n'est plus alimenté)
+        from ufa.analysis_store import get_analysis_store
+        cache_entries = get_analysis_store().iter_entries()
+    except Exception as e:
+        logger.warning(f"⚠️ Store des analyses indisponible: {e}")
+        cache_entries = _load_jsonl(ANALYSIS_CACHE)
+    for entry in cache_entries:
+        prediction = entry.get("prediction") or {}
+        analyses.append({
+            "home": entry.get("home_team"),
+            "away": entry.get("away_team"),
+            "league": entry.get("league") or "Unknown",
+            "timestamp": entry.get("timestamp"),
+            "scores": entry.get("scores"),
+            "recorded": prediction.get("probabilities") or None,
+            "source": "analysis_cache"
+        })
+
+    memories = []
+    for path in MATCHES_MEMORY_FILES:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                memories.append(json.load(f).values())
+        except (OSError, json.JSONDecodeError):
+            continue
+    try:
+        # mémoire du backend : store indexé (l'ancien JSON n'est plus mis à jour)
+        from matches_memory import iter_matches
+        memories.append(match for _, match in iter_matches())
+    except Exception as e:
+        logger.warning(f"⚠️ Store matches_memory indisponible: {e}")
+    for memory in memories:
+        for match in memory:
+            name = match.get("match_name") or ""
+            if " - " not in name:
+                continue
+            home, away = name.split(" - ", 1)
+            analyses.append({
+                "home": home.strip(),
+                "away": away.strip(),
+                "league": match.get("league") or "Unknown",
+                "timestamp": match.get("analyzed_at"),
+                "scores": match.get("extracted_scores"),
+                "recorded": match.get("probabilities") or None,
+                "source": "matches_memory"
+            })
+    return analyses
+
+
+def load_outcomes():
+    """Scores réels {(home_norm, away_norm): [(date, home_goals, away_goals, league), ...]}"""
+    index = defaultdict(list)
+    for entry in _load_jsonl(REAL_SCORES):
+        if entry.get("validated") is False:
+            continue
+        hg, ag = entry.get("home_goals"), entry.get("away_goals")
+        if hg is None or ag is None:
+            continue
+        try:
+            hg, ag = int(hg), int(ag)
+        except (TypeError, ValueError):
+            continue
+        key = (_norm_team(entry.get("home_team")), _norm_team(entry.get("away_team")))
+        date = _parse_date(entry.get("date") or entry.get("timestamp"))
+        index[key].append((date, hg, ag, entry.get("league")))
+    for candidates in index.values():
+        candidates.sort(key=lambda c: c[0] or datetime.min)
+    return index
+
+
+def _find_outcome(candidates, ts):
+    """Premier score réel dans la fenêtre [analyse - 1 jour, analyse + JOIN_WINDOW_DAYS]"""
+    if ts is None:
+        return candidates[-1]
+    for c in candidates:
+        if c[0] is None:
+            continue
+        if ts - timedelta(days=1) <= c[0] <= ts + timedelta(days=JOIN_WINDOW_DAYS):
+            return c
+    undated = [c for c in candidates if c[0] is None]
+    return undated[-1] if undated else None
+
+
+def build_dataset(period="month"):
+    """
+    Joint analyses et scores réels.
+    Une seule analyse (la plus récente) est conservée par match joué.
+
+    Returns:
+        list d'items {id, home, away, league, period, scores, recorded, actual, source}
+    """
+    outcomes = load_outcomes()
+    joined = {}
+    for a in load_analyses():
+        candidates = outcomes.get((_norm_team(a["home"]), _norm_team(a["away"])))
+        if not candidates:
+            continue
+        ts = _parse_date(a["timestamp"])
+        outcome = _find_outcome(candidates, ts)
+        if outcome is None:
+            continue
+        date, hg, ag, league = outcome
+        match_key = (_norm_team(a["home"]), _norm_team(a["away"]), date, hg, ag)
+        previous = joined.get(match_key)
+        if previous and (previous[0] or datetime.min) > (ts or datetime.min):
+            continue
+        item = {
+            "home": a["home"],
+            "away": a["away"],
+            "league": a["league"] if a["league"] != "Unknown" else (league or "Unknown"),
+            "period": _period(date or ts, period),
+            "scores": a["scores"] or None,
+            "recorded": a["recorded"],
+            "actual": [hg, ag],
+            "source": a["source"]
+        }
+        item["id"] = _hash([item["home"], item["away"], item["league"], a["timestamp"],
+                            item["scores"], item["actual"]])
+        joined[match_key] = (ts, item)
+    return [item for _, item in joined.values()]
+
+
+# ============================================================================
+# PRÉDICTIONS (processus du pool)
+# ============================================================================
+
+def _init_worker():
+    # les algorithmes journalisent chaque score en INFO
+    logging.disable(logging.INFO)
+
+
+def _predict_chunk(algo, params, items):
+    """Probabilités (%) par item, None si l'algorithme échoue"""
+    out = []
+    for item in items:
+        try:
+            out.append(_predict_one(algo, params, item))
+        except Exception as e:
+            logger.warning(f"⚠️ Backtest {algo} échoué ({item['home']} - {item['away']}): {e}")
+            out.append(None)
+    return out
+
+
+def _predict_one(algo, params, item):
+    scores = item["scores"]
+    if algo == "classic":
+        from score_predictor import calculate_probabilities
+        result = calculate_probabilities(
+            scores, diff_expected=params["diff_expected"],
+            use_odds_weighting=params.get("use_odds_weighting", False),
+            home_team=item["home"], away_team=item["away"], league=item["league"],
+            use_league_coeff=params.get("use_league_coeff", True)
+        )
+    elif algo == "combined":
+        from score_predictor import predict_combined, get_team_stats
+        gf_a, ga_a = get_team_stats(item["home"])
+        gf_b, ga_b = get_team_stats(item["away"])
+        result = predict_combined(
+            scores,
+            {'avg_goals_scored': gf_a, 'avg_goals_conceded': ga_a},
+            {'avg_goals_scored': gf_b, 'avg_goals_conceded': ga_b},
+            params["diff_expected"]
+        )
+    elif algo == "predictor":
+        from predictor import predict_score
+        result = predict_score(scores, item["home"], item["away"],
+                               enable_fifa_coeffs=params.get("enable_fifa_coeffs", True))
+    else:
+        raise ValueError(f"Algorithme inconnu: {algo}")
+    return result.get("probabilities") or None
+
+
+def _predict_ufa(items):
+    from batch_predictor import CoefficientResolver
+    from ufa.ufa_v3_for_emergent import predict_batch, SCORES
+
+    resolver = CoefficientResolver()
+    rows = []
+    for item in items:
+        h, a = resolver.match_coeffs(item["home"], item["away"], item["league"])
+        rows.append((item["home"], item["away"], item["league"], h, a))
+    return [{s: p * 100.0 for s, p in ranked} for ranked in predict_batch(rows, topk=len(SCORES))]
+
+
+def _run_predictions(algo, params, items, workers):
+    if algo == "recorded":
+        return [item["recorded"] for item in items]
+    if algo == "ufa_v3":
+        return _predict_ufa(items)
+    if workers <= 1 or len(items) <= CHUNK_SIZE:
+        # dans ce processus : on rétablit ensuite le niveau de désactivation de l'appelant
+        previous = logging.root.manager.disable
+        logging.disable(max(previous, logging.INFO))
+        try:
+            return _predict_chunk(algo, params, items)
+        finally:
+            logging.disable(previous)
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    out = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for chunk_result in pool.map(_predict_chunk, [algo] * len(chunks), [params] * len(chunks), chunks):
+            out.extend(chunk_result)
+    return out
+
+
+# ============================================================================
+# MÉTRIQUES
+# ============================================================================
+
+def _outcome(h, a):
+    return "1" if h > a else ("X" if h == a else "2")
+
+
+def score_metrics(probs, actual):
+    """
+    Métriques d'une prédiction.
+
+    Args:
+        probs: {score: probabilité en %}
+        actual: (buts domicile, buts extérieur)
+
+    Returns:
+        dict {exact, outcome_1x2, goal_diff, log_loss, brier} ou None si inexploitable
+    """
+    parsed = {}
+    for s, p in probs.items():
+        hs = _parse_score(s)
+        if hs is not None and p > 0:
+            parsed[hs] = parsed.get(hs, 0.0) + float(p)
+    if not parsed:
+        return None
+
+    total = sum(max(float(p), 0.0) for p in probs.values()) or 1.0
+    h, a = actual
+    top = max(parsed, key=parsed.get)
+
+    p1x2 = {"1": 0.0, "X": 0.0, "2": 0.0}
+    for (sh, sa), p in parsed.items():
+        p1x2[_outcome(sh, sa)] += p
+    mass = sum(p1x2.values())
+    p1x2 = {k: v / mass for k, v in p1x2.items()}
+    real = _outcome(h, a)
+
+    p_actual = parsed.get((h, a))
+    if p_actual is None:
+        p_actual = float(probs.get("Autre", 0.0) or 0.0)
+    p_actual /= total
+
+    return {
+        "exact": float(top == (h, a)),
+        "outcome_1x2": float(max(p1x2, key=p1x2.get) == real),
+        "goal_diff": float(top[0] - top[1] == h - a),
+        "log_loss": -math.log(max(p_actual, LOGLOSS_FLOOR)),
+        "brier": sum((p - (1.0 if k == real else 0.0)) ** 2 for k, p in p1x2.items())
+    }
+
+
+def _aggregate(rows):
+    n = len(rows)
+    if not n:
+        return {"n": 0}
+    out = {"n": n}
+    for key in ("exact", "outcome_1x2", "goal_diff", "log_loss", "brier"):
+        out[key] = round(sum(r[key] for r in rows) / n, 4)
+    return out
+
+
+def summarize(items, metrics):
+    """Agrégats globaux, par ligue et par période"""
+    by_league = defaultdict(list)
+    by_period = defaultdict(list)
+    for item, m in zip(items, metrics):
+        by_league[item["league"]].append(m)
+        by_period[item["period"]].append(m)
+    return {
+        "overall": _aggregate(metrics),
+        "by_league": {k: _aggregate(v) for k, v in sorted(by_league.items())},
+        "by_period": {k: _aggregate(v) for k, v in sorted(by_period.items())}
+    }
+
+
+# ============================================================================
+# EXÉCUTION
+# ============================================================================
+
+def _default_params(algo, params):
+    params = dict(params or {})
+    if algo in ("classic", "combined") and "diff_expected" not in params:
+        from learning import get_diff_expected
+        params["diff_expected"] = get_diff_expected()
+    if algo == "combined":
+        from score_predictor import get_calibration
+        params.setdefault("calibration", get_calibration())
+    return params
+
+
+def _inputs_fingerprint(algo):
+    """Empreinte des données que l'algorithme lit en plus de ses paramètres"""
+    inputs = {}
+    if algo in ("classic", "predictor", "ufa_v3"):
+        from league_fetcher import LEAGUE_CONFIG
+        from tools.fifa_ranking_manager import FIFA_RANKING_FILE
+        inputs["standings"] = {league: _file_digest(config["fallback_file"])
+                               for league, config in LEAGUE_CONFIG.items()}
+        inputs["fifa"] = _file_digest(FIFA_RANKING_FILE)
+    if algo == "ufa_v3":
+        from ufa.world_coeffs import OUT_FILE
+        inputs["world"] = _file_digest(OUT_FILE)
+    if algo == "combined":
+        from score_predictor import _team_store
+        inputs["team_stats"] = _hash(_team_store().all_results())
+    return _hash(inputs)
+
+
+def run_backtest(algo, params=None, items=None, workers=None, period="month", use_cache=True):
+    """
+    Évalue un algorithme sur l'historique.
+
+    Args:
+        algo: "classic", "combined", "predictor", "ufa_v3" ou "recorded"
+        params: paramètres de l'algorithme (diff_expected, use_league_coeff, ...)
+        items: dataset (build_dataset) ; rechargé si None
+        workers: taille du pool de processus (défaut: nb de CPU)
+        period: "month" ou "week"
+        use_cache: réutiliser les prédictions déjà calculées
+
+    Returns:
+        dict rapport {algo, params, snapshot, evaluated, skipped, computed, overall, by_league, by_period}
+    """
+    if algo not in ALGORITHMS:
+        raise ValueError(f"Algorithme inconnu: {algo} (attendu: {', '.join(ALGORITHMS)})")
+    t0 = time.time()
+    params = _default_params(algo, params)
+    items = build_dataset(period) if items is None else items
+    workers = workers or os.cpu_count() or 1
+
+    if algo in GRID_ALGORITHMS:
+        eligible = [it for it in items if it["scores"]]
+    elif algo == "recorded":
+        eligible = [it for it in items if it["recorded"]]
+    else:
+        eligible = list(items)
+
+    snapshot = _hash(sorted([it["id"], it["period"]] for it in eligible))
+    inputs = _inputs_fingerprint(algo) if algo != "recorded" else None
+    cache_prefix = f"{algo}_{_hash(params)}_"
+    cache_path = os.path.join(BACKTEST_DIR, f"{cache_prefix}{inputs}.json")
+    cache = {"algo": algo, "params": params, "predictions": {}, "reports": {}}
+    if use_cache and algo != "recorded" and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Cache backtest illisible ({cache_path}): {e}")
+        report = cache.get("reports", {}).get(snapshot)
+        if report:
+            logger.info(f"♻️ Backtest {algo}: instantané {snapshot} déjà évalué")
+            return dict(report, cached=True)
+
+    predictions = cache.setdefault("predictions", {})
+    todo = [it for it in eligible if it["id"] not in predictions]
+    if todo:
+        logger.info(f"🔁 Backtest {algo}: {len(todo)} nouvelles analyses sur {len(eligible)}")
+        for item, probs in zip(todo, _run_predictions(algo, params, todo, workers)):
+            if probs:
+                predictions[item["id"]] = probs
+
+    scored_items, metrics = [], []
+    for item in eligible:
+        probs = predictions.get(item["id"])
+        m = score_metrics(probs, item["actual"]) if probs else None
+        if m is not None:
+            scored_items.append(item)
+            metrics.append(m)
+
+    report = {
+        "algo": algo,
+        "params": params,
+        "snapshot": snapshot,
+        "evaluated": len(metrics),
+        "skipped": len(items) - len(metrics),
+        "computed": len(todo),
+        "duration_sec": round(time.time() - t0, 3),
+        "inputs": inputs,
+        **summarize(scored_items, metrics)
+    }
+    if algo == "combined":
+        report["lookahead_bias"] = True
+        report["note"] = LOOKAHEAD_NOTE
+
+    if use_cache and algo != "recorded":
+        reports = cache.setdefault("reports", {})
+        reports[snapshot] = report
+        for old in list(reports)[:-MAX_CACHED_REPORTS]:
+            del reports[old]
+        _atomic_write_json(cache_path, cache)
+        # caches des mêmes paramètres sur des données périmées
+        for name in os.listdir(BACKTEST_DIR):
+            if name.startswith(cache_prefix) and os.path.join(BACKTEST_DIR, name) != cache_path:
+                os.remove(os.path.join(BACKTEST_DIR, name))
+    return report
+
+
+def run_all(algos=ALGORITHMS, params=None, workers=None, period="month", use_cache=True):
+    """Backtest de plusieurs algorithmes sur le même dataset"""
+    items = build_dataset(period)
+    reports = {}
+    for algo in algos:
+        try:
+            reports[algo] = run_backtest(algo, (params or {}).get(algo), items, workers, period, use_cache)
+        except Exception as e:
+            logger.error(f"❌ Backtest {algo} échoué: {e}")
+            reports[algo] = {"algo": algo, "error": str(e)}
+    return {"generated_at": datetime.utcnow().isoformat(), "matches": len(items), "reports": reports}
+
+
+def _print_table(result):
+    print(f"\n📊 BACKTEST — {result['matches']} matchs joints aux scores réels\n")
+    print(f"{'algo':<10} {'n':>5} {'exact':>7} {'1X2':>7} {'diff':>7} {'logloss':>8} {'brier':>7}")
+    for algo, rep in result["reports"].items():
+        if "error" in rep:
+            print(f"{algo:<10} ❌ {rep['error']}")
+            continue
+        o = rep["overall"]
+        if not o.get("n"):
+            print(f"{algo:<10} {0:>5}   (aucune analyse exploitable)")
+            continue
+        print(f"{algo:<10} {o['n']:>5} {o['exact']:>7.3f} {o['outcome_1x2']:>7.3f} "
+              f"{o['goal_diff']:>7.3f} {o['log_loss']:>8.3f} {o['brier']:>7.3f}")
+    for algo, rep in result["reports"].items():
+        if rep.get("lookahead_bias"):
+            print(f"\n⚠️ {rep['note']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Backtest des algorithmes de prédiction")
+    parser.add_argument("--algos", default="classic,combined,predictor,recorded",
+                        help=f"liste séparée par des virgules parmi: {', '.join(ALGORITHMS)}")
+    parser.add_argument("--workers", type=int, default=None, help="taille du pool de processus")
+    parser.add_argument("--period", choices=("month", "week"), default="month")
+    parser.add_argument("--no-cache", action="store_true", help="tout recalculer")
+    parser.add_argument("--output", default=os.path.join(BACKTEST_DIR, "last_report.json"))
+    args = parser.parse_args()
+
+    result = run_all([a.strip() for a in args.algos.split(",") if a.strip()],
+                     workers=args.workers, period=args.period, use_cache=not args.no_cache)
+    _atomic_write_json(args.output, result)
+    _print_table(result)
+    print(f"\n💾 Rapport complet: {args.output}")
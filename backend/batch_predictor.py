@@ -0,0 +1,535 @@
+# /app/backend/batch_predictor.py
+"""
+Prédiction de scores par lots, sans OCR (endpoint POST /api/predict/batch).
+
+Chaque match reçu est une grille de cotes déjà extraite :
+    {"scores": [...], "home_team": ..., "away_team": ..., "league": ..., "algo": ...}
+
+- Les coefficients (ligue, FIFA, mondiaux) et les stats d'équipe sont résolus
+  une seule fois par équipe distincte du lot (CoefficientResolver)
+- Les algorithmes classique et combiné sont vectorisés avec numpy sur une
+  matrice (matchs × scores) complétée par des zéros et masquée
+- UFA v3 charge le modèle une fois et fait un seul passage pour tout le lot
+
+Les probabilités sont identiques (à l'arrondi près) à celles de
+calculate_probabilities, predict_combined et predict_single appelés match par
+match. Seul l'ordre des clés du dict "probabilities" peut différer pour
+l'algorithme combiné (ordre d'entrée au lieu de l'ordre du lissage).
+"""
+import time
+import logging
+
+import numpy as np
+
+import score_predictor
+from learning import get_diff_expected
+
+logger = logging.getLogger(__name__)
+
+# Import du système de coefficient de ligue
+try:
+    import league_coeff
+    LEAGUE_COEFF_AVAILABLE = True
+except ImportError:
+    LEAGUE_COEFF_AVAILABLE = False
+    logger.warning("⚠️ Module league_coeff non disponible")
+
+# Import du gestionnaire de classement FIFA
+try:
+    from tools.fifa_ranking_manager import get_team_coefficient
+    FIFA_RANKING_AVAILABLE = True
+except ImportError:
+    FIFA_RANKING_AVAILABLE = False
+    logger.warning("⚠️ Module FIFA ranking non disponible")
+
+ALGORITHMS = ("classic", "combined", "ufa")
+NO_DATA = "Aucune donnée"
+
+
+# ============================================================================
+# RÉSOLUTION DES COEFFICIENTS (une fois par équipe distincte)
+# ============================================================================
+
+class CoefficientResolver:
+    """
+    Mémoïse coefficients et stats d'équipe pour la durée d'un lot.
+    Une nouvelle instance par lot : rien n'est conservé entre deux appels,
+    les mises à jour de classement restent donc visibles immédiatement.
+    """
+
+    def __init__(self):
+        self._league = {}
+        self._fifa = {}
+        self._world = {}
+        self._stats = {}
+
+    def league_coeff(self, team, league):
+        """Coefficient de classement (league_coeff.get_team_coeff) ou None si erreur"""
+        key = (team, league)
+        if key not in self._league:
+            try:
+                result = league_coeff.get_team_coeff(team, league)
+                self._league[key] = result["coefficient"] if isinstance(result, dict) else result
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur calcul coefficient ligue {team} ({league}): {e}")
+                self._league[key] = None
+        return self._league[key]
+
+    def fifa_coeff(self, team):
+        """Coefficient FIFA (tranches de rang) ou None si erreur"""
+        if team not in self._fifa:
+            try:
+                # index FIFA partagé (rechargé seulement si le fichier change)
+                self._fifa[team] = get_team_coefficient(team)
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur calcul coefficient FIFA {team}: {e}")
+                self._fifa[team] = None
+        return self._fifa[team]
+
+    def world_coeff(self, team):
+        """Coefficient mondial (ufa.world_coeffs), 1.0 par défaut"""
+        if team not in self._world:
+            try:
+                from ufa.world_coeffs import get_world_coeff
+                self._world[team] = get_world_coeff(team)
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur coefficient mondial {team}: {e}")
+                self._world[team] = 1.0
+        return self._world[team]
+
+    def team_stats(self, team):
+        """Stats moyennes au format attendu par compute_team_lambdas"""
+        if team not in self._stats:
+            gf, ga = score_predictor.get_team_stats(team)
+            self._stats[team] = {'avg_goals_scored': gf, 'avg_goals_conceded': ga}
+        return self._stats[team]
+
+    def classic_coeffs(self, home_team, away_team, league, use_league_coeff=True):
+        """
+        Coefficients de l'algorithme classique, même logique que les étapes
+        0 et 0b de calculate_probabilities.
+
+        Returns:
+            tuple: (home_coeff, away_coeff, league_coeffs_applied)
+        """
+        home_coeff = 1.0
+        away_coeff = 1.0
+        applied = False
+        if not (league and home_team and away_team):
+            return home_coeff, away_coeff, applied
+
+        if use_league_coeff and LEAGUE_COEFF_AVAILABLE:
+            h = self.league_coeff(home_team, league)
+            a = self.league_coeff(away_team, league)
+            if h is not None and a is not None:
+                home_coeff, away_coeff, applied = h, a, True
+
+        if FIFA_RANKING_AVAILABLE and "World" in league:
+            h = self.fifa_coeff(home_team)
+            a = self.fifa_coeff(away_team)
+            if h is not None and a is not None:
+                home_coeff *= h
+                away_coeff *= a
+                applied = True
+            else:
+                home_coeff, away_coeff = 1.0, 1.0
+
+        return home_coeff, away_coeff, applied
+
+    def match_coeffs(self, home_team, away_team, league):
+        """
+        Coefficients d'entrée du modèle UFA, même logique que
+        league_coeff.get_coeffs_for_match.
+        """
+        if not LEAGUE_COEFF_AVAILABLE:
+            return 1.0, 1.0
+        if league_coeff.is_international_league(league):
+            return self.world_coeff(home_team), self.world_coeff(away_team)
+        h = self.league_coeff(home_team, league) if home_team else None
+        a = self.league_coeff(away_team, league) if away_team else None
+        fallback = league_coeff.FALLBACK_COEF
+        return (h if h is not None else fallback), (a if a is not None else fallback)
+
+
+# ============================================================================
+# GRILLE (matchs × scores)
+# ============================================================================
+
+def _parse_score(score):
+    """Retourne (home, away) pour un score "X-Y", None sinon (ex: "Autre")"""
+    if "-" not in score:
+        return None
+    parts = score.split("-")
+    if len(parts) != 2:
+        return None
+    try:
+        return int(parts[0]), int(parts[1])
+    except ValueError:
+        return None
+
+
+def _to_score_map(scores):
+    """
+    Même conversion que les algorithmes unitaires (liste OCR -> dict).
+
+    Raises:
+        ValueError: grille invalide (entrée sans score / odds, score non textuel)
+    """
+    if isinstance(scores, list):
+        out = {}
+        for pos, item in enumerate(scores):
+            if not isinstance(item, dict) or "score" not in item or "odds" not in item:
+                raise ValueError(f"Entrée de score invalide (position {pos}): 'score' et 'odds' requis")
+            out[item["score"]] = item["odds"]
+        scores = out
+    elif scores is not None and not isinstance(scores, dict):
+        raise ValueError("Grille de scores invalide: liste ou dict attendu")
+    scores = scores or {}
+    if not all(isinstance(score, str) for score in scores):
+        raise ValueError("Grille de scores invalide: scores textuels attendus (ex: \"2-1\")")
+    return scores
+
+
+class _Grid:
+    """
+    Matrices (matchs × scores) d'un groupe de grilles de cotes.
+    Les lignes plus courtes sont complétées et exclues via les masques.
+    """
+
+    def __init__(self, score_maps):
+        n = len(score_maps)
+        width = max(2, max((len(m) for m in score_maps), default=0))
+        self.keys = [list(m.keys()) for m in score_maps]
+        self.inv_odds = np.zeros((n, width))
+        self.has_odds = np.zeros((n, width), dtype=bool)
+        self.parsed = np.zeros((n, width), dtype=bool)
+        self.colon = np.zeros((n, width), dtype=bool)
+        self.canonical = np.zeros((n, width), dtype=bool)
+        self.home = np.zeros((n, width), dtype=np.int64)
+        self.away = np.zeros((n, width), dtype=np.int64)
+
+        for i, m in enumerate(score_maps):
+            for j, (score, odds) in enumerate(m.items()):
+                try:
+                    o = float(odds)
+                    if o > 0:
+                        self.inv_odds[i, j] = 1.0 / o
+                        self.has_odds[i, j] = True
+                except (ValueError, TypeError):
+                    pass
+                hs = _parse_score(score)
+                if hs is None and ":" in score:
+                    # "2:1" accepté par le Poisson du combiné, mais pas par le reste
+                    hs = _parse_score(score.replace(":", "-"))
+                    if hs is not None:
+                        self.colon[i, j] = True
+                elif hs is not None:
+                    self.parsed[i, j] = True
+                    self.canonical[i, j] = score == f"{hs[0]}-{hs[1]}"
+                if hs is not None:
+                    self.home[i, j], self.away[i, j] = hs
+
+    def to_dicts(self, values, mask):
+        """Reconstruit les dicts {score: probabilité arrondie} dans l'ordre d'entrée"""
+        out = []
+        for keys, row_vals, row_mask in zip(self.keys, values.tolist(), mask.tolist()):
+            out.append({k: round(v, 2) for k, v, ok in zip(keys, row_vals, row_mask) if ok})
+        return out
+
+
+def _normalize_rows(values, scale=1.0):
+    total = values.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, values / total * scale, 0.0)
+
+
+def _argmax_keys(grid, values, mask):
+    """Score le plus probable par ligne (premier maximum, comme max())"""
+    filled = np.where(mask, values, -np.inf)
+    idx = filled.argmax(axis=1)
+    has_any = mask.any(axis=1)
+    return [keys[j] if ok else None for keys, j, ok in zip(grid.keys, idx.tolist(), has_any.tolist())]
+
+
+def confidence_batch(values, mask):
+    """
+    Version vectorisée de score_predictor.calculate_confidence.
+
+    Args:
+        values: probabilités en pourcentage (matchs × scores)
+        mask: scores présents
+
+    Returns:
+        np.ndarray: confiance entre 0.0 et 1.0 par ligne
+    """
+    filled = np.where(mask, values, -np.inf)
+    top2 = -np.partition(-filled, 1, axis=1)[:, :2]
+    count = mask.sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        best = top2[:, 0] / 100.0
+        gap = np.where(count > 1, best - top2[:, 1] / 100.0, best)
+        conf = best * 0.6 + gap * 0.4
+        conf = np.where(best > 0.25, conf * 1.2, conf)
+    conf = np.clip(conf, 0.0, 1.0)
+    return np.where(count > 0, conf, 0.0)
+
+
+# ============================================================================
+# ALGORITHMES VECTORISÉS
+# ============================================================================
+
+def classic_batch(score_maps, diff_expected, home_coeffs, away_coeffs, applied):
+    """
+    Algorithme classique (calculate_probabilities) sur tout un lot.
+
+    Args:
+        score_maps: liste de dicts {score: cote}
+        diff_expected: différence de buts attendue (commune au lot)
+        home_coeffs, away_coeffs, applied: séquences par match (voir classic_coeffs)
+
+    Returns:
+        list: un dict par match (mostProbableScore, probabilities, confidence, league_coeffs_applied)
+    """
+    grid = _Grid(score_maps)
+    mask = grid.has_odds
+    normalized = _normalize_rows(grid.inv_odds)
+
+    # Gaussienne sur la différence de buts
+    adjusted_diff = diff_expected + 1 if diff_expected > 2 else diff_expected
+    diff = np.abs(grid.away - grid.home)
+    weight = np.where(grid.parsed, np.exp(-0.4 * (diff - adjusted_diff) ** 2), 1.0)
+
+    # Coefficients de ligue (ratio extérieur / domicile)
+    home_c = np.asarray(home_coeffs, dtype=float)
+    away_c = np.asarray(away_coeffs, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(home_c > 0, away_c / home_c, 1.0)[:, None]
+        league_weight = np.where(
+            grid.home > grid.away, 1.0 / (ratio ** 2.5),
+            np.where(grid.away > grid.home, ratio ** 2.5, 1.0 / (ratio ** 0.5))
+        )
+    league_weight = np.where(grid.parsed & np.asarray(applied, dtype=bool)[:, None], league_weight, 1.0)
+
+    weighted = np.where(mask, normalized * weight * league_weight, 0.0)
+    final = _normalize_rows(weighted, 100.0)
+
+    # Correction adaptative des nuls extrêmes
+    draws = grid.parsed & (grid.home == grid.away)
+    draw_factor = np.where(draws & (grid.home >= 3), 0.75, np.where(draws & (grid.home == 2), 0.95, 1.0))
+    final = _normalize_rows(final * draw_factor, 100.0)
+
+    tops = _argmax_keys(grid, final, mask)
+    confidences = confidence_batch(final, mask).tolist()
+    probabilities = grid.to_dicts(final, mask)
+
+    results = []
+    for top, conf, probs, app in zip(tops, confidences, probabilities, applied):
+        if top is None:
+            results.append({"mostProbableScore": NO_DATA, "probabilities": {}})
+            continue
+        results.append({
+            "mostProbableScore": top,
+            "probabilities": probs,
+            "confidence": round(conf, 3),
+            "league_coeffs_applied": bool(app)
+        })
+    return results
+
+
+def _pmf_lookup(k, lams):
+    """
+    P(k) par case via les tables PMF partagées de score_predictor
+    (k: matrice d'entiers, lams: lambda par ligne)
+    """
+    distinct, inverse = np.unique(np.asarray(lams, dtype=float), return_inverse=True)
+    table = np.array([score_predictor.poisson_pmf_vector(lam) for lam in distinct])[inverse]
+    kc = np.clip(k, 0, table.shape[1] - 1)
+    return np.take_along_axis(table, kc, axis=1)
+
+
+def combined_batch(score_maps, diff_expected, lam_home, lam_away):
+    """
+    Algorithme combiné (predict_combined) sur tout un lot.
+
+    Args:
+        score_maps: liste de dicts {score: cote}
+        diff_expected: diffExpected (commun au lot)
+        lam_home, lam_away: lambdas de Poisson par match
+
+    Returns:
+        list: un dict par match (mostProbableScore, probabilities, confidence)
+    """
+    max_goals = score_predictor.MAX_GOALS
+    alpha = score_predictor.ALPHA
+    beta = score_predictor.BLEND_BETA
+    eps = score_predictor.EPS
+
+    grid = _Grid(score_maps)
+    keys_mask = grid.parsed | grid.colon
+    h, a = grid.home, grid.away
+
+    # 1) probabilités implicites (la somme inclut les scores non numériques)
+    sum_impl = grid.inv_odds.sum(axis=1, keepdims=True)
+    sum_impl = np.where(sum_impl > 0, sum_impl, eps)
+
+    # 3) Poisson joint dans la zone 0..MAX_GOALS, EPS au-delà
+    inside = (h >= 0) & (a >= 0) & (h <= max_goals) & (a <= max_goals)
+    poisson = np.where(inside, np.maximum(eps, _pmf_lookup(h, lam_home) * _pmf_lookup(a, lam_away)), eps)
+
+    # 4) gaussienne sur diffExpected (les scores "X:Y" n'y passent pas)
+    diff = np.abs(a - h)
+    weights = np.array(score_predictor.diff_weight_vector(diff_expected))
+    weight_diff = np.where(
+        diff <= max_goals,
+        weights[np.minimum(diff, max_goals)],
+        np.exp(-alpha * (diff - diff_expected) ** 2)
+    )
+    adjusted = np.where(grid.parsed, poisson * weight_diff + eps, poisson)
+    adjusted = np.where(keys_mask, adjusted, 0.0)
+
+    # 5-7) normalisation, mélange Poisson / cotes, pourcentages
+    sum_pois = adjusted.sum(axis=1, keepdims=True)
+    sum_pois = np.where(sum_pois > 0, sum_pois, eps)
+    blended = beta * (adjusted / sum_pois) + (1 - beta) * (grid.inv_odds / sum_impl) + eps
+    blended = np.where(keys_mask, blended, 0.0)
+    total = blended.sum(axis=1, keepdims=True)
+    final = blended / np.where(total > 0, total, eps) * 100
+
+    # 8) lissage de voisinage : 80% conservé, 5% vers chaque voisin dans la grille
+    emitters = grid.parsed
+    n_neighbors = np.zeros_like(h)
+    for dh, da in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        nh, na = h + dh, a + da
+        n_neighbors += (nh >= 0) & (nh <= max_goals) & (na >= 0) & (na <= max_goals)
+    self_part = np.where(emitters, final * 0.80, final)
+    total_sm = (self_part + np.where(emitters, final * 0.05 * n_neighbors, 0.0)).sum(axis=1, keepdims=True)
+
+    adjacent = (np.abs(h[:, :, None] - h[:, None, :]) + np.abs(a[:, :, None] - a[:, None, :])) == 1
+    receivers = grid.canonical & inside
+    adjacent &= receivers[:, :, None] & emitters[:, None, :]
+    received = 0.05 * np.einsum("bij,bj->bi", adjacent.astype(float), final)
+
+    smoothed = (self_part + received) / np.where(total_sm > 0, total_sm, eps) * 100
+
+    tops = _argmax_keys(grid, smoothed, keys_mask)
+    confidences = confidence_batch(smoothed, keys_mask).tolist()
+    probabilities = grid.to_dicts(smoothed, keys_mask)
+
+    results = []
+    for top, conf, probs in zip(tops, confidences, probabilities):
+        if top is None:
+            results.append({"mostProbableScore": NO_DATA, "probabilities": {}, "confidence": 0.0})
+            continue
+        results.append({
+            "mostProbableScore": top,
+            "probabilities": probs,
+            "confidence": round(conf, 3)
+        })
+    return results
+
+
+# ============================================================================
+# POINT D'ENTRÉE
+# ============================================================================
+
+def predict_batch(matches, diff_expected=None, topk=10):
+    """
+    Prédit une liste de matchs en un seul appel, résultats dans l'ordre d'entrée.
+
+    Args:
+        matches: liste de dicts {scores, home_team, away_team, league, algo, disable_league_coeff}
+                 algo: "classic" (défaut), "combined" ou "ufa"
+        diff_expected: différence de buts attendue (lue une fois via get_diff_expected si None)
+        topk: nombre de scores retournés pour UFA v3
+
+    Returns:
+        list: un dict par match; {"error": ...} pour un match invalide sans bloquer le lot
+    """
+    t0 = time.time()
+    if diff_expected is None:
+        diff_expected = get_diff_expected()
+
+    resolver = CoefficientResolver()
+    results = [None] * len(matches)
+    groups = {algo: [] for algo in ALGORITHMS}
+
+    score_maps = {}
+    for i, match in enumerate(matches):
+        algo = (match.get("algo") or "classic").lower()
+        if algo not in groups:
+            results[i] = {"algo": algo, "error": f"Algorithme inconnu: {algo} (attendu: {', '.join(ALGORITHMS)})"}
+            continue
+        if algo != "ufa":
+            try:
+                score_maps[i] = _to_score_map(match.get("scores"))
+            except ValueError as e:
+                results[i] = {"algo": algo, "error": str(e)}
+                continue
+        groups[algo].append(i)
+
+    # Algorithme classique
+    if groups["classic"]:
+        idx = groups["classic"]
+        home_c, away_c, applied = [], [], []
+        for i in idx:
+            m = matches[i]
+            h, a, app = resolver.classic_coeffs(
+                m.get("home_team"), m.get("away_team"), m.get("league"),
+                use_league_coeff=not m.get("disable_league_coeff", False)
+            )
+            home_c.append(h)
+            away_c.append(a)
+            applied.append(app)
+        for i, res in zip(idx, classic_batch([score_maps[i] for i in idx], diff_expected, home_c, away_c, applied)):
+            results[i] = {"algo": "classic", **res}
+
+    # Algorithme combiné
+    if groups["combined"]:
+        idx = groups["combined"]
+        lam_home, lam_away = [], []
+        for i in idx:
+            m = matches[i]
+            home, away = m.get("home_team"), m.get("away_team")
+            if home and away:
+                lh, la = score_predictor.compute_team_lambdas(resolver.team_stats(home), resolver.team_stats(away))
+            else:
+                lh, la = 1.5, 1.5
+            lam_home.append(lh)
+            lam_away.append(la)
+        for i, res in zip(idx, combined_batch([score_maps[i] for i in idx], diff_expected, lam_home, lam_away)):
+            results[i] = {"algo": "combined", **res}
+
+    # UFA v3 (un seul passage du modèle)
+    if groups["ufa"]:
+        idx = groups["ufa"]
+        rows = []
+        for i in idx:
+            m = matches[i]
+            home, away, league = m.get("home_team") or "", m.get("away_team") or "", m.get("league") or ""
+            hc, ac = resolver.match_coeffs(home, away, league)
+            rows.append((home, away, league, hc, ac))
+        try:
+            from ufa.ufa_v3_for_emergent import predict_batch as ufa_predict_batch
+            tops = ufa_predict_batch(rows, topk=topk)
+            for i, row, top in zip(idx, rows, tops):
+                results[i] = {
+                    "algo": "ufa",
+                    "mostProbableScore": top[0][0] if top else NO_DATA,
+                    "top": [{"score": s, "probability": round(p, 4)} for s, p in top],
+                    "home_coeff": row[3],
+                    "away_coeff": row[4]
+                }
+        except FileNotFoundError as e:
+            for i in idx:
+                results[i] = {"algo": "ufa", "error": f"UFA v3 model not available: {e}"}
+        except Exception as e:
+            logger.error(f"❌ Erreur prédiction UFA v3 par lot: {e}")
+            for i in idx:
+                results[i] = {"algo": "ufa", "error": f"Prediction error: {e}"}
+
+    elapsed = time.time() - t0
+    logger.info(
+        f"📦 Lot de {len(matches)} matchs prédit en {elapsed:.3f}s "
+        f"(classic={len(groups['classic'])}, combined={len(groups['combined'])}, ufa={len(groups['ufa'])})"
+    )
+    return results
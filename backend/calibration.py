@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+# /app/backend/calibration.py
+"""
+Calibration des paramètres des algorithmes sur l'historique labellisé.
+
+- Données : analyses jointes aux scores réels (backtest.build_dataset), seules
+  celles qui ont une grille de cotes sont utilisables
+- Évaluation vectorisée sur tous les matchs (numpy, matrice matchs × scores) ;
+  tout ce qui ne dépend pas des paramètres est précalculé une seule fois
+- Points de paramètres répartis sur un pool de processus
+- Recherche : grille, aléatoire ou bayésienne (TPE, estimateur de Parzen)
+- Sorties : tableau classé (global + meilleur point par ligue) et proposition
+  de leagues_params.json (diffExpected par ligue) dans CALIBRATION_DIR
+
+Paramètres :
+    classic  : diff_expected, diff_k (0.4), coeff_power (2.5), draw_power (0.5),
+               draw_high (0.75, nuls ≥ 3-3), draw_two (0.95, 2-2)
+    combined : diff_expected, alpha (ALPHA), blend_beta (BLEND_BETA),
+               max_goals (MAX_GOALS), eps (EPS)
+
+Usage:
+    python /app/backend/calibration.py --algo classic --search random --points 2000
+    python /app/backend/calibration.py --algo combined --search grid --param alpha=0.2:2.0 --steps 7
+"""
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, '/app/backend')
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_DIR = "/app/data/calibration"
+PROPOSED_LEAGUES_FILE = os.path.join(CALIBRATION_DIR, "proposed_leagues_params.json")
+
+OBJECTIVES = {
+    # nom: (sens, libellé) ; sens = 1 minimiser, -1 maximiser
+    "log_loss": (1, "log-loss score exact"),
+    "brier": (1, "Brier 1X2"),
+    "exact": (-1, "score exact"),
+    "outcome_1x2": (-1, "1X2")
+}
+METRICS = ("log_loss", "brier", "exact", "outcome_1x2")
+
+# Valeurs actuelles (point de référence) et bornes de recherche par défaut
+CLASSIC_DEFAULTS = {"diff_expected": 2.0, "diff_k": 0.4, "coeff_power": 2.5,
+                    "draw_power": 0.5, "draw_high": 0.75, "draw_two": 0.95}
+CLASSIC_SPACE = {"diff_expected": (0.5, 3.5), "diff_k": (0.05, 1.5), "coeff_power": (0.5, 4.0),
+                 "draw_power": (0.0, 1.5), "draw_high": (0.5, 1.0), "draw_two": (0.7, 1.0)}
+COMBINED_DEFAULTS = {"diff_expected": 2.0, "alpha": 1.0, "blend_beta": 0.7, "max_goals": 5, "eps": 1e-9}
+COMBINED_SPACE = {"diff_expected": (0.5, 3.5), "alpha": (0.1, 2.0), "blend_beta": (0.0, 1.0),
+                  "max_goals": (4, 8)}
+INTEGER_PARAMS = ("max_goals",)
+
+LOGLOSS_FLOOR = 1e-4       # même plancher que backtest
+MIN_LEAGUE_MATCHES = 10    # matchs min pour proposer un diffExpected par ligue
+POINTS_PER_TASK = 16       # points évalués par tâche du pool
+TPE_GAMMA = 0.25           # part des meilleurs points (estimateur "bon")
+TPE_CANDIDATES = 64        # candidats tirés par point proposé
+
+
+# ============================================================================
+# DONNÉES (précalcul indépendant des paramètres)
+# ============================================================================
+
+class CalibrationData:
+    """Matrices (matchs × scores) et vérité terrain d'un historique labellisé"""
+
+    def __init__(self, items):
+        from batch_predictor import _Grid, _to_score_map, CoefficientResolver
+        from score_predictor import get_team_stats, compute_team_lambdas
+
+        self.items = [it for it in items if it.get("scores")]
+        if not self.items:
+            raise ValueError("Aucune analyse avec grille de cotes jointe à un score réel")
+        grid = _Grid([_to_score_map(it["scores"]) for it in self.items])
+        n = len(self.items)
+
+        self.parsed = grid.parsed
+        self.colon = grid.colon
+        self.canonical = grid.canonical
+        self.has_odds = grid.has_odds
+        self.home = grid.home
+        self.away = grid.away
+        self.inv_odds = grid.inv_odds
+        self.diff = np.abs(grid.away - grid.home)
+        self.normalized = self._normalize(grid.inv_odds)
+        self.sum_impl = grid.inv_odds.sum(axis=1, keepdims=True)
+        outcome = np.sign(grid.home - grid.away)            # 1 domicile, 0 nul, -1 extérieur
+        self.outcome_cells = [(outcome == o) for o in (1, 0, -1)]
+
+        # Vérité terrain : colonne du score réel ("Autre" sinon, -1 si absent)
+        actual = np.array([it["actual"] for it in self.items], dtype=np.int64)
+        match = (grid.parsed | grid.colon) & (grid.home == actual[:, :1]) & (grid.away == actual[:, 1:])
+        other = np.array([[k == "Autre" for k in keys] + [False] * (grid.inv_odds.shape[1] - len(keys))
+                          for keys in grid.keys])
+        self.actual_col = np.where(match.any(axis=1), match.argmax(axis=1),
+                                   np.where(other.any(axis=1), other.argmax(axis=1), -1))
+        self.actual_parsed = match.any(axis=1)
+        real = np.sign(actual[:, 0] - actual[:, 1])
+        self.real_onehot = np.stack([real == o for o in (1, 0, -1)], axis=1).astype(float)
+
+        # Coefficients (classique) et lambdas (combiné)
+        resolver = CoefficientResolver()
+        coeffs = [resolver.classic_coeffs(it["home"], it["away"], it["league"], use_league_coeff=True)
+                  for it in self.items]
+        home_c = np.array([c[0] for c in coeffs], dtype=float)
+        away_c = np.array([c[1] for c in coeffs], dtype=float)
+        applied = np.array([c[2] for c in coeffs], dtype=bool)
+        ratio = np.where(home_c > 0, away_c / np.where(home_c > 0, home_c, 1.0), 1.0)
+        self.log_ratio = np.where(applied, np.log(np.where(ratio > 0, ratio, 1.0)), 0.0)[:, None]
+        lams = []
+        for it in self.items:
+            gf_a, ga_a = get_team_stats(it["home"])
+            gf_b, ga_b = get_team_stats(it["away"])
+            lams.append(compute_team_lambdas(
+                {'avg_goals_scored': gf_a, 'avg_goals_conceded': ga_a},
+                {'avg_goals_scored': gf_b, 'avg_goals_conceded': ga_b}
+            ))
+        self.lam_home = np.array([l[0] for l in lams])[:, None]
+        self.lam_away = np.array([l[1] for l in lams])[:, None]
+        self.adjacent = ((np.abs(self.home[:, :, None] - self.home[:, None, :])
+                          + np.abs(self.away[:, :, None] - self.away[:, None, :])) == 1).astype(float)
+
+        # Ligues (agrégats par bincount)
+        self.leagues = sorted({it["league"] for it in self.items})
+        index = {lg: i for i, lg in enumerate(self.leagues)}
+        self.league_idx = np.array([index[it["league"]] for it in self.items])
+        self.league_counts = np.bincount(self.league_idx, minlength=len(self.leagues))
+        self.n = n
+
+    @staticmethod
+    def _normalize(values, scale=1.0):
+        total = values.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total > 0, values / total * scale, 0.0)
+
+
+# ============================================================================
+# ALGORITHMES PARAMÉTRÉS (vectorisés)
+# ============================================================================
+
+def classic_matrix(data, p):
+    """Probabilités (%) de calculate_probabilities avec constantes paramétrées"""
+    de = p["diff_expected"]
+    adjusted_diff = de + 1 if de > 2 else de
+    weight = np.where(data.parsed, np.exp(-p["diff_k"] * (data.diff - adjusted_diff) ** 2), 1.0)
+
+    # ratio ** puissance via exp(puissance * log(ratio))
+    league_weight = np.where(
+        data.home > data.away, np.exp(-p["coeff_power"] * data.log_ratio),
+        np.where(data.away > data.home, np.exp(p["coeff_power"] * data.log_ratio),
+                 np.exp(-p["draw_power"] * data.log_ratio))
+    )
+    league_weight = np.where(data.parsed, league_weight, 1.0)
+
+    final = data._normalize(np.where(data.has_odds, data.normalized * weight * league_weight, 0.0), 100.0)
+    draws = data.parsed & (data.home == data.away)
+    draw_factor = np.where(draws & (data.home >= 3), p["draw_high"],
+                           np.where(draws & (data.home == 2), p["draw_two"], 1.0))
+    return data._normalize(final * draw_factor, 100.0), data.has_odds
+
+
+def _poisson_pmf(k, lam, log_fact):
+    """PMF de Poisson vectorisée ; λ <= 0 comme poisson_pmf (1 pour k=0, 0 sinon)"""
+    positive = lam > 0
+    safe = np.where(positive, lam, 1.0)
+    pmf = np.exp(-safe + k * np.log(safe) - log_fact[k])
+    return np.where(positive, pmf, np.where(k == 0, 1.0, 0.0))
+
+
+def combined_matrix(data, p):
+    """Probabilités (%) de predict_combined avec ALPHA / BLEND_BETA / MAX_GOALS / EPS paramétrés"""
+    max_goals = int(p["max_goals"])
+    alpha, beta, eps, de = p["alpha"], p["blend_beta"], p["eps"], p["diff_expected"]
+    h, a = data.home, data.away
+    keys_mask = data.parsed | data.colon
+
+    sum_impl = np.where(data.sum_impl > 0, data.sum_impl, eps)
+    inside = (h >= 0) & (a >= 0) & (h <= max_goals) & (a <= max_goals)
+    hk, ak = np.clip(h, 0, max_goals), np.clip(a, 0, max_goals)
+    log_fact = np.array([math.lgamma(k + 1) for k in range(max_goals + 1)])
+    pmf_h = _poisson_pmf(hk, data.lam_home, log_fact)
+    pmf_a = _poisson_pmf(ak, data.lam_away, log_fact)
+    poisson = np.where(inside, np.maximum(eps, pmf_h * pmf_a), eps)
+
+    weight_diff = np.exp(-alpha * (data.diff - de) ** 2)
+    adjusted = np.where(data.parsed, poisson * weight_diff + eps, poisson)
+    adjusted = np.where(keys_mask, adjusted, 0.0)
+
+    sum_pois = adjusted.sum(axis=1, keepdims=True)
+    sum_pois = np.where(sum_pois > 0, sum_pois, eps)
+    blended = beta * (adjusted / sum_pois) + (1 - beta) * (data.inv_odds / sum_impl) + eps
+    blended = np.where(keys_mask, blended, 0.0)
+    total = blended.sum(axis=1, keepdims=True)
+    final = blended / np.where(total > 0, total, eps) * 100
+
+    emitters = data.parsed
+    n_neighbors = np.zeros_like(h)
+    for dh, da in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        nh, na = h + dh, a + da
+        n_neighbors += (nh >= 0) & (nh <= max_goals) & (na >= 0) & (na <= max_goals)
+    self_part = np.where(emitters, final * 0.80, final)
+    total_sm = (self_part + np.where(emitters, final * 0.05 * n_neighbors, 0.0)).sum(axis=1, keepdims=True)
+    receivers = (data.canonical & inside)[:, :, None] & emitters[:, None, :]
+    received = 0.05 * np.einsum("bij,bj->bi", data.adjacent * receivers, final)
+    smoothed = (self_part + received) / np.where(total_sm > 0, total_sm, eps) * 100
+    return smoothed, keys_mask
+
+
+MATRICES = {"classic": (classic_matrix, CLASSIC_DEFAULTS, CLASSIC_SPACE),
+            "combined": (combined_matrix, COMBINED_DEFAULTS, COMBINED_SPACE)}
+
+
+# ============================================================================
+# MÉTRIQUES (vectorisées)
+# ============================================================================
+
+def evaluate(data, algo, params):
+    """
+    Métriques d'un point de paramètres, globales et par ligue.
+
+    Returns:
+        dict {metric: moyenne, "by_league": {metric: [moyenne par ligue]}}
+    """
+    probs, mask = MATRICES[algo][0](data, params)
+    probs = np.where(mask, probs, 0.0)
+    rows = np.arange(data.n)
+    total = probs.sum(axis=1)
+    total = np.where(total > 0, total, 1.0)
+
+    p_actual = np.where(data.actual_col >= 0, probs[rows, np.maximum(data.actual_col, 0)], 0.0) / total
+    log_loss = -np.log(np.maximum(p_actual, LOGLOSS_FLOOR))
+
+    parsed = mask & (data.parsed | data.colon)
+    top = np.where(parsed, probs, -np.inf).argmax(axis=1)
+    exact = (data.actual_parsed & (top == data.actual_col)).astype(float)
+
+    p1x2 = np.stack([np.where(parsed & cells, probs, 0.0).sum(axis=1) for cells in data.outcome_cells], axis=1)
+    mass = p1x2.sum(axis=1, keepdims=True)
+    p1x2 = p1x2 / np.where(mass > 0, mass, 1.0)
+    outcome_1x2 = data.real_onehot[rows, p1x2.argmax(axis=1)]
+    brier = ((p1x2 - data.real_onehot) ** 2).sum(axis=1)
+
+    values = {"log_loss": log_loss, "brier": brier, "exact": exact, "outcome_1x2": outcome_1x2}
+    counts = np.maximum(data.league_counts, 1)
+    out = {k: float(v.mean()) for k, v in values.items()}
+    out["by_league"] = {k: (np.bincount(data.league_idx, weights=v, minlength=len(data.leagues)) / counts).tolist()
+                        for k, v in values.items()}
+    return out
+
+
+_worker_data = None
+_worker_algo = None
+
+
+def _init_worker(data, algo):
+    global _worker_data, _worker_algo
+    _worker_data, _worker_algo = data, algo
+
+
+def _evaluate_points(points):
+    return [evaluate(_worker_data, _worker_algo, p) for p in points]
+
+
+def _evaluate_all(data, algo, points, pool):
+    if pool is None:
+        return [evaluate(data, algo, p) for p in points]
+    chunks = [points[i:i + POINTS_PER_TASK] for i in range(0, len(points), POINTS_PER_TASK)]
+    return [m for res in pool.map(_evaluate_points, chunks) for m in res]
+
+
+# ============================================================================
+# STRATÉGIES DE RECHERCHE
+# ============================================================================
+
+def _complete(algo, point, fixed):
+    p = dict(MATRICES[algo][1])
+    p.update(fixed)
+    p.update(point)
+    for k in INTEGER_PARAMS:
+        if k in p:
+            p[k] = int(round(p[k]))
+    return p
+
+
+def grid_points(space, steps):
+    axes = {k: np.unique(np.linspace(lo, hi, steps).round(6)) for k, (lo, hi) in space.items()}
+    return [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+
+
+def random_points(space, n, rng):
+    return [{k: float(rng.uniform(lo, hi)) for k, (lo, hi) in space.items()} for _ in range(n)]
+
+
+def tpe_points(space, history, n, rng):
+    """
+    Propositions TPE : tirage autour des meilleurs points (densité l) et
+    sélection des candidats maximisant l(x) / g(x) (g = autres points).
+    history: [(point, score)] avec score à minimiser
+    """
+    ordered = sorted(history, key=lambda h: h[1])
+    n_good = max(2, int(len(ordered) * TPE_GAMMA))
+    good = np.array([[h[0][k] for k in space] for h in ordered[:n_good]])
+    bad = np.array([[h[0][k] for k in space] for h in ordered[n_good:]]) if len(ordered) > n_good else good
+    lo = np.array([b[0] for b in space.values()], dtype=float)
+    hi = np.array([b[1] for b in space.values()], dtype=float)
+    width = np.where(hi > lo, hi - lo, 1.0)
+    bw_good = width * max(0.05, len(good) ** (-1 / (len(space) + 4)))
+    bw_bad = width * max(0.05, len(bad) ** (-1 / (len(space) + 4)))
+
+    def log_density(x, centers, bw):
+        z = (x[:, None, :] - centers[None, :, :]) / bw
+        return np.logaddexp.reduce(-0.5 * (z ** 2).sum(axis=2), axis=1)
+
+    out = []
+    for _ in range(n):
+        centers = good[rng.integers(0, len(good), TPE_CANDIDATES)]
+        cand = np.clip(centers + rng.normal(0, 1, centers.shape) * bw_good, lo, hi)
+        ratio = log_density(cand, good, bw_good) - log_density(cand, bad, bw_bad)
+        best = cand[int(ratio.argmax())]
+        out.append({k: float(v) for k, v in zip(space, best)})
+    return out
+
+
+def run_search(data, algo="classic", search="random", space=None, fixed=None, points=1000,
+               steps=5, objective="log_loss", workers=None, seed=42):
+    """
+    Évalue un ensemble de points de paramètres.
+
+    Args:
+        data: CalibrationData
+        algo: "classic" ou "combined"
+        search: "grid", "random" ou "bayesian"
+        space: {param: (min, max)} (défaut: CLASSIC_SPACE / COMBINED_SPACE)
+        fixed: paramètres fixés (non explorés)
+        points: nombre de points (random / bayesian)
+        steps: valeurs par paramètre (grid)
+        objective: métrique à optimiser (voir OBJECTIVES)
+        workers: taille du pool de processus (défaut: nb de CPU)
+
+    Returns:
+        list [{"params", "metrics", "by_league"}] classée selon l'objectif
+    """
+    if algo not in MATRICES:
+        raise ValueError(f"Algorithme inconnu: {algo} (attendu: {', '.join(MATRICES)})")
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objectif inconnu: {objective} (attendu: {', '.join(OBJECTIVES)})")
+    space = dict(space or MATRICES[algo][2])
+    fixed = dict(fixed or {})
+    for k in fixed:
+        space.pop(k, None)
+    unknown = set(space) | set(fixed)
+    unknown -= set(MATRICES[algo][1])
+    if unknown:
+        raise KeyError(f"Paramètres inconnus pour {algo}: {sorted(unknown)}")
+
+    sign = OBJECTIVES[objective][0]
+    rng = np.random.default_rng(seed)
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(data, algo)) if workers > 1 else None
+    results = []
+    try:
+        def run(batch):
+            full = [_complete(algo, p, fixed) for p in batch]
+            for raw, p, m in zip(batch, full, _evaluate_all(data, algo, full, pool)):
+                results.append({"point": raw, "params": p, "metrics": {k: round(m[k], 5) for k in METRICS},
+                                "by_league": m["by_league"], "score": sign * m[objective]})
+
+        if search == "grid":
+            run(grid_points(space, steps))
+        elif search == "random":
+            run(random_points(space, points, rng))
+        elif search == "bayesian":
+            batch = max(POINTS_PER_TASK, workers * 2)
+            run(random_points(space, min(points, max(batch, points // 5)), rng))
+            while len(results) < points:
+                history = [(r["point"], r["score"]) for r in results]
+                run(tpe_points(space, history, min(batch, points - len(results)), rng))
+        else:
+            raise ValueError(f"Recherche inconnue: {search} (attendu: grid, random, bayesian)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # point de référence (valeurs actuelles)
+    ref = _complete(algo, {}, fixed)
+    m = evaluate(data, algo, ref)
+    results.append({"point": {}, "params": ref, "metrics": {k: round(m[k], 5) for k in METRICS},
+                    "by_league": m["by_league"], "score": sign * m[objective], "reference": True})
+    results.sort(key=lambda r: r["score"])
+    return results
+
+
+# ============================================================================
+# SORTIES
+# ============================================================================
+
+def best_by_league(data, results, objective="log_loss"):
+    """Meilleur point par ligue (ligues avec au moins MIN_LEAGUE_MATCHES matchs)"""
+    sign = OBJECTIVES[objective][0]
+    out = {}
+    for i, league in enumerate(data.leagues):
+        count = int(data.league_counts[i])
+        if count < MIN_LEAGUE_MATCHES or league == "Unknown":
+            continue
+        best = min(results, key=lambda r: sign * r["by_league"][objective][i])
+        out[league] = {
+            "matches": count,
+            "params": best["params"],
+            "metrics": {k: round(best["by_league"][k][i], 5) for k in METRICS}
+        }
+    return out
+
+
+def propose_leagues_params(league_best):
+    """leagues_params.json actuel avec diffExpected remplacé par la valeur calibrée"""
+    sys.path.insert(0, '/app')
+    from core.config import get_all_params
+
+    params = get_all_params()
+    for league, best in league_best.items():
+        entry = dict(params.get(league) or params.get("default", {}))
+        entry["diffExpected"] = round(float(best["params"]["diff_expected"]), 3)
+        params[league] = entry
+    return params
+
+
+def _save_json(path, obj):
+    """Écriture atomique avec tmp + rename"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _parse_param(value):
+    """"nom=min:max" (plage) ou "nom=valeur" (fixé)"""
+    name, _, rng = value.partition("=")
+    if ":" in rng:
+        lo, hi = rng.split(":", 1)
+        return name.strip(), (float(lo), float(hi))
+    return name.strip(), float(rng)
+
+
+def _print_table(results, objective, top):
+    keys = list(results[0]["params"])
+    print(f"\n🏁 CLASSEMENT (objectif: {OBJECTIVES[objective][1]})\n")
+    print(f"{'#':>4} " + " ".join(f"{k[:12]:>12}" for k in keys) + " " + " ".join(f"{m[:11]:>11}" for m in METRICS))
+    for rank, r in enumerate(results[:top], 1):
+        mark = " ← actuel" if r.get("reference") else ""
+        print(f"{rank:>4} " + " ".join(f"{r['params'][k]:>12.4g}" for k in keys) + " "
+              + " ".join(f"{r['metrics'][m]:>11.4f}" for m in METRICS) + mark)
+    ref_rank = next((i for i, r in enumerate(results, 1) if r.get("reference")), None)
+    if ref_rank and ref_rank > top:
+        print(f"   (valeurs actuelles classées #{ref_rank} sur {len(results)})")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Calibration des paramètres de prédiction")
+    parser.add_argument("--algo", choices=tuple(MATRICES), default="classic")
+    parser.add_argument("--search", choices=("grid", "random", "bayesian"), default="random")
+    parser.add_argument("--points", type=int, default=1000, help="nombre de points (random / bayesian)")
+    parser.add_argument("--steps", type=int, default=5, help="valeurs par paramètre (grid)")
+    parser.add_argument("--param", action="append", default=[],
+                        help="plage 'nom=min:max' ou valeur fixée 'nom=valeur' (répétable)")
+    parser.add_argument("--objective", choices=tuple(OBJECTIVES), default="log_loss")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    from backtest import build_dataset
+
+    t0 = time.time()
+    try:
+        data = CalibrationData(build_dataset())
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    space, fixed = None, {}
+    ranges = {}
+    for raw in args.param:
+        name, value = _parse_param(raw)
+        if isinstance(value, tuple):
+            ranges[name] = value
+        else:
+            fixed[name] = value
+    if ranges:
+        space = ranges
+
+    results = run_search(data, args.algo, args.search, space, fixed, args.points, args.steps,
+                         args.objective, args.workers, args.seed)
+    league_best = best_by_league(data, results, args.objective)
+    _print_table(results, args.objective, args.top)
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ranking_file = os.path.join(CALIBRATION_DIR, f"ranking_{args.algo}_{stamp}.json")
+    _save_json(ranking_file, {
+        "generated_at": datetime.now().isoformat(),
+        "algo": args.algo,
+        "search": args.search,
+        "objective": args.objective,
+        "matches": data.n,
+        "leagues": data.leagues,
+        "ranking": [{"params": r["params"], "metrics": r["metrics"], "reference": r.get("reference", False)}
+                    for r in results],
+        "best_by_league": league_best
+    })
+    _save_json(PROPOSED_LEAGUES_FILE, propose_leagues_params(league_best))
+
+    print(f"\n📊 {len(results)} points évalués sur {data.n} matchs en {time.time() - t0:.1f}s")
+    for league, best in league_best.items():
+        print(f"   {league:<24} diffExpected → {best['params']['diff_expected']:.3f} "
+              f"({best['matches']} matchs, {args.objective}={best['metrics'][args.objective]:.4f})")
+    print(f"💾 Classement: {ranking_file}")
+    print(f"💾 Proposition leagues_params: {PROPOSED_LEAGUES_FILE}")
@@ -0,0 +1,359 @@
+# /app/backend/compact_analysis.py
+"""
+Représentation compacte des analyses stockées (matches_memory, cache d'analyses).
+
+Une analyse garde en mémoire et sur disque :
+- les scores comme indices d'un vocabulaire fixe (SCORE_VOCAB, uint8) ;
+  un libellé hors vocabulaire est ajouté à la table locale de l'enregistrement
+- cotes et probabilités en float32 ; extracted_scores, probabilities et top3
+  partagent un seul array('B') d'indices et un seul array('f') de valeurs,
+  découpés par la longueur de chaque section
+- les autres champs tels quels (extra, JSON uniquement s'il en reste)
+
+Aller-retour JSON exact : une section n'est compactée que si toutes ses
+valeurs sont des floats que le float32 redonne à l'identique (plus courte
+écriture décimale), ou toutes des entiers de ±2^24 (section marquée entière,
+relue en int). Sinon (mélange int/float, précision double, hors plage float32,
+NaN) elle reste telle quelle dans extra. La confiance garde son type (int ou
+float, double).
+
+CompactAnalysis (__slots__) se sérialise en binaire (to_bytes / from_bytes) ;
+le dict JSON n'est reconstruit qu'à la frontière de l'API (to_dict), avec le
+même ordre de clés.
+
+Usage:
+    record = CompactAnalysis.from_dict(result)   # dict d'analyse → compact
+    blob = record.to_bytes()
+    CompactAnalysis.from_bytes(blob).to_dict() == result
+
+    pack_value(result) / unpack_value(blob)      # persistance (anciennes lignes JSON acceptées)
+"""
+import sys
+import json
+import struct
+from array import array
+
+SCORE_VOCAB = tuple(f"{h}-{a}" for h in range(10) for a in range(10)) + ("Autre", "Other", "Autres")
+SCORE_INDEX = {label: i for i, label in enumerate(SCORE_VOCAB)}
+
+MAGIC = b"CA"
+VERSION = 1
+
+# Ordre des clés d'un résultat de matches_memory.analyze_match_stable (layout 0)
+DEFAULT_LAYOUT = ("match_id", "match_name", "bookmaker", "extracted_scores",
+                  "probabilities", "confidence", "top3", "analyzed_at")
+TEXT_FIELDS = ("match_id", "match_name", "bookmaker", "analyzed_at")
+# Sections compactées, dans l'ordre de stockage : champ → clé de la valeur associée au score
+SECTION_FIELDS = {"extracted_scores": "odds", "probabilities": None, "top3": "probability"}
+NO_SECTIONS = (None, None, None)
+
+_HEADER = struct.Struct("<2sBBd")   # magic, version, drapeaux, confiance
+_SIZES = struct.Struct("<3H")      # longueurs des sections
+_F32 = struct.Struct("<f")
+ABSENT_SIZE = 0xFFFF
+HAS_CONFIDENCE = 1
+CUSTOM_LAYOUT = 2
+INT_CONFIDENCE = 4
+INT_SECTION = 8                    # 8 << i : section i entière
+F32_MAX_INT = 2 ** 24              # entiers exacts en float32
+DOUBLE_MAX_INT = 2 ** 53           # entiers exacts en double
+
+
+def f32_decimal(value):
+    """Plus courte écriture décimale qui redonne le même float32 (7.33 et non 7.329999923706055)"""
+    packed = _F32.pack(value)
+    for precision in (6, 7, 8):
+        candidate = float(f"{value:.{precision}g}")
+        if _F32.pack(candidate) == packed:
+            return candidate
+    return value
+
+
+def f32_decimals(values):
+    """f32_decimal sur tout un array('f') : un seul formatage, vérifié en bloc"""
+    if not values:
+        return []
+    decoded = [float(text) for text in ("%.6g " * len(values) % tuple(values)).split()]
+    if array("f", decoded) == values:
+        return decoded
+    return [f32_decimal(value) for value in values]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _section_kind(values):
+    """"int" / "float" si la section se stocke sans perte en float32, None sinon"""
+    if all(isinstance(v, int) for v in values):
+        return "int" if all(-F32_MAX_INT <= v <= F32_MAX_INT for v in values) else None
+    if all(isinstance(v, float) for v in values):
+        return "float" if f32_decimals(array("f", values)) == values else None
+    return None
+
+
+def _is_pairs(items, field):
+    """[{"score": s, field: x}] uniquement (sinon le champ reste tel quel dans extra)"""
+    return isinstance(items, list) and all(
+        isinstance(item, dict) and len(item) == 2 and isinstance(item.get("score"), str)
+        and _is_number(item.get(field)) for item in items)
+
+
+class CompactAnalysis:
+    """Analyse stockée : scores indexés, float32, champs texte ; dict reconstruit à la demande"""
+
+    __slots__ = ("match_id", "match_name", "bookmaker", "analyzed_at", "confidence",
+                 "labels", "idx", "values", "sizes", "int_sections", "layout", "extra")
+
+    def __init__(self):
+        self.match_id = self.match_name = self.bookmaker = self.analyzed_at = None
+        self.confidence = None
+        self.labels = None            # libellés hors vocabulaire (indices ≥ len(SCORE_VOCAB))
+        self.idx = array("B")         # indices de score : scores extraits, probabilités, top3
+        self.values = array("f")      # cotes, probabilités, probabilités du top3
+        self.sizes = NO_SECTIONS      # longueur de chaque section (None = champ absent)
+        self.int_sections = 0         # bit i : valeurs de la section i relues en int
+        self.layout = DEFAULT_LAYOUT
+        self.extra = None             # champs non compactables, tels quels
+
+    # -----------------------
+    # Scores
+    # -----------------------
+    def _index(self, label):
+        idx = SCORE_INDEX.get(label)
+        if idx is not None:
+            return idx
+        if self.labels is None:
+            self.labels = []
+        if label not in self.labels:
+            if len(SCORE_VOCAB) + len(self.labels) > 255:
+                raise ValueError("trop de libellés de score hors vocabulaire")
+            self.labels.append(label)
+        return len(SCORE_VOCAB) + self.labels.index(label)
+
+    def _label(self, idx):
+        return SCORE_VOCAB[idx] if idx < len(SCORE_VOCAB) else self.labels[idx - len(SCORE_VOCAB)]
+
+    # -----------------------
+    # dict → compact
+    # -----------------------
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        record.layout = tuple(data) if tuple(data) != DEFAULT_LAYOUT else DEFAULT_LAYOUT
+        sections = {}
+        extra = {}
+        for key, value in data.items():
+            if key in TEXT_FIELDS and (value is None or isinstance(value, str)):
+                setattr(record, key, value)
+            elif key == "confidence" and (isinstance(value, float) or (
+                    _is_number(value) and -DOUBLE_MAX_INT <= value <= DOUBLE_MAX_INT)):
+                record.confidence = value
+            elif key == "probabilities" and isinstance(value, dict) and all(
+                    isinstance(k, str) and _is_number(v) for k, v in value.items()):
+                sections[key] = list(value.items())
+            elif SECTION_FIELDS.get(key) and _is_pairs(value, SECTION_FIELDS[key]):
+                sections[key] = [(item["score"], item[SECTION_FIELDS[key]]) for item in value]
+            else:
+                extra[key] = value
+        sizes = []
+        for i, key in enumerate(SECTION_FIELDS):
+            pairs = sections.get(key)
+            kind = _section_kind([value for _, value in pairs]) if pairs is not None else None
+            if kind is None:
+                if pairs is not None:
+                    extra[key] = data[key]    # non représentable sans perte : gardé tel quel
+                sizes.append(None)
+                continue
+            if kind == "int":
+                record.int_sections |= 1 << i
+            sizes.append(len(pairs))
+            for label, value in pairs:
+                record.idx.append(record._index(label))
+                record.values.append(value)
+        record.sizes = tuple(sizes)
+        record.extra = extra or None
+        return record
+
+    # -----------------------
+    # compact → dict (frontière API)
+    # -----------------------
+    def get(self, key, default=None):
+        value = self._field(key)
+        return default if value is _ABSENT else value
+
+    def _section(self, key):
+        """[(libellé, valeur)] d'une section, None si absente"""
+        offset = 0
+        for i, (name, size) in enumerate(zip(SECTION_FIELDS, self.sizes)):
+            if name == key:
+                if size is None:
+                    return None
+                labels = [self._label(j) for j in self.idx[offset:offset + size]]
+                values = self.values[offset:offset + size]
+                if self.int_sections & (1 << i):
+                    return list(zip(labels, map(int, values)))
+                return list(zip(labels, f32_decimals(values)))
+            offset += size or 0
+        return None
+
+    def _field(self, key):
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        if key in TEXT_FIELDS:
+            return getattr(self, key) if key in self.layout else _ABSENT
+        if key == "confidence":
+            return self.confidence if self.confidence is not None else _ABSENT
+        if key in SECTION_FIELDS:
+            pairs = self._section(key)
+            if pairs is None:
+                return _ABSENT
+            field = SECTION_FIELDS[key]
+            if field is None:
+                return dict(pairs)
+            return [{"score": label, field: value} for label, value in pairs]
+        return _ABSENT
+
+    def to_dict(self):
+        out = {}
+        for key in self.layout:
+            value = self._field(key)
+            if value is not _ABSENT:
+                out[key] = value
+        return out
+
+    # -----------------------
+    # Binaire
+    # -----------------------
+    def to_bytes(self):
+        flags = HAS_CONFIDENCE if self.confidence is not None else 0
+        if isinstance(self.confidence, int):
+            flags |= INT_CONFIDENCE
+        if self.layout != DEFAULT_LAYOUT:
+            flags |= CUSTOM_LAYOUT
+        flags |= self.int_sections * INT_SECTION
+        parts = [_HEADER.pack(MAGIC, VERSION, flags, self.confidence or 0.0)]
+        for key in TEXT_FIELDS:
+            parts.append(_pack_text(getattr(self, key)))
+        labels = self.labels or []
+        parts.append(struct.pack("<B", len(labels)))
+        parts.extend(_pack_text(label) for label in labels)
+        parts.append(_SIZES.pack(*(ABSENT_SIZE if size is None else size for size in self.sizes)))
+        parts.append(self.idx.tobytes())
+        parts.append(self.values.tobytes())
+        tail = {}
+        if flags & CUSTOM_LAYOUT:
+            tail["layout"] = list(self.layout)
+        if self.extra:
+            tail["extra"] = self.extra
+        payload = json.dumps(tail, ensure_ascii=False, separators=(",", ":")).encode("utf-8") if tail else b""
+        parts.append(struct.pack("<I", len(payload)))
+        parts.append(payload)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        view = memoryview(blob)
+        magic, version, flags, confidence = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("format d'analyse compacte inconnu")
+        pos = _HEADER.size
+        record = cls()
+        record.confidence = confidence if flags & HAS_CONFIDENCE else None
+        if flags & INT_CONFIDENCE:
+            record.confidence = int(confidence)
+        record.int_sections = flags // INT_SECTION
+        for key in TEXT_FIELDS:
+            value, pos = _unpack_text(view, pos)
+            setattr(record, key, value)
+        (count,) = struct.unpack_from("<B", view, pos)
+        pos += 1
+        if count:
+            record.labels = []
+            for _ in range(count):
+                label, pos = _unpack_text(view, pos)
+                record.labels.append(label)
+        record.sizes = tuple(None if size == ABSENT_SIZE else size for size in _SIZES.unpack_from(view, pos))
+        pos += _SIZES.size
+        n = sum(size or 0 for size in record.sizes)
+        record.idx = array("B", view[pos:pos + n].tobytes())
+        pos += n
+        record.values = array("f", view[pos:pos + 4 * n].tobytes())
+        pos += 4 * n
+        (size,) = struct.unpack_from("<I", view, pos)
+        pos += 4
+        if size:
+            tail = json.loads(view[pos:pos + size].tobytes().decode("utf-8"))
+            if "layout" in tail:
+                record.layout = tuple(tail["layout"])
+            record.extra = tail.get("extra")
+        return record
+
+    def nbytes(self):
+        """Taille approximative en mémoire (objet, tableaux, chaînes)"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.idx) + sys.getsizeof(self.values)
+        for key in TEXT_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                size += sys.getsizeof(value)
+        if self.extra:
+            size += len(json.dumps(self.extra, ensure_ascii=False, default=str))
+        return size
+
+    def __repr__(self):
+        return f"CompactAnalysis({self.match_id!r})"
+
+
+# -----------------------
+# Valeurs stockées (binaire compact, JSON pour ce qui n'est pas une analyse)
+# -----------------------
+def pack_value(value):
+    """Valeur → octets persistés (analyse compacte si dict, JSON sinon)"""
+    if isinstance(value, CompactAnalysis):
+        return value.to_bytes()
+    if isinstance(value, dict):
+        return CompactAnalysis.from_dict(value).to_bytes()
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def unpack_value(data):
+    """Octets persistés (ou ancien texte JSON) → CompactAnalysis / valeur JSON"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        if bytes(data[:2]) == MAGIC:
+            return CompactAnalysis.from_bytes(data)
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+def compact_value(value):
+    """Forme gardée en mémoire : CompactAnalysis pour un dict d'analyse"""
+    return CompactAnalysis.from_dict(value) if isinstance(value, dict) else value
+
+
+def to_api(value):
+    """Forme JSON renvoyée aux appelants (frontière de l'API)"""
+    return value.to_dict() if isinstance(value, CompactAnalysis) else value
+
+
+class _Absent:
+    __slots__ = ()
+
+
+_ABSENT = _Absent()
+
+
+def _pack_text(value):
+    if value is None:
+        return struct.pack("<H", 0xFFFF)
+    data = value.encode("utf-8")
+    if len(data) >= 0xFFFF:
+        raise ValueError("champ texte trop long")
+    return struct.pack("<H", len(data)) + data
+
+
+def _unpack_text(view, pos):
+    (size,) = struct.unpack_from("<H", view, pos)
+    pos += 2
+    if size == 0xFFFF:
+        return None, pos
+    return view[pos:pos + size].tobytes().decode("utf-8"), pos + size
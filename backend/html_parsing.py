@@ -0,0 +1,304 @@
+# /app/backend/html_parsing.py
+"""
+Couche de parsing HTML commune aux scrapers de classements.
+
+Parseur C (lxml / libxml2) et sélecteurs XPath compilés une fois à l'import,
+par source (SELECTORS). Remplace la construction d'un arbre BeautifulSoup
+complet à chaque page : mêmes règles de sélection que les anciens sélecteurs
+CSS / find_all, mêmes formats de sortie.
+
+Parseurs partagés :
+- parse_wikitable_teams   : tableaux "wikitable" Wikipedia (league_unified)
+- parse_lfp_standings     : classement Ligue 2 ligue1.com
+- parse_uefa_standings    : classement par groupes uefa.com
+- parse_dbfoot_standings  : tableau de classement DBfoot
+- parse_soccerwiki_info   : métadonnées club SoccerWiki (paires clé / valeur)
+
+Les scrapers de league_fetcher utilisent directement parse_html / text / first
+avec leurs sélecteurs. Benchmark sur pages enregistrées : tools/parser_benchmark.py
+"""
+import re
+import logging
+
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+
+def has_class(name):
+    """Prédicat XPath équivalent au sélecteur CSS .name (jeton de classe exact)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xp(expr):
+    return etree.XPath(expr)
+
+
+# td:nth-child(n) / td:nth-last-child(1) relatifs à la ligne (descendants)
+_FIRST_TD = ".//td[not(preceding-sibling::*)]"
+_SECOND_TD = ".//td[count(preceding-sibling::*) = 1]"
+_LAST_TD = ".//td[not(following-sibling::*)]"
+
+SELECTORS = {
+    "common": {
+        "tables": _xp("//table"),
+        "rows": _xp(".//tr"),
+        "cells": _xp(".//td | .//th"),
+        "tds": _xp(".//td"),
+        "link": _xp("(.//a)[1]"),
+    },
+    "wikipedia": {
+        "wikitables": _xp("//table[contains(@class, 'wikitable')]"),
+        "wiki_links": _xp("//a[contains(@href, '/wiki/')]"),
+    },
+    "laliga": {
+        "rows": _xp("//tr[contains(@class, 'standing') or contains(@class, 'table-row')]"),
+        "team_span": _xp("(.//span[contains(@class, 'team') or contains(@class, 'club')])[1]"),
+    },
+    "premier_league": {
+        "rows": _xp("//tr[contains(@class, 'table__row')]"),
+        "first_tbody": _xp("(//table//tbody)[1]"),
+        "team_cell": [_xp("(.//td[contains(@class, 'team')])[1]"),
+                      _xp("(.//span[contains(@class, 'team') or contains(@class, 'long')])[1]")],
+    },
+    "lfp": {
+        "rows": [_xp(f"//table[{has_class('standings-table')}]//tbody//tr"),
+                 _xp("//table//tbody//tr")],
+        "position": [_xp(f"(.//*[{has_class('position')}])[1]"), _xp(f"({_FIRST_TD})[1]")],
+        "team": [_xp(f"(.//*[{has_class('club-name')}])[1]"),
+                 _xp(f"(.//*[{has_class('team-name')}])[1]"),
+                 _xp(f"({_SECOND_TD})[1]")],
+        "points": [_xp(f"(.//*[{has_class('points')}])[1]"), _xp(f"({_LAST_TD})[1]")],
+    },
+    "uefa": {
+        "groups": [_xp(f"//section[{has_class('standings-group')}]"),
+                   _xp(f"//div[{has_class('standings-group')}]"),
+                   _xp("//table")],
+        "group_name": [_xp("(.//h3)[1]"), _xp("(.//h2)[1]"),
+                       _xp(f"(.//*[{has_class('group-name')}])[1]")],
+        "rows": [_xp(f".//table[{has_class('standings-table')}]//tbody//tr"),
+                 _xp(".//tbody//tr")],
+        "team": [_xp(f"(.//*[{has_class('team-name')}])[1]"),
+                 _xp(f"(.//*[{has_class('club-name')}])[1]"),
+                 _xp(f"({_SECOND_TD})[1]"),
+                 _xp(f"(.//td[{has_class('team')}])[1]")],
+        "points": [_xp(f"(.//*[{has_class('points')}])[1]"),
+                   _xp(f"({_LAST_TD})[1]"),
+                   _xp(f"(.//td[{has_class('pts')}])[1]")],
+    },
+    "dbfoot": {
+        "table": _xp("(//table)[1]"),
+    },
+    "soccerwiki": {
+        "rows": _xp("//table//tr"),
+    },
+}
+
+
+def parse_html(markup):
+    """
+    Parse une page HTML (str ou bytes) avec lxml.
+
+    Returns:
+        élément racine lxml, ou None si la page est vide / illisible
+    """
+    if not markup:
+        return None
+    try:
+        return lxml_html.document_fromstring(markup)
+    except ValueError:
+        # str avec déclaration d'encodage XML : lxml exige des bytes
+        return lxml_html.document_fromstring(markup.encode("utf-8"))
+    except etree.ParserError:
+        return None
+
+
+def text(el):
+    """Texte d'un élément, équivalent à BeautifulSoup get_text(strip=True)"""
+    return "".join(s.strip() for s in el.itertext())
+
+
+def first(node, selectors):
+    """Premier élément trouvé en essayant les sélecteurs dans l'ordre (ou None)"""
+    if not isinstance(selectors, (list, tuple)):
+        selectors = (selectors,)
+    for sel in selectors:
+        found = sel(node)
+        if found:
+            return found[0]
+    return None
+
+
+def select_rows(node, selectors):
+    """Premier résultat non vide parmi des sélecteurs de lignes alternatifs"""
+    for sel in selectors:
+        rows = sel(node)
+        if rows:
+            return rows
+    return []
+
+
+def keyword_pattern(words):
+    """Regex compilée équivalente à any(word in text for word in words)"""
+    return re.compile("|".join(re.escape(w) for w in words))
+
+
+# -----------------------
+# Parseurs partagés
+# -----------------------
+def parse_wikitable_teams(html, expected_teams, normalize=None):
+    """
+    Noms d'équipes du premier tableau "wikitable" contenant au moins
+    expected_teams - 3 équipes (colonne 2 ou 3, titre du lien en priorité).
+
+    Returns:
+        list: noms (tronqués à expected_teams), [] si aucun tableau valide
+    """
+    root = parse_html(html)
+    if root is None:
+        return []
+    common = SELECTORS["common"]
+    normalize = normalize or (lambda name: name)
+
+    for table in SELECTORS["wikipedia"]["wikitables"](root):
+        teams = []
+        for row in common["rows"](table)[1:]:  # Skip header
+            cells = common["cells"](row)
+            if len(cells) < 2:
+                continue
+            team_name = None
+            for cell in cells[1:3]:
+                link = common["link"](cell)
+                if link and link[0].get("title"):
+                    team_name = link[0].get("title")
+                    break
+                content = cell.text_content().strip()
+                if content:
+                    team_name = content
+                    break
+            if not team_name:
+                continue
+            team_name = normalize(team_name)
+            if len(team_name) > 2:
+                teams.append(team_name)
+        if len(teams) >= expected_teams - 3:
+            return teams[:expected_teams]
+    return []
+
+
+def parse_lfp_standings(html):
+    """
+    Classement ligue1.com : [{team, position, points, played}]
+    (lignes sans position / points numériques ignorées)
+    """
+    root = parse_html(html)
+    if root is None:
+        return []
+    sel = SELECTORS["lfp"]
+    standings = []
+    for row in select_rows(root, sel["rows"]):
+        pos_elem = first(row, sel["position"])
+        team_elem = first(row, sel["team"])
+        pts_elem = first(row, sel["points"])
+        if pos_elem is None or team_elem is None or pts_elem is None:
+            continue
+        try:
+            position = int(text(pos_elem).replace('.', '').replace('#', '').strip())
+            points = int(text(pts_elem))
+        except ValueError:
+            continue
+        standings.append({
+            "team": text(team_elem),
+            "position": position,
+            "points": points,
+            "played": None  # Pas toujours disponible
+        })
+    return standings
+
+
+def parse_uefa_standings(html, with_group=True):
+    """
+    Classement uefa.com, tous groupes combinés :
+    [{team, position, points, played, group}] — position cumulée sur les groupes
+    """
+    root = parse_html(html)
+    if root is None:
+        return []
+    sel = SELECTORS["uefa"]
+    standings = []
+    for group in select_rows(root, sel["groups"]):
+        rows = select_rows(group, sel["rows"])
+        if not rows:
+            continue
+        name_elem = first(group, sel["group_name"]) if with_group else None
+        group_name = text(name_elem) if name_elem is not None else "Unknown"
+        for row in rows:
+            team_elem = first(row, sel["team"])
+            pts_elem = first(row, sel["points"])
+            if team_elem is None or pts_elem is None:
+                continue
+            try:
+                points = int(text(pts_elem))
+            except ValueError:
+                continue
+            entry = {
+                "team": text(team_elem),
+                "position": len(standings) + 1,
+                "points": points,
+                "played": None
+            }
+            if with_group:
+                entry["group"] = group_name
+            standings.append(entry)
+    return standings
+
+
+def parse_dbfoot_standings(html):
+    """
+    Premier tableau d'une page DBfoot : [{team, position, played, points}]
+
+    Returns:
+        list, ou None si la page n'a pas de tableau
+    """
+    root = parse_html(html)
+    table = first(root, SELECTORS["dbfoot"]["table"]) if root is not None else None
+    if table is None:
+        return None
+    common = SELECTORS["common"]
+    results = []
+    for row in common["rows"](table)[1:]:
+        cols = [text(td) for td in common["tds"](row)]
+        if len(cols) < 2:
+            continue
+        # heuristique: position, team, played, points typical
+        try:
+            position = int(cols[0])
+            team = cols[1]
+            played = int(cols[2]) if len(cols) > 2 and cols[2].isdigit() else None
+            points = int(cols[-1]) if cols[-1].isdigit() else None
+        except ValueError:
+            position = None
+            team = cols[1]
+            played = None
+            points = None
+        results.append({
+            "team": team,
+            "position": position,
+            "played": played,
+            "points": points
+        })
+    return results
+
+
+def parse_soccerwiki_info(html):
+    """Paires clé / valeur des lignes de tableau d'une page club SoccerWiki"""
+    root = parse_html(html)
+    if root is None:
+        return {}
+    cells = SELECTORS["common"]["cells"]
+    info = {}
+    for row in SELECTORS["soccerwiki"]["rows"](root):
+        tds = [text(td) for td in cells(row)]
+        if len(tds) >= 2:
+            info[tds[0].strip(": ")] = tds[1]
+    return info
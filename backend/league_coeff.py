@@ -2,10 +2,20 @@
 """
 Calcule les coefficients d'équipe basés sur leur position dans le classement.
 Plus l'équipe est haute dans le classement, plus son coefficient est élevé.
+
+Les classements sont servis depuis un index en mémoire (StandingsIndex) :
+- noms normalisés (accents, casse, ponctuation), nom "court" sans préfixes de
+  club (FC, AC, SSC...) et alias usuels (PSG, Inter, Barca...)
+- coefficients linéaire et exponentiel précalculés pour chaque équipe
+- reconstruit en bloc (swap atomique) quand un fichier de ligue change sur
+  disque, vérifié au plus une fois toutes les INDEX_CHECK_INTERVAL secondes
+Une recherche de coefficient est donc un accès dict, sans lecture disque.
 """
 import os
 import json
+import time
 import logging
+from functools import lru_cache
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -13,34 +23,323 @@ logger = logging.getLogger(__name__)
 # Importer les fonctions de league_fetcher
 import sys
 sys.path.insert(0, '/app/backend')
-from league_fetcher import load_positions, get_team_position
+from league_fetcher import LEAGUE_CONFIG, load_league_data
+from team_keys import normalize_key, clean_name, file_signature, FileIndex
 
 # Coefficients min/max
 MIN_COEF = 0.85  # Équipe dernière
 MAX_COEF = 1.30  # Équipe première
 FALLBACK_COEF = 1.0  # Si équipe non trouvée
+DEFAULT_EXP = 2.0  # Exposant de la formule exponentielle
 
-# Cache des coefficients
+# Ancien cache disque des coefficients (remplacé par l'index, supprimé par clear_cache)
 DATA_DIR = "/app/data/leagues"
 COEFF_CACHE_FILE = os.path.join(DATA_DIR, "coeff_cache.json")
 
-def _load_cache():
-    """Charge le cache des coefficients"""
-    if not os.path.exists(COEFF_CACHE_FILE):
-        return {}
-    try:
-        with open(COEFF_CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return {}
+# Index des classements
+INDEX_CHECK_INTERVAL = 1.0   # fréquence max de vérification des fichiers (secondes)
+FUZZY_MEMO_SIZE = 4096       # résolutions approximatives mémorisées par index
+FUZZY_MIN_KEY = 4            # plus courte clé acceptée en sous-chaîne (sinon mot entier)
+
+# Ligues nationales prioritaires (ordre de recherche pour les coupes européennes)
+NATIONAL_LEAGUES = ["LaLiga", "PremierLeague", "SerieA", "Ligue1", "Bundesliga", "PrimeiraLiga"]
+
+# Préfixes/suffixes de club ignorés pour le nom court ("Real Madrid CF" → "real madrid")
+CLUB_AFFIXES = {
+    "fc", "cf", "afc", "ac", "acf", "as", "ssc", "ss", "sc", "us", "bc", "cfc",
+    "sco", "osc", "ogc", "rc", "cd", "gd", "sv", "vfb", "vfl", "tsg", "fk", "sk", "kv", "calcio"
+}
+
+# Alias usuels → nom court de l'équipe dans les classements (clubs) ou nom du
+# classement FIFA (sélections, utilisé par tools/fifa_ranking_manager)
+TEAM_ALIASES = {
+    "psg": "paris saint germain",
+    "paris sg": "paris saint germain",
+    "om": "olympique de marseille",
+    "marseille": "olympique de marseille",
+    "lyon": "olympique lyonnais",
+    "ol": "olympique lyonnais",
+    "rennes": "stade rennais",
+    "brest": "stade brestois",
+    "lens": "racing club de lens",
+    "strasbourg": "strasbourg alsace",
+    "barca": "barcelona",
+    "atletico madrid": "club atletico de madrid",
+    "atletico": "club atletico de madrid",
+    "athletic bilbao": "athletic club",
+    "inter": "internazionale milano",
+    "inter milan": "internazionale milano",
+    "man city": "manchester city",
+    "man united": "manchester united",
+    "man utd": "manchester united",
+    "spurs": "tottenham hotspur",
+    "tottenham": "tottenham hotspur",
+    "wolves": "wolverhampton wanderers",
+    "brighton": "brighton hove albion",
+    "bayern": "bayern munchen",
+    "bayern munich": "bayern munchen",
+    "leverkusen": "bayer 04 leverkusen",
+    "dortmund": "borussia dortmund",
+    "gladbach": "borussia monchengladbach",
+    "benfica": "sport lisboa e benfica",
+    "sporting": "sporting clube de portugal",
+    "sporting cp": "sporting clube de portugal",
+    "braga": "sporting clube de braga",
+    # Sélections nationales (variantes absentes du classement FIFA)
+    "united states of america": "united states",
+    "etats unis d amerique": "united states",
+    "holland": "netherlands",
+    "hollande": "netherlands",
+    "south korea": "korea republic",
+    "republique de coree": "korea republic",
+    "turkiye": "turkey",
+    "czechia": "czech republic",
+    "republique tcheque": "czech republic",
+    "cote ivoire": "ivory coast",
+    "cabo verde": "cape verde",
+    "ir iran": "iran",
+    "china": "china pr",
+    "republic of ireland": "ireland",
+    "republique d irlande": "ireland",
+    "bosnia and herzegovina": "bosnia herzegovina",
+    "bosnie": "bosnia herzegovina",
+    "congo dr": "dr congo",
+    "rdc": "dr congo",
+    "macedonia": "north macedonia",
+    "macedoine": "north macedonia",
+    "uae": "united arab emirates",
+    "emirats": "united arab emirates",
+    "trinidad tobago": "trinidad and tobago",
+    "galles": "wales",
+    "arabie saoudite": "saudi arabia",
+}
+
+
+@lru_cache(maxsize=8192)
+def _team_key(name):
+    """Clé de recherche : nom sans parenthèses, clé normalisée commune (team_keys)"""
+    return normalize_key(clean_name(name))
+
+
+@lru_cache(maxsize=8192)
+def _core_key(key):
+    """Nom court : clé sans préfixes de club ni années ("1 fc koln" → "koln")"""
+    tokens = [t for t in key.split() if t not in CLUB_AFFIXES and not t.isdigit()]
+    return " ".join(tokens) or key
+
+
+def _partial_match(key, team_key):
+    """
+    Recherche approximative "contient / est contenu" : la plus courte des deux
+    clés doit faire au moins FUZZY_MIN_KEY caractères ou être un mot entier
+    ("om" ne correspond pas à "real betis balompie").
+    """
+    short, long = sorted((key, team_key), key=len)
+    if short not in long:
+        return False
+    return len(short) >= FUZZY_MIN_KEY or f" {short} " in f" {long} "
+
+
+def _linear(pos, n, min_coef, max_coef):
+    # Formule linéaire : plus l'équipe est haute, plus le coeff est élevé
+    raw = (n - pos) / float(n - 1)
+    return round(min_coef + raw * (max_coef - min_coef), 4)
+
+
+def _exponential(pos, n, min_coef, max_coef, exp):
+    raw = ((n - pos) / float(n - 1)) ** exp
+    return round(min_coef + raw * (max_coef - min_coef), 4)
+
+
+class StandingsIndex:
+    """
+    Index immuable des classements construit depuis les fichiers de ligue.
+
+    Pour chaque ligue : {clé: (nom, position, coeff_linéaire, coeff_exponentiel)}
+    indexé par nom complet, nom court et alias. Les noms inconnus retombent sur
+    l'ancienne recherche "contient / est contenu" (ordre du classement), dont le
+    résultat est mémorisé.
+    """
+
+    def __init__(self, signature, standings):
+        self.signature = signature
+        self.built_at = time.time()
+        self.sizes = {}      # {ligue: N}
+        self._entries = {}   # {ligue: {clé: record}}
+        self._ordered = {}   # {ligue: [(clé, record)]} pour la recherche approximative
+        self._fuzzy = {}     # {(ligue, clé): record | None}
+
+        for league, teams in standings.items():
+            self._add_league(league, teams)
+
+    def _add_league(self, league, teams):
+        ranked = []
+        for team in teams:
+            try:
+                name = team["name"]
+                if not isinstance(name, str) or not name.strip():
+                    continue   # entrée sans nom (ex. WorldCup.json, "name": null)
+                ranked.append((name, int(team["rank"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+        if not ranked:
+            return
+
+        max_pos = max(pos for _, pos in ranked)
+        n = max_pos if max_pos > 1 else len(ranked)
+        self.sizes[league] = n
+
+        entries, ordered = {}, []
+        for name, pos in ranked:
+            if n > 1:
+                record = (name, pos, _linear(pos, n, MIN_COEF, MAX_COEF),
+                          _exponential(pos, n, MIN_COEF, MAX_COEF, DEFAULT_EXP))
+            else:
+                record = (name, pos, FALLBACK_COEF, FALLBACK_COEF)
+            key = _team_key(name)
+            entries.setdefault(key, record)
+            entries.setdefault(_core_key(key), record)
+            ordered.append((key, record))
+
+        for alias, target in TEAM_ALIASES.items():
+            if target in entries:
+                entries.setdefault(alias, entries[target])
+
+        self._entries[league] = entries
+        self._ordered[league] = ordered
+
+    def with_league(self, signature, league, teams):
+        """Nouvel index identique sauf pour `league` (mise à jour ciblée)"""
+        index = StandingsIndex(signature, {})
+        index.sizes = {k: v for k, v in self.sizes.items() if k != league}
+        index._entries = {k: v for k, v in self._entries.items() if k != league}
+        index._ordered = {k: v for k, v in self._ordered.items() if k != league}
+        index._fuzzy = {k: v for k, v in list(self._fuzzy.items()) if k[0] != league}
+        index._add_league(league, teams)
+        return index
+
+    def has_league(self, league):
+        return league in self._entries
+
+    def lookup(self, team_name, league, fuzzy=True):
+        """
+        (nom, position, coeff_linéaire, coeff_exponentiel) ou None.
+        Nom complet, nom court, alias ; puis recherche approximative si fuzzy.
+        """
+        entries = self._entries.get(league)
+        if not entries or not team_name:
+            return None
+        key = _team_key(str(team_name))
+        record = entries.get(key)
+        if record is None:
+            record = entries.get(_core_key(key))
+        if record is None and key and fuzzy:
+            record = self._fuzzy_lookup(key, league)
+        return record
+
+    def _fuzzy_lookup(self, key, league):
+        memo_key = (league, key)
+        if memo_key in self._fuzzy:
+            return self._fuzzy[memo_key]
+        record = None
+        for team_key, candidate in self._ordered[league]:
+            # Contient ou est contenu
+            if _partial_match(key, team_key):
+                record = candidate
+                break
+        if len(self._fuzzy) < FUZZY_MEMO_SIZE:
+            self._fuzzy[memo_key] = record
+        return record
+
+    def info(self):
+        return {
+            "leagues": dict(self.sizes),
+            "keys": sum(len(e) for e in self._entries.values()),
+            "fuzzy_memo": len(self._fuzzy),
+            "built_at": self.built_at
+        }
+
+
+def _league_files_signature():
+    """Signature (mtime, taille) de chaque fichier de ligue"""
+    return tuple((league,) + file_signature(config["fallback_file"])
+                 for league, config in LEAGUE_CONFIG.items())
+
+
+def _build_index(signature):
+    standings = {}
+    for league in LEAGUE_CONFIG:
+        data = load_league_data(league)
+        if data and "teams" in data:
+            standings[league] = data["teams"]
+    index = StandingsIndex(signature, standings)
+    logger.info(f"📇 Index des classements reconstruit: {len(index.sizes)} ligues, "
+                f"{index.info()['keys']} clés")
+    return index
+
+
+# publication en bloc, les lecteurs gardent l'ancien index
+_index = FileIndex(_build_index, _league_files_signature, INDEX_CHECK_INTERVAL)
+
+
+def refresh_index(force=False):
+    """
+    Reconstruit l'index si un fichier de ligue a changé (ou si force=True).
+
+    Returns:
+        StandingsIndex: index courant
+    """
+    return _index.refresh(force)
+
+
+def apply_standings_change(change):
+    """
+    Abonné standings_events : seule la ligue modifiée est réindexée, les
+    autres ligues (et leurs résolutions mémorisées) sont conservées.
+    """
+    league = change["league"]
+    with _index.lock:
+        current = _index.current
+        if current is None or league not in LEAGUE_CONFIG:
+            return
+        data = load_league_data(league) or {}
+        entry = (league,) + file_signature(LEAGUE_CONFIG[league]["fallback_file"])
+        # seule l'entrée de cette ligue est rafraîchie : un autre fichier modifié
+        # entre-temps sera détecté par la vérification périodique
+        signature = tuple(entry if item[0] == league else item for item in _index.current_signature)
+        _index.publish(current.with_league(signature, league, data.get("teams", [])), signature)
+    logger.info(f"📇 Index des classements: {league} réindexée ({len(change.get('teams', []))} équipes touchées)")
+
+
+def get_standings_index():
+    """Index courant (vérification des fichiers au plus une fois par INDEX_CHECK_INTERVAL)"""
+    return _index.get()
+
+
+def get_index_info():
+    """Statistiques de l'index des classements (pour /admin)"""
+    index = get_standings_index()
+    info = index.info()
+    info["rebuilds"] = _index.rebuilds
+    return info
+
+
+def get_team_rank(team_name, league_name):
+    """Position d'une équipe dans une ligue (None si non trouvée)"""
+    record = get_standings_index().lookup(team_name, league_name)
+    return record[1] if record else None
+
+
+def _team_record(team_name, league_name):
+    index = get_standings_index()
+    if not index.has_league(league_name):
+        logger.warning(f"⚠️ Aucun classement pour {league_name}")
+        return None, None
+    record = index.lookup(team_name, league_name)
+    if record is None:
+        logger.warning(f"⚠️ Équipe '{team_name}' non trouvée dans {league_name}")
+    return record, index.sizes[league_name]
 
-def _save_cache(cache):
-    """Sauvegarde le cache des coefficients"""
-    try:
-        with open(COEFF_CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(cache, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        logger.error(f"Erreur sauvegarde cache coeff: {e}")
 
 def team_coef_from_position_linear(team_name, league_name="LaLiga", min_coef=MIN_COEF, max_coef=MAX_COEF):
     """
@@ -62,56 +361,19 @@ def team_coef_from_position_linear(team_name, league_name="LaLiga", min_coef=MIN
     Returns:
         float: Coefficient entre min_coef et max_coef
     """
-    # Vérifier le cache
-    cache_key = f"{league_name}:{team_name}"
-    cache = _load_cache()
-    if cache_key in cache:
-        return cache[cache_key]
-    
-    pos_map = load_positions().get(league_name, {})
-    
-    if not pos_map:
-        logger.warning(f"⚠️ Aucun classement pour {league_name}")
-        return FALLBACK_COEF
-    
-    # Obtenir la position (avec fuzzy matching)
-    pos = get_team_position(team_name, league_name)
-    
-    if not pos:
-        logger.warning(f"⚠️ Équipe '{team_name}' non trouvée dans {league_name}")
+    record, n = _team_record(team_name, league_name)
+    if record is None or n <= 1:
         return FALLBACK_COEF
-    
-    try:
-        pos_int = int(pos)
-    except:
-        return FALLBACK_COEF
-    
-    # Calculer le nombre total d'équipes
-    positions = list(pos_map.values())
-    try:
-        max_pos = max(int(p) for p in positions if isinstance(p, (int, float, str)))
-    except:
-        max_pos = len(positions)
-    
-    N = max_pos if max_pos > 1 else len(positions)
-    
-    if N <= 1:
-        return FALLBACK_COEF
-    
-    # Formule linéaire : plus l'équipe est haute, plus le coeff est élevé
-    raw = (N - pos_int) / float(N - 1)
-    coef = min_coef + raw * (max_coef - min_coef)
-    coef = round(coef, 4)
-    
-    # Sauvegarder dans le cache
-    cache[cache_key] = coef
-    _save_cache(cache)
-    
-    logger.info(f"📊 {team_name} ({league_name}) : Position {pos_int}/{N} → Coeff {coef}")
-    
+
+    if min_coef == MIN_COEF and max_coef == MAX_COEF:
+        coef = record[2]
+    else:
+        coef = _linear(record[1], n, min_coef, max_coef)
+
+    logger.debug(f"📊 {team_name} ({league_name}) : Position {record[1]}/{n} → Coeff {coef}")
     return coef
 
-def team_coef_from_position_exponential(team_name, league_name="LaLiga", min_coef=MIN_COEF, max_coef=MAX_COEF, exp=2.0):
+def team_coef_from_position_exponential(team_name, league_name="LaLiga", min_coef=MIN_COEF, max_coef=MAX_COEF, exp=DEFAULT_EXP):
     """
     Calcule le coefficient d'une équipe selon sa position (formule EXPONENTIELLE).
     
@@ -133,41 +395,24 @@ def team_coef_from_position_exponential(team_name, league_name="LaLiga", min_coe
     Returns:
         float: Coefficient entre min_coef et max_coef
     """
-    pos_map = load_positions().get(league_name, {})
-    
-    if not pos_map:
-        return FALLBACK_COEF
-    
-    pos = get_team_position(team_name, league_name)
-    
-    if not pos:
-        return FALLBACK_COEF
-    
-    try:
-        pos_int = int(pos)
-    except:
-        return FALLBACK_COEF
-    
-    positions = list(pos_map.values())
-    try:
-        max_pos = max(int(p) for p in positions if isinstance(p, (int, float, str)))
-    except:
-        max_pos = len(positions)
-    
-    N = max_pos if max_pos > 1 else len(positions)
-    
-    if N <= 1:
+    record, n = _team_record(team_name, league_name)
+    if record is None or n <= 1:
         return FALLBACK_COEF
-    
-    # Formule exponentielle
-    raw = ((N - pos_int) / float(N - 1)) ** exp
-    coef = min_coef + raw * (max_coef - min_coef)
-    coef = round(coef, 4)
-    
-    logger.info(f"📊 {team_name} ({league_name}) : Position {pos_int}/{N} → Coeff {coef} (exp={exp})")
-    
+
+    if min_coef == MIN_COEF and max_coef == MAX_COEF and exp == DEFAULT_EXP:
+        coef = record[3]
+    else:
+        coef = _exponential(record[1], n, min_coef, max_coef, exp)
+
+    logger.debug(f"📊 {team_name} ({league_name}) : Position {record[1]}/{n} → Coeff {coef} (exp={exp})")
     return coef
 
+try:
+    from standings_events import subscribe as _subscribe_standings
+    _subscribe_standings(apply_standings_change, name="league_coeff")
+except ImportError:
+    pass
+
 # Alias pour la fonction par défaut (linéaire)
 team_coef_from_position = team_coef_from_position_linear
 
@@ -204,10 +449,14 @@ def get_both_team_coeffs(home_team, away_team, league="LaLiga", mode="linear"):
     return home_coef, away_coef
 
 def clear_cache():
-    """Vide le cache des coefficients"""
+    """
+    Vide le cache des coefficients : reconstruit l'index des classements
+    (et supprime l'ancien fichier coeff_cache.json s'il existe encore)
+    """
     try:
         if os.path.exists(COEFF_CACHE_FILE):
             os.remove(COEFF_CACHE_FILE)
+        refresh_index(force=True)
         logger.info("✅ Cache des coefficients vidé")
         return True
     except Exception as e:
@@ -225,18 +474,15 @@ def lookup_in_all_leagues(team_name):
     Returns:
         tuple: (coefficient, source_league) ou (None, None) si non trouvé
     """
-    # Ligues nationales prioritaires (ordre de recherche)
-    national_leagues = ["LaLiga", "PremierLeague", "SerieA", "Ligue1", "Bundesliga", "PrimeiraLiga"]
-    
-    for league in national_leagues:
-        try:
-            pos = get_team_position(team_name, league)
-            if pos:
-                coef = team_coef_from_position_linear(team_name, league)
-                logger.info(f"🔍 {team_name} trouvée dans {league} → coeff={coef:.3f}")
-                return coef, league
-        except Exception as e:
-            continue
+    index = get_standings_index()
+    # nom exact / court / alias dans toutes les ligues avant toute recherche approximative :
+    # un alias de Ligue1 ("OM") l'emporte sur une sous-chaîne trouvée en LaLiga
+    for fuzzy in (False, True):
+        for league in NATIONAL_LEAGUES:
+            record = index.lookup(team_name, league, fuzzy=fuzzy)
+            if record is not None and index.sizes[league] > 1:
+                logger.debug(f"🔍 {team_name} trouvée dans {league} → coeff={record[2]:.3f}")
+                return record[2], league
     
     return None, None
 
@@ -277,7 +523,7 @@ def get_team_coeff(team_name, league_name=None):
             return {"coefficient": FALLBACK_COEF, "source": "fallback_error"}
     
     # Cas 2: Compétition européenne - Recherche prioritaire dans ligues nationales
-    logger.info(f"🏆 Recherche {team_name} pour {league_name}...")
+    logger.debug(f"🏆 Recherche {team_name} pour {league_name}...")
     
     # PRIORITÉ 1: Chercher dans toutes les ligues nationales
     coef, source_league = lookup_in_all_leagues(team_name)
@@ -296,6 +542,22 @@ def get_team_coeff(team_name, league_name=None):
 # COEFFICIENTS FIFA POUR MATCHS INTERNATIONAUX
 # =============================================================================
 
+# Marqueurs pour détecter les compétitions internationales
+INTERNATIONAL_MARKERS = {
+    "world", "worldcup", "qualification", "fifa", 
+    "international", "nations", "euro", "copa america"
+}
+
+def is_international_league(league):
+    """
+    Indique si la compétition oppose des équipes nationales (WorldCup,
+    Qualification, NationsLeague, ...).
+    """
+    if not league:
+        return False
+    league_lower = league.lower()
+    return any(marker in league_lower for marker in INTERNATIONAL_MARKERS)
+
 def get_coeffs_for_match(home_team, away_team, league):
     """
     Retourne les coefficients pour un match, en détectant automatiquement
@@ -320,19 +582,8 @@ def get_coeffs_for_match(home_team, away_team, league):
         >>> get_coeffs_for_match("Real Madrid", "Barcelona", "LaLiga")
         (1.30, 1.28)  # Coefficients de ligue
     """
-    # Marqueurs pour détecter les compétitions internationales
-    international_markers = {
-        "world", "worldcup", "qualification", "fifa", 
-        "international", "nations", "euro", "copa america"
-    }
-    
     # Vérifier si c'est une compétition internationale
-    is_international = False
-    if league:
-        league_lower = league.lower()
-        is_international = any(marker in league_lower for marker in international_markers)
-    
-    if is_international:
+    if is_international_league(league):
         # Utiliser les coefficients FIFA
         try:
             from ufa.world_coeffs import get_world_coeff
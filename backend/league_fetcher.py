@@ -4,14 +4,14 @@ Récupération automatique des classements de ligues depuis Wikipedia.
 Système robuste avec parsing standard des tableaux Wikipedia.
 """
 import requests
-from bs4 import BeautifulSoup
 import json
 import os
-import re
-import unicodedata
 from datetime import datetime, timezone
 import logging
 
+from html_parsing import SELECTORS, parse_html, text, first, keyword_pattern
+from team_keys import clean_name as _normalize_name   # normalisation des noms pour matching
+
 logger = logging.getLogger(__name__)
 
 # Configuration TTL (Time To Live) pour le cache
@@ -91,52 +91,45 @@ def _load_json(path):
     except:
         return {}
 
-def _normalize_name(name):
-    """Normalise le nom d'équipe pour matching"""
-    name = re.sub(r"\(.*?\)", "", name)
-    name = name.strip()
-    name = unicodedata.normalize("NFKD", name)
-    name = "".join([c for c in name if not unicodedata.combining(c)])
-    name = re.sub(r"\s+", " ", name)
-    return name.strip()
-
 def scrape_laliga(html):
     """Parse le classement LaLiga officiel"""
     try:
-        soup = BeautifulSoup(html, "lxml")
+        root = parse_html(html)
+        if root is None:
+            return []
+        sel = SELECTORS["laliga"]
+        common = SELECTORS["common"]
         teams = []
         
         # LaLiga utilise une structure avec des divs/tables spécifiques
         # Chercher les lignes du classement
-        rows = soup.find_all("tr", class_=re.compile("standing.*|table-row.*"))
+        rows = sel["rows"](root)
         
         if not rows:
-            # Fallback : chercher toute table avec des données de classement
-            tables = soup.find_all("table")
-            for table in tables:
-                rows = table.find_all("tr")
-                break
+            # Fallback : lignes de la première table
+            table = first(root, common["tables"])
+            rows = common["rows"](table) if table is not None else []
         
         for i, row in enumerate(rows, 1):
-            cols = row.find_all(["td", "th"])
+            cols = common["cells"](row)
             if len(cols) < 3:
                 continue
             
             # Extraire le nom de l'équipe (généralement dans un <a> ou <span>)
             team_name = None
             for col in cols:
-                link = col.find("a")
+                link = common["link"](col)
                 if link:
-                    text = link.get_text(strip=True)
-                    if len(text) > 2 and not text.isdigit():
-                        team_name = text
+                    content = text(link[0])
+                    if len(content) > 2 and not content.isdigit():
+                        team_name = content
                         break
                 
-                span = col.find("span", class_=re.compile("team.*|club.*"))
+                span = sel["team_span"](col)
                 if span:
-                    text = span.get_text(strip=True)
-                    if len(text) > 2:
-                        team_name = text
+                    content = text(span[0])
+                    if len(content) > 2:
+                        team_name = content
                         break
             
             if team_name:
@@ -157,29 +150,26 @@ def scrape_laliga(html):
 def scrape_premier_league(html):
     """Parse le classement Premier League officiel"""
     try:
-        soup = BeautifulSoup(html, "lxml")
+        root = parse_html(html)
+        if root is None:
+            return []
+        sel = SELECTORS["premier_league"]
         teams = []
         
         # Premier League utilise des classes spécifiques
-        rows = soup.find_all("tr", class_=re.compile("table__row.*"))
+        rows = sel["rows"](root)
         
         if not rows:
-            # Fallback
-            tables = soup.find_all("table")
-            for table in tables:
-                tbody = table.find("tbody")
-                if tbody:
-                    rows = tbody.find_all("tr")
-                    break
+            # Fallback : lignes du premier tbody d'une table
+            tbody = first(root, sel["first_tbody"])
+            rows = SELECTORS["common"]["rows"](tbody) if tbody is not None else []
         
         for i, row in enumerate(rows, 1):
             # Chercher le nom de l'équipe
-            team_cell = row.find("td", class_=re.compile("team.*"))
-            if not team_cell:
-                team_cell = row.find("span", class_=re.compile("team.*|long.*"))
+            team_cell = first(row, sel["team_cell"])
             
-            if team_cell:
-                team_name = team_cell.get_text(strip=True)
+            if team_cell is not None:
+                team_name = text(team_cell)
                 if len(team_name) > 2:
                     teams.append({
                         "name": _normalize_name(team_name),
@@ -215,46 +205,55 @@ def scrape_primeira_liga(html):
     logger.warning("Primeira Liga parser pas encore implémenté")
     return []
 
+# Mots-clés pour identifier les clubs (pas les pays), compilés une fois
+CL_CLUB_KEYWORDS = keyword_pattern([
+    "FC", "CF", "United", "City", "Madrid", "Barcelona", "Milan", "Juventus",
+    "Bayern", "PSG", "Dortmund", "Liverpool", "Arsenal", "Chelsea", "Manchester",
+    "Inter", "Atletico", "Porto", "Benfica", "Ajax", "Celtic", "Rangers",
+    "Sporting", "Sevilla", "Napoli", "Roma", "Lazio", "Leipzig", "Leverkusen"])
+EL_CLUB_KEYWORDS = keyword_pattern([
+    "FC", "CF", "United", "Roma", "Lazio", "Sevilla", "Villarreal",
+    "Ajax", "Feyenoord", "Porto", "Benfica", "Sporting", "Rangers",
+    "Betis", "Union", "Leverkusen", "Toulouse", "Rennes", "Brighton",
+    "West Ham", "Slavia", "Olympiacos", "Atalanta"])
+
+# Mots à éviter (noms de pays, etc.)
+CL_SKIP_WORDS = keyword_pattern([
+    "UEFA", "Wikipedia", "League", "Group", "Knockout", "Final", "Season",
+    "Match", "England", "Spain", "Germany", "Italy", "France", "Portugal",
+    "Netherlands", "Belgium", "Austria", "Scotland", "Turkey", "Greece"])
+EL_SKIP_WORDS = keyword_pattern([
+    "UEFA", "Wikipedia", "League", "Group", "Knockout", "Final", "Season",
+    "Match", "England", "Spain", "Germany", "Italy", "France", "Portugal"])
+
+def _scrape_wiki_clubs(html, club_keywords, skip_words):
+    """Clubs cités dans les liens /wiki/ d'une page de compétition européenne"""
+    root = parse_html(html)
+    if root is None:
+        return []
+    teams = []
+    seen = set()
+    for link in SELECTORS["wikipedia"]["wiki_links"](root):
+        name = text(link)
+        # Filtrer les pays et mots-clés non pertinents, puis identifier les clubs
+        if len(name) <= 3 or name in seen or skip_words.search(name):
+            continue
+        if club_keywords.search(name):
+            seen.add(name)
+            teams.append({
+                "name": _normalize_name(name),
+                "rank": len(teams) + 1,
+                "points": 0
+            })
+    return teams
+
 def scrape_champions_league(html):
     """
     Parse Champions League - Extrait les équipes participantes.
     Liste les équipes avec un fallback intelligent sur une liste fixe si le scraping échoue.
     """
     try:
-        soup = BeautifulSoup(html, "lxml")
-        teams = []
-        seen = set()
-        
-        # Mots-clés pour identifier les clubs (pas les pays)
-        club_keywords = ["FC", "CF", "United", "City", "Madrid", "Barcelona", "Milan", "Juventus", 
-                        "Bayern", "PSG", "Dortmund", "Liverpool", "Arsenal", "Chelsea", "Manchester",
-                        "Inter", "Atletico", "Porto", "Benfica", "Ajax", "Celtic", "Rangers",
-                        "Sporting", "Sevilla", "Napoli", "Roma", "Lazio", "Leipzig", "Leverkusen"]
-        
-        # Mots à éviter (noms de pays, etc.)
-        skip_words = ["UEFA", "Wikipedia", "League", "Group", "Knockout", "Final", "Season", 
-                     "Match", "England", "Spain", "Germany", "Italy", "France", "Portugal",
-                     "Netherlands", "Belgium", "Austria", "Scotland", "Turkey", "Greece"]
-        
-        # Chercher dans tous les liens
-        all_links = soup.find_all("a", href=re.compile(r"/wiki/"))
-        for link in all_links:
-            text = link.get_text(strip=True)
-            href = link.get("href", "")
-            
-            # Filtrer les pays et mots-clés non pertinents
-            if any(word in text for word in skip_words):
-                continue
-            
-            # Identifier les clubs
-            if len(text) > 3 and text not in seen:
-                if any(keyword in text for keyword in club_keywords):
-                    seen.add(text)
-                    teams.append({
-                        "name": _normalize_name(text),
-                        "rank": len(teams) + 1,
-                        "points": 0
-                    })
+        teams = _scrape_wiki_clubs(html, CL_CLUB_KEYWORDS, CL_SKIP_WORDS)
         
         # Si moins de 10 équipes trouvées, utiliser une liste de fallback (saison 2024-25)
         if len(teams) < 10:
@@ -288,36 +287,7 @@ def scrape_europa_league(html):
     Liste les équipes avec un fallback intelligent sur une liste fixe si le scraping échoue.
     """
     try:
-        soup = BeautifulSoup(html, "lxml")
-        teams = []
-        seen = set()
-        
-        # Mots-clés pour identifier les clubs
-        club_keywords = ["FC", "CF", "United", "Roma", "Lazio", "Sevilla", "Villarreal", 
-                        "Ajax", "Feyenoord", "Porto", "Benfica", "Sporting", "Rangers",
-                        "Betis", "Union", "Leverkusen", "Toulouse", "Rennes", "Brighton",
-                        "West Ham", "Slavia", "Olympiacos", "Atalanta"]
-        
-        # Mots à éviter
-        skip_words = ["UEFA", "Wikipedia", "League", "Group", "Knockout", "Final", "Season", 
-                     "Match", "England", "Spain", "Germany", "Italy", "France", "Portugal"]
-        
-        # Chercher dans tous les liens
-        all_links = soup.find_all("a", href=re.compile(r"/wiki/"))
-        for link in all_links:
-            text = link.get_text(strip=True)
-            
-            if any(word in text for word in skip_words):
-                continue
-            
-            if len(text) > 3 and text not in seen:
-                if any(keyword in text for keyword in club_keywords):
-                    seen.add(text)
-                    teams.append({
-                        "name": _normalize_name(text),
-                        "rank": len(teams) + 1,
-                        "points": 0
-                    })
+        teams = _scrape_wiki_clubs(html, EL_CLUB_KEYWORDS, EL_SKIP_WORDS)
         
         # Si moins de 10 équipes trouvées, utiliser une liste de fallback
         if len(teams) < 10:
@@ -376,12 +346,20 @@ def save_league_data(league_name, data):
         "teams": data
     }
     
+    previous = _load_json(filepath)
     try:
         _save_json(filepath, output)
-        return True
     except Exception as e:
         logger.error(f"Erreur sauvegarde {league_name}: {e}")
         return False
+    
+    # Diff avec l'ancien classement -> invalidation ciblée des caches abonnés
+    try:
+        from standings_events import notify_league_saved
+        notify_league_saved(league_name, previous, output)
+    except Exception as e:
+        logger.warning(f"⚠️ Événement de classement non publié pour {league_name}: {e}")
+    return True
 
 def load_positions():
     """Charge tous les classements (format compatible ancien système)"""
@@ -476,18 +454,49 @@ def _fallback_to_cache(league_name, cached_data):
         return {}
 
 def update_all(leagues=None, force=False):
-    """Met à jour tous les classements (ou une liste spécifique)"""
+    """
+    Met à jour tous les classements (ou une liste spécifique).
+
+    Les pages sont récupérées en parallèle par standings_refresh (client
+    mutualisé, requêtes conditionnelles, pages inchangées ignorées) ; repli
+    séquentiel sur update_league si httpx n'est pas disponible.
+    """
     if leagues is None:
         leagues = list(LEAGUE_CONFIG.keys())
-    
+
+    try:
+        from standings_refresh import refresh_leagues, HTTPX_AVAILABLE
+    except ImportError:
+        HTTPX_AVAILABLE = False
+
+    if not HTTPX_AVAILABLE:
+        result = {}
+        for lg in leagues:
+            try:
+                result[lg] = update_league(lg, force=force)
+            except Exception as e:
+                logger.error(f"❌ Erreur update {lg}: {e}")
+                result[lg] = {}
+        return result
+
+    try:
+        report = refresh_leagues(leagues, force=force)
+    except Exception as e:
+        logger.error(f"❌ Rafraîchissement concurrent échoué: {e}")
+        report = {}
+
     result = {}
     for lg in leagues:
-        try:
-            result[lg] = update_league(lg, force=force)
-        except Exception as e:
-            logger.error(f"❌ Erreur update {lg}: {e}")
-            result[lg] = {}
-    
+        res = report.get(lg, {})
+        if res.get("status") == "updated":
+            result[lg] = {team["name"]: team["rank"] for team in res["data"]}
+        elif res.get("status") in ("fresh", "not_modified", "unchanged"):
+            # Classement local toujours à jour
+            cached = load_league_data(lg) or {}
+            result[lg] = {team["name"]: team["rank"] for team in cached.get("teams", [])}
+        else:
+            result[lg] = _fallback_to_cache(lg, load_league_data(lg))
+
     return result
 
 def get_team_position(team_name, league_name):
@@ -304,7 +304,7 @@ class LeagueScheduler:
             
             # Afficher le résumé dans les logs
             logger.info(summary)
-            logger.info(f"📁 Fichier final : /app/data/analysis_cache.jsonl")
+            logger.info(f"📁 Store final : /app/data/analysis_cache.db")
             
         except ImportError as e:
             logger.error(f"❌ Erreur import script migration : {e}")
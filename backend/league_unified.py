@@ -16,14 +16,19 @@ Ligues supportées:
 - ChampionsLeague, EuropaLeague
 """
 import os
+import re
 import sys
 import logging
 import json
+import unicodedata
 from datetime import datetime
 
+import requests
+
 # Import du nouveau système multi-sources
 sys.path.insert(0, '/app/backend')
 from tools.multi_source_updater import UnifiedUpdater, run_daily_update
+from html_parsing import parse_wikitable_teams
 
 logger = logging.getLogger(__name__)
 
@@ -208,50 +213,10 @@ def fetch_standings(league_name, config):
         })
         res.raise_for_status()
         
-        soup = BeautifulSoup(res.text, "lxml")
-        
-        # Chercher le tableau de classement
-        tables = soup.find_all("table", class_=re.compile("wikitable"))
-        
-        teams = []
-        found = False
+        # Premier tableau "wikitable" avec un nombre raisonnable d'équipes
+        teams = parse_wikitable_teams(res.text, config["expected_teams"], normalize=_normalize_name)
         
-        for table in tables:
-            rows = table.find_all("tr")[1:]  # Skip header
-            temp_teams = []
-            
-            for row in rows:
-                cells = row.find_all(["th", "td"])
-                if len(cells) < 2:
-                    continue
-                
-                # Essayer différentes positions pour le nom d'équipe
-                team_name = None
-                for i in [1, 2]:
-                    if i < len(cells):
-                        # Chercher un lien vers la page de l'équipe
-                        link = cells[i].find("a")
-                        if link and link.get("title"):
-                            team_name = link.get("title")
-                            break
-                        elif cells[i].text.strip():
-                            team_name = cells[i].text.strip()
-                            break
-                
-                if not team_name:
-                    continue
-                
-                team_name = _normalize_name(team_name)
-                if len(team_name) > 2:  # Filtrer les noms trop courts
-                    temp_teams.append(team_name)
-            
-            # Vérifier si on a trouvé un nombre raisonnable d'équipes
-            if len(temp_teams) >= config["expected_teams"] - 3:
-                teams = temp_teams[:config["expected_teams"]]
-                found = True
-                break
-        
-        if not found or not teams:
+        if not teams:
             raise ValueError(f"No valid standing table found (found {len(teams)} teams)")
         
         # Créer la structure finale (format compatible avec Phase 1)
@@ -302,25 +267,31 @@ def calculate_coefficient(position, total_teams):
     coeff = 0.85 + ((total_teams - position) / (total_teams - 1)) * 0.45
     return round(coeff, 4)
 
+# Mapping code API vers nom interne
+CODE_TO_NAME = {
+    "PL": "PremierLeague",
+    "PD": "LaLiga",
+    "SA": "SerieA",
+    "BL1": "Bundesliga",
+    "FL1": "Ligue1",
+    "PPL": "PrimeiraLiga",
+    "FL2": "Ligue2",
+    "CL": "ChampionsLeague",
+    "EL": "EuropaLeague",
+    "WC": "WorldCup",
+    "CLI": "CopaLibertadores"
+}
+
+
+def league_file_path(league_api_code):
+    """Fichier de ligue interne d'un code API"""
+    return f"/app/data/leagues/{CODE_TO_NAME.get(league_api_code, league_api_code)}.json"
+
+
 def save_league_to_file(league_api_code, data):
     """Sauvegarde les données d'une ligue dans le format interne"""
-    # Mapping code API vers nom interne
-    CODE_TO_NAME = {
-        "PL": "PremierLeague",
-        "PD": "LaLiga",
-        "SA": "SerieA",
-        "BL1": "Bundesliga",
-        "FL1": "Ligue1",
-        "PPL": "PrimeiraLiga",
-        "FL2": "Ligue2",
-        "CL": "ChampionsLeague",
-        "EL": "EuropaLeague",
-        "WC": "WorldCup",
-        "CLI": "CopaLibertadores"
-    }
-    
     league_name = CODE_TO_NAME.get(league_api_code, league_api_code)
-    file_path = f"/app/data/leagues/{league_name}.json"
+    file_path = league_file_path(league_api_code)
     
     # Calculer les coefficients
     total_teams = len(data)
@@ -343,6 +314,14 @@ def save_league_to_file(league_api_code, data):
         ]
     }
     
+    previous = None
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except Exception:
+            previous = None
+    
     # Backup ancien fichier
     if os.path.exists(file_path):
         backup_path = file_path + ".backup_auto"
@@ -358,6 +337,13 @@ def save_league_to_file(league_api_code, data):
     os.replace(tmp_path, file_path)
     
     logger.info(f"💾 Sauvegardé {league_name} ({len(data)} équipes)")
+    
+    # Diff avec l'ancien classement -> invalidation ciblée des caches abonnés
+    try:
+        from standings_events import notify_league_saved
+        notify_league_saved(league_name, previous, formatted_data)
+    except Exception as e:
+        logger.warning(f"⚠️ Événement de classement non publié pour {league_name}: {e}")
     return True
 
 def update_all_leagues():
@@ -381,10 +367,14 @@ def update_all_leagues():
     updater = UnifiedUpdater(use_mongo=False)
     
     # Lancer la mise à jour
-    multi_report = run_daily_update(updater, LEAGUES_MAP, season="2425")
+    # un fichier de ligue absent est réécrit même si la source répond 304
+    multi_report = run_daily_update(updater, LEAGUES_MAP, season="2425", target_path=league_file_path)
     
     # Sauvegarder les données dans nos fichiers JSON
     for api_code, result in multi_report["results"].items():
+        if result.get("changed") is False and os.path.exists(league_file_path(api_code)):
+            logger.info(f"♻️ {api_code}: classement inchangé, fichier conservé")
+            continue
         if result["status"] == "ok":
             try:
                 # Récupérer les données du cache
@@ -416,19 +406,6 @@ def update_all_leagues():
     
     # Détails par ligue
     for api_code, result in multi_report["results"].items():
-        CODE_TO_NAME = {
-            "PL": "PremierLeague",
-            "PD": "LaLiga",
-            "SA": "SerieA",
-            "BL1": "Bundesliga",
-            "FL1": "Ligue1",
-            "PPL": "PrimeiraLiga",
-            "FL2": "Ligue2",
-            "CL": "ChampionsLeague",
-            "EL": "EuropaLeague",
-            "WC": "WorldCup",
-            "CLI": "CopaLibertadores"
-        }
         league_name = CODE_TO_NAME.get(api_code, api_code)
         
         if result["status"] == "ok":
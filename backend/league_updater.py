@@ -1,14 +1,13 @@
 # /app/backend/league_updater.py
 """
 Orchestrateur pour la mise à jour de toutes les ligues.
-Gère la mise à jour séquentielle de tous les classements.
+Gère la mise à jour (parallèle) de tous les classements.
 """
 import logging
 import sys
 sys.path.insert(0, '/app/backend')
 
 import league_fetcher
-import league_coeff
 
 logger = logging.getLogger(__name__)
 
@@ -27,40 +26,33 @@ def update_all_leagues(force=False):
     results = {}
     all_leagues = list(league_fetcher.LEAGUE_CONFIG.keys())
     
+    # Récupération parallèle de toutes les ligues (requêtes conditionnelles)
+    try:
+        all_standings = league_fetcher.update_all(all_leagues, force=force)
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la mise à jour des ligues: {e}")
+        all_standings = {}
+    
     for league in all_leagues:
-        try:
-            logger.info(f"📊 Mise à jour de {league}...")
-            standings = league_fetcher.update_league(league, force=force)
-            
-            if standings:
-                results[league] = {
-                    "success": True,
-                    "teams_count": len(standings),
-                    "message": f"✅ {league} mis à jour avec {len(standings)} équipes"
-                }
-                logger.info(results[league]["message"])
-            else:
-                results[league] = {
-                    "success": False,
-                    "teams_count": 0,
-                    "message": f"⚠️ {league} - Aucune donnée récupérée"
-                }
-                logger.warning(results[league]["message"])
-                
-        except Exception as e:
-            logger.error(f"❌ Erreur lors de la mise à jour de {league}: {e}")
+        standings = all_standings.get(league)
+        
+        if standings:
+            results[league] = {
+                "success": True,
+                "teams_count": len(standings),
+                "message": f"✅ {league} mis à jour avec {len(standings)} équipes"
+            }
+            logger.info(results[league]["message"])
+        else:
             results[league] = {
                 "success": False,
-                "error": str(e),
-                "message": f"❌ {league} - Erreur: {e}"
+                "teams_count": 0,
+                "message": f"⚠️ {league} - Aucune donnée récupérée"
             }
+            logger.warning(results[league]["message"])
     
-    # Vider le cache des coefficients pour forcer le recalcul
-    try:
-        league_coeff.clear_cache()
-        logger.info("✅ Cache des coefficients vidé - les nouveaux classements seront utilisés")
-    except Exception as e:
-        logger.warning(f"⚠️ Erreur lors du vidage du cache des coefficients: {e}")
+    # Pas de vidage global : chaque ligue modifiée publie un événement
+    # (standings_events) et seuls les caches des équipes touchées sont invalidés
     
     # Résumé
     successful = sum(1 for r in results.values() if r.get("success"))
@@ -93,13 +85,7 @@ def update_single_league(league_name, force=False):
         standings = league_fetcher.update_league(league_name, force=force)
         
         if standings:
-            # Vider le cache des coefficients pour cette ligue
-            try:
-                league_coeff.clear_cache()
-                logger.info("✅ Cache des coefficients vidé")
-            except Exception as e:
-                logger.warning(f"⚠️ Erreur vidage cache: {e}")
-            
+            # Invalidation ciblée via standings_events (publié à l'écriture du fichier)
             return {
                 "success": True,
                 "league": league_name,
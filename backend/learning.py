@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 from math import fabs
 import logging
 
@@ -7,19 +8,30 @@ logger = logging.getLogger(__name__)
 
 DATA_FILE = "/app/backend/learning_data.json"
 
+# Service de configuration à chaud (snapshot en mémoire de learning_meta.json)
+try:
+    sys.path.insert(0, '/app')
+    from core.config import get_learning_meta_snapshot
+    CONFIG_SERVICE_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"⚠️ Service de configuration indisponible: {e}")
+    CONFIG_SERVICE_AVAILABLE = False
+
 def get_diff_expected():
     """
     Récupère la différence de buts attendue depuis le système sécurisé.
     Fallback sur l'ancien fichier si le nouveau n'existe pas.
     Par défaut: 2 buts de différence.
+
+    La valeur provient du snapshot en mémoire de learning_meta.json
+    (rechargé automatiquement quand le fichier change).
     """
     # Essayer d'abord le nouveau système sécurisé
     try:
-        import sys
-        sys.path.insert(0, '/app')
-        from modules.local_learning_safe import load_meta
+        if not CONFIG_SERVICE_AVAILABLE:
+            raise RuntimeError("service de configuration non chargé")
         
-        meta = load_meta()
+        meta = get_learning_meta_snapshot()
         diff = meta.get("diffExpected", 2)
         logger.info(f"✅ Différence attendue (système sécurisé): {diff}")
         return diff
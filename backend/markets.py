@@ -0,0 +1,233 @@
+# /app/backend/markets.py
+"""
+Marchés dérivés calculés depuis la distribution des scores exacts.
+
+À partir de n'importe quelle prédiction ({score: probabilité}, résultat
+d'algorithme avec "probabilities", top-k UFA [(score, p)]), calcule les
+probabilités et cotes justes (sans marge) de :
+- 1X2 et double chance (1X, 12, X2)
+- plus/moins de N buts (lignes entières, demi et quart de ligne)
+- les deux équipes marquent (BTTS)
+- handicap asiatique (lignes entières, demi et quart de ligne)
+
+Les distributions sont placées dans un tenseur (matchs × buts domicile × buts
+extérieur) et chaque marché est une réduction einsum avec des masques
+précalculés : un lot complet est évalué en quelques opérations numpy.
+
+Lignes entières / quarts de ligne : la mise est remboursée en cas d'égalité
+(push) et un quart de ligne est partagé entre les deux lignes voisines ;
+la cote juste vaut alors 1 + P(perte) / P(gain).
+"""
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OU_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+DEFAULT_AH_LINES = (-2.5, -2.0, -1.5, -1.25, -1.0, -0.75, -0.5, -0.25, 0.0,
+                    0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5)
+MAX_MATRIX_GOALS = 15    # scores au-delà ignorés (comptés hors couverture)
+
+
+@lru_cache(maxsize=1024)
+def _parse_score(score):
+    """(home, away) pour "X-Y" ou "X:Y", None sinon (ex: "Autre")"""
+    parts = str(score).replace(":", "-").split("-")
+    if len(parts) != 2:
+        return None
+    try:
+        h, a = int(parts[0]), int(parts[1])
+    except ValueError:
+        return None
+    return (h, a) if h >= 0 and a >= 0 else None
+
+
+def to_distribution(prediction):
+    """
+    Distribution {score: probabilité} depuis un résultat de prédiction.
+
+    Accepte: {score: p}, {"probabilities": {...}}, [(score, p), ...],
+    [{"score": s, "probability": p}, ...]
+    """
+    if isinstance(prediction, dict):
+        probs = prediction.get("probabilities")
+        return probs if isinstance(probs, dict) else prediction
+    out = {}
+    for item in prediction or []:
+        if isinstance(item, dict):
+            out[item.get("score")] = item.get("probability", item.get("prob", 0.0))
+        else:
+            out[item[0]] = item[1]
+    return out
+
+
+def score_tensor(distributions):
+    """
+    Tenseur (matchs × buts domicile × buts extérieur) normalisé par match.
+
+    Returns:
+        (tensor, coverage) — coverage = part de la masse portée par des scores
+        exacts exploitables (hors "Autre" / scores invalides)
+    """
+    parsed = []
+    max_goals = 0
+    for dist in distributions:
+        cells, total = [], 0.0
+        for score, p in to_distribution(dist).items():
+            try:
+                p = float(p)
+            except (TypeError, ValueError):
+                continue
+            if p <= 0:
+                continue
+            total += p
+            hs = _parse_score(score)
+            if hs is not None and max(hs) <= MAX_MATRIX_GOALS:
+                cells.append((hs[0], hs[1], p))
+                max_goals = max(max_goals, hs[0], hs[1])
+        parsed.append((cells, total))
+
+    tensor = np.zeros((len(parsed), max_goals + 1, max_goals + 1))
+    for i, (cells, _) in enumerate(parsed):
+        for h, a, p in cells:
+            tensor[i, h, a] += p
+    mass = tensor.sum(axis=(1, 2))
+    totals = np.array([t for _, t in parsed]) if parsed else np.zeros(0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        coverage = np.where(totals > 0, mass / totals, 0.0)
+        tensor = np.where(mass[:, None, None] > 0, tensor / mass[:, None, None], 0.0)
+    return tensor, coverage
+
+
+def _split_line(line):
+    """Quart de ligne → deux demi-mises (ex: 2.25 → 2.0 et 2.5)"""
+    if abs(line * 4 - round(line * 4)) > 1e-9:
+        raise ValueError(f"Ligne invalide: {line} (multiple de 0.25 attendu)")
+    if round(line * 4) % 2:
+        return (line - 0.25, line + 0.25)
+    return (line,)
+
+
+@lru_cache(maxsize=64)
+def _masks(size, ou_lines, ah_lines):
+    """Masques (size × size) précalculés pour chaque marché"""
+    h, a = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    total, diff = h + a, h - a
+
+    def settle(value, lines):
+        # poids gain / perte (0.5 par demi-mise pour un quart de ligne)
+        win = np.zeros((len(lines), size, size))
+        lose = np.zeros((len(lines), size, size))
+        for k, line in enumerate(lines):
+            parts = _split_line(line)
+            for part in parts:
+                win[k] += (value(part) > 0) / len(parts)
+                lose[k] += (value(part) < 0) / len(parts)
+        return win, lose
+
+    ou_over = settle(lambda line: total - line, ou_lines)
+    ou_under = settle(lambda line: line - total, ou_lines)
+    ah_home = settle(lambda line: diff + line, ah_lines)
+    ah_away = settle(lambda line: -(diff + line), ah_lines)
+    outcomes = np.stack([h > a, h == a, h < a]).astype(float)
+    btts = np.stack([(h > 0) & (a > 0)]).astype(float)
+    return outcomes, btts, ou_over, ou_under, ah_home, ah_away
+
+
+def _fair_odds(win, lose):
+    """Cote juste d'un pari avec remboursement : 1 + P(perte) / P(gain)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(win > 0, 1.0 + lose / np.where(win > 0, win, 1.0), np.nan)
+
+
+def _rows(values, decimals):
+    """Tableau numpy → listes Python arrondies (NaN → None, -0.0 → 0.0)"""
+    rounded = (np.round(values, decimals) + 0.0).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+
+def _priced(prob, odds):
+    """Colonnes (prob, odds) → lignes de {"prob", "odds"}"""
+    return [[{"prob": p, "odds": o} for p, o in zip(prow, orow)]
+            for prow, orow in zip(_rows(prob, 4), _rows(odds, 3))]
+
+
+def _line_key(line):
+    return f"{line:+g}" if line else "0"
+
+
+def price_markets_batch(predictions, ou_lines=DEFAULT_OU_LINES, ah_lines=DEFAULT_AH_LINES):
+    """
+    Marchés dérivés pour un lot de prédictions.
+
+    Args:
+        predictions: liste de distributions / résultats de prédiction
+        ou_lines: lignes plus/moins (buts totaux)
+        ah_lines: lignes de handicap asiatique (appliquées à l'équipe domicile)
+
+    Returns:
+        list: un dict de marchés par prédiction (None si aucune masse exploitable)
+        Pour les lignes avec remboursement, "prob" est la probabilité de gain
+        (demi-gain compté pour moitié sur un quart de ligne).
+    """
+    ou_lines = tuple(float(x) for x in (ou_lines or ()))
+    ah_lines = tuple(float(x) for x in (ah_lines or ()))
+    tensor, coverage = score_tensor(predictions)
+    if not len(tensor):
+        return []
+    outcomes, btts, ou_over, ou_under, ah_home, ah_away = _masks(tensor.shape[1], ou_lines, ah_lines)
+
+    def reduce(masks):
+        return np.einsum("nij,kij->nk", tensor, masks)
+
+    p1x2 = reduce(outcomes)
+    p_btts = reduce(btts)[:, 0]
+    over_w, over_l = reduce(ou_over[0]), reduce(ou_over[1])
+    under_w, under_l = reduce(ou_under[0]), reduce(ou_under[1])
+    home_w, home_l = reduce(ah_home[0]), reduce(ah_home[1])
+    away_w, away_l = reduce(ah_away[0]), reduce(ah_away[1])
+
+    dc = np.stack([p1x2[:, 0] + p1x2[:, 1], p1x2[:, 0] + p1x2[:, 2], p1x2[:, 1] + p1x2[:, 2]], axis=1)
+    bt = np.stack([p_btts, np.maximum(0.0, 1.0 - p_btts)], axis=1)
+
+    r1x2 = _priced(p1x2, _fair_odds(p1x2, 1.0 - p1x2))
+    rdc = _priced(dc, _fair_odds(dc, 1.0 - dc))
+    rbt = _priced(bt, _fair_odds(bt, 1.0 - bt))
+    rover = _priced(over_w, _fair_odds(over_w, over_l))
+    runder = _priced(under_w, _fair_odds(under_w, under_l))
+    rhome = _priced(home_w, _fair_odds(home_w, home_l))
+    raway = _priced(away_w, _fair_odds(away_w, away_l))
+    # complément à 1 : les erreurs d'arrondi ne doivent pas donner de masse négative
+    ou_push = _rows(np.maximum(0.0, 1.0 - over_w - under_w), 4)
+    ah_push = _rows(np.maximum(0.0, 1.0 - home_w - away_w), 4)
+    ou_keys = [f"{line:g}" for line in ou_lines]
+    ah_keys = [_line_key(line) for line in ah_lines]
+
+    results = []
+    for i, cov in enumerate(coverage.tolist()):
+        if cov <= 0:
+            results.append(None)
+            continue
+        results.append({
+            "coverage": round(cov, 4),
+            "1x2": dict(zip(("home", "draw", "away"), r1x2[i])),
+            "double_chance": dict(zip(("1X", "12", "X2"), rdc[i])),
+            "btts": dict(zip(("yes", "no"), rbt[i])),
+            "over_under": {
+                key: {"over": o, "under": u, "push": p}
+                for key, o, u, p in zip(ou_keys, rover[i], runder[i], ou_push[i])
+            },
+            "asian_handicap": {
+                key: {"home": h, "away": a, "push": p}
+                for key, h, a, p in zip(ah_keys, rhome[i], raway[i], ah_push[i])
+            }
+        })
+    return results
+
+
+def price_markets(prediction, ou_lines=DEFAULT_OU_LINES, ah_lines=DEFAULT_AH_LINES):
+    """Marchés dérivés d'une seule prédiction (voir price_markets_batch)"""
+    return price_markets_batch([prediction], ou_lines, ah_lines)[0]
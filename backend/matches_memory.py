@@ -1,50 +1,845 @@
+"""
+Mémoire des matchs analysés (résultats figés par match_id).
+
+Cache à deux niveaux :
+- chaud : LRU en mémoire borné en octets (HOT_MAX_BYTES) avec expiration
+  (HOT_TTL) ; les entrées froides sont relues à la demande
+- froid : store SQLite indexé (MEMORY_DB), une ligne par match
+
+Les matchs sont gardés sous forme compacte (compact_analysis.CompactAnalysis :
+scores indexés, float32, __slots__) en mémoire, dans le journal (base64) et
+dans le store (binaire) ; le dict JSON n'est reconstruit qu'à la lecture par
+les appelants (get, items, recent). Les anciennes lignes JSON restent lisibles.
+
+Persistance des écritures :
+- MEMORY_FILE.wal.<n> : journal append-only des opérations (put / del / clear),
+  une ligne par opération préfixée de son CRC32 ; les écritures simultanées
+  sont regroupées (group commit : un seul fsync pour toute une rafale)
+- au-delà de WAL_COMPACT_OPS opérations ou WAL_COMPACT_BYTES, un thread
+  applique les segments au store froid puis les supprime ; en attendant, les
+  opérations récentes restent lisibles via une table d'attente (_pending)
+
+Le journal a un seul propriétaire : load_matches_memory(), appelé par le
+serveur au démarrage (pas à l'import), prend le verrou MEMORY_FILE.lock puis
+applique au store les segments restants (une ligne incomplète, crash pendant
+l'écriture, est ignorée et tronquée) : rien n'est chargé en mémoire. Rejouer
+un segment déjà appliqué est sans effet (opérations absolues). L'ancien
+snapshot MEMORY_FILE (JSON complet) est importé une seule fois.
+Les autres processus (backtest, calibration, scripts) ne touchent jamais au
+journal : ils lisent le store et y écrivent directement.
+
+Les lectures (len, items, recent) combinent le store et les opérations en
+attente sans déclencher de compaction.
+"""
 import json
 import os
+import re
 import copy
+import glob
+import zlib
+import time
+import sqlite3
+import base64
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
 from datetime import datetime
 import logging
 
+from compact_analysis import CompactAnalysis, pack_value, unpack_value, compact_value, to_api
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 # --- 📦 FICHIER DE SAUVEGARDE PERSISTANTE ---
-MEMORY_FILE = "/app/backend/data/matches_memory.json"
+MEMORY_FILE = "/app/backend/data/matches_memory.json"   # ancien snapshot + préfixe du journal
+MEMORY_DB = "/app/backend/data/matches_memory.db"
+
+WAL_COMPACT_OPS = 5000            # opérations journalisées avant compaction
+WAL_COMPACT_BYTES = 8 * 1024 * 1024
+MAX_FAILED_BATCHES = 64           # lots en échec mémorisés pour leurs écrivains
+WAL_COMPACT_AGE = 600             # secondes depuis la dernière compaction (journal non vide)
+
+HOT_MAX_BYTES = int(os.getenv("MATCHES_HOT_MAX_BYTES", str(32 * 1024 * 1024)))
+HOT_TTL = int(os.getenv("MATCHES_HOT_TTL", str(6 * 3600)))   # secondes sans accès
+
+
+# --- 📝 JOURNAL (WAL) ---
+class MemoryWAL:
+    """Journal segmenté des opérations, avec group commit"""
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.segment = 0          # numéro du segment actif
+        self._file = None
+        self._lock = threading.Lock()             # fichier du segment actif
+        self._commit = threading.Condition(threading.Lock())
+        self._pending = []        # lignes en attente d'écriture
+        self._queued_seq = 0      # dernière ligne mise en file
+        self._durable_seq = 0     # dernière ligne écrite + fsync
+        self._flushing = False
+        self._failed = []         # [(première, dernière séquence, erreur)] des lots non écrits
+        self.ops = 0              # opérations dans les segments non compactés
+        self.bytes = 0
+        self.stats = {"commits": 0, "ops": 0, "compactions": 0, "recovered_ops": 0, "torn_lines": 0,
+                      "failed_commits": 0}
+
+    # -----------------------
+    # Segments
+    # -----------------------
+    def segments(self):
+        """[(numéro, chemin)] des segments existants, dans l'ordre"""
+        found = []
+        for path in glob.glob(f"{glob.escape(self.base_path)}.wal.*"):
+            match = re.search(r"\.wal\.(\d+)$", path)
+            if match:
+                found.append((int(match.group(1)), path))
+        return sorted(found)
+
+    def _segment_path(self, number):
+        return f"{self.base_path}.wal.{number}"
+
+    @staticmethod
+    def encode(op):
+        payload = json.dumps(op, ensure_ascii=False, separators=(",", ":"))
+        return f"{zlib.crc32(payload.encode('utf-8')):08x} {payload}\n"
+
+    @staticmethod
+    def decode(line):
+        crc, _, payload = line.rstrip("\n").partition(" ")
+        if not payload or f"{zlib.crc32(payload.encode('utf-8')):08x}" != crc:
+            return None
+        return json.loads(payload)
+
+    def read_segment(self, path):
+        """Opérations valides d'un segment ; tronque une fin incomplète"""
+        ops, good_offset = [], 0
+        with open(path, "rb") as f:
+            for raw in f:
+                try:
+                    op = self.decode(raw.decode("utf-8"))
+                except Exception:
+                    op = None
+                if op is None:
+                    self.stats["torn_lines"] += 1
+                    logger.warning(f"⚠️ Journal {os.path.basename(path)} : ligne invalide à l'octet {good_offset}, fin ignorée")
+                    break
+                ops.append(op)
+                good_offset += len(raw)
+        if os.path.getsize(path) != good_offset:
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+        return ops
+
+    # -----------------------
+    # Écriture (group commit)
+    # -----------------------
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.base_path), exist_ok=True)
+            self._file = open(self._segment_path(self.segment), "ab")
+        return self._file
+
+    def enqueue(self, line):
+        """Met une ligne encodée en file ; retourne son numéro de séquence"""
+        with self._commit:
+            self._pending.append(line)
+            self._queued_seq += 1
+            return self._queued_seq
+
+    def wait(self, seq):
+        """Attend que la ligne seq soit durable ; le premier arrivé écrit toute la file (un fsync)"""
+        with self._commit:
+            while True:
+                for first, last, error in self._failed:
+                    if first <= seq <= last:
+                        raise OSError(f"écriture du journal échouée : {error}") from error
+                if self._durable_seq >= seq:
+                    return
+                if self._flushing:
+                    self._commit.wait()
+                    continue
+                batch, self._pending = self._pending, []
+                first, last = self._queued_seq - len(batch) + 1, self._queued_seq
+                self._flushing = True
+                self._commit.release()
+                error = None
+                try:
+                    self._flush_batch(batch)
+                except Exception as e:
+                    error = e
+                finally:
+                    self._commit.acquire()
+                    self._flushing = False
+                    if error is None:
+                        self._durable_seq = last
+                        self.stats["commits"] += 1
+                        self.stats["ops"] += len(batch)
+                    else:
+                        # tout le lot est en échec : chaque écrivain concerné le voit
+                        logger.error(f"⚠️ Écriture du journal échouée ({len(batch)} opérations) : {error}")
+                        self._failed = self._failed[-(MAX_FAILED_BATCHES - 1):] + [(first, last, error)]
+                        self.stats["failed_commits"] += 1
+                    self._commit.notify_all()
+
+    def _flush_batch(self, batch):
+        with self._lock:
+            f = self._open()
+            start = os.fstat(f.fileno()).st_size   # mode ajout : tell() n'est pas fiable après un truncate
+            try:
+                f.write(b"".join(batch))
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception:
+                # pas de lot partiel devant les écritures suivantes
+                try:
+                    f.truncate(start)
+                    f.seek(start)
+                except Exception:
+                    # segment inutilisable : la suite va dans un nouveau segment
+                    try:
+                        f.close()
+                    except Exception:
+                        pass
+                    self._file = None
+                    self.segment += 1
+                raise
+            self.bytes += sum(len(b) for b in batch)
+            self.ops += len(batch)
+
+    def rotate(self, on_rotate=None):
+        """
+        Ferme le segment actif ; les écritures suivantes vont dans un nouveau segment.
+
+        Returns:
+            tuple: (dernier segment fermé, séquence durable couverte par les segments fermés)
+        """
+        with self._commit:
+            # aucun écrivain ne peut démarrer tant que _commit est tenu
+            while self._flushing:
+                self._commit.wait()
+            with self._lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                covered = self.segment
+                self.segment += 1
+                self.ops = 0
+                self.bytes = 0
+            return covered, self._durable_seq
+
+    def info(self):
+        return dict(self.stats, segment=self.segment, pending_ops=self.ops, segment_bytes=self.bytes)
+
+
+# --- 🧊 STORE FROID (SQLite) ---
+class MatchStore:
+    """Une ligne par match (ordre d'insertion = rowid), colonnes indexées pour les rapports"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS matches (
+        id TEXT NOT NULL UNIQUE,
+        bookmaker TEXT,
+        confidence REAL,
+        analyzed_at TEXT,
+        data BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_matches_bookmaker ON matches(bookmaker);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def apply(self, ops, claim=None):
+        """
+        Applique des opérations du journal en une transaction.
+        claim : clé meta réservée dans la même transaction (import unique) ;
+        déjà prise → rien n'est appliqué, échec → la clé n'est pas réservée.
+
+        Returns:
+            bool: False si claim était déjà pris
+        """
+        conn = self._conn()
+        with conn:
+            if claim is not None and conn.execute(
+                    "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                    (claim, datetime.now().isoformat())).rowcount != 1:
+                return False
+            for op in ops:
+                kind = op.get("op")
+                if kind == "put":
+                    # "b" : analyse binaire en base64 ; "value" : ancien format / import JSON
+                    blob = base64.b64decode(op["b"]) if "b" in op else pack_value(op["value"])
+                    value = unpack_value(blob)
+                    meta = value if isinstance(value, (dict, CompactAnalysis)) else {}
+                    confidence = meta.get("confidence")
+                    conn.execute(
+                        "INSERT INTO matches (id, bookmaker, confidence, analyzed_at, data) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET bookmaker = excluded.bookmaker, "
+                        "confidence = excluded.confidence, analyzed_at = excluded.analyzed_at, data = excluded.data",
+                        (op["id"], meta.get("bookmaker"),
+                         confidence if isinstance(confidence, (int, float)) else None,
+                         meta.get("analyzed_at"),
+                         blob))
+                elif kind == "del":
+                    conn.execute("DELETE FROM matches WHERE id = ?", (op["id"],))
+                elif kind == "clear":
+                    conn.execute("DELETE FROM matches")
+        return True
+
+    def get(self, match_id):
+        """Octets stockés (ou ancien texte JSON) ou None"""
+        row = self._conn().execute("SELECT data FROM matches WHERE id = ?", (match_id,)).fetchone()
+        return row[0] if row else None
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    @contextmanager
+    def snapshot(self):
+        """Lectures cohérentes entre elles (une transaction de lecture)"""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def existing(self, keys, conn=None):
+        """Sous-ensemble des ids présents dans le store"""
+        conn = conn or self._conn()
+        keys = list(keys)
+        found = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            found.update(row[0] for row in conn.execute(
+                f"SELECT id FROM matches WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        return found
+
+    def items(self):
+        for match_id, data in self._conn().execute("SELECT id, data FROM matches ORDER BY rowid"):
+            yield match_id, unpack_value(data)
+
+    def recent(self, n):
+        """n derniers matchs insérés, du plus ancien au plus récent"""
+        rows = self._conn().execute("SELECT id, data FROM matches ORDER BY rowid DESC LIMIT ?", (n,)).fetchall()
+        return [(match_id, unpack_value(data)) for match_id, data in reversed(rows)]
+
+    def bookmaker_counts(self, conn=None):
+        return dict((conn or self._conn()).execute(
+            "SELECT bookmaker, COUNT(*) FROM matches WHERE bookmaker IS NOT NULL GROUP BY bookmaker"))
+
+    def confidence_sum(self, conn=None):
+        """(somme, nombre) des confiances renseignées"""
+        total, count = (conn or self._conn()).execute(
+            "SELECT COALESCE(SUM(confidence), 0), COUNT(confidence) FROM matches").fetchone()
+        return total, count
+
+    def columns(self, keys, conn=None):
+        """{id: (bookmaker, confidence)} des ids présents dans le store"""
+        conn = conn or self._conn()
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            for match_id, bookmaker, confidence in conn.execute(
+                    f"SELECT id, bookmaker, confidence FROM matches WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk):
+                found[match_id] = (bookmaker, confidence)
+        return found
+
+    def claimed(self, key):
+        """Clé meta déjà réservée ?"""
+        return self._conn().execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone() is not None
+
+
+# --- 🔥 CACHE CHAUD (LRU + TTL, borné en octets) ---
+class HotCache:
+    """OrderedDict id → (valeur, taille, dernier accès), plus ancien accès en tête"""
+
+    def __init__(self, max_bytes=HOT_MAX_BYTES, ttl=HOT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if self.ttl and now - entry[2] > self.ttl:
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self._entries[key] = (entry[0], entry[1], now)
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size):
+        self._drop(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size, time.monotonic())
+        self.bytes += size
+        self._evict()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._entries:
+            key, (_, size, accessed) = next(iter(self._entries.items()))
+            expired = self.ttl and now - accessed > self.ttl
+            if self.bytes <= self.max_bytes and not expired:
+                break
+            self._drop(key)
+            if expired:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+    def discard(self, key):
+        self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
 
 # --- 📦 MÉMOIRE EN COURS ---
-analyzed_matches = {}
+class TieredMatches:
+    """
+    Mémoire des matchs : cache chaud → opérations en attente de compaction → store froid.
+    Interface de type dict (in, [], get, items, len) ; écritures via put / delete / clear.
+    Les valeurs sont stockées compactes et rendues en dict (to_api) à la lecture.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, wal, store, max_bytes=HOT_MAX_BYTES, ttl=HOT_TTL):
+        self.wal = wal
+        self.store = store
+        self.hot = HotCache(max_bytes, ttl)
+        self._pending = {}          # id → (séquence, valeur ou None si supprimé)
+        self._cleared_seq = None    # clear en attente de compaction
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compacting = False
+        self._last_compact = time.monotonic()
+        self.owner = False          # propriétaire du journal (sinon écritures directes dans le store)
+        self._owner_lock = None
+        self.hits = 0
+        self.cold_hits = 0
+        self.misses = 0
+
+    # -----------------------
+    # Démarrage
+    # -----------------------
+    def open(self, legacy_file=None):
+        """
+        Prend la propriété du journal (verrou fichier non bloquant, gardé pendant
+        toute la vie du processus) puis rejoue les segments laissés par le
+        propriétaire précédent. Si un autre processus le détient, ce processus
+        reste en écriture directe et ne touche pas au journal.
+
+        Returns:
+            bool: True si ce processus est propriétaire du journal
+        """
+        if self.owner:
+            return True
+        if FCNTL_AVAILABLE:
+            os.makedirs(os.path.dirname(self.wal.base_path), exist_ok=True)
+            lock_file = open(f"{self.wal.base_path}.lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                logger.info("🔒 Journal de la mémoire tenu par un autre processus : écritures directes dans le store")
+                return False
+            self._owner_lock = lock_file
+        self.recover(legacy_file)
+        self.owner = True
+        return True
+
+    def recover(self, legacy_file=None):
+        """
+        Import unique de l'ancien snapshot JSON puis application des segments restants.
+        Réservé au propriétaire du journal (open) : aucun segment n'est alors actif.
+        """
+        if legacy_file and os.path.exists(legacy_file) and not self.store.claimed("legacy_import"):
+            # réservation et import dans la même transaction : un import échoué sera retenté
+            try:
+                with open(legacy_file, "r", encoding="utf-8") as f:
+                    legacy = json.load(f)
+                if self.store.apply(({"op": "put", "id": k, "value": v} for k, v in legacy.items()),
+                                    claim="legacy_import"):
+                    logger.info(f"📥 {len(legacy)} matchs importés depuis {legacy_file}")
+            except Exception as e:
+                logger.error(f"⚠️ Erreur d'import de l'ancienne mémoire (nouvel essai au prochain démarrage) : {e}")
+
+        segments = self.wal.segments()
+        for number, path in segments:
+            ops = self.wal.read_segment(path)
+            self.store.apply(ops)
+            self.wal.stats["recovered_ops"] += len(ops)
+            os.remove(path)
+            self.wal.segment = number + 1
+        if segments:
+            logger.info(f"📝 Journal rejoué : {self.wal.stats['recovered_ops']} opérations ({len(segments)} segment(s))")
+
+    # -----------------------
+    # Lecture
+    # -----------------------
+    def _lookup(self, key):
+        with self._lock:
+            value = self.hot.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            if key in self._pending:
+                value = self._pending[key][1]
+                if value is None:
+                    self.misses += 1
+                    return self._MISSING
+                self.hits += 1
+                return value
+            if self._cleared_seq is not None:
+                self.misses += 1
+                return self._MISSING
+        data = self.store.get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return self._MISSING
+            # une écriture concurrente a pu passer pendant la lecture froide
+            if key in self._pending or self._cleared_seq is not None:
+                return self._lookup(key)
+            value = unpack_value(data)
+            self.cold_hits += 1
+            self.hot.put(key, value, _size(value, data))
+            return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is self._MISSING else to_api(value)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not self._MISSING
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is self._MISSING:
+            raise KeyError(key)
+        return to_api(value)
+
+    def _overlay(self):
+        """Copie des opérations en attente : ({id: (séquence, valeur ou None)}, clear en attente)"""
+        with self._lock:
+            return dict(self._pending), self._cleared_seq is not None
+
+    @staticmethod
+    def _by_seq(pending):
+        return sorted(pending.items(), key=lambda item: item[1][0])
+
+    def __len__(self):
+        pending, cleared = self._overlay()
+        if cleared:
+            return sum(1 for _, value in pending.values() if value is not None)
+        # opération déjà appliquée par une compaction concurrente : présente dans le store, comptée une fois
+        with self.store.snapshot() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+            stored = self.store.existing(pending, conn)
+        for key, (_, value) in pending.items():
+            if value is None and key in stored:
+                count -= 1
+            elif value is not None and key not in stored:
+                count += 1
+        return count
+
+    def items(self):
+        """(id, match) dans l'ordre d'insertion : store puis nouveaux matchs en attente"""
+        pending, cleared = self._overlay()
+        seen = set()
+        if not cleared:
+            for key, value in self.store.items():
+                if key in pending:
+                    value = pending[key][1]
+                    if value is None:
+                        continue
+                seen.add(key)
+                yield key, to_api(value)
+        for key, (_, value) in self._by_seq(pending):
+            if value is not None and key not in seen:
+                yield key, to_api(value)
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def values(self):
+        return (value for _, value in self.items())
+
+    def summary(self):
+        """
+        (nombre, {bookmaker: nombre}, confiance moyenne) : agrégats du store
+        corrigés des opérations en attente, comme len(), items() et recent()
+        """
+        pending, cleared = self._overlay()
+        counts, conf_total, conf_count = {}, 0, 0
+        if not cleared:
+            with self.store.snapshot() as conn:
+                total = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+                counts = self.store.bookmaker_counts(conn)
+                conf_total, conf_count = self.store.confidence_sum(conn)
+                stored = self.store.columns(pending, conn)
+            # lignes remplacées ou supprimées par une opération en attente
+            for bookmaker, confidence in stored.values():
+                total -= 1
+                if bookmaker is not None:
+                    counts[bookmaker] -= 1
+                if confidence is not None:
+                    conf_total -= confidence
+                    conf_count -= 1
+        else:
+            total = 0
+        for _, value in pending.values():
+            if value is None:
+                continue
+            total += 1
+            meta = value if isinstance(value, (dict, CompactAnalysis)) else {}
+            bookmaker, confidence = meta.get("bookmaker"), meta.get("confidence")
+            if bookmaker is not None:
+                counts[bookmaker] = counts.get(bookmaker, 0) + 1
+            if isinstance(confidence, (int, float)):
+                conf_total += confidence
+                conf_count += 1
+        counts = {bm: n for bm, n in counts.items() if n > 0}
+        return total, counts, (conf_total / conf_count if conf_count else 0)
+
+    def recent(self, n=5):
+        """[(id, match)] des n derniers matchs insérés"""
+        if n <= 0:
+            return []
+        pending, cleared = self._overlay()
+        if cleared:
+            new = [(key, value) for key, (_, value) in self._by_seq(pending) if value is not None]
+            return [(key, to_api(value)) for key, value in new[-n:]]
+        stored = self.store.existing(pending)
+        # nouveaux matchs (absents du store) : après tous ceux du store
+        new = [(key, value) for key, (_, value) in self._by_seq(pending)
+               if value is not None and key not in stored]
+        deleted = sum(1 for _, value in pending.values() if value is None)
+        out, seen = [], set()
+        for key, value in self.store.recent(n + deleted):
+            if key in pending:
+                value = pending[key][1]
+                if value is None:
+                    continue
+            out.append((key, value))
+            seen.add(key)
+        out.extend((key, value) for key, value in new if key not in seen)
+        return [(key, to_api(value)) for key, value in out[-n:]]
+
+    # -----------------------
+    # Écriture
+    # -----------------------
+    def _write(self, op, apply):
+        """apply(seq) met à jour le cache chaud et, si seq n'est pas None, les opérations en attente"""
+        if not self.owner:
+            # processus secondaire : écriture directe dans le store (SQLite gère la concurrence)
+            self.store.apply([op])
+            with self._lock:
+                apply(None)
+            return
+        line = self.wal.encode(op).encode("utf-8")
+        with self._lock:
+            seq = self.wal.enqueue(line)
+            apply(seq)
+        try:
+            self.wal.wait(seq)
+        except Exception:
+            with self._lock:
+                self._undo(op, seq)
+            raise
+        if (self.wal.ops >= WAL_COMPACT_OPS or self.wal.bytes >= WAL_COMPACT_BYTES
+                or time.monotonic() - self._last_compact >= WAL_COMPACT_AGE):
+            self.compact_async()
+
+    def _undo(self, op, seq):
+        """Retire une opération dont l'écriture a échoué (si rien ne l'a remplacée)"""
+        if op["op"] == "clear":
+            if self._cleared_seq == seq:
+                self._cleared_seq = None
+            return
+        key = op["id"]
+        if key in self._pending and self._pending[key][0] == seq:
+            del self._pending[key]
+        self.hot.discard(key)
+
+    def put(self, key, value):
+        value = compact_value(value)
+        blob = pack_value(value)
+
+        def apply(seq):
+            if seq is not None:
+                self._pending[key] = (seq, value)
+            self.hot.put(key, value, _size(value, blob))
+        self._write({"op": "put", "id": key, "b": base64.b64encode(blob).decode("ascii")}, apply)
+
+    def delete(self, key):
+        def apply(seq):
+            if seq is not None:
+                self._pending[key] = (seq, None)
+            self.hot.discard(key)
+        self._write({"op": "del", "id": key}, apply)
+
+    def clear(self):
+        def apply(seq):
+            self._pending.clear()
+            self.hot.clear()
+            if seq is not None:
+                self._cleared_seq = seq
+        self._write({"op": "clear"}, apply)
+
+    # -----------------------
+    # Compaction
+    # -----------------------
+    def compact(self):
+        """Applique les segments fermés au store froid puis les supprime (propriétaire du journal uniquement)"""
+        if not self.owner:
+            return
+        with self._compact_lock:
+            self._last_compact = time.monotonic()
+            covered, durable_seq = self.wal.rotate()
+            for number, path in self.wal.segments():
+                if number > covered:
+                    continue
+                self.store.apply(self.wal.read_segment(path))
+                os.remove(path)
+            with self._lock:
+                # les opérations appliquées sont désormais lisibles dans le store
+                for key in [k for k, (seq, _) in self._pending.items() if seq <= durable_seq]:
+                    del self._pending[key]
+                if self._cleared_seq is not None and self._cleared_seq <= durable_seq:
+                    self._cleared_seq = None
+            self.wal.stats["compactions"] += 1
+
+    def compact_async(self):
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def _run():
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"⚠️ Erreur de compaction mémoire : {e}")
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=_run, daemon=True, name="matches-memory-compactor").start()
+
+    def metrics(self):
+        lookups = self.hits + self.cold_hits + self.misses
+        return {
+            "hot_entries": len(self.hot),
+            "hot_bytes": self.hot.bytes,
+            "hot_max_bytes": self.hot.max_bytes,
+            "hot_ttl": self.hot.ttl,
+            "hits": self.hits,
+            "cold_hits": self.cold_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.hot.evictions,
+            "expirations": self.hot.expirations,
+            "pending_ops": len(self._pending),
+            "wal_owner": self.owner,
+            "wal": self.wal.info()
+        }
+
+
+def _size(value, data):
+    """Poids d'une entrée dans le cache chaud"""
+    return value.nbytes() if isinstance(value, CompactAnalysis) else len(data)
+
+
+analyzed_matches = TieredMatches(MemoryWAL(MEMORY_FILE), MatchStore(MEMORY_DB))
+
 
 # --- 🔁 CHARGEMENT AU DÉMARRAGE ---
 def load_matches_memory():
-    """Charge la mémoire des matchs depuis le fichier JSON"""
-    global analyzed_matches
-    
-    # Créer le dossier data s'il n'existe pas
-    os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-    
-    if os.path.exists(MEMORY_FILE):
-        try:
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                analyzed_matches = json.load(f)
-            logger.info(f"🧠 Mémoire chargée : {len(analyzed_matches)} matchs restaurés.")
-        except Exception as e:
-            logger.error(f"⚠️ Erreur de lecture mémoire : {e}")
-            analyzed_matches = {}
-    else:
-        logger.info("📂 Aucune mémoire trouvée — démarrage neuf.")
-        analyzed_matches = {}
+    """
+    Prépare la mémoire dans le processus serveur : propriété du journal, import de
+    l'ancien snapshot, application des segments restants (rien n'est chargé en RAM).
+    Les scripts (backtest, calibration...) ne l'appellent pas.
+    """
+    try:
+        owner = analyzed_matches.open(legacy_file=MEMORY_FILE)
+        logger.info(f"🧠 Mémoire prête : {analyzed_matches.store.count()} matchs stockés"
+                    + ("." if owner else " (journal tenu par un autre processus)."))
+    except Exception as e:
+        logger.error(f"⚠️ Erreur de lecture mémoire : {e}")
 
 # --- 💾 SAUVEGARDE AUTOMATIQUE ---
 def save_matches_memory():
-    """Sauvegarde la mémoire des matchs dans le fichier JSON"""
+    """Point de contrôle : applique le journal au store et supprime les segments"""
     try:
-        # Créer le dossier data s'il n'existe pas
-        os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-        
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(analyzed_matches, f, indent=2, ensure_ascii=False)
-        logger.info(f"💾 Mémoire sauvegardée ({len(analyzed_matches)} matchs enregistrés).")
+        analyzed_matches.compact()
+        logger.info(f"💾 Mémoire sauvegardée ({analyzed_matches.store.count()} matchs enregistrés).")
+    except Exception as e:
+        logger.error(f"⚠️ Erreur de sauvegarde mémoire : {e}")
+
+
+def _journal(write, *args):
+    """Journalise une opération (erreur loggée, comme l'ancienne sauvegarde complète)"""
+    try:
+        write(*args)
     except Exception as e:
         logger.error(f"⚠️ Erreur de sauvegarde mémoire : {e}")
 
+
+def get_wal_info():
+    """État du journal (group commits, compactions, segment actif)"""
+    return analyzed_matches.wal.info()
+
+
+def get_cache_metrics():
+    """Hits / misses / évictions du cache chaud, état du journal"""
+    return analyzed_matches.metrics()
+
+
+def iter_matches():
+    """Parcours de tous les matchs stockés (ordre d'insertion), sans tout charger"""
+    return analyzed_matches.items()
+
+
 # --- 🔍 ANALYSE STABLE AVEC SAUVEGARDE ---
 def analyze_match_stable(match_id, scores_data, probabilities, confidence, top3, bookmaker=None, match_name=None):
     """
@@ -66,9 +861,10 @@ def analyze_match_stable(match_id, scores_data, probabilities, confidence, top3,
     """
     
     # 1️⃣ Vérifie si le match existe déjà
-    if match_id in analyzed_matches:
+    existing = analyzed_matches.get(match_id)
+    if existing is not None:
         logger.info(f"⚙️ Match {match_id} déjà analysé — résultat figé retourné.")
-        return analyzed_matches[match_id]
+        return existing
     
     # 2️⃣ Créer le résultat d'analyse
     result = {
@@ -82,10 +878,8 @@ def analyze_match_stable(match_id, scores_data, probabilities, confidence, top3,
         "analyzed_at": datetime.now().isoformat(),
     }
     
-    # 3️⃣ Sauvegarde du résultat figé pour ce match
-    analyzed_matches[match_id] = result
-    
-    save_matches_memory()
+    # 3️⃣ Sauvegarde du résultat figé pour ce match (cache chaud + une ligne de journal)
+    _journal(analyzed_matches.put, match_id, result)
     logger.info(f"✅ Match {match_id} analysé et figé dans la mémoire")
     
     return result
@@ -106,12 +900,12 @@ def get_match_result(match_id):
 # --- 📋 LISTE TOUS LES MATCHS ---
 def get_all_matches():
     """
-    Retourne la liste de tous les matchs en mémoire.
+    Retourne la liste de tous les matchs stockés (lus depuis le store froid).
     
     Returns:
         dict: Tous les matchs analysés
     """
-    return analyzed_matches
+    return dict(analyzed_matches.items())
 
 # --- 🗑️ SUPPRESSION D'UN MATCH ---
 def delete_match(match_id):
@@ -125,8 +919,7 @@ def delete_match(match_id):
         bool: True si supprimé, False si non trouvé
     """
     if match_id in analyzed_matches:
-        del analyzed_matches[match_id]
-        save_matches_memory()
+        _journal(analyzed_matches.delete, match_id)
         logger.info(f"🗑️ Match {match_id} supprimé de la mémoire")
         return True
     return False
@@ -134,9 +927,7 @@ def delete_match(match_id):
 # --- 🧹 NETTOYAGE DE LA MÉMOIRE ---
 def clear_all_matches():
     """Supprime tous les matchs de la mémoire"""
-    global analyzed_matches
-    analyzed_matches = {}
-    save_matches_memory()
+    _journal(analyzed_matches.clear)
     logger.info("🧹 Mémoire complètement effacée")
 
 # --- 🔑 GÉNÉRATION D'ID UNIQUE ---
@@ -175,36 +966,17 @@ def generate_system_report():
         dict: Rapport structuré avec statistiques et dernières analyses
     """
     try:
-        total_matches = len(analyzed_matches)
+        # store + opérations en attente du journal, pour tous les chiffres du rapport
+        total_matches, bookmakers, avg_confidence = analyzed_matches.summary()
         
-        # Obtenir la date de dernière modification du fichier
+        # Dernière modification : store ou segment du journal
         last_update = "—"
-        if os.path.exists(MEMORY_FILE):
-            last_update_timestamp = os.path.getmtime(MEMORY_FILE)
-            last_update = datetime.fromtimestamp(last_update_timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        paths = [MEMORY_DB, f"{MEMORY_DB}-wal"] + [path for _, path in analyzed_matches.wal.segments()]
+        mtimes = [os.path.getmtime(path) for path in paths if os.path.exists(path)]
+        if mtimes:
+            last_update = datetime.fromtimestamp(max(mtimes)).strftime("%Y-%m-%d %H:%M:%S")
         
-        # Comptage des stats
-        bookmakers = {}
-        match_names = []
-        confidence_scores = []
-        
-        for match_id, info in analyzed_matches.items():
-            if isinstance(info, dict):
-                # Bookmaker
-                if "bookmaker" in info:
-                    bm = info["bookmaker"]
-                    bookmakers[bm] = bookmakers.get(bm, 0) + 1
-                
-                # Nom du match
-                if "match_name" in info:
-                    match_names.append(info["match_name"])
-                
-                # Confiance
-                if "confidence" in info:
-                    confidence_scores.append(info["confidence"])
-        
-        # Calcul de la confiance moyenne
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
+        recent = analyzed_matches.recent(5)
         
         # Générer rapport textuel
         report_text = f"""
@@ -229,7 +1001,7 @@ def generate_system_report():
 
         # Derniers matchs analysés
         if total_matches > 0:
-            recent_matches = list(analyzed_matches.items())[-5:]  # 5 derniers
+            recent_matches = recent  # 5 derniers
             report_text += f"\n📋 {min(5, total_matches)} dernier(s) match(s) analysé(s) :\n"
             
             for match_id, match_data in reversed(recent_matches):
@@ -262,7 +1034,7 @@ def generate_system_report():
                     "top_score": mdata.get("top3", [{}])[0].get("score", "N/A") if mdata.get("top3") else "N/A",
                     "analyzed_at": mdata.get("analyzed_at", "N/A")
                 }
-                for mid, mdata in list(analyzed_matches.items())[-5:]
+                for mid, mdata in recent
                 if isinstance(mdata, dict)
             ],
             "status": "operational" if total_matches > 0 else "empty",
@@ -278,6 +1050,3 @@ def generate_system_report():
             "error": str(e),
             "status": "error"
         }
-
-# --- ⚙️ CHARGEMENT AUTOMATIQUE AU DÉMARRAGE ---
-load_matches_memory()
@@ -0,0 +1,128 @@
+# /app/backend/prediction_memo.py
+"""
+Mémoïsation des prédictions (LRU + TTL).
+
+La clé est un hash canonique de :
+- la grille (scores triés + cotes normalisées en float)
+- l'algorithme et ses paramètres effectifs (diffExpected, coefficients
+  domicile/extérieur résolus, options...)
+
+Les coefficients et diffExpected faisant partie de la clé, toute modification
+(mise à jour de classement, apprentissage) produit une nouvelle clé : les
+anciennes entrées ne sont plus jamais servies et sortent du LRU / expirent.
+"""
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MEMO_MAXSIZE = 4096    # nombre max de prédictions gardées
+MEMO_TTL = 3600.0      # durée de vie d'une entrée (secondes)
+
+
+def _canonical_odds(odds):
+    try:
+        return float(odds)
+    except (TypeError, ValueError):
+        return repr(odds)
+
+
+def _canonical_scores(scores):
+    """Grille sous forme de tuple trié ((score, cote), ...)"""
+    if isinstance(scores, dict):
+        items = scores.items()
+    else:
+        items = ((item.get("score"), item.get("odds")) for item in scores)
+    return tuple(sorted((str(s), _canonical_odds(o)) for s, o in items))
+
+
+def make_key(algo, scores, **params):
+    """
+    Clé canonique d'une prédiction.
+
+    Args:
+        algo: nom de l'algorithme ("classic", "combined", ...)
+        scores: dict {score: cote} ou list [{"score": "X-Y", "odds": Z}]
+        **params: paramètres effectifs (diffExpected, coefficients, options)
+
+    Returns:
+        str: empreinte hexadécimale
+    """
+    payload = repr((algo, _canonical_scores(scores), tuple(sorted(params.items()))))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _copy_result(result):
+    """Copie d'un résultat (les dicts imbriqués ne sont pas partagés)"""
+    return {k: (dict(v) if isinstance(v, dict) else v) for k, v in result.items()}
+
+
+class PredictionMemo:
+    """Cache LRU avec expiration, partagé par tout le processus"""
+
+    def __init__(self, maxsize=MEMO_MAXSIZE, ttl=MEMO_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # {clé: (expiration, résultat)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Résultat mémorisé (copie) ou None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            result = entry[1]
+        return _copy_result(result)
+
+    def put(self, key, result):
+        """Mémorise un résultat (copie)"""
+        value = (time.monotonic() + self.ttl, _copy_result(result))
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache (les compteurs sont conservés)"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Taux de réussite et occupation"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_sec": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+_memo = PredictionMemo()
+
+
+def get_memo():
+    """Cache de prédictions du processus"""
+    return _memo
@@ -0,0 +1,185 @@
+# /app/backend/prediction_rescore.py
+"""
+Re-scoring en arrière-plan des prédictions récentes après un changement de classement.
+
+Abonné à standings_events : quand des positions changent dans une ligue, les
+analyses récentes (RESCORE_WINDOW_DAYS) sans score réel connu et impliquant une
+équipe touchée sont recalculées avec les nouveaux coefficients
+(batch_predictor, algorithme classique) à partir de la grille de cotes stockée.
+
+Les événements arrivant pendant un re-scoring sont fusionnés et traités au
+passage suivant (un seul thread de travail). Résultats dans RESCORED_FILE :
+{clé d'analyse: {home, away, league, previous, mostProbableScore, probabilities,
+confidence, home_coeff, away_coeff, trigger, rescored_at}}
+"""
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+RESCORED_FILE = "/app/data/rescored_predictions.json"
+RESCORE_WINDOW_DAYS = 7
+EUROPEAN_LEAGUES = ("ChampionsLeague", "EuropaLeague")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rescore")
+_pending = {}          # {ligue: set(équipes)} en attente de re-scoring
+_pending_lock = threading.Lock()
+_running = False
+_stats = {"runs": 0, "rescored": 0, "last_run": None, "last_error": None}
+
+
+def _atomic_write_json(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _load_rescored():
+    if not os.path.exists(RESCORED_FILE):
+        return {}
+    try:
+        with open(RESCORED_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _affected(analysis, changes, index):
+    """(ligue, équipe touchée) si l'analyse implique une équipe d'un classement modifié"""
+    for league, teams in changes.items():
+        if analysis["league"] not in (league, "Unknown") + EUROPEAN_LEAGUES:
+            continue
+        for side in (analysis["home"], analysis["away"]):
+            record = index.lookup(side, league) if side else None
+            if record is not None and record[0] in teams:
+                return league, record[0]
+    return None
+
+
+def find_candidates(changes, now=None):
+    """Analyses récentes, non jouées, avec grille de cotes, touchées par les changements"""
+    import league_coeff
+    from backtest import load_analyses, load_outcomes, _find_outcome, _norm_team, _parse_date
+
+    now = now or datetime.now()
+    since = now - timedelta(days=RESCORE_WINDOW_DAYS)
+    outcomes = load_outcomes()
+    index = league_coeff.get_standings_index()
+
+    candidates = []
+    for analysis in load_analyses():
+        ts = _parse_date(analysis.get("timestamp"))
+        if ts is None or ts < since or not analysis.get("scores"):
+            continue
+        played = outcomes.get((_norm_team(analysis["home"]), _norm_team(analysis["away"])))
+        if played and _find_outcome(played, ts):
+            continue
+        hit = _affected(analysis, changes, index)
+        if hit:
+            candidates.append((analysis, hit))
+    return candidates
+
+
+def rescore(changes):
+    """
+    Recalcule les prédictions touchées par `changes` ({ligue: set(équipes)}).
+
+    Returns:
+        int: nombre de prédictions recalculées
+    """
+    from batch_predictor import predict_batch
+
+    candidates = find_candidates(changes)
+    if not candidates:
+        logger.info("♻️ Aucune prédiction récente à recalculer")
+        return 0
+
+    matches = [{
+        "scores": analysis["scores"],
+        "home_team": analysis["home"],
+        "away_team": analysis["away"],
+        "league": analysis["league"] if analysis["league"] != "Unknown" else league,
+        "algo": "classic"
+    } for analysis, (league, _) in candidates]
+    results = predict_batch(matches)
+
+    rescored = _load_rescored()
+    now = datetime.now().isoformat()
+    count = 0
+    for (analysis, (league, team)), match, res in zip(candidates, matches, results):
+        if "error" in res:
+            continue
+        recorded = analysis.get("recorded") or {}
+        key = f"{analysis['source']}:{analysis['home']}|{analysis['away']}|{analysis['timestamp']}"
+        rescored[key] = {
+            "home": analysis["home"],
+            "away": analysis["away"],
+            "league": match["league"],
+            "analysis_timestamp": analysis["timestamp"],
+            "previous": max(recorded, key=recorded.get) if recorded else None,
+            "mostProbableScore": res.get("mostProbableScore"),
+            "probabilities": res.get("probabilities"),
+            "confidence": res.get("confidence"),
+            "league_coeffs_applied": res.get("league_coeffs_applied"),
+            "trigger": {"league": league, "team": team},
+            "rescored_at": now
+        }
+        count += 1
+
+    # on ne garde que la fenêtre de re-scoring
+    cutoff = (datetime.now() - timedelta(days=RESCORE_WINDOW_DAYS)).isoformat()
+    rescored = {k: v for k, v in rescored.items() if (v.get("analysis_timestamp") or "") >= cutoff}
+    _atomic_write_json(RESCORED_FILE, rescored)
+    logger.info(f"🔁 {count} prédictions recalculées après changement de classement")
+    return count
+
+
+def _worker():
+    global _running
+    while True:
+        with _pending_lock:
+            if not _pending:
+                _running = False
+                return
+            changes = dict(_pending)
+            _pending.clear()
+        try:
+            _stats["rescored"] += rescore(changes)
+            _stats["last_error"] = None
+        except Exception as e:
+            logger.error(f"❌ Re-scoring échoué: {e}")
+            _stats["last_error"] = str(e)
+        _stats["runs"] += 1
+        _stats["last_run"] = datetime.now().isoformat()
+
+
+def on_standings_change(change):
+    """Abonné standings_events : planifie le re-scoring des équipes touchées"""
+    global _running
+    with _pending_lock:
+        _pending.setdefault(change["league"], set()).update(change["teams"])
+        if _running:
+            return
+        _running = True
+    _executor.submit(_worker)
+
+
+def get_rescore_status():
+    with _pending_lock:
+        pending = {league: len(teams) for league, teams in _pending.items()}
+    return {**_stats, "running": _running, "pending": pending}
+
+
+try:
+    from standings_events import subscribe as _subscribe_standings
+    _subscribe_standings(on_standings_change, name="prediction_rescore")
+except ImportError:
+    pass
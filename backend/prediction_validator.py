@@ -3,12 +3,29 @@
 Module de validation des prédictions
 Compare les prédictions du système avec les résultats réels des matchs
 Génère des métriques de performance (accuracy, MAE, RMSE)
+
+Validation incrémentale (IncrementalValidator, VALIDATION_DB) :
+- predictions.jsonl / results.jsonl restent la source (ajout en fin) ; seules
+  les lignes ajoutées depuis la dernière lecture (offset + empreinte du début
+  du fichier) sont lues ; un fichier réécrit (cleanup_old_data) est relu en entier
+- les prédictions sont jointes aux résultats par l'index match_id (un nouveau
+  résultat ne touche que les prédictions de son match)
+- scores stockés sous forme canonique "X-Y" (canonical_score) ; un score
+  illisible ou nul est stocké NULL et compte comme testé non parsé, dans les
+  agrégats comme dans l'heure de coupure ; une ligne inexploitable est
+  ignorée (journalisée) sans bloquer la lecture des suivantes
+- agrégats par heure de prédiction (testés, exacts, 1X2, écart de buts, somme
+  des écarts et des carrés) : une fenêtre = somme de ses heures complètes +
+  l'heure de coupure recalculée exactement ; le coût ne dépend pas de l'historique
+- l'historique des rapports est une table indexée par date
 """
 import json
 import os
+import zlib
 import datetime
 import math
-import statistics
+import sqlite3
+import threading
 import logging
 from pathlib import Path
 
@@ -19,7 +36,11 @@ DATA_DIR = Path("/app/data/validation")
 PREDICTIONS_FILE = Path("/app/data/predictions.jsonl")
 RESULTS_FILE = Path("/app/data/results.jsonl")
 REPORT_FILE = DATA_DIR / "validation_report.json"
-HISTORY_FILE = DATA_DIR / "validation_history.jsonl"
+HISTORY_FILE = DATA_DIR / "validation_history.jsonl"   # ancien historique (import unique)
+VALIDATION_DB = DATA_DIR / "validation.db"
+
+HEAD_FINGERPRINT_BYTES = 4096   # début du fichier comparé pour détecter une réécriture
+SCORE_FORMAT = "canonical"      # forme des scores stockés ; autre valeur → agrégats reconstruits
 
 def load_jsonl(file_path):
     """Charge un fichier JSONL (une entrée JSON par ligne)"""
@@ -56,7 +77,10 @@ def parse_score(score_str):
     Gère aussi les formats alternatifs: "X:Y", "X Y"
     """
     if isinstance(score_str, (list, tuple)) and len(score_str) == 2:
-        return tuple(score_str)
+        try:
+            return (int(score_str[0]), int(score_str[1]))
+        except (TypeError, ValueError):
+            pass
     
     if isinstance(score_str, str):
         # Remplacer les séparateurs possibles
@@ -71,58 +95,41 @@ def parse_score(score_str):
     logger.warning(f"Format de score invalide: {score_str}")
     return None
 
-def calculate_metrics(predictions, results_dict):
+def canonical_score(score):
+    """Score sous toutes ses formes acceptées par parse_score → "X-Y" ; None si illisible"""
+    parsed = parse_score(score)
+    return f"{parsed[0]}-{parsed[1]}" if parsed else None
+
+def score_contribution(predicted_score, final_score):
     """
-    Calcule les métriques de validation
-    
-    Args:
-        predictions: Liste des prédictions
-        results_dict: Dictionnaire des résultats réels {match_id: result}
-    
+    Contribution d'une prédiction jointe à son résultat.
+
     Returns:
-        dict: Métriques calculées
+        tuple: (testé, exact, 1X2, écart de buts, parsé, écart absolu, écart²)
     """
-    correct = 0
-    total = 0
-    diffs = []
-    exact_matches = []
-    goal_diff_matches = []
-    outcome_matches = []  # 1X2 (victoire domicile, nul, victoire extérieur)
+    pred_score = parse_score(predicted_score)
+    real_score = parse_score(final_score)
     
-    for pred in predictions:
-        match_id = pred.get("match_id")
-        if not match_id or match_id not in results_dict:
-            continue
-        
-        total += 1
-        
-        # Parser les scores
-        pred_score = parse_score(pred.get("predicted_score", "0-0"))
-        real_score = parse_score(results_dict[match_id].get("final_score", "0-0"))
-        
-        if not pred_score or not real_score:
-            continue
-        
-        # Score exact
-        if pred_score == real_score:
-            correct += 1
-            exact_matches.append(match_id)
-        
-        # Différence de buts
-        pred_diff = pred_score[0] - pred_score[1]
-        real_diff = real_score[0] - real_score[1]
-        if pred_diff == real_diff:
-            goal_diff_matches.append(match_id)
-        
-        # Résultat (1X2)
-        pred_outcome = "1" if pred_diff > 0 else ("X" if pred_diff == 0 else "2")
-        real_outcome = "1" if real_diff > 0 else ("X" if real_diff == 0 else "2")
-        if pred_outcome == real_outcome:
-            outcome_matches.append(match_id)
-        
-        # Différence absolue (pour MAE et RMSE)
-        diff = abs(pred_score[0] - real_score[0]) + abs(pred_score[1] - real_score[1])
-        diffs.append(diff)
+    if not pred_score or not real_score:
+        return (1, 0, 0, 0, 0, 0, 0)
+    
+    # Différence de buts
+    pred_diff = pred_score[0] - pred_score[1]
+    real_diff = real_score[0] - real_score[1]
+    
+    # Résultat (1X2 : victoire domicile, nul, victoire extérieur)
+    pred_outcome = "1" if pred_diff > 0 else ("X" if pred_diff == 0 else "2")
+    real_outcome = "1" if real_diff > 0 else ("X" if real_diff == 0 else "2")
+    
+    # Différence absolue (pour MAE et RMSE)
+    diff = abs(pred_score[0] - real_score[0]) + abs(pred_score[1] - real_score[1])
+    
+    return (1, int(pred_score == real_score), int(pred_outcome == real_outcome),
+            int(pred_diff == real_diff), 1, diff, diff * diff)
+
+def metrics_from_sums(sums):
+    """Métriques à partir des sommes (testés, exacts, 1X2, écart de buts, parsés, Σécart, Σécart²)"""
+    total, correct, outcomes, goal_diffs, parsed, sum_diff, sum_sq = sums
     
     if total == 0:
         return {
@@ -136,26 +143,356 @@ def calculate_metrics(predictions, results_dict):
             "rmse": 0.0
         }
     
-    accuracy = round(correct / total, 3)
-    outcome_accuracy = round(len(outcome_matches) / total, 3)
-    goal_diff_accuracy = round(len(goal_diff_matches) / total, 3)
-    mae = round(statistics.mean(diffs), 3) if diffs else 0.0
-    rmse = round(math.sqrt(statistics.mean([d**2 for d in diffs])), 3) if diffs else 0.0
-    
     return {
         "status": "success",
         "matches_tested": total,
         "correct_predictions": correct,
-        "accuracy": accuracy,
-        "outcome_accuracy": outcome_accuracy,
-        "goal_diff_accuracy": goal_diff_accuracy,
-        "mae": mae,
-        "rmse": rmse,
-        "exact_matches": len(exact_matches),
-        "outcome_matches": len(outcome_matches),
-        "goal_diff_matches": len(goal_diff_matches)
+        "accuracy": round(correct / total, 3),
+        "outcome_accuracy": round(outcomes / total, 3),
+        "goal_diff_accuracy": round(goal_diffs / total, 3),
+        "mae": round(sum_diff / parsed, 3) if parsed else 0.0,
+        "rmse": round(math.sqrt(sum_sq / parsed), 3) if parsed else 0.0,
+        "exact_matches": correct,
+        "outcome_matches": outcomes,
+        "goal_diff_matches": goal_diffs
     }
 
+def calculate_metrics(predictions, results_dict):
+    """
+    Calcule les métriques de validation
+    
+    Args:
+        predictions: Liste des prédictions
+        results_dict: Dictionnaire des résultats réels {match_id: result}
+    
+    Returns:
+        dict: Métriques calculées
+    """
+    sums = [0] * 7
+    for pred in predictions:
+        match_id = pred.get("match_id")
+        if not match_id or match_id not in results_dict:
+            continue
+        contribution = score_contribution(pred.get("predicted_score", "0-0"),
+                                          results_dict[match_id].get("final_score", "0-0"))
+        sums = [a + b for a, b in zip(sums, contribution)]
+    return metrics_from_sums(sums)
+
+def _parse_timestamp(value):
+    """Horodatage ISO naïf (UTC) → epoch ; None si invalide ou avec fuseau (comparaison impossible)"""
+    try:
+        ts = datetime.datetime.fromisoformat(value or "")
+    except (ValueError, TypeError):
+        return None
+    if ts.tzinfo is not None:
+        return None
+    return ts.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+VALIDATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    match_id TEXT,
+    ts REAL NOT NULL,
+    predicted_score TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_match ON predictions(match_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions(ts);
+
+CREATE TABLE IF NOT EXISTS results (
+    match_id TEXT PRIMARY KEY,
+    final_score TEXT
+);
+
+CREATE TABLE IF NOT EXISTS buckets (
+    hour INTEGER PRIMARY KEY,
+    predictions INTEGER NOT NULL DEFAULT 0,
+    tested INTEGER NOT NULL DEFAULT 0,
+    exact INTEGER NOT NULL DEFAULT 0,
+    outcome INTEGER NOT NULL DEFAULT 0,
+    goal_diff INTEGER NOT NULL DEFAULT 0,
+    parsed INTEGER NOT NULL DEFAULT 0,
+    sum_diff REAL NOT NULL DEFAULT 0,
+    sum_sq REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    report TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT_BUCKET = """
+INSERT INTO buckets (hour, predictions, tested, exact, outcome, goal_diff, parsed, sum_diff, sum_sq)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (hour) DO UPDATE SET
+    predictions = predictions + excluded.predictions,
+    tested = tested + excluded.tested,
+    exact = exact + excluded.exact,
+    outcome = outcome + excluded.outcome,
+    goal_diff = goal_diff + excluded.goal_diff,
+    parsed = parsed + excluded.parsed,
+    sum_diff = sum_diff + excluded.sum_diff,
+    sum_sq = sum_sq + excluded.sum_sq
+"""
+
+class IncrementalValidator:
+    """Jointure prédictions ↔ résultats et agrégats horaires persistés (SQLite, une connexion par thread)"""
+
+    def __init__(self, path=VALIDATION_DB, predictions_file=PREDICTIONS_FILE, results_file=RESULTS_FILE,
+                 history_file=HISTORY_FILE):
+        self.path = Path(path)
+        self.sources = {"predictions": Path(predictions_file), "results": Path(results_file)}
+        self.history_file = Path(history_file) if history_file else None
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # -----------------------
+    # Connexion / schéma
+    # -----------------------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(VALIDATION_SCHEMA)
+                    self._import_history(conn)
+                    self._initialized = True
+        return conn
+
+    def _import_history(self, conn):
+        """Import unique de validation_history.jsonl"""
+        if not self.history_file or not self.history_file.exists():
+            return
+        with conn:
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('history_import', '')").rowcount
+            if not claimed:
+                return
+            reports = load_jsonl(self.history_file)
+            conn.executemany("INSERT INTO history (timestamp, report) VALUES (?, ?)",
+                             ((r.get("timestamp", ""), json.dumps(r, ensure_ascii=False)) for r in reports))
+        logger.info(f"📥 {len(reports)} rapports de validation importés depuis {self.history_file}")
+
+    @staticmethod
+    def _meta(conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # -----------------------
+    # Lecture incrémentale des fichiers
+    # -----------------------
+    def _read_new(self, conn, name):
+        """
+        Lignes ajoutées depuis la dernière lecture.
+
+        Returns:
+            tuple: (entrées, nouvel offset, empreinte, réécrit)
+        """
+        path = self.sources[name]
+        offset = int(self._meta(conn, f"{name}_offset", 0))
+        head = self._meta(conn, f"{name}_head", "")
+        if not path.exists():
+            return [], 0, "", offset > 0
+        with open(path, "rb") as f:
+            start = f.read(min(offset, HEAD_FINGERPRINT_BYTES))
+            rewritten = offset > 0 and f"{zlib.crc32(start):08x}" != head
+            if rewritten or os.fstat(f.fileno()).st_size < offset:
+                rewritten, offset = offset > 0, 0
+            f.seek(offset)
+            chunk = f.read()
+            # ligne incomplète en fin de fichier : relue au prochain passage
+            complete = chunk[:chunk.rfind(b"\n") + 1]
+            new_offset = offset + len(complete)
+            f.seek(0)
+            head = f"{zlib.crc32(f.read(min(new_offset, HEAD_FINGERPRINT_BYTES))):08x}"
+        entries = []
+        for line in complete.decode("utf-8", errors="replace").splitlines():
+            if line.strip():
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Ligne invalide dans {path}: {e}")
+        return entries, new_offset, head, rewritten
+
+    @staticmethod
+    def _bucket(conn, hour, predictions, contribution, sign=1):
+        conn.execute(UPSERT_BUCKET, (hour, predictions, *(sign * v for v in contribution)))
+
+    def _reset(self, conn):
+        """Fichier réécrit : agrégats reconstruits depuis le début"""
+        conn.execute("DELETE FROM predictions")
+        conn.execute("DELETE FROM results")
+        conn.execute("DELETE FROM buckets")
+        for key in ("predictions_offset", "predictions_head", "results_offset", "results_head"):
+            conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+        self._set_meta(conn, "predictions_total", 0)
+
+    def _apply_result(self, conn, result):
+        match_id = result.get("match_id")
+        if not match_id:
+            return
+        final_score = canonical_score(result.get("final_score", "0-0"))
+        row = conn.execute("SELECT final_score FROM results WHERE match_id = ?", (match_id,)).fetchone()
+        conn.execute("INSERT OR REPLACE INTO results (match_id, final_score) VALUES (?, ?)", (match_id, final_score))
+        # prédictions déjà connues de ce match : l'ancien résultat est retiré, le nouveau compté
+        for ts, predicted_score in conn.execute(
+                "SELECT ts, predicted_score FROM predictions WHERE match_id = ?", (match_id,)).fetchall():
+            hour = int(ts // 3600)
+            if row is not None:
+                self._bucket(conn, hour, 0, score_contribution(predicted_score, row[0]), sign=-1)
+            self._bucket(conn, hour, 0, score_contribution(predicted_score, final_score))
+
+    def _apply_prediction(self, conn, prediction):
+        ts = _parse_timestamp(prediction.get("timestamp", ""))
+        if ts is None:
+            return   # hors de toute fenêtre (comme avant)
+        match_id = prediction.get("match_id") or None
+        predicted_score = canonical_score(prediction.get("predicted_score", "0-0"))
+        conn.execute("INSERT INTO predictions (match_id, ts, predicted_score) VALUES (?, ?, ?)",
+                     (match_id, ts, predicted_score))
+        contribution = (0,) * 7
+        if match_id:
+            row = conn.execute("SELECT final_score FROM results WHERE match_id = ?", (match_id,)).fetchone()
+            if row is not None:
+                contribution = score_contribution(predicted_score, row[0])
+        self._bucket(conn, int(ts // 3600), 1, contribution)
+
+    @staticmethod
+    def _apply_each(conn, entries, apply, name):
+        """Applique chaque ligne dans son propre savepoint : une ligne invalide est ignorée, pas rejouée"""
+        for entry in entries:
+            conn.execute("SAVEPOINT entry")
+            try:
+                apply(conn, entry)
+            except Exception as e:
+                conn.execute("ROLLBACK TO entry")
+                logger.warning(f"⚠️ Ligne ignorée dans {name} ({e}): {str(entry)[:200]}")
+            conn.execute("RELEASE entry")
+
+    def ingest(self):
+        """
+        Intègre les lignes ajoutées depuis le dernier passage (une transaction).
+
+        Returns:
+            dict: {"predictions": n, "results": n, "rebuilt": bool}
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._meta(conn, "score_format") != SCORE_FORMAT:
+                self._reset(conn)
+                self._set_meta(conn, "score_format", SCORE_FORMAT)
+            results, results_offset, results_head, results_rewritten = self._read_new(conn, "results")
+            predictions, predictions_offset, predictions_head, predictions_rewritten = self._read_new(conn, "predictions")
+            rebuilt = results_rewritten or predictions_rewritten
+            if rebuilt:
+                logger.info("🔄 Fichiers de validation réécrits : agrégats reconstruits")
+                self._reset(conn)
+                if not results_rewritten:
+                    results, results_offset, results_head, _ = self._read_new(conn, "results")
+                if not predictions_rewritten:
+                    predictions, predictions_offset, predictions_head, _ = self._read_new(conn, "predictions")
+            # résultats d'abord : une prédiction et son résultat arrivés ensemble ne sont comptés qu'une fois
+            self._apply_each(conn, results, self._apply_result, "results")
+            self._apply_each(conn, predictions, self._apply_prediction, "predictions")
+            total = int(self._meta(conn, "predictions_total", 0)) + len(predictions)
+            self._set_meta(conn, "predictions_total", total)
+            self._set_meta(conn, "results_offset", results_offset)
+            self._set_meta(conn, "results_head", results_head)
+            self._set_meta(conn, "predictions_offset", predictions_offset)
+            self._set_meta(conn, "predictions_head", predictions_head)
+        return {"predictions": len(predictions), "results": len(results), "rebuilt": rebuilt}
+
+    # -----------------------
+    # Fenêtres
+    # -----------------------
+    def window(self, days_back, now=None):
+        """
+        Agrégats des prédictions faites depuis now - days_back jours.
+
+        Returns:
+            dict: predictions_total, predictions_period, results_available, sums (7 valeurs)
+        """
+        conn = self._conn()
+        now = now or datetime.datetime.utcnow()
+        cutoff = (now - datetime.timedelta(days=days_back)).replace(tzinfo=datetime.timezone.utc).timestamp()
+        cutoff_hour = int(cutoff // 3600)
+        # heures complètes après la coupure
+        row = conn.execute(
+            "SELECT COALESCE(SUM(predictions), 0), COALESCE(SUM(tested), 0), COALESCE(SUM(exact), 0), "
+            "COALESCE(SUM(outcome), 0), COALESCE(SUM(goal_diff), 0), COALESCE(SUM(parsed), 0), "
+            "COALESCE(SUM(sum_diff), 0), COALESCE(SUM(sum_sq), 0) FROM buckets WHERE hour > ?",
+            (cutoff_hour,)).fetchone()
+        period = row[0]
+        sums = list(row[1:])
+        # heure de la coupure : prédictions relues une à une
+        for predicted_score, has_result, final_score in conn.execute(
+                "SELECT p.predicted_score, r.match_id IS NOT NULL, r.final_score FROM predictions p "
+                "LEFT JOIN results r ON r.match_id = p.match_id WHERE p.ts >= ? AND p.ts < ?",
+                (cutoff, (cutoff_hour + 1) * 3600)):
+            period += 1
+            # même règle que les agrégats : un résultat au score NULL compte comme testé
+            if has_result:
+                sums = [a + b for a, b in zip(sums, score_contribution(predicted_score, final_score))]
+        return {
+            "predictions_total": int(self._meta(conn, "predictions_total", 0)),
+            "predictions_period": period,
+            "results_available": conn.execute("SELECT COUNT(*) FROM results").fetchone()[0],
+            "sums": [int(v) if float(v).is_integer() else v for v in sums]
+        }
+
+    # -----------------------
+    # Historique
+    # -----------------------
+    def add_history(self, report):
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT INTO history (timestamp, report) VALUES (?, ?)",
+                         (report.get("timestamp", ""), json.dumps(report, ensure_ascii=False)))
+
+    def history(self, limit=30):
+        rows = self._conn().execute(
+            "SELECT report FROM history ORDER BY timestamp DESC, id DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(report) for report, in rows]
+
+    def prune_history(self, cutoff_iso):
+        """Supprime les rapports antérieurs à cutoff_iso ; retourne (avant, après)"""
+        conn = self._conn()
+        with conn:
+            before = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+            # les rapports sans date sont conservés (comme l'ancien nettoyage)
+            conn.execute("DELETE FROM history WHERE timestamp != '' AND timestamp < ?", (cutoff_iso,))
+            after = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        return before, after
+
+_validator = None
+_validator_lock = threading.Lock()
+
+def get_validator():
+    """Validateur partagé du processus"""
+    global _validator
+    with _validator_lock:
+        if _validator is None:
+            _validator = IncrementalValidator()
+        return _validator
+
 def validate_predictions(days_back=7, save_report=True):
     """
     Valide les prédictions sur une période donnée
@@ -169,11 +506,13 @@ def validate_predictions(days_back=7, save_report=True):
     """
     logger.info(f"🔍 Début de la validation des prédictions (derniers {days_back} jours)")
     
-    # Charger les données
-    predictions = load_jsonl(PREDICTIONS_FILE)
-    results = load_jsonl(RESULTS_FILE)
+    # Intégrer uniquement les nouvelles lignes, puis lire les agrégats de la fenêtre
+    validator = get_validator()
+    ingested = validator.ingest()
+    logger.info(f"📥 {ingested['predictions']} nouvelle(s) prédiction(s), {ingested['results']} nouveau(x) résultat(s)")
+    window = validator.window(days_back)
     
-    if not predictions:
+    if not window["predictions_total"]:
         logger.warning("⚠️ Aucune prédiction trouvée")
         return {
             "status": "no_data",
@@ -181,7 +520,7 @@ def validate_predictions(days_back=7, save_report=True):
             "accuracy": 0.0
         }
     
-    if not results:
+    if not window["results_available"]:
         logger.warning("⚠️ Aucun résultat réel trouvé")
         return {
             "status": "no_data",
@@ -189,41 +528,26 @@ def validate_predictions(days_back=7, save_report=True):
             "accuracy": 0.0
         }
     
-    # Filtrer sur les derniers jours
-    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=days_back)
-    
-    filtered_predictions = []
-    for p in predictions:
-        try:
-            timestamp = datetime.datetime.fromisoformat(p.get("timestamp", ""))
-            if timestamp >= cutoff:
-                filtered_predictions.append(p)
-        except (ValueError, TypeError):
-            continue
-    
-    logger.info(f"📊 {len(filtered_predictions)} prédictions dans la période")
-    
-    # Créer un dictionnaire des résultats
-    results_dict = {r.get("match_id"): r for r in results if r.get("match_id")}
-    logger.info(f"📊 {len(results_dict)} résultats réels disponibles")
+    logger.info(f"📊 {window['predictions_period']} prédictions dans la période")
+    logger.info(f"📊 {window['results_available']} résultats réels disponibles")
     
     # Calculer les métriques
-    metrics = calculate_metrics(filtered_predictions, results_dict)
+    metrics = metrics_from_sums(window["sums"])
     
     # Ajouter des métadonnées
     report = {
         "timestamp": datetime.datetime.utcnow().isoformat(),
         "period_days": days_back,
-        "predictions_total": len(predictions),
-        "predictions_period": len(filtered_predictions),
-        "results_available": len(results_dict),
+        "predictions_total": window["predictions_total"],
+        "predictions_period": window["predictions_period"],
+        "results_available": window["results_available"],
         **metrics
     }
     
     # Sauvegarder le rapport
     if save_report:
         save_json(REPORT_FILE, report)
-        append_jsonl(HISTORY_FILE, report)
+        validator.add_history(report)
         logger.info(f"✅ Rapport de validation généré: accuracy={metrics.get('accuracy', 0):.1%}")
     
     return report
@@ -245,10 +569,8 @@ def get_validation_history(limit=30):
     Returns:
         list: Historique des validations
     """
-    history = load_jsonl(HISTORY_FILE)
-    # Trier par date décroissante et limiter
-    history.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    return history[:limit]
+    # Table indexée par date, plus récents d'abord
+    return get_validator().history(limit)
 
 def add_prediction(match_id, home_team, away_team, predicted_score, confidence=None, league=None):
     """
@@ -307,7 +629,7 @@ def cleanup_old_data(days_to_keep=30):
     """
     cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=days_to_keep)
     
-    for file_path in [PREDICTIONS_FILE, RESULTS_FILE, HISTORY_FILE]:
+    for file_path in [PREDICTIONS_FILE, RESULTS_FILE]:
         if not os.path.exists(file_path):
             continue
         
@@ -329,6 +651,10 @@ def cleanup_old_data(days_to_keep=30):
                 f.write(json.dumps(entry, ensure_ascii=False) + "\n")
         
         logger.info(f"🧹 Nettoyage {file_path}: {len(data)} → {len(filtered)} entrées")
+    
+    # Historique des rapports (la réécriture des fichiers est détectée au prochain ingest)
+    before, after = get_validator().prune_history(cutoff.isoformat())
+    logger.info(f"🧹 Nettoyage historique des validations: {before} → {after} entrées")
 
 if __name__ == "__main__":
     # Test du module
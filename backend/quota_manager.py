@@ -0,0 +1,253 @@
+# /app/backend/quota_manager.py
+"""
+Quotas partagés des sources externes (API-Football, SofaScore, Football-Data,
+scrapers HTML du multi-source updater).
+
+Par fournisseur : seau de jetons (débit + rafale) et plafond quotidien (jour UTC).
+L'état tient dans un petit fichier (QUOTA_STATE_FILE) :
+
+    {"sofascore": ["2025-11-20", 42, 0.37, 1763640000.12], ...}
+     fournisseur: [jour, requêtes du jour, jetons, horodatage des jetons]
+
+protégé par un verrou de thread et un verrou fichier (fcntl) entre processus :
+il survit aux redémarrages et reste cohérent entre workers. Le fichier n'est
+re-parsé que si un autre processus l'a modifié (mtime / taille).
+
+acquire() réserve le prochain créneau libre et n'attend que le temps restant
+jusqu'à ce créneau (pas de pause fixe avant chaque requête) ; les appels
+concurrents obtiennent des créneaux successifs.
+
+Usage:
+    from quota_manager import get_quota_manager
+    quota = get_quota_manager()
+    quota.register("sofascore", daily_cap=300, rate=1 / 1.2, burst=1)
+    if quota.acquire("sofascore"):      # False si plafond quotidien atteint
+        requests.get(...)
+    quota.remaining("sofascore")
+"""
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+QUOTA_STATE_FILE = "/app/data/quota_state.json"
+
+
+class ProviderLimits:
+    """
+    Limites d'un fournisseur.
+
+    Args:
+        daily_cap: requêtes max par jour UTC (None = pas de plafond)
+        rate: jetons regagnés par seconde (None = pas de cadence)
+        burst: jetons max accumulés (rafale autorisée)
+        seed: fonction() → requêtes déjà faites aujourd'hui, appelée une seule
+              fois si l'état ne connaît pas encore ce fournisseur (migration)
+    """
+
+    def __init__(self, daily_cap=None, rate=None, burst=1, seed=None):
+        self.daily_cap = daily_cap
+        self.rate = rate
+        self.burst = max(1, burst or 1)
+        self.seed = seed
+
+
+def _today():
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class QuotaManager:
+    """Seaux de jetons + plafonds quotidiens persistés, partagés threads / processus"""
+
+    def __init__(self, path=QUOTA_STATE_FILE):
+        self.path = path
+        self.providers = {}
+        self._state = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def register(self, name, daily_cap=None, rate=None, burst=1, seed=None):
+        """Déclare (ou met à jour) les limites d'un fournisseur"""
+        self.providers[name] = ProviderLimits(daily_cap, rate, burst, seed)
+
+    # -----------------------
+    # État fichier
+    # -----------------------
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _load(self):
+        """Relit l'état seulement si le fichier a changé depuis la dernière lecture / écriture"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        state = {}
+        if signature is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ État des quotas illisible, réinitialisé: {e}")
+        self._state = state if isinstance(state, dict) else {}
+        self._signature = signature
+
+    def _save(self):
+        # fichier temporaire + os.replace, sans fsync : un crash peut perdre les
+        # dernières réservations mais jamais corrompre le fichier (pas de fsync par requête)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._signature = self._file_signature()
+
+    def _locked(self, func):
+        """Exécute func() sous verrou thread + verrou fichier inter-processus"""
+        with self._lock:
+            if not FCNTL_AVAILABLE:
+                self._load()
+                return func()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._load()
+                    return func()
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _entry(self, name, now):
+        """[jour, utilisées, jetons, horodatage] à jour (jour UTC et jetons regagnés)"""
+        limits = self.providers.get(name) or ProviderLimits()
+        today = _today()
+        entry = self._state.get(name)
+        if entry is None:
+            used = 0
+            if limits.seed:
+                try:
+                    used = int(limits.seed())
+                except Exception as e:
+                    logger.warning(f"⚠️ Amorçage du quota {name} impossible: {e}")
+            entry = [today, used, float(limits.burst), now]
+        if entry[0] != today:
+            entry = [today, 0, entry[2], entry[3]]
+        if limits.rate:
+            entry[2] = min(float(limits.burst), entry[2] + (now - entry[3]) * limits.rate)
+        entry[3] = now
+        self._state[name] = entry
+        return entry
+
+    # -----------------------
+    # API
+    # -----------------------
+    def reserve(self, name, n=1, max_wait=None):
+        """
+        Réserve n requêtes au prochain créneau libre.
+
+        Returns:
+            float: secondes à attendre avant d'envoyer (0.0 = tout de suite),
+            None si le plafond quotidien est atteint ou si l'attente dépasserait max_wait
+            (rien n'est alors réservé)
+        """
+        limits = self.providers.get(name) or ProviderLimits()
+
+        def _reserve():
+            now = time.time()
+            entry = self._entry(name, now)
+            if limits.daily_cap is not None and entry[1] + n > limits.daily_cap:
+                return None
+            delay = 0.0
+            if limits.rate:
+                # jetons négatifs = créneaux déjà promis à d'autres appelants
+                delay = max(0.0, (n - entry[2]) / limits.rate)
+                if max_wait is not None and delay > max_wait:
+                    return None
+                entry[2] -= n
+            entry[1] += n
+            self._save()
+            return delay
+
+        return self._locked(_reserve)
+
+    def acquire(self, name, n=1, max_wait=None):
+        """
+        Réserve puis attend le créneau.
+
+        Returns:
+            bool: True si la requête peut partir, False si plafond atteint / attente trop longue
+        """
+        delay = self.reserve(name, n, max_wait)
+        if delay is None:
+            return False
+        if delay > 0:
+            logger.debug(f"⏱️ {name}: prochain créneau dans {delay:.2f}s")
+            time.sleep(delay)
+        return True
+
+    def try_acquire(self, name, n=1):
+        """Réserve seulement si aucun délai n'est nécessaire"""
+        return self.reserve(name, n, max_wait=0.0) is not None
+
+    def next_slot(self, name):
+        """Secondes avant le prochain créneau libre (None si plafond quotidien atteint)"""
+        limits = self.providers.get(name) or ProviderLimits()
+
+        def _peek():
+            entry = self._entry(name, time.time())
+            if limits.daily_cap is not None and entry[1] >= limits.daily_cap:
+                return None
+            if not limits.rate:
+                return 0.0
+            return max(0.0, (1 - entry[2]) / limits.rate)
+
+        return self._locked(_peek)
+
+    def used_today(self, name):
+        return self._locked(lambda: self._entry(name, time.time())[1])
+
+    def remaining(self, name):
+        """Requêtes restantes aujourd'hui (None si pas de plafond)"""
+        cap = (self.providers.get(name) or ProviderLimits()).daily_cap
+        if cap is None:
+            return None
+        return max(0, cap - self.used_today(name))
+
+    def status(self):
+        """{fournisseur: {used, daily_cap, remaining, next_slot}} pour les fournisseurs déclarés"""
+        report = {}
+        for name, limits in self.providers.items():
+            used = self.used_today(name)
+            report[name] = {
+                "used": used,
+                "daily_cap": limits.daily_cap,
+                "remaining": None if limits.daily_cap is None else max(0, limits.daily_cap - used),
+                "next_slot": self.next_slot(name)
+            }
+        return report
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_quota_manager():
+    """Gestionnaire partagé du processus (état commun à tous les processus via le fichier)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = QuotaManager()
+        return _manager
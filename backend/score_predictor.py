@@ -4,12 +4,15 @@ Basé sur l'algorithme original avec pondération Poisson et correction adaptati
 + Apprentissage par équipe avec historique des 5 derniers matchs
 + NOUVEAU: Algorithme combiné Poisson + ImpliedOdds avec smoothing de voisinage
 + NOUVEAU: Intégration coefficient de classement de ligue
++ Mémoïsation des prédictions (grille + paramètres effectifs, voir prediction_memo)
 """
 import math
 import logging
-import json
-import os
 from collections import defaultdict
+from functools import lru_cache
+
+from team_stats_store import get_store as get_team_store
+from prediction_memo import get_memo, make_key
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,13 @@ BLEND_BETA = 0.7         # poids Poisson vs ImpliedOdds (0..1). 0.7 = 70% Poisso
 EPS = 1e-9               # lissage pour éviter 0
 # ===============================================================
 
+# ====== Tables précalculées (Poisson / gaussienne sur diff) ======
+LAMBDA_DECIMALS = 4          # quantification des lambdas (stats équipes arrondies à 0.01 -> exact)
+PMF_CACHE_SIZE = 4096        # nb max de vecteurs PMF en mémoire (~6 floats chacun)
+DIFF_WEIGHT_CACHE_SIZE = 256 # nb max de vecteurs de poids (diffExpected, alpha)
+CALIBRATION_KEYS = ("MAX_GOALS", "ALPHA", "BLEND_BETA", "EPS")
+# ===============================================================
+
 
 # ============================================================================
 # 🎯 MODULE : PONDÉRATION PAR COTE BOOKMAKER (AJOUT OFFICIEL)
@@ -291,6 +301,17 @@ def calculate_probabilities(scores, diff_expected=2, use_odds_weighting=False,
         logger.warning("Aucune donnée pour la prédiction")
         return {"mostProbableScore": "Aucune donnée", "probabilities": {}}
     
+    # ♻️ Même grille + mêmes paramètres effectifs → résultat mémorisé
+    memo_key = make_key(
+        "classic", scores,
+        diff_expected=diff_expected, odds_weighting=bool(use_odds_weighting),
+        home_coeff=home_coeff, away_coeff=away_coeff, coeffs_applied=league_coeffs_applied
+    )
+    cached = get_memo().get(memo_key)
+    if cached is not None:
+        logger.debug(f"♻️ Prédiction mémorisée: {cached['mostProbableScore']}")
+        return cached
+    
     # Conversion si format liste (venant de l'OCR)
     if isinstance(scores, list):
         scores_dict = {item["score"]: item["odds"] for item in scores}
@@ -418,12 +439,14 @@ def calculate_probabilities(scores, diff_expected=2, use_odds_weighting=False,
     logger.info(f"💯 Confiance globale: {confidence:.2%}")
 
     # 🔁 Étape 6 : Retour formaté
-    return {
+    result = {
         "mostProbableScore": most_probable,
         "probabilities": {k: round(v, 2) for k, v in final_probabilities.items()},
         "confidence": round(confidence, 3),
         "league_coeffs_applied": league_coeffs_applied
     }
+    get_memo().put(memo_key, result)
+    return result
 
 
 # ============================================================================
@@ -431,39 +454,35 @@ def calculate_probabilities(scores, diff_expected=2, use_odds_weighting=False,
 # ============================================================================
 json_path = "/app/data/teams_data.json"
 
+def _team_store():
+    """Dépôt en mémoire des stats d'équipes (voir team_stats_store)"""
+    return get_team_store(json_path)
+
 def _load_data():
-    """Charge les données des équipes"""
-    if not os.path.exists(json_path):
-        os.makedirs(os.path.dirname(json_path), exist_ok=True)
-        with open(json_path, "w") as f: 
-            json.dump({}, f)
-    with open(json_path, "r") as f: 
-        return json.load(f)
+    """Charge les données des équipes (copie de l'état en mémoire)"""
+    return _team_store().all_results()
 
 def _save_data(d): 
-    """Sauvegarde les données des équipes"""
-    with open(json_path, "w") as f: 
-        json.dump(d, f, indent=2)
+    """Sauvegarde les données des équipes (remplacement complet, écriture immédiate)"""
+    _team_store().replace_all(d)
 
 def update_team_results(team, gf, ga):
     """
     Enregistre le résultat d'un match pour une équipe.
     Garde les 5 derniers matchs seulement.
+    Mise à jour immédiate en mémoire, écriture disque différée.
     
     Args:
         team: Nom de l'équipe
         gf: Goals For (buts marqués)
         ga: Goals Against (buts encaissés)
     """
-    d = _load_data()
-    d.setdefault(team, []).append([gf, ga])
-    d[team] = d[team][-5:]  # garde les 5 derniers matchs
-    _save_data(d)
+    _team_store().append_result(team, gf, ga)
     logger.info(f"📝 Stats mises à jour pour {team}: {gf}-{ga}")
 
 def get_team_stats(team):
     """
-    Récupère les statistiques moyennes d'une équipe.
+    Récupère les statistiques moyennes d'une équipe (précalculées, sans I/O).
     
     Args:
         team: Nom de l'équipe
@@ -471,13 +490,11 @@ def get_team_stats(team):
     Returns:
         tuple: (moyenne buts marqués, moyenne buts encaissés)
     """
-    d = _load_data()
-    if team not in d or not d[team]: 
-        return (1.5, 1.5)  # Valeurs par défaut
-    
-    gf = sum(x[0] for x in d[team]) / len(d[team])
-    ga = sum(x[1] for x in d[team]) / len(d[team])
-    return round(gf, 2), round(ga, 2)
+    return _team_store().get_stats(team)
+
+def get_team_results(team):
+    """Derniers résultats [[gf, ga], ...] d'une équipe, None si inconnue"""
+    return _team_store().get_results(team)
 
 def adjust_diff_expected(diff, home, away):
     """
@@ -510,6 +527,10 @@ def get_all_teams_stats():
     """Récupère les statistiques de toutes les équipes"""
     return _load_data()
 
+def get_all_teams_summary():
+    """Stats de toutes les équipes avec moyennes (matches_count, avg_goals_for, ...)"""
+    return _team_store().all_stats()
+
 
 # ============================================================================
 # === NOUVEL ALGORITHME COMBINÉ - predict_combined ===
@@ -538,6 +559,67 @@ def poisson_pmf(k, lam):
     except OverflowError:
         return 0.0
 
+@lru_cache(maxsize=PMF_CACHE_SIZE)
+def _pmf_table(lam, max_goals):
+    return tuple(poisson_pmf(k, lam) for k in range(max_goals + 1))
+
+def poisson_pmf_vector(lam):
+    """
+    Vecteur PMF de Poisson P(k) pour k = 0..MAX_GOALS.
+    Mis en cache par lambda quantifié (LAMBDA_DECIMALS) et MAX_GOALS.
+    """
+    return _pmf_table(round(float(lam), LAMBDA_DECIMALS), MAX_GOALS)
+
+@lru_cache(maxsize=DIFF_WEIGHT_CACHE_SIZE)
+def _diff_weight_table(diff_expected, alpha, max_goals):
+    return tuple(math.exp(-alpha * (d - diff_expected) ** 2) for d in range(max_goals + 1))
+
+def diff_weight_vector(diff_expected, alpha=None):
+    """
+    Poids gaussiens exp(-alpha * (diff - diffExpected)²) pour diff = 0..MAX_GOALS.
+    alpha: ALPHA par défaut. Mis en cache par (diffExpected, alpha, MAX_GOALS).
+    """
+    return _diff_weight_table(float(diff_expected), ALPHA if alpha is None else alpha, MAX_GOALS)
+
+def diff_weight(diff, diff_expected, alpha=None):
+    """Poids gaussien d'une différence de buts (table si diff <= MAX_GOALS)"""
+    table = diff_weight_vector(diff_expected, alpha)
+    if 0 <= diff < len(table):
+        return table[diff]
+    return math.exp(-(ALPHA if alpha is None else alpha) * (diff - diff_expected) ** 2)
+
+def clear_probability_tables():
+    """Vide les tables PMF et de poids gaussiens (et les prédictions mémorisées)"""
+    _pmf_table.cache_clear()
+    _diff_weight_table.cache_clear()
+    get_memo().clear()
+
+def probability_tables_info():
+    """Statistiques des tables précalculées et du cache de prédictions"""
+    return {
+        "pmf": _pmf_table.cache_info()._asdict(),
+        "diff_weight": _diff_weight_table.cache_info()._asdict(),
+        "predictions": get_memo().stats()
+    }
+
+def get_calibration():
+    """Retourne les constantes calibrables de l'algorithme combiné"""
+    return {k: globals()[k] for k in CALIBRATION_KEYS}
+
+def set_calibration(**params):
+    """
+    Met à jour les constantes calibrables (MAX_GOALS, ALPHA, BLEND_BETA, EPS)
+    et invalide les tables précalculées.
+    
+    Exemple: set_calibration(ALPHA=0.8, BLEND_BETA=0.6)
+    """
+    unknown = set(params) - set(CALIBRATION_KEYS)
+    if unknown:
+        raise KeyError(f"Paramètres de calibration inconnus: {sorted(unknown)}")
+    globals().update(params)
+    clear_probability_tables()
+    logger.info(f"⚙️ Calibration mise à jour: {get_calibration()}")
+
 def compute_team_lambdas(teamA_stats, teamB_stats, global_scale=1.0):
     """
     Calcule lambda_home, lambda_away à partir des stats (avg scored/conceded).
@@ -568,12 +650,7 @@ def predict_combined(score_odds_map, teamA_stats=None, teamB_stats=None, diffExp
     if isinstance(score_odds_map, list):
         score_odds_map = {item["score"]: item["odds"] for item in score_odds_map}
     
-    # 1) build implied probabilities from odds
-    implied_raw = {}
-    for s, o in score_odds_map.items():
-        implied_raw[s] = implied_prob_from_odds(o)
-
-    # 2) compute lambdas (Poisson) from team stats if provided, else neutral
+    # 1) compute lambdas (Poisson) from team stats if provided, else neutral
     if teamA_stats and teamB_stats:
         lam_home, lam_away = compute_team_lambdas(teamA_stats, teamB_stats)
         logger.info(f"📊 Lambdas calculés depuis stats équipes: λ_home={lam_home:.2f}, λ_away={lam_away:.2f}")
@@ -581,7 +658,25 @@ def predict_combined(score_odds_map, teamA_stats=None, teamB_stats=None, diffExp
         lam_home, lam_away = 1.5, 1.5
         logger.info(f"📊 Lambdas par défaut: λ_home={lam_home:.2f}, λ_away={lam_away:.2f}")
 
+    # ♻️ Même grille + mêmes lambdas / diffExpected / calibration → résultat mémorisé
+    memo_key = make_key(
+        "combined", score_odds_map,
+        diff_expected=diffExpected, lam_home=lam_home, lam_away=lam_away,
+        **get_calibration()
+    )
+    cached = get_memo().get(memo_key)
+    if cached is not None:
+        logger.debug(f"♻️ Prédiction combinée mémorisée: {cached['mostProbableScore']}")
+        return cached
+
+    # 2) build implied probabilities from odds
+    implied_raw = {}
+    for s, o in score_odds_map.items():
+        implied_raw[s] = implied_prob_from_odds(o)
+
     # 3) compute Poisson joint probs for all score pairs within clamp
+    pmf_home = poisson_pmf_vector(lam_home)
+    pmf_away = poisson_pmf_vector(lam_away)
     poisson_raw = {}
     for s in score_odds_map.keys():
         parts = s.replace(":", "-").split("-")
@@ -598,8 +693,8 @@ def predict_combined(score_odds_map, teamA_stats=None, teamB_stats=None, diffExp
             poisson_raw[s] = EPS
             continue
         # joint prob = P(home goals = h) * P(away goals = a)
-        p_h = poisson_pmf(h, lam_home)
-        p_a = poisson_pmf(a, lam_away)
+        p_h = pmf_home[h]
+        p_a = pmf_away[a]
         poisson_raw[s] = max(EPS, p_h * p_a)
 
     # 4) apply diffExpected gaussian penalty/bonus to poisson_raw (make it stronger)
@@ -614,7 +709,7 @@ def predict_combined(score_odds_map, teamA_stats=None, teamB_stats=None, diffExp
             
         diff = abs(a - h)
         # alpha is stronger than before to increase discrimination
-        weight_diff = math.exp(-ALPHA * (diff - diffExpected)**2)
+        weight_diff = diff_weight(diff, diffExpected)
         adjusted_poisson[s] = p * weight_diff + EPS
         
         if p * weight_diff > 0.01:  # Log seulement les scores significatifs
@@ -670,11 +765,13 @@ def predict_combined(score_odds_map, teamA_stats=None, teamB_stats=None, diffExp
     logger.info(f"🏆 Score le plus probable (combiné): {top_score} ({final_smoothed[top_score]:.2f}%)")
     logger.info(f"💯 Confiance: {confidence:.2%}")
     
-    return {
+    result = {
         "mostProbableScore": top_score,
         "probabilities": {k: round(v, 2) for k, v in final_smoothed.items()},
         "confidence": round(confidence, 3)
     }
+    get_memo().put(memo_key, result)
+    return result
 
 
 # ============================================================================
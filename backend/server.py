@@ -8,7 +8,7 @@ import json
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import List, Optional
 import uuid
 from datetime import datetime, timezone
 import shutil
@@ -28,6 +28,8 @@ from ufa.api_world_coeffs import router as world_coeffs_router
 from ufa.api_ufa_v3 import router as ufa_v3_router
 from api.dashboard_status import router as dashboard_router
 from api.predict_with_odds import router as predict_odds_router
+from api.predict_batch import router as predict_batch_router
+from api.markets import router as markets_router
 from matches_memory import (
     analyze_match_stable, 
     get_match_result, 
@@ -35,9 +37,14 @@ from matches_memory import (
     get_all_matches,
     delete_match,
     clear_all_matches,
-    generate_system_report
+    generate_system_report,
+    analyzed_matches,
+    load_matches_memory
 )
 
+# Mémoire des matchs : ce processus devient propriétaire du journal (les scripts lisent le store)
+load_matches_memory()
+
 # Import des modules de classement de ligues
 import league_fetcher
 import league_coeff
@@ -45,7 +52,8 @@ import league_scheduler
 import prediction_validator
 
 # Import du unified analyzer
-from ufa.unified_analyzer import analyze_image, ANALYSIS_CACHE, REAL_SCORES
+from ufa.unified_analyzer import analyze_image, ANALYSIS_DB, REAL_SCORES
+from ufa.analysis_store import get_analysis_store
 
 
 ROOT_DIR = Path(__file__).parent
@@ -88,6 +96,13 @@ async def startup_event():
         logger.info(f"✅ Planificateur démarré: mise à jour quotidienne à {status['update_time']}")
     except Exception as e:
         logger.error(f"❌ Erreur démarrage planificateur: {e}")
+    
+    # Compaction périodique du store des cotes (rétention : complet 7 jours, puis horaire)
+    try:
+        from tools.odds_store import start_compactor
+        start_compactor()
+    except Exception as e:
+        logger.error(f"❌ Erreur démarrage compacteur des cotes: {e}")
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -476,7 +491,7 @@ async def unified_analyze(
     Unified analyzer endpoint - Replaces both Analyzer UEFA and Mode Production.
     
     - Applies league coefficients automatically
-    - Saves analysis to cache (analysis_cache.jsonl)
+    - Saves analysis to cache (indexed analysis store)
     - Saves real scores if detected (real_scores.jsonl)
     - Compatible with UFA pipeline
     
@@ -567,12 +582,37 @@ async def unified_health():
     """Health check for unified analyzer"""
     return JSONResponse({
         "status": "ok",
-        "analysis_cache": str(ANALYSIS_CACHE),
+        "analysis_cache": ANALYSIS_DB,
         "real_scores": str(REAL_SCORES),
-        "cache_entries": len(open(ANALYSIS_CACHE).readlines()) if ANALYSIS_CACHE.exists() else 0,
+        "cache_entries": get_analysis_store().count(),
         "real_scores_entries": len(open(REAL_SCORES).readlines()) if REAL_SCORES.exists() else 0
     })
 
+@api_router.get("/unified/analyses")
+async def unified_analyses(
+    start: str = None,
+    end: str = None,
+    home: str = None,
+    away: str = None,
+    team: str = None,
+    league: str = None,
+    image_hash: str = None,
+    limit: int = 100,
+    cursor: str = None,
+    descending: bool = False
+):
+    """
+    Analyses du cache (index : horodatage, équipes, ligue, hash d'image).
+    Pagination par curseur : passer next_cursor pour la page suivante.
+    """
+    try:
+        entries, next_cursor = get_analysis_store().query(
+            limit=limit, cursor=cursor, descending=descending, start=start, end=end,
+            home=home, away=away, team=team, league=league, image_hash=image_hash)
+        return {"success": True, "count": len(entries), "analyses": entries, "next_cursor": next_cursor}
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": f"Paramètre invalide: {str(e)}"}, status_code=400)
+
 @api_router.post("/learn")
 async def learn(
     predicted: str = Form(...), 
@@ -957,20 +997,10 @@ async def get_teams_stats():
     Récupère les statistiques de toutes les équipes.
     """
     try:
-        from score_predictor import get_all_teams_stats, get_team_stats
-        
-        teams_data = get_all_teams_stats()
+        from score_predictor import get_all_teams_summary
         
-        # Enrichir avec les moyennes
-        stats = {}
-        for team, matches in teams_data.items():
-            gf, ga = get_team_stats(team)
-            stats[team] = {
-                "matches_count": len(matches),
-                "avg_goals_for": gf,
-                "avg_goals_against": ga,
-                "recent_matches": matches
-            }
+        # Moyennes précalculées en mémoire (pas de relecture par équipe)
+        stats = get_all_teams_summary()
         
         return {"teams": stats, "total_teams": len(stats)}
     except Exception as e:
@@ -986,12 +1016,12 @@ async def get_team_stats_by_name(team_name: str):
     Récupère les statistiques d'une équipe spécifique.
     """
     try:
-        from score_predictor import get_team_stats, _load_data
+        from score_predictor import get_team_stats, get_team_results
         
         gf, ga = get_team_stats(team_name)
-        data = _load_data()
+        results = get_team_results(team_name)
         
-        if team_name not in data:
+        if results is None:
             return {
                 "team": team_name,
                 "found": False,
@@ -1003,8 +1033,8 @@ async def get_team_stats_by_name(team_name: str):
             "found": True,
             "avg_goals_for": gf,
             "avg_goals_against": ga,
-            "matches_count": len(data[team_name]),
-            "recent_matches": data[team_name]
+            "matches_count": len(results),
+            "recent_matches": results
         }
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des stats pour {team_name}: {str(e)}")
@@ -1208,27 +1238,57 @@ async def admin_export_learning_log():
 
 # ========== ENDPOINTS DIAGNOSTIC ==========
 
+def _analysis_time(value, utc):
+    """Horodatage ISO → datetime UTC (naïf : UTC si utc, sinon heure locale) ; None si illisible"""
+    try:
+        ts = datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+    if ts.tzinfo is None and utc:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
 @api_router.get("/diagnostic/last-analysis")
 async def diagnostic_last_analysis():
     """
-    🔍 Retourne la dernière analyse effectuée depuis la mémoire des matchs.
+    🔍 Retourne la dernière analyse effectuée (cache d'analyses, sinon mémoire des matchs).
     """
     try:
-        matches = get_all_matches()
-        
-        if not matches or len(matches.get('matches', {})) == 0:
+        last = get_analysis_store().tail(1)
+        recent = analyzed_matches.recent(1)
+        if not last and not recent:
             return {
                 "success": False,
                 "message": "Aucune analyse en mémoire"
             }
+
+        # la plus récente des deux sources (analyseur unifié en UTC, mémoire des matchs en heure locale)
+        cache_time = _analysis_time(last[0].get("timestamp"), utc=True) if last else None
+        memory_time = _analysis_time(recent[-1][1].get("analyzed_at"), utc=False) if recent else None
+        if last and (not recent or memory_time is None or (cache_time is not None and cache_time >= memory_time)):
+            entry = last[0]
+            prediction = entry.get("prediction") or {}
+            return {
+                "success": True,
+                "source": "analysis_cache",
+                "analysis": {
+                    "match_name": f"{entry.get('home_team') or 'Unknown'} - {entry.get('away_team') or 'Unknown'}",
+                    "league": entry.get("league"),
+                    "analyzed_at": entry.get("timestamp"),
+                    "image_hash": entry.get("image_hash"),
+                    "confidence": prediction.get("confidence"),
+                    "top3": prediction.get("top3"),
+                    "extracted_scores": entry.get("scores"),
+                    "probabilities": prediction.get("probabilities")
+                }
+            }
         
-        # Récupérer le dernier match analysé
-        all_matches = matches.get('matches', {})
-        last_match_id = list(all_matches.keys())[-1]
-        last_match = all_matches[last_match_id]
+        # Dernier match analysé (mémoire des matchs)
+        last_match_id, last_match = recent[-1]
         
         return {
             "success": True,
+            "source": "matches_memory",
             "match_id": last_match_id,
             "analysis": {
                 "match_name": last_match.get("match_name"),
@@ -1279,14 +1339,16 @@ async def admin_cache_status():
     🔍 [ADMIN] Affiche l'état du cache en mémoire
     """
     try:
-        from matches_memory import analyzed_matches
+        from matches_memory import analyzed_matches, get_cache_metrics
+        from prediction_memo import get_memo
+        from ufa.world_coeffs import get_index_info as get_world_index_info
         
         # Compter les entrées
         cache_count = len(analyzed_matches)
         
         # Lister les dernières entrées
         recent_matches = []
-        for match_id, data in list(analyzed_matches.items())[-5:]:
+        for match_id, data in analyzed_matches.recent(5):
             recent_matches.append({
                 "match_id": match_id,
                 "match_name": data.get("match_name"),
@@ -1297,6 +1359,11 @@ async def admin_cache_status():
             "success": True,
             "cache_count": cache_count,
             "recent_matches": recent_matches,
+            "matches_cache": get_cache_metrics(),
+            "analysis_cache": get_analysis_store().stats(),
+            "prediction_memo": get_memo().stats(),
+            "standings_index": league_coeff.get_index_info(),
+            "world_coeffs_index": get_world_index_info(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -1305,36 +1372,26 @@ async def admin_cache_status():
 @api_router.delete("/admin/clear-analysis-cache")
 async def admin_clear_analysis_cache():
     """
-    🗑️ [ADMIN] Vide complètement le cache des analyses (matches_memory + analysis_cache.jsonl).
+    🗑️ [ADMIN] Vide complètement le cache des analyses (matches_memory + cache d'analyses).
     Utile pour forcer de nouveaux calculs sur tous les matchs.
     """
     try:
         # Vider matches_memory
         clear_all_matches()
         
-        # Vider analysis_cache.jsonl (le vrai cache utilisé par unified analyzer)
-        cache_file = Path("/app/data/analysis_cache.jsonl")
-        if cache_file.exists():
-            # Backup avant suppression
-            backup_file = Path(f"/app/data/analysis_cache_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
-            shutil.copy(cache_file, backup_file)
-            
-            # Vider le fichier
-            cache_file.write_text("")
-            logger.info(f"✅ Cache vidé: {cache_file}, backup: {backup_file}")
-            
-            return {
-                "success": True,
-                "message": "Cache d'analyse vidé avec succès (matches_memory + analysis_cache.jsonl)",
-                "backup": str(backup_file),
-                "timestamp": datetime.now().isoformat()
-            }
-        else:
-            return {
-                "success": True,
-                "message": "Cache matches_memory vidé (analysis_cache.jsonl n'existait pas)",
-                "timestamp": datetime.now().isoformat()
-            }
+        # Vider le cache d'analyses (unified analyzer) : rotation de segment,
+        # l'ancien segment reste dans la base comme sauvegarde
+        rotation = get_analysis_store().rotate()
+        logger.info(f"✅ Cache vidé: segment {rotation['archived_segment']} archivé "
+                    f"({rotation['archived_entries']} analyses)")
+        
+        return {
+            "success": True,
+            "message": "Cache d'analyse vidé avec succès (matches_memory + cache d'analyses)",
+            "archived_segment": rotation["archived_segment"],
+            "archived_entries": rotation["archived_entries"],
+            "timestamp": datetime.now().isoformat()
+        }
             
     except Exception as e:
         logger.error(f"Erreur lors du vidage du cache: {str(e)}")
@@ -1733,7 +1790,7 @@ async def api_get_team_coeff(
         # Essayer de récupérer la position si dans une ligue avec classement
         pos = None
         try:
-            pos = league_fetcher.get_team_position(team, source if source != "european_fallback" else league)
+            pos = league_coeff.get_team_rank(team, source if source != "european_fallback" else league)
         except:
             pass
         
@@ -1769,6 +1826,39 @@ async def api_clear_coeff_cache():
             status_code=500
         )
 
+@api_router.get("/admin/league/changes")
+async def api_get_standings_changes(league: Optional[str] = Query(None)):
+    """Derniers changements de classement et état du re-scoring des prédictions"""
+    try:
+        import standings_events
+        import prediction_rescore
+        return {
+            "success": True,
+            "changes": standings_events.get_recent_changes(league),
+            "subscribers": standings_events.get_subscribers(),
+            "rescore": prediction_rescore.get_rescore_status()
+        }
+    except Exception as e:
+        return JSONResponse(
+            {"success": False, "error": str(e)},
+            status_code=500
+        )
+
+@api_router.get("/admin/quotas")
+async def api_get_quotas():
+    """Quotas des sources externes : requêtes du jour, restantes, prochain créneau"""
+    try:
+        from quota_manager import get_quota_manager
+        import tools.api_football_fetcher  # déclarent leurs fournisseurs à l'import
+        import tools.sofascore_scraper
+        import tools.multi_source_updater
+        return {"success": True, "quotas": get_quota_manager().status()}
+    except Exception as e:
+        return JSONResponse(
+            {"success": False, "error": str(e)},
+            status_code=500
+        )
+
 @api_router.get("/admin/league/scheduler-status")
 async def api_get_scheduler_status():
     """Récupère le statut du planificateur automatique"""
@@ -1964,6 +2054,8 @@ app.include_router(world_coeffs_router)
 app.include_router(ufa_v3_router)
 app.include_router(dashboard_router)
 app.include_router(predict_odds_router)
+app.include_router(predict_batch_router)
+app.include_router(markets_router)
 
 app.add_middleware(
     CORSMiddleware,
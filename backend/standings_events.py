@@ -0,0 +1,148 @@
+# /app/backend/standings_events.py
+"""
+Diff incrémental des classements et événements de changement.
+
+Chaque écriture d'un fichier de ligue (league_fetcher.save_league_data,
+league_unified.save_league_to_file, et les save_league_standings des outils
+api_football_fetcher, football_data_standings, sofascore_scraper ainsi que
+league_updater_unified.update_league_smart) compare l'ancien et le nouveau classement
+et publie un événement si des positions ont changé :
+
+    {"league": "LaLiga", "timestamp": "...",
+     "changed": {"FC Barcelona": [2, 1], "Real Madrid CF": [1, 2]},
+     "added": [...], "removed": [...], "teams": [...toutes les équipes touchées]}
+
+Les caches dépendants s'abonnent (subscribe) et n'invalident que les ligues /
+équipes touchées, au lieu de league_coeff.clear_cache() après chaque mise à jour.
+Abonnés chargés par défaut : league_coeff (index des classements) et
+prediction_rescore (re-scoring en arrière-plan des prédictions récentes).
+"""
+import os
+import json
+import logging
+import importlib
+import threading
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+CHANGES_LOG = "/app/data/leagues/standings_changes.jsonl"
+MAX_RECENT_EVENTS = 50
+DEFAULT_SUBSCRIBERS = ("league_coeff", "prediction_rescore")
+
+_subscribers = []      # [(nom, callback)]
+_recent = deque(maxlen=MAX_RECENT_EVENTS)
+_lock = threading.Lock()
+_defaults_loaded = False
+
+
+def _ranks(data):
+    """{équipe: position} depuis un fichier de ligue ({"teams": [...]}) ou une liste d'équipes"""
+    teams = data.get("teams", []) if isinstance(data, dict) else (data or [])
+    ranks = {}
+    for team in teams:
+        name = team.get("name") or team.get("team")
+        rank = team.get("rank", team.get("position"))
+        if not name:
+            continue
+        try:
+            ranks[name] = int(rank)
+        except (TypeError, ValueError):
+            ranks[name] = None
+    return ranks
+
+
+def diff_standings(league, old_data, new_data):
+    """
+    Compare deux classements d'une ligue.
+
+    Returns:
+        dict: événement de changement, ou None si aucune position n'a bougé
+    """
+    old, new = _ranks(old_data), _ranks(new_data)
+    changed = {team: [old[team], rank] for team, rank in new.items() if team in old and old[team] != rank}
+    added = sorted(team for team in new if team not in old)
+    removed = sorted(team for team in old if team not in new)
+    if not (changed or added or removed):
+        return None
+    return {
+        "league": league,
+        "timestamp": datetime.now().isoformat(),
+        "changed": changed,
+        "added": added,
+        "removed": removed,
+        "teams": sorted(set(changed) | set(added) | set(removed))
+    }
+
+
+def subscribe(callback, name=None):
+    """Abonne callback(change) aux changements de classement (idempotent par nom)"""
+    name = name or f"{callback.__module__}.{callback.__qualname__}"
+    with _lock:
+        if any(existing == name for existing, _ in _subscribers):
+            return
+        _subscribers.append((name, callback))
+    logger.debug(f"📡 Abonné aux changements de classement: {name}")
+
+
+def _load_default_subscribers():
+    """Importe les modules abonnés par défaut (ils s'abonnent à l'import)"""
+    global _defaults_loaded
+    if _defaults_loaded:
+        return
+    _defaults_loaded = True
+    for module in DEFAULT_SUBSCRIBERS:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"⚠️ Abonné {module} non chargé: {e}")
+
+
+def _log_change(change):
+    try:
+        os.makedirs(os.path.dirname(CHANGES_LOG), exist_ok=True)
+        with open(CHANGES_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(change, ensure_ascii=False) + "\n")
+    except Exception as e:
+        logger.warning(f"⚠️ Journal des changements non écrit: {e}")
+
+
+def publish(change):
+    """Diffuse un événement à tous les abonnés (une erreur n'arrête pas les autres)"""
+    _load_default_subscribers()
+    _recent.append(change)
+    _log_change(change)
+    logger.info(f"📡 {change['league']}: {len(change['changed'])} positions modifiées, "
+                f"{len(change['added'])} ajouts, {len(change['removed'])} retraits")
+    with _lock:
+        subscribers = list(_subscribers)
+    for name, callback in subscribers:
+        try:
+            callback(change)
+        except Exception as e:
+            logger.error(f"❌ Abonné {name} en erreur sur {change['league']}: {e}")
+
+
+def notify_league_saved(league, old_data, new_data):
+    """
+    À appeler après l'écriture d'un fichier de ligue.
+
+    Returns:
+        dict: l'événement publié, None si le classement est identique
+    """
+    change = diff_standings(league, old_data, new_data)
+    if change is None:
+        logger.debug(f"♻️ {league}: classement identique, aucun événement")
+        return None
+    publish(change)
+    return change
+
+
+def get_recent_changes(league=None):
+    """Derniers événements (les plus récents en premier)"""
+    return [c for c in reversed(_recent) if league is None or c["league"] == league]
+
+
+def get_subscribers():
+    return [name for name, _ in _subscribers]
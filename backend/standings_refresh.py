@@ -0,0 +1,404 @@
+# /app/backend/standings_refresh.py
+"""
+Moteur asynchrone de rafraîchissement des classements.
+
+Toutes les pages sont récupérées en parallèle via un client HTTP mutualisé
+(keep-alive), avec :
+- une limite de concurrence et un intervalle minimum entre requêtes par hôte
+- des requêtes conditionnelles (If-None-Match / If-Modified-Since) à partir des
+  validateurs mémorisés dans http_validators.json
+- une empreinte du contenu : une page identique à la précédente (304 ou même
+  hash) ne passe ni par le parsing ni par l'écriture du fichier de ligue
+
+Chaque travail (RefreshJob) fournit son URL, une fonction de parsing et une
+fonction de sauvegarde ; les ligues Wikipedia de league_fetcher et l'API
+Football-Data de multi_source_updater utilisent le même moteur.
+
+Test hors ligne : tools/standings_fixture_server.py rejoue des pages
+enregistrées (option record_dir) avec ETag / Last-Modified.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logger.warning("⚠️ httpx non disponible - rafraîchissement concurrent désactivé")
+
+VALIDATORS_FILE = "/app/data/leagues/http_validators.json"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+MAX_CONNECTIONS = 16
+REQUEST_TIMEOUT = 15.0
+CONNECT_TIMEOUT = 5.0
+RETRY_ATTEMPTS = 2
+RETRY_BACKOFF = 1.0  # secondes * tentative
+
+# Limites par hôte : requêtes simultanées et intervalle minimum entre deux départs
+DEFAULT_HOST_LIMIT = {"concurrency": 4, "min_interval": 0.25}
+HOST_LIMITS = {
+    "en.wikipedia.org": {"concurrency": 4, "min_interval": 0.25},
+    "api.football-data.org": {"concurrency": 2, "min_interval": 1.0},
+}
+
+
+class RefreshJob:
+    """
+    Un document à rafraîchir.
+
+    Args:
+        key: identifiant stable (nom de ligue, code API...) des validateurs
+        url: URL à récupérer
+        parse: fonction(texte) → données (None / vide = rien d'exploitable)
+        save: fonction(données) appelée uniquement si le contenu a changé
+        headers: en-têtes supplémentaires (ex: X-Auth-Token)
+        force: ignorer les validateurs (requête complète, parsing forcé)
+    """
+
+    def __init__(self, key, url, parse, save=None, headers=None, force=False):
+        self.key = key
+        self.url = url
+        self.parse = parse
+        self.save = save
+        self.headers = headers or {}
+        self.force = force
+
+
+class HostLimiter:
+    """Sémaphore + cadence minimale pour un hôte"""
+
+    def __init__(self, concurrency, min_interval):
+        self._sem = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._min_interval = min_interval
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start = max(now, self._next_start)
+            self._next_start = start + self._min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._sem.release()
+
+
+class ValidatorStore:
+    """
+    Validateurs HTTP et empreintes par clé :
+    {key: {url, etag, last_modified, hash, checked_at, changed_at}}
+    """
+
+    def __init__(self, path=VALIDATORS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Validateurs HTTP illisibles ({e}), réinitialisation")
+            return {}
+
+    def get(self, key, url):
+        entry = self._data.get(key)
+        # Validateurs d'une autre URL (saison suivante...) : inutilisables
+        if not entry or entry.get("url") != url:
+            return {}
+        return entry
+
+    def update(self, key, **fields):
+        with self._lock:
+            entry = self._data.setdefault(key, {})
+            entry.update(fields)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+
+def content_hash(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _conditional_headers(validators):
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _record(record_dir, job, body, response):
+    """Enregistre la page brute (rejouée par tools/standings_fixture_server.py)"""
+    os.makedirs(record_dir, exist_ok=True)
+    ext = ".json" if "json" in response.headers.get("content-type", "") else ".html"
+    with open(os.path.join(record_dir, f"{job.key}{ext}"), "wb") as f:
+        f.write(body)
+
+
+async def _get(client, job, headers):
+    last_error = None
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            response = await client.get(job.url, headers=headers)
+            if response.status_code < 500:
+                return response
+            last_error = f"HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            last_error = f"{type(e).__name__}: {e}"
+        if attempt + 1 < RETRY_ATTEMPTS:
+            await asyncio.sleep(RETRY_BACKOFF * (attempt + 1))
+    raise RuntimeError(last_error)
+
+
+async def _run_job(client, limiter, store, job, record_dir):
+    t0 = time.perf_counter()
+    result = {"key": job.key, "url": job.url, "status": "error", "http_status": None,
+              "bytes": 0, "data": None, "error": None}
+    validators = {} if job.force else store.get(job.key, job.url)
+    headers = dict(job.headers)
+    headers.update(_conditional_headers(validators))
+
+    try:
+        async with limiter:
+            response = await _get(client, job, headers)
+        result["http_status"] = response.status_code
+        now = time.time()
+
+        if response.status_code == 304:
+            store.update(job.key, checked_at=now)
+            result["status"] = "not_modified"
+        elif response.status_code == 429:
+            result["status"] = "rate_limited"
+        elif response.status_code != 200:
+            result["error"] = f"HTTP {response.status_code}"
+        else:
+            body = response.content
+            result["bytes"] = len(body)
+            digest = content_hash(body)
+            if record_dir:
+                _record(record_dir, job, body, response)
+            # validateurs mémorisés seulement pour un contenu exploité
+            fresh_validators = {"url": job.url, "etag": response.headers.get("etag"),
+                                "last_modified": response.headers.get("last-modified"),
+                                "checked_at": now}
+
+            if not job.force and validators.get("hash") == digest:
+                store.update(job.key, **fresh_validators)
+                result["status"] = "unchanged"
+            else:
+                # parsing hors boucle événementielle (BeautifulSoup est synchrone)
+                data = await asyncio.to_thread(job.parse, response.text)
+                if not data:
+                    result["status"] = "empty"
+                else:
+                    if job.save:
+                        await asyncio.to_thread(job.save, data)
+                    store.update(job.key, hash=digest, changed_at=now, **fresh_validators)
+                    result["status"] = "updated"
+                    result["data"] = data
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["duration"] = round(time.perf_counter() - t0, 3)
+    icon = {"updated": "✅", "not_modified": "♻️", "unchanged": "♻️"}.get(result["status"], "⚠️")
+    logger.info(f"{icon} {job.key}: {result['status']} ({result['duration']}s"
+                + (f", {result['error']}" if result["error"] else "") + ")")
+    return result
+
+
+async def run_jobs(jobs, validators_path=VALIDATORS_FILE, host_limits=None, record_dir=None):
+    """
+    Exécute les travaux en parallèle avec un client mutualisé.
+
+    Returns:
+        dict: {key: {"status", "http_status", "bytes", "duration", "data", "error"}}
+        status ∈ updated | not_modified | unchanged | empty | rate_limited | error
+    """
+    if not HTTPX_AVAILABLE:
+        raise RuntimeError("httpx non disponible")
+
+    limits = dict(HOST_LIMITS)
+    limits.update(host_limits or {})
+    limiters = {}
+    for job in jobs:
+        host = urlsplit(job.url).netloc
+        if host not in limiters:
+            cfg = limits.get(host, DEFAULT_HOST_LIMIT)
+            limiters[host] = HostLimiter(cfg["concurrency"], cfg["min_interval"])
+
+    store = ValidatorStore(validators_path)
+    client_limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    timeout = httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+    async with httpx.AsyncClient(limits=client_limits, timeout=timeout, follow_redirects=True,
+                                 headers={"User-Agent": USER_AGENT}) as client:
+        results = await asyncio.gather(*[
+            _run_job(client, limiters[urlsplit(job.url).netloc], store, job, record_dir)
+            for job in jobs
+        ])
+
+    try:
+        store.save()
+    except Exception as e:
+        logger.error(f"❌ Sauvegarde des validateurs HTTP échouée: {e}")
+    return {r["key"]: r for r in results}
+
+
+def run_sync(coro):
+    """Exécute une coroutine depuis du code synchrone (y compris sous une boucle active)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Appelé depuis un handler async : boucle dédiée dans un thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+# =============================================================================
+# CLASSEMENTS DE LIGUE (league_fetcher)
+# =============================================================================
+
+def _league_is_fresh(league_name, ttl, store):
+    """Dernière vérification (écriture ou 304) plus récente que ttl"""
+    import league_fetcher
+
+    checked_at = store.get(league_name, league_fetcher.LEAGUE_CONFIG[league_name]["url"]).get("checked_at", 0)
+    if time.time() - checked_at < ttl:
+        return True
+    data = league_fetcher.load_league_data(league_name)
+    if not data or "updated" not in data:
+        return False
+    try:
+        from datetime import datetime, timezone
+        updated = datetime.fromisoformat(data["updated"].replace("Z", "+00:00"))
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - updated).total_seconds() < ttl
+    except Exception:
+        return False
+
+
+def league_jobs(leagues, force=False, urls=None):
+    """RefreshJob par ligue (parser + save_league_data de league_fetcher)"""
+    import league_fetcher
+
+    jobs = []
+    for league_name in leagues:
+        config = league_fetcher.LEAGUE_CONFIG.get(league_name)
+        if not config:
+            logger.warning(f"⚠️ Ligue inconnue: {league_name}")
+            continue
+        parser = getattr(league_fetcher, config["method"], None)
+        if parser is None:
+            logger.warning(f"⚠️ Parser {config['method']} introuvable pour {league_name}")
+            continue
+        jobs.append(RefreshJob(
+            key=league_name,
+            url=(urls or {}).get(league_name, config["url"]),
+            parse=parser,
+            save=lambda teams, name=league_name: league_fetcher.save_league_data(name, teams),
+            # sans fichier local, un 304 ne servirait à rien
+            force=force or not os.path.exists(config["fallback_file"])
+        ))
+    return jobs
+
+
+async def refresh_leagues_async(leagues=None, force=False, ttl=None, urls=None,
+                                validators_path=VALIDATORS_FILE, record_dir=None):
+    """
+    Rafraîchit les classements en parallèle.
+
+    Args:
+        leagues: ligues à rafraîchir (toutes par défaut)
+        force: ignorer TTL et validateurs
+        ttl: secondes pendant lesquelles une ligue vérifiée n'est pas redemandée
+             (league_fetcher.DEFAULT_TTL par défaut)
+        urls: {ligue: url} pour remplacer les URLs configurées (serveur de fixtures)
+        record_dir: dossier où enregistrer les pages reçues
+
+    Returns:
+        dict: {ligue: résultat} (status "fresh" si ignorée grâce au TTL)
+    """
+    import league_fetcher
+
+    leagues = list(leagues or league_fetcher.LEAGUE_CONFIG.keys())
+    ttl = league_fetcher.DEFAULT_TTL if ttl is None else ttl
+
+    results, to_fetch = {}, []
+    store = ValidatorStore(validators_path)
+    for league_name in leagues:
+        if not force and league_name in league_fetcher.LEAGUE_CONFIG and _league_is_fresh(league_name, ttl, store):
+            results[league_name] = {"key": league_name, "status": "fresh"}
+        else:
+            to_fetch.append(league_name)
+
+    jobs = league_jobs(to_fetch, force=force, urls=urls)
+    if jobs:
+        results.update(await run_jobs(jobs, validators_path=validators_path, record_dir=record_dir))
+    for league_name in to_fetch:
+        results.setdefault(league_name, {"key": league_name, "status": "error", "error": "non configurée"})
+    return results
+
+
+def refresh_leagues(leagues=None, force=False, ttl=None, urls=None,
+                    validators_path=VALIDATORS_FILE, record_dir=None):
+    """Version synchrone de refresh_leagues_async"""
+    return run_sync(refresh_leagues_async(leagues, force, ttl, urls, validators_path, record_dir))
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    sys.path.insert(0, '/app/backend')
+    parser = argparse.ArgumentParser(description="Rafraîchissement concurrent des classements")
+    parser.add_argument("--league", action="append", help="Ligue à rafraîchir (répétable, défaut: toutes)")
+    parser.add_argument("--force", action="store_true", help="Ignorer TTL et validateurs")
+    parser.add_argument("--base-url", help="Serveur de fixtures: {base-url}/{ligue}.html")
+    parser.add_argument("--record", help="Dossier où enregistrer les pages reçues")
+    parser.add_argument("--validators", default=VALIDATORS_FILE, help="Fichier des validateurs HTTP")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    import league_fetcher
+    leagues = args.league or list(league_fetcher.LEAGUE_CONFIG.keys())
+    urls = {lg: f"{args.base_url.rstrip('/')}/{lg}.html" for lg in leagues} if args.base_url else None
+
+    t0 = time.perf_counter()
+    report = refresh_leagues(leagues, force=args.force, urls=urls,
+                             validators_path=args.validators, record_dir=args.record)
+    print(f"\n=== {len(report)} ligues en {time.perf_counter() - t0:.2f}s ===")
+    for league_name, res in report.items():
+        print(f"  {league_name:16s} {res['status']:13s} {res.get('duration', '')}")
@@ -0,0 +1,95 @@
+# /app/backend/team_keys.py
+"""
+Noms d'équipes et index chargés depuis des fichiers (partagés par tous les modules).
+
+- normalize_key : clé de recherche (sans accents, casse repliée, ponctuation →
+  espaces), la même pour les cotes, le cache d'analyses, les scores réels, le
+  classement FIFA, les coefficients mondiaux et les classements de ligue
+- clean_name : nom affiché (sans parenthèses ni accents, espaces réduits)
+- FileIndex : index reconstruit quand ses fichiers changent (signature
+  mtime/taille vérifiée au plus une fois par intervalle), publié en bloc
+
+Usage:
+    from team_keys import normalize_key, file_signature, FileIndex
+
+    _index = FileIndex(lambda signature: MyIndex(signature, load()),
+                       lambda: file_signature(PATH), INDEX_CHECK_INTERVAL)
+    _index.get()                  # index courant
+    _index.refresh(force=True)    # après une écriture du fichier
+"""
+import os
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Optional, Tuple
+
+
+def strip_accents(name: str) -> str:
+    """Retire les accents (décomposition NFKD, marques combinantes supprimées)"""
+    name = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in name if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=8192)
+def normalize_key(name: Optional[str]) -> str:
+    """Clé normalisée : sans accents, casse repliée, ponctuation → espaces"""
+    name = strip_accents(name or "").casefold()
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name).split())
+
+
+def clean_name(name: str) -> str:
+    """Nom d'équipe affiché : sans parenthèses ni accents, espaces réduits"""
+    name = re.sub(r"\(.*?\)", "", name)
+    name = strip_accents(name.strip())
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def file_signature(path) -> Tuple:
+    """(mtime_ns, taille) du fichier, (None, None) s'il n'existe pas"""
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (None, None)
+
+
+class FileIndex:
+    """
+    Index construit depuis des fichiers : build(signature) n'est rappelé que si
+    signature() a changé. Les lecteurs gardent l'index qu'ils ont obtenu, le
+    nouveau est publié en bloc.
+    """
+
+    def __init__(self, build: Callable, signature: Callable, check_interval: float = 1.0):
+        self.build = build
+        self.signature = signature
+        self.check_interval = check_interval
+        self.lock = Lock()
+        self.current = None
+        self.current_signature = None
+        self.checked = 0.0
+        self.rebuilds = 0
+
+    def publish(self, index, signature):
+        """Remplace l'index courant (appelant sous self.lock)"""
+        self.current, self.current_signature = index, signature
+        self.rebuilds += 1
+        return index
+
+    def refresh(self, force: bool = False):
+        """Reconstruit l'index si les fichiers ont changé (ou si force=True)"""
+        with self.lock:
+            self.checked = time.monotonic()
+            signature = self.signature()
+            if force or self.current is None or signature != self.current_signature:
+                return self.publish(self.build(signature), signature)
+            return self.current
+
+    def get(self):
+        """Index courant (fichiers vérifiés au plus une fois par check_interval)"""
+        index = self.current
+        if index is None or time.monotonic() - self.checked >= self.check_interval:
+            return self.refresh()
+        return index
@@ -0,0 +1,220 @@
+# /app/backend/team_stats_store.py
+"""
+Stockage en mémoire des statistiques d'équipes (teams_data.json).
+
+- Carte en mémoire {équipe: derniers résultats [[buts_pour, buts_contre], ...]}
+  avec moyennes précalculées : les lectures ne touchent pas le disque
+- Écriture différée (write-behind) : les ajouts sont regroupés puis écrits
+  de manière atomique (tmp + os.replace) après FLUSH_DELAY secondes
+- Rechargement si le fichier est modifié par un autre processus
+  (ex: modules/local_learning_safe), détecté via son mtime au plus une fois
+  toutes les RELOAD_CHECK_INTERVAL secondes. Les ajouts pas encore écrits
+  sont réappliqués sur les données rechargées.
+"""
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS = (1.5, 1.5)   # moyennes par défaut (équipe inconnue)
+KEEP_LAST = 5                # nombre de matchs conservés par équipe
+FLUSH_DELAY = 1.0            # délai d'écriture différée (secondes)
+RELOAD_CHECK_INTERVAL = 2.0  # fréquence max de vérification du mtime (secondes)
+
+
+def _averages(results):
+    """Moyennes (buts marqués, buts encaissés) arrondies à 0.01"""
+    if not results:
+        return DEFAULT_STATS
+    gf = sum(x[0] for x in results) / len(results)
+    ga = sum(x[1] for x in results) / len(results)
+    return round(gf, 2), round(ga, 2)
+
+
+class TeamStatsStore:
+    """Dépôt des stats d'équipes, partagé par tout le processus"""
+
+    def __init__(self, path, keep_last=KEEP_LAST, flush_delay=FLUSH_DELAY,
+                 reload_interval=RELOAD_CHECK_INTERVAL):
+        self.path = path
+        self.keep_last = keep_last
+        self.flush_delay = flush_delay
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        # {équipe: (tuple des résultats, (moyenne_pour, moyenne_contre))}
+        # remplacé en bloc ou entrée par entrée : les lecteurs ne prennent pas de verrou
+        self._entries = None
+        self._mtime = None
+        self._last_check = 0.0
+        self._pending = []       # ajouts pas encore écrits [(équipe, gf, ga)]
+        self._timer = None
+        self.reloads = 0
+        self.flushes = 0
+
+    # ------------------------------------------------------------------
+    # Chargement / rechargement
+    # ------------------------------------------------------------------
+
+    def _read_file(self):
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._write_file({})
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        return data, os.stat(self.path).st_mtime_ns
+
+    def _build(self, data):
+        return {team: (tuple(tuple(r) for r in res), _averages(res)) for team, res in data.items()}
+
+    def _load(self):
+        with self._lock:
+            data, mtime = self._read_file()
+            for team, gf, ga in self._pending:
+                self._append_to(data, team, gf, ga)
+            self._entries = self._build(data)
+            self._mtime = mtime
+            self._last_check = time.monotonic()
+            self.reloads += 1
+
+    def _ensure_fresh(self):
+        """Charge au premier accès, puis recharge si le fichier a changé (mtime)"""
+        if self._entries is None:
+            self._load()
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            logger.info(f"🔄 {self.path} modifié sur disque, rechargement des stats d'équipes")
+            self._load()
+
+    def reload(self):
+        """Force le rechargement depuis le disque"""
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Lecture (sans I/O disque)
+    # ------------------------------------------------------------------
+
+    def get_stats(self, team):
+        """Moyennes (buts marqués, buts encaissés), DEFAULT_STATS si inconnue"""
+        self._ensure_fresh()
+        entry = self._entries.get(team)
+        return entry[1] if entry else DEFAULT_STATS
+
+    def get_results(self, team):
+        """Derniers résultats d'une équipe (liste de [gf, ga]) ou None"""
+        self._ensure_fresh()
+        entry = self._entries.get(team)
+        return [list(r) for r in entry[0]] if entry else None
+
+    def all_results(self):
+        """Copie de toutes les données {équipe: [[gf, ga], ...]}"""
+        self._ensure_fresh()
+        return {team: [list(r) for r in entry[0]] for team, entry in self._entries.items()}
+
+    def all_stats(self):
+        """Résumé de toutes les équipes avec moyennes précalculées"""
+        self._ensure_fresh()
+        return {
+            team: {
+                "matches_count": len(results),
+                "avg_goals_for": avg[0],
+                "avg_goals_against": avg[1],
+                "recent_matches": [list(r) for r in results]
+            }
+            for team, (results, avg) in self._entries.items()
+        }
+
+    # ------------------------------------------------------------------
+    # Écriture (différée)
+    # ------------------------------------------------------------------
+
+    def _append_to(self, data, team, gf, ga):
+        data.setdefault(team, []).append([gf, ga])
+        data[team] = data[team][-self.keep_last:]
+
+    def append_result(self, team, gf, ga):
+        """Ajoute un résultat (mémoire immédiate, disque après FLUSH_DELAY)"""
+        with self._lock:
+            self._ensure_fresh()
+            entry = self._entries.get(team)
+            results = (entry[0] if entry else ()) + ((gf, ga),)
+            results = results[-self.keep_last:]
+            self._entries[team] = (results, _averages(results))
+            self._pending.append((team, gf, ga))
+            self._schedule_flush()
+
+    def replace_all(self, data):
+        """Remplace toutes les données et les écrit immédiatement"""
+        with self._lock:
+            self._pending = []
+            self._entries = self._build(data)
+            self._write_file(data)
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _write_file(self, data):
+        """Écriture atomique avec tmp + rename"""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._last_check = time.monotonic()
+
+    def flush(self):
+        """Écrit les ajouts en attente (relit d'abord le fichier s'il a changé)"""
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+            try:
+                mtime = os.stat(self.path).st_mtime_ns if os.path.exists(self.path) else None
+                if mtime != self._mtime:
+                    self._load()
+                self._write_file(self.all_results())
+                self._pending = []
+                self.flushes += 1
+            except Exception as e:
+                logger.error(f"❌ Erreur écriture stats d'équipes: {e}")
+
+    def info(self):
+        """État du dépôt (pour diagnostic)"""
+        return {
+            "path": self.path,
+            "loaded": self._entries is not None,
+            "teams": len(self._entries or {}),
+            "pending_writes": len(self._pending),
+            "reloads": self.reloads,
+            "flushes": self.flushes
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path):
+    """Dépôt unique par fichier (écritures en attente vidées à la sortie)"""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = TeamStatsStore(path)
+            atexit.register(store.flush)
+        return store
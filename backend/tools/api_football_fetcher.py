@@ -10,12 +10,16 @@ Documentation: https://www.api-football.com/documentation-v3
 """
 
 import os
+import sys
 import json
 import requests
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, '/app/backend')
+from quota_manager import get_quota_manager
+
 logger = logging.getLogger(__name__)
 
 # =========================================
@@ -27,8 +31,10 @@ API_BASE_URL = "https://v3.football.api-sports.io"
 DATA_DIR = "/app/data/leagues"
 REQUEST_LOG_FILE = "/app/logs/api_football_requests.log"
 
-# Limite de requêtes: 100/jour
+# Limite de requêtes: 100/jour, 10/minute (plan gratuit)
 MAX_REQUESTS_PER_DAY = 100
+REQUESTS_PER_MINUTE = 10
+QUOTA_PROVIDER = "api_football"
 
 # Mapping des ligues vers les IDs API-Football
 LEAGUE_IDS = {
@@ -50,8 +56,8 @@ CURRENT_SEASON = 2024  # Format API-Football utilise l'année de début
 # 📊 GESTION DES REQUÊTES
 # =========================================
 
-def get_request_count_today():
-    """Compte le nombre de requêtes effectuées aujourd'hui"""
+def _count_logged_requests_today():
+    """Requêtes du jour d'après le journal (amorçage unique du quota partagé)"""
     if not os.path.exists(REQUEST_LOG_FILE):
         return 0
     
@@ -73,6 +79,14 @@ def get_request_count_today():
     
     return count
 
+quota = get_quota_manager()
+quota.register(QUOTA_PROVIDER, daily_cap=MAX_REQUESTS_PER_DAY, rate=REQUESTS_PER_MINUTE / 60,
+               burst=REQUESTS_PER_MINUTE, seed=_count_logged_requests_today)
+
+def get_request_count_today():
+    """Nombre de requêtes effectuées aujourd'hui (quota partagé, sans relire le journal)"""
+    return quota.used_today(QUOTA_PROVIDER)
+
 def log_request(league, status):
     """Enregistre une requête dans le log"""
     os.makedirs(os.path.dirname(REQUEST_LOG_FILE), exist_ok=True)
@@ -88,8 +102,7 @@ def log_request(league, status):
 
 def can_make_request():
     """Vérifie si on peut faire une requête (limite quotidienne)"""
-    count = get_request_count_today()
-    return count < MAX_REQUESTS_PER_DAY
+    return quota.remaining(QUOTA_PROVIDER) > 0
 
 # =========================================
 # 🌐 API REQUESTS
@@ -105,14 +118,15 @@ def fetch_league_standings(league_name):
     Returns:
         dict: Données du classement ou None en cas d'erreur
     """
-    if not can_make_request():
-        logger.warning(f"⚠️ Limite quotidienne de requêtes atteinte ({MAX_REQUESTS_PER_DAY})")
-        return None
-    
     if league_name not in LEAGUE_IDS:
         logger.error(f"❌ Ligue inconnue: {league_name}")
         return None
     
+    # Réserve la requête et attend son créneau (limite par minute)
+    if not quota.acquire(QUOTA_PROVIDER):
+        logger.warning(f"⚠️ Limite quotidienne de requêtes atteinte ({MAX_REQUESTS_PER_DAY})")
+        return None
+    
     league_id = LEAGUE_IDS[league_name]
     
     headers = {
@@ -219,6 +233,14 @@ def save_league_standings(league_name, data):
     os.makedirs(DATA_DIR, exist_ok=True)
     file_path = os.path.join(DATA_DIR, f"{league_name}.json")
     
+    previous = None
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except Exception:
+            previous = None
+    
     # Sauvegarde atomique
     tmp_path = file_path + ".tmp"
     with open(tmp_path, 'w', encoding='utf-8') as f:
@@ -226,6 +248,13 @@ def save_league_standings(league_name, data):
     
     os.replace(tmp_path, file_path)
     logger.info(f"💾 Saved {league_name} standings to {file_path}")
+
+    # Diff avec l'ancien classement -> invalidation ciblée des caches abonnés
+    try:
+        from standings_events import notify_league_saved
+        notify_league_saved(league_name, previous, data)
+    except Exception as e:
+        logger.warning(f"⚠️ Événement de classement non publié pour {league_name}: {e}")
     return True
 
 # =========================================
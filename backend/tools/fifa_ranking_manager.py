@@ -2,14 +2,27 @@
 """
 FIFA Ranking Manager - Gestion du classement FIFA et calcul des coefficients
 Système ajustable pour mettre à jour facilement le classement via photos OCR.
+
+Les recherches passent par un index chargé une fois (RankingIndex) :
+- table d'alias compilée : codes FIFA, noms anglais / français, name_mappings,
+  alias de league_coeff.TEAM_ALIASES, et leurs formes normalisées (casse,
+  accents, ponctuation)
+- coefficient précalculé par équipe depuis son rang
+- fuzzy matching seulement si aucun alias ne correspond, résultat mémorisé
+Le fichier est vérifié (mtime, taille) au plus une fois par INDEX_CHECK_INTERVAL
+et l'index reconstruit après save_fifa_ranking.
 """
 
+import os
 import json
 import logging
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 from fuzzywuzzy import process, fuzz
 
+from league_coeff import TEAM_ALIASES
+from team_keys import normalize_key, file_signature, FileIndex
+
 logger = logging.getLogger(__name__)
 
 # Chemins des fichiers
@@ -26,6 +39,12 @@ COEFFICIENT_TIERS = [
     (151, 999, 1.0)    # 150+: Très faible équipe
 ]
 
+DEFAULT_RANK = 999
+DEFAULT_POINTS = 1000.0
+FUZZY_THRESHOLD = 75          # Seuil de confiance du fuzzy matching (%)
+FUZZY_MEMO_SIZE = 2048
+INDEX_CHECK_INTERVAL = 1.0    # fréquence max de vérification du fichier (secondes)
+
 
 def load_fifa_ranking() -> Dict:
     """
@@ -54,10 +73,10 @@ def save_fifa_ranking(data: Dict) -> bool:
     """
     Sauvegarde le classement FIFA dans le fichier JSON.
     Crée automatiquement un backup de l'ancien fichier.
-    
+
     Args:
         data: Données du classement à sauvegarder
-    
+
     Returns:
         True si succès, False sinon
     """
@@ -67,128 +86,202 @@ def save_fifa_ranking(data: Dict) -> bool:
             import shutil
             shutil.copy(FIFA_RANKING_FILE, FIFA_RANKING_BACKUP)
             logger.info(f"📦 Backup créé : {FIFA_RANKING_BACKUP}")
-        
-        # Sauvegarder le nouveau
-        with open(FIFA_RANKING_FILE, 'w', encoding='utf-8') as f:
+
+        # Sauvegarder le nouveau (écriture atomique : l'index ne lit jamais un fichier partiel)
+        tmp = f"{FIFA_RANKING_FILE}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
-        
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, FIFA_RANKING_FILE)
+
         logger.info(f"✅ Classement FIFA sauvegardé : {data.get('total_teams', 0)} équipes")
+        refresh_index(force=True)
         return True
-    
+
     except Exception as e:
         logger.error(f"❌ Erreur sauvegarde FIFA ranking : {e}")
         return False
 
 
+# ============================================================================
+# INDEX DU CLASSEMENT (chargé une fois, alias compilés)
+# ============================================================================
+
+class RankingIndex:
+    """
+    Vue immuable d'un classement FIFA : alias → code, code → (rang, points,
+    coefficient). Seule la mémoire du fuzzy matching évolue après construction.
+    """
+
+    def __init__(self, signature, data: Dict):
+        self.signature = signature
+        self.meta = {key: data.get(key) for key in ("total_teams", "last_updated", "source")}
+        self.teams = {}      # code -> (rang, points, coefficient)
+        self.names = {}      # code -> (nom anglais, nom français)
+        self._exact = {}     # nom tel quel -> code
+        self._keys = {}      # clé normalisée -> code
+        self._fuzzy = {}     # nom demandé -> code ou None
+
+        rankings = data.get("rankings", {})
+        mappings = {name: code for name, code in data.get("name_mappings", {}).items()
+                    if isinstance(code, str)}
+        ordered = sorted(rankings.items(), key=lambda item: item[1].get("rank", DEFAULT_RANK))
+        for code, team in ordered:
+            rank = team.get("rank", DEFAULT_RANK)
+            self.teams[code] = (rank, team.get("points", DEFAULT_POINTS), calculate_coefficient_from_rank(rank))
+            self.names[code] = (team.get("name", ""), team.get("name_fr", ""))
+
+        # Priorité : name_mappings, codes, noms du classement, alias statiques
+        self._exact.update(mappings)
+        aliases = list(mappings.items()) + [(code, code) for code in self.teams]
+        for code, (name_en, name_fr) in self.names.items():
+            aliases += [(name_en, code), (name_fr, code)]
+        for name, code in aliases:
+            if name:
+                self._keys.setdefault(normalize_key(name), code)
+        for alias, target in TEAM_ALIASES.items():
+            code = self._keys.get(normalize_key(target))
+            if code is not None:
+                self._keys.setdefault(normalize_key(alias), code)
+
+        # Candidats du fuzzy matching (mêmes noms que l'ancien parcours complet)
+        self._fuzzy_names = {}
+        for name, code in mappings.items():
+            self._fuzzy_names.setdefault(name, code)
+        for code, (name_en, name_fr) in self.names.items():
+            for name in (name_en, name_fr):
+                if name:
+                    self._fuzzy_names.setdefault(name, code)
+        self._fuzzy_choices = list(self._fuzzy_names)
+
+    def lookup(self, team_name: str) -> Optional[str]:
+        """Code FIFA : alias exact, puis clé normalisée, puis fuzzy (mémorisé)"""
+        name = team_name.strip()
+        code = self._exact.get(name)
+        if code is None and name.upper() in self.teams:
+            code = name.upper()
+        if code is None:
+            code = self._keys.get(normalize_key(name))
+        if code is not None:
+            return code
+        if name in self._fuzzy:
+            return self._fuzzy[name]
+        return self._fuzzy_lookup(name)
+
+    def _fuzzy_lookup(self, name: str) -> Optional[str]:
+        code = None
+        match = process.extractOne(name, self._fuzzy_choices, scorer=fuzz.token_sort_ratio) if self._fuzzy_choices else None
+        if match and match[1] >= FUZZY_THRESHOLD:
+            code = self._fuzzy_names[match[0]]
+            logger.info(f"🔍 Fuzzy match: '{name}' → '{match[0]}' ({match[1]}%)")
+        else:
+            logger.warning(f"⚠️ Équipe non trouvée dans FIFA ranking : '{name}'")
+        if len(self._fuzzy) >= FUZZY_MEMO_SIZE:
+            self._fuzzy.clear()
+        self._fuzzy[name] = code
+        return code
+
+    def team(self, team_name: str) -> Optional[Tuple[int, float, float]]:
+        """(rang, points, coefficient) ou None si l'équipe est inconnue"""
+        code = self.lookup(team_name) if team_name else None
+        return self.teams.get(code) if code else None
+
+    def info(self) -> Dict:
+        return {
+            "teams": len(self.teams),
+            "aliases": len(self._keys),
+            "fuzzy_memo": len(self._fuzzy),
+            "last_updated": self.meta["last_updated"]
+        }
+
+
+def _build_index(signature) -> RankingIndex:
+    index = RankingIndex(signature, load_fifa_ranking())
+    logger.info(f"📇 Index FIFA reconstruit: {len(index.teams)} équipes, {len(index._keys)} alias")
+    return index
+
+
+_index = FileIndex(_build_index, lambda: file_signature(FIFA_RANKING_FILE), INDEX_CHECK_INTERVAL)
+
+
+def refresh_index(force: bool = False) -> RankingIndex:
+    """
+    Reconstruit l'index si le fichier a changé (ou si force=True).
+
+    Returns:
+        RankingIndex: index courant
+    """
+    return _index.refresh(force)
+
+
+def get_ranking_index(ranking_data: Optional[Dict] = None) -> RankingIndex:
+    """
+    Index du fichier courant (vérifié au plus une fois par INDEX_CHECK_INTERVAL),
+    ou index construit sur ranking_data s'il est fourni.
+    """
+    if ranking_data:
+        return RankingIndex(None, ranking_data)
+    return _index.get()
+
+
+def get_index_info() -> Dict:
+    """État de l'index FIFA (pour /api/fifa/ranking/stats)"""
+    info = get_ranking_index().info()
+    info["rebuilds"] = _index.rebuilds
+    return info
+
+
 def get_team_code(team_name: str, ranking_data: Optional[Dict] = None) -> Optional[str]:
     """
-    Récupère le code FIFA d'une équipe via fuzzy matching.
-    
+    Récupère le code FIFA d'une équipe (alias exacts, puis fuzzy matching).
+
     Args:
         team_name: Nom de l'équipe (français ou anglais)
-        ranking_data: Données du ranking (optionnel, rechargé si None)
-    
+        ranking_data: Données du ranking (optionnel, index du fichier si None)
+
     Returns:
         Code FIFA (ex: "FRA", "NOR") ou None si non trouvé
     """
-    if not ranking_data:
-        ranking_data = load_fifa_ranking()
-    
     if not team_name:
         return None
-    
-    team_name_clean = team_name.strip()
-    
-    # 1. Recherche exacte dans les mappings
-    mappings = ranking_data.get("name_mappings", {})
-    if team_name_clean in mappings:
-        return mappings[team_name_clean]
-    
-    # 2. Recherche dans les codes (ex: "FRA" direct)
-    rankings = ranking_data.get("rankings", {})
-    if team_name_clean.upper() in rankings:
-        return team_name_clean.upper()
-    
-    # 3. Fuzzy matching sur tous les noms possibles
-    all_names = list(mappings.keys())
-    for code, team_data in rankings.items():
-        all_names.append(team_data.get("name", ""))
-        all_names.append(team_data.get("name_fr", ""))
-    
-    match = process.extractOne(team_name_clean, all_names, scorer=fuzz.token_sort_ratio)
-    
-    if match and match[1] >= 75:  # Seuil de confiance 75%
-        matched_name = match[0]
-        
-        # Trouver le code correspondant
-        if matched_name in mappings:
-            logger.info(f"🔍 Fuzzy match: '{team_name}' → '{matched_name}' ({match[1]}%)")
-            return mappings[matched_name]
-        
-        # Chercher dans les rankings
-        for code, team_data in rankings.items():
-            if matched_name in [team_data.get("name"), team_data.get("name_fr")]:
-                logger.info(f"🔍 Fuzzy match: '{team_name}' → '{matched_name}' ({match[1]}%)")
-                return code
-    
-    logger.warning(f"⚠️ Équipe non trouvée dans FIFA ranking : '{team_name}'")
-    return None
+    return get_ranking_index(ranking_data).lookup(team_name)
 
 
 def get_team_rank(team_name: str, ranking_data: Optional[Dict] = None) -> int:
     """
     Récupère le rang FIFA d'une équipe.
-    
+
     Args:
         team_name: Nom de l'équipe
         ranking_data: Données du ranking (optionnel)
-    
+
     Returns:
         Rang FIFA (1-999), ou 999 si non trouvé
     """
-    if not ranking_data:
-        ranking_data = load_fifa_ranking()
-    
-    code = get_team_code(team_name, ranking_data)
-    
-    if code:
-        rankings = ranking_data.get("rankings", {})
-        team_data = rankings.get(code)
-        if team_data:
-            return team_data.get("rank", 999)
-    
-    return 999  # Rang par défaut si non trouvé
+    team = get_ranking_index(ranking_data).team(team_name)
+    return team[0] if team else DEFAULT_RANK
 
 
 def get_team_points(team_name: str, ranking_data: Optional[Dict] = None) -> float:
     """
     Récupère les points FIFA d'une équipe.
-    
+
     Args:
         team_name: Nom de l'équipe
         ranking_data: Données du ranking (optionnel)
-    
+
     Returns:
         Points FIFA, ou 1000.0 si non trouvé
     """
-    if not ranking_data:
-        ranking_data = load_fifa_ranking()
-    
-    code = get_team_code(team_name, ranking_data)
-    
-    if code:
-        rankings = ranking_data.get("rankings", {})
-        team_data = rankings.get(code)
-        if team_data:
-            return team_data.get("points", 1000.0)
-    
-    return 1000.0  # Points par défaut
+    team = get_ranking_index(ranking_data).team(team_name)
+    return team[1] if team else DEFAULT_POINTS
 
 
 def calculate_coefficient_from_rank(rank: int) -> float:
     """
     Calcule le coefficient de performance basé sur le rang FIFA.
-    
+
     Tranches:
     - Rang 1-10: 1.5
     - Rang 11-30: 1.3
@@ -196,36 +289,36 @@ def calculate_coefficient_from_rank(rank: int) -> float:
     - Rang 61-100: 1.1
     - Rang 101-150: 1.05
     - Rang 150+: 1.0
-    
+
     Args:
         rank: Rang FIFA
-    
+
     Returns:
         Coefficient (1.0 à 1.5)
     """
     for min_rank, max_rank, coeff in COEFFICIENT_TIERS:
         if min_rank <= rank <= max_rank:
             return coeff
-    
+
     return 1.0  # Par défaut
 
 
 def get_team_coefficient(team_name: str, ranking_data: Optional[Dict] = None) -> float:
     """
-    Récupère le coefficient FIFA d'une équipe.
-    
+    Récupère le coefficient FIFA d'une équipe (précalculé dans l'index).
+
     Args:
         team_name: Nom de l'équipe
         ranking_data: Données du ranking (optionnel)
-    
+
     Returns:
         Coefficient (1.0 à 1.5)
     """
-    rank = get_team_rank(team_name, ranking_data)
-    coeff = calculate_coefficient_from_rank(rank)
-    
-    logger.debug(f"📊 {team_name}: Rang {rank} → Coefficient {coeff}")
-    
+    team = get_ranking_index(ranking_data).team(team_name)
+    coeff = team[2] if team else calculate_coefficient_from_rank(DEFAULT_RANK)
+
+    logger.debug(f"📊 {team_name}: Rang {team[0] if team else DEFAULT_RANK} → Coefficient {coeff}")
+
     return coeff
 
 
@@ -236,81 +329,71 @@ def get_match_coefficients(
 ) -> Tuple[float, float, float]:
     """
     Calcule les coefficients pour un match et le ratio domicile/extérieur.
-    
+
     Args:
         home_team: Équipe à domicile
         away_team: Équipe à l'extérieur
-        ranking_data: Données du ranking (optionnel)
-    
+        ranking_data: Données du ranking (optionnel, index du fichier si None)
+
     Returns:
         Tuple (coeff_home, coeff_away, ratio_home_away)
     """
-    if not ranking_data:
-        ranking_data = load_fifa_ranking()
-    
     coeff_home = get_team_coefficient(home_team, ranking_data)
     coeff_away = get_team_coefficient(away_team, ranking_data)
-    
+
     # Ratio pour ajuster les probabilités
     # ratio > 1 = domicile favorisé
     # ratio < 1 = extérieur favorisé
     ratio = coeff_home / coeff_away if coeff_away > 0 else 1.0
-    
-    logger.info(f"⚽ Match: {home_team} ({coeff_home:.2f}) vs {away_team} ({coeff_away:.2f}) → Ratio: {ratio:.2f}")
-    
+
+    logger.debug(f"⚽ Match: {home_team} ({coeff_home:.2f}) vs {away_team} ({coeff_away:.2f}) → Ratio: {ratio:.2f}")
+
     return coeff_home, coeff_away, ratio
 
 
 def get_all_coefficients(ranking_data: Optional[Dict] = None) -> Dict[str, float]:
     """
     Génère un dictionnaire de tous les coefficients pour toutes les équipes.
-    
+
     Args:
         ranking_data: Données du ranking (optionnel)
-    
+
     Returns:
         Dict {nom_équipe: coefficient}
     """
-    if not ranking_data:
-        ranking_data = load_fifa_ranking()
-    
+    index = get_ranking_index(ranking_data)
     coefficients = {}
-    
-    rankings = ranking_data.get("rankings", {})
-    for code, team_data in rankings.items():
-        rank = team_data.get("rank", 999)
-        coeff = calculate_coefficient_from_rank(rank)
-        
+
+    for code, (rank, points, coeff) in index.teams.items():
         # Ajouter avec différents noms
-        name_en = team_data.get("name", "")
-        name_fr = team_data.get("name_fr", "")
-        
+        name_en, name_fr = index.names[code]
         if name_en:
             coefficients[name_en] = coeff
         if name_fr:
             coefficients[name_fr] = coeff
         coefficients[code] = coeff
-    
+
     logger.info(f"📊 {len(coefficients)} coefficients générés")
-    
+
     return coefficients
 
 
 def get_ranking_stats() -> Dict:
     """
     Récupère les statistiques du classement FIFA.
-    
+
     Returns:
         Dict avec stats (total équipes, dernière MAJ, etc.)
     """
-    ranking_data = load_fifa_ranking()
-    
+    index = get_ranking_index()
+
     return {
-        "total_teams": ranking_data.get("total_teams", 0),
-        "last_updated": ranking_data.get("last_updated", "Unknown"),
-        "source": ranking_data.get("source", "Unknown"),
+        "total_teams": index.meta["total_teams"] or 0,
+        "last_updated": index.meta["last_updated"] or "Unknown",
+        "source": index.meta["source"] or "Unknown",
         "file_path": str(FIFA_RANKING_FILE),
-        "file_exists": FIFA_RANKING_FILE.exists()
+        "file_exists": FIFA_RANKING_FILE.exists(),
+        "index": get_index_info()
     }
 
 
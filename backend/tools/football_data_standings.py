@@ -199,6 +199,14 @@ def save_league_standings(league_name, data):
     os.makedirs(DATA_DIR, exist_ok=True)
     file_path = os.path.join(DATA_DIR, f"{league_name}.json")
     
+    previous = None
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except Exception:
+            previous = None
+    
     # Backup de l'ancien fichier
     if os.path.exists(file_path):
         backup_path = file_path + ".backup_auto"
@@ -212,6 +220,13 @@ def save_league_standings(league_name, data):
     
     os.replace(tmp_path, file_path)
     logger.info(f"💾 Saved {league_name} standings to {file_path}")
+
+    # Diff avec l'ancien classement -> invalidation ciblée des caches abonnés
+    try:
+        from standings_events import notify_league_saved
+        notify_league_saved(league_name, previous, data)
+    except Exception as e:
+        logger.warning(f"⚠️ Événement de classement non publié pour {league_name}: {e}")
     return True
 
 # =========================================
@@ -185,6 +185,13 @@ def update_league_smart(league_name, force=False):
             json.dump(updated_data, f, indent=2, ensure_ascii=False)
         os.replace(tmp_path, file_path)
         
+        # Diff avec l'ancien classement (local_data) -> invalidation ciblée des caches abonnés
+        try:
+            from standings_events import notify_league_saved
+            notify_league_saved(league_name, local_data, updated_data)
+        except Exception as e:
+            logger.warning(f"⚠️ Événement de classement non publié pour {league_name}: {e}")
+        
         result["success"] = True
         result["source"] = "football_data_api"
         result["action"] = "updated_from_api"
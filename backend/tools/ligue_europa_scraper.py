@@ -7,12 +7,15 @@ Sources officielles :
 - Europa League : uefa.com
 """
 
+import sys
 import requests
-from bs4 import BeautifulSoup
 import logging
 import time
 import random
 
+sys.path.insert(0, '/app/backend')
+from html_parsing import parse_lfp_standings, parse_uefa_standings
+
 logger = logging.getLogger(__name__)
 
 # User agents pour éviter le blocage
@@ -53,58 +56,7 @@ def scrape_ligue2():
             logger.error(f"❌ Ligue 2 HTTP {response.status_code}")
             return None
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        standings = []
-
-        # Méthode 1 : table.standings-table
-        rows = soup.select("table.standings-table tbody tr")
-        
-        if not rows:
-            # Méthode 2 : Essayer d'autres sélecteurs
-            rows = soup.select("table tbody tr")
-        
-        if not rows:
-            # Méthode 3 : Chercher toutes les tables
-            tables = soup.find_all("table")
-            for table in tables:
-                rows = table.select("tbody tr")
-                if rows and len(rows) > 10:  # Au moins 10 équipes
-                    break
-        
-        if not rows:
-            logger.warning(f"⚠️ Aucune ligne trouvée pour Ligue 2")
-            return None
-
-        for row in rows:
-            try:
-                # Essayer plusieurs sélecteurs
-                pos_elem = row.select_one(".position") or row.select_one("td:nth-child(1)")
-                team_elem = row.select_one(".club-name") or row.select_one(".team-name") or row.select_one("td:nth-child(2)")
-                pts_elem = row.select_one(".points") or row.select_one("td:nth-last-child(1)")
-                
-                if not (pos_elem and team_elem and pts_elem):
-                    continue
-                
-                pos = pos_elem.get_text(strip=True)
-                team = team_elem.get_text(strip=True)
-                pts = pts_elem.get_text(strip=True)
-                
-                # Nettoyer et convertir
-                try:
-                    position = int(pos.replace('.', '').replace('#', '').strip())
-                    points = int(pts.strip())
-                except:
-                    continue
-                
-                standings.append({
-                    "team": team,
-                    "position": position,
-                    "points": points,
-                    "played": None  # Pas toujours disponible
-                })
-            except Exception as e:
-                logger.debug(f"Erreur parsing ligne Ligue 2: {e}")
-                continue
+        standings = parse_lfp_standings(response.text)
 
         if standings:
             logger.info(f"✅ Ligue 2 : {len(standings)} équipes scrapées")
@@ -140,74 +92,7 @@ def scrape_europa_league():
             logger.error(f"❌ Europa League HTTP {response.status_code}")
             return None
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        all_standings = []
-        position_counter = 1
-
-        # Chercher les groupes
-        groups = soup.select("section.standings-group") or soup.select("div.standings-group")
-        
-        if not groups:
-            # Fallback : chercher toutes les tables
-            groups = soup.find_all("table")
-        
-        if not groups:
-            logger.warning(f"⚠️ Aucun groupe trouvé pour Europa League")
-            return None
-
-        for group in groups:
-            try:
-                # Nom du groupe (optionnel)
-                group_name_elem = group.select_one("h3") or group.select_one("h2") or group.select_one(".group-name")
-                group_name = group_name_elem.get_text(strip=True) if group_name_elem else "Unknown"
-                
-                # Lignes du tableau
-                rows = group.select("table.standings-table tbody tr") or group.select("tbody tr")
-                
-                if not rows:
-                    continue
-
-                for row in rows:
-                    try:
-                        # Essayer plusieurs sélecteurs
-                        team_elem = (row.select_one(".team-name") or 
-                                   row.select_one(".club-name") or 
-                                   row.select_one("td:nth-child(2)") or
-                                   row.select_one("td.team"))
-                        
-                        pts_elem = (row.select_one(".points") or 
-                                  row.select_one("td:nth-last-child(1)") or
-                                  row.select_one("td.pts"))
-                        
-                        if not (team_elem and pts_elem):
-                            continue
-                        
-                        team = team_elem.get_text(strip=True)
-                        pts = pts_elem.get_text(strip=True)
-                        
-                        # Convertir
-                        try:
-                            points = int(pts.strip())
-                        except:
-                            continue
-                        
-                        all_standings.append({
-                            "team": team,
-                            "position": position_counter,
-                            "points": points,
-                            "played": None,
-                            "group": group_name
-                        })
-                        
-                        position_counter += 1
-                        
-                    except Exception as e:
-                        logger.debug(f"Erreur parsing ligne Europa League: {e}")
-                        continue
-                        
-            except Exception as e:
-                logger.debug(f"Erreur parsing groupe Europa League: {e}")
-                continue
+        all_standings = parse_uefa_standings(response.text)
 
         if all_standings:
             logger.info(f"✅ Europa League : {len(all_standings)} équipes scrapées")
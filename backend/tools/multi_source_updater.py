@@ -9,6 +9,8 @@ Sources:
  - FIFA.com (scraping ranking) --> ranking nations
 Fonctionnalités:
  - cache local (JSON)
+ - hedged fetch: sources lancées en cascade selon un budget de latence,
+   premier classement valide retenu, stats par source (source_stats.json)
  - retry + backoff
  - anti-ban (rotation UA, pauses aléatoires)
  - option MongoDB ingestion
@@ -18,15 +20,22 @@ Usage:
 """
 
 import os
+import sys
 import time
 import json
 import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 
 import requests
-from bs4 import BeautifulSoup
+
+sys.path.insert(0, '/app/backend')
+from quota_manager import get_quota_manager
+from html_parsing import (SELECTORS, parse_html, text, parse_lfp_standings, parse_uefa_standings,
+                          parse_dbfoot_standings, parse_soccerwiki_info)
 
 # optional imports (installer dans requirements)
 try:
@@ -62,6 +71,15 @@ DAILY_MAX_REQUESTS = int(os.getenv("DAILY_MAX_REQUESTS", "200"))
 MIN_SLEEP = float(os.getenv("ANTI_BAN_MIN_SLEEP", "1.0"))
 MAX_SLEEP = float(os.getenv("ANTI_BAN_MAX_SLEEP", "2.5"))
 
+# Football-Data: 10 requêtes / minute par clé (plan gratuit)
+FOOTBALL_DATA_PER_MINUTE = int(os.getenv("FOOTBALL_DATA_PER_MINUTE", "10"))
+FOOTBALL_DATA_MAX_WAIT = 30.0  # au-delà, on passe à la clé / source suivante
+
+QUOTA = get_quota_manager()
+QUOTA.register("unified_updater", daily_cap=DAILY_MAX_REQUESTS)
+for _idx in (1, 2):
+    QUOTA.register(f"football_data:{_idx}", rate=FOOTBALL_DATA_PER_MINUTE / 60, burst=FOOTBALL_DATA_PER_MINUTE)
+
 # retry config
 RETRY_ATTEMPTS = 3
 RETRY_BACKOFF = 5  # seconds * attempt
@@ -94,10 +112,14 @@ def save_cache(cache: Dict[str, Any]):
     except Exception as e:
         logging.error(f"Save cache failed: {e}")
 
-def random_sleep():
-    s = random.uniform(MIN_SLEEP, MAX_SLEEP)
-    logging.debug(f"anti-ban sleep {s:.2f}s")
-    time.sleep(s)
+def wait_for_slot(provider: str):
+    """
+    anti-ban: attend le prochain créneau de la source (quota partagé entre threads
+    et processus), au lieu d'une pause aléatoire avant chaque requête
+    """
+    if provider not in QUOTA.providers:
+        QUOTA.register(provider, rate=2 / (MIN_SLEEP + MAX_SLEEP), burst=1)
+    QUOTA.acquire(provider)
 
 def headers():
     return {"User-Agent": random.choice(USER_AGENTS), "Accept": "text/html,application/json"}
@@ -117,6 +139,29 @@ if USE_MONGO and MongoClient:
 # -----------------------
 # Football-Data API wrapper
 # -----------------------
+def parse_football_data_standings(data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Réponse JSON /competitions/{code}/standings -> lignes standardisées"""
+    table = data.get("standings", [])
+    if not table:
+        return None
+    # take first group (usually TOTAL)
+    rows = table[0].get("table", [])
+    result = []
+    for r in rows:
+        team = r.get("team", {})
+        result.append({
+            "team": team.get("name"),
+            "position": r.get("position"),
+            "points": r.get("points"),
+            "played": r.get("playedGames"),
+            "won": r.get("won"),
+            "draw": r.get("draw"),
+            "lost": r.get("lost"),
+            "for": r.get("goalsFor"),
+            "against": r.get("goalsAgainst")
+        })
+    return result or None
+
 def get_standings_football_data(league_code: str) -> Optional[List[Dict[str, Any]]]:
     """
     league_code: ex. 'PL' (Premier League), 'FL1' (Ligue 1), 'BL1' (Bundesliga)...
@@ -137,31 +182,13 @@ def get_standings_football_data(league_code: str) -> Optional[List[Dict[str, Any
         hdr = {"X-Auth-Token": api_key}
         attempt = 0
         while attempt < RETRY_ATTEMPTS:
+            if not QUOTA.acquire(f"football_data:{key_idx+1}", max_wait=FOOTBALL_DATA_MAX_WAIT):
+                logging.info(f"Football-Data key {key_idx+1}: no slot within {FOOTBALL_DATA_MAX_WAIT}s, trying next...")
+                break
             try:
                 resp = requests.get(url, headers=hdr, timeout=12)
                 if resp.status_code == 200:
-                    data = resp.json()
-                    # standardize
-                    table = data.get("standings", [])
-                    if not table:
-                        return None
-                    # take first group (usually TOTAL)
-                    rows = table[0].get("table", [])
-                    result = []
-                    for r in rows:
-                        team = r.get("team", {})
-                        result.append({
-                            "team": team.get("name"),
-                            "position": r.get("position"),
-                            "points": r.get("points"),
-                            "played": r.get("playedGames"),
-                            "won": r.get("won"),
-                            "draw": r.get("draw"),
-                            "lost": r.get("lost"),
-                            "for": r.get("goalsFor"),
-                            "against": r.get("goalsAgainst")
-                        })
-                    return result
+                    return parse_football_data_standings(resp.json())
                 elif resp.status_code == 429:
                     # rate limit, try next key
                     logging.warning(f"Football-Data rate limit reached on key {key_idx+1}, trying next...")
@@ -239,7 +266,7 @@ def get_standings_ligue2() -> Optional[List[Dict[str, Any]]]:
     
     try:
         logging.info(f"🌐 Scraping Ligue 2 depuis {url}")
-        random_sleep()
+        wait_for_slot("ligue1.com")
         
         response = requests.get(url, headers=headers(), timeout=15)
         
@@ -247,58 +274,7 @@ def get_standings_ligue2() -> Optional[List[Dict[str, Any]]]:
             logging.error(f"❌ Ligue 2 HTTP {response.status_code}")
             return None
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        standings = []
-
-        # Méthode 1 : table.standings-table
-        rows = soup.select("table.standings-table tbody tr")
-        
-        if not rows:
-            # Méthode 2 : Essayer d'autres sélecteurs
-            rows = soup.select("table tbody tr")
-        
-        if not rows:
-            # Méthode 3 : Chercher toutes les tables
-            tables = soup.find_all("table")
-            for table in tables:
-                rows = table.select("tbody tr")
-                if rows and len(rows) > 10:  # Au moins 10 équipes
-                    break
-        
-        if not rows:
-            logging.warning(f"⚠️ Aucune ligne trouvée pour Ligue 2")
-            return None
-
-        for row in rows:
-            try:
-                # Essayer plusieurs sélecteurs
-                pos_elem = row.select_one(".position") or row.select_one("td:nth-child(1)")
-                team_elem = row.select_one(".club-name") or row.select_one(".team-name") or row.select_one("td:nth-child(2)")
-                pts_elem = row.select_one(".points") or row.select_one("td:nth-last-child(1)")
-                
-                if not (pos_elem and team_elem and pts_elem):
-                    continue
-                
-                pos = pos_elem.get_text(strip=True)
-                team = team_elem.get_text(strip=True)
-                pts = pts_elem.get_text(strip=True)
-                
-                # Nettoyer et convertir
-                try:
-                    position = int(pos.replace('.', '').replace('#', '').strip())
-                    points = int(pts.strip())
-                except:
-                    continue
-                
-                standings.append({
-                    "team": team,
-                    "position": position,
-                    "points": points,
-                    "played": None  # Pas toujours disponible
-                })
-            except Exception as e:
-                logging.debug(f"Erreur parsing ligne Ligue 2: {e}")
-                continue
+        standings = parse_lfp_standings(response.text)
 
         if standings:
             logging.info(f"✅ Ligue 2 : {len(standings)} équipes scrapées")
@@ -325,7 +301,7 @@ def get_standings_europa_league() -> Optional[List[Dict[str, Any]]]:
     
     try:
         logging.info(f"🌐 Scraping Europa League depuis {url}")
-        random_sleep()
+        wait_for_slot("uefa.com")
         
         response = requests.get(url, headers=headers(), timeout=15)
         
@@ -333,69 +309,7 @@ def get_standings_europa_league() -> Optional[List[Dict[str, Any]]]:
             logging.error(f"❌ Europa League HTTP {response.status_code}")
             return None
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        all_standings = []
-        position_counter = 1
-
-        # Chercher les groupes
-        groups = soup.select("section.standings-group") or soup.select("div.standings-group")
-        
-        if not groups:
-            # Fallback : chercher toutes les tables
-            groups = soup.find_all("table")
-        
-        if not groups:
-            logging.warning(f"⚠️ Aucun groupe trouvé pour Europa League")
-            return None
-
-        for group in groups:
-            try:
-                # Lignes du tableau
-                rows = group.select("table.standings-table tbody tr") or group.select("tbody tr")
-                
-                if not rows:
-                    continue
-
-                for row in rows:
-                    try:
-                        # Essayer plusieurs sélecteurs
-                        team_elem = (row.select_one(".team-name") or 
-                                   row.select_one(".club-name") or 
-                                   row.select_one("td:nth-child(2)") or
-                                   row.select_one("td.team"))
-                        
-                        pts_elem = (row.select_one(".points") or 
-                                  row.select_one("td:nth-last-child(1)") or
-                                  row.select_one("td.pts"))
-                        
-                        if not (team_elem and pts_elem):
-                            continue
-                        
-                        team = team_elem.get_text(strip=True)
-                        pts = pts_elem.get_text(strip=True)
-                        
-                        # Convertir
-                        try:
-                            points = int(pts.strip())
-                        except:
-                            continue
-                        
-                        all_standings.append({
-                            "team": team,
-                            "position": position_counter,
-                            "points": points,
-                            "played": None
-                        })
-                        
-                        position_counter += 1
-                        
-                    except Exception as e:
-                        logging.debug(f"Erreur parsing ligne Europa League: {e}")
-                        continue
-                        
-            except Exception as e:
-                logging.debug(f"Erreur parsing groupe Europa League: {e}")
-                continue
+        all_standings = parse_uefa_standings(response.text, with_group=False)
 
         if all_standings:
             logging.info(f"✅ Europa League : {len(all_standings)} équipes scrapées")
@@ -418,39 +332,14 @@ def get_standings_dbfoot(league_url: str) -> Optional[List[Dict[str, Any]]]:
     This is a light-weight parser; adapt selectors to actual page structure.
     """
     try:
-        random_sleep()
+        wait_for_slot("db-foot.com")
         resp = requests.get(league_url, headers=headers(), timeout=12)
         if resp.status_code != 200:
             logging.warning(f"DBfoot HTTP {resp.status_code} for {league_url}")
             return None
-        soup = BeautifulSoup(resp.text, "html.parser")
-        table = soup.find("table")
-        if not table:
+        results = parse_dbfoot_standings(resp.text)
+        if results is None:
             logging.warning("DBfoot table not found")
-            return None
-        rows = table.find_all("tr")
-        results = []
-        for r in rows[1:]:
-            cols = [c.get_text(strip=True) for c in r.find_all("td")]
-            if len(cols) < 2:
-                continue
-            # heuristique: position, team, played, points typical
-            try:
-                position = int(cols[0])
-                team = cols[1]
-                played = int(cols[2]) if len(cols) > 2 and cols[2].isdigit() else None
-                points = int(cols[-1]) if cols[-1].isdigit() else None
-            except Exception:
-                position = None
-                team = cols[1] if len(cols) > 1 else cols[0]
-                played = None
-                points = None
-            results.append({
-                "team": team,
-                "position": position,
-                "played": played,
-                "points": points
-            })
         return results
     except Exception as e:
         logging.warning(f"DBfoot exception: {e}")
@@ -466,22 +355,12 @@ def get_club_info_soccerwiki(club_slug_url: str) -> Optional[Dict[str, Any]]:
     This function scrapes basic metadata like founded, stadium, market value etc.
     """
     try:
-        random_sleep()
+        wait_for_slot("soccerwiki.org")
         r = requests.get(club_slug_url, headers=headers(), timeout=10)
         if r.status_code != 200:
             logging.warning(f"SoccerWiki HTTP {r.status_code} for {club_slug_url}")
             return None
-        soup = BeautifulSoup(r.text, "html.parser")
-        info = {}
-        # heuristic: find table with class or dt/dd pairs
-        # This is generic; adapt if needed.
-        for tr in soup.select("table tr"):
-            tds = [td.get_text(strip=True) for td in tr.find_all(["th", "td"])]
-            if len(tds) >= 2:
-                key = tds[0].strip(": ")
-                val = tds[1]
-                info[key] = val
-        return info
+        return parse_soccerwiki_info(r.text)
     except Exception as e:
         logging.warning(f"SoccerWiki exception: {e}")
         return None
@@ -498,26 +377,24 @@ def get_fifa_ranking() -> Optional[List[Dict[str, Any]]]:
     attempt = 0
     while attempt < RETRY_ATTEMPTS:
         try:
-            random_sleep()
+            wait_for_slot("fifa.com")
             r = requests.get(url, headers=headers(), timeout=12)
             if r.status_code != 200:
                 logging.warning(f"FIFA ranking HTTP {r.status_code}")
                 attempt += 1
                 time.sleep(RETRY_BACKOFF * attempt)
                 continue
-            soup = BeautifulSoup(r.text, "html.parser")
-            # find ranking rows - heuristics
+            root = parse_html(r.text)
             rankings = []
-            # search for tables or divs with ranking info
-            for row in soup.select("tr"):
-                cols = row.find_all("td")
+            # lignes de classement - heuristiques
+            for row in (SELECTORS["common"]["rows"](root) if root is not None else []):
+                cols = SELECTORS["common"]["tds"](row)
                 if len(cols) < 3:
                     continue
                 try:
-                    rank = int(cols[0].get_text(strip=True))
-                    country = cols[1].get_text(strip=True)
-                    points_text = cols[2].get_text(strip=True).replace(",", "")
-                    points = float(points_text)
+                    rank = int(text(cols[0]))
+                    country = text(cols[1])
+                    points = float(text(cols[2]).replace(",", ""))
                     rankings.append({"rank": rank, "country": country, "points": points})
                 except Exception:
                     continue
@@ -532,11 +409,150 @@ def get_fifa_ranking() -> Optional[List[Dict[str, Any]]]:
             time.sleep(RETRY_BACKOFF * attempt)
     return None
 
+# -----------------------
+# Hedged multi-source fetch: validation, per-source stats, source registry
+# -----------------------
+SOURCE_STATS_PATH = "/app/data/leagues/source_stats.json"
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "4.0"))       # budget before launching the next source (s)
+HEDGE_MIN_DELAY = 1.0
+HEDGE_LATENCY_FACTOR = 2.0   # adaptive budget = factor * EWMA latency of the running source
+LATENCY_EWMA_ALPHA = 0.3
+MIN_TEAMS = 8
+TEAM_COUNT_TOLERANCE = 2
+
+# expected number of teams per competition (None = unknown)
+EXPECTED_TEAMS = {
+    "PL": 20, "PD": 20, "SA": 20, "BL1": 18, "FL1": 18, "PPL": 18,
+    "FL2": 18, "CL": 36, "EL": 36, "WC": None, "CLI": None
+}
+
+# DBfoot standings pages per league code (empty = source disabled)
+DBFOOT_URLS: Dict[str, str] = {}
+
+def validate_standings(rows: Optional[List[Dict[str, Any]]], expected: Optional[int] = None) -> Optional[str]:
+    """
+    Sanity checks on a standings table.
+    Returns None when valid, otherwise the reason of the rejection.
+    """
+    if not rows:
+        return "empty"
+    if len(rows) < MIN_TEAMS:
+        return f"too few teams ({len(rows)})"
+    if expected and abs(len(rows) - expected) > TEAM_COUNT_TOLERANCE:
+        return f"team count {len(rows)} != {expected}"
+    if any(not r.get("team") for r in rows):
+        return "missing team name"
+    try:
+        positions = sorted(int(r.get("position")) for r in rows)
+    except (TypeError, ValueError):
+        return "missing position"
+    if positions != list(range(1, len(rows) + 1)):
+        return "ranks not continuous"
+    return None
+
+class SourceStats:
+    """
+    Per-league, per-source latency (EWMA) and success statistics, persisted in
+    SOURCE_STATS_PATH and used to order sources on the next update:
+    {league_code: {source: {attempts, ok, invalid, failed, latency_ewma, last_error}}}
+    """
+    def __init__(self, path: Optional[str] = SOURCE_STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                logging.warning(f"Load source stats failed: {e}")
+
+    def _get(self, league: str, source: str) -> Dict[str, Any]:
+        return self.data.get(league, {}).get(source) or {}
+
+    def record(self, league: str, source: str, latency: float, outcome: str, error: Optional[str] = None):
+        """outcome: ok | invalid | failed"""
+        with self._lock:
+            st = self.data.setdefault(league, {}).setdefault(source, {
+                "attempts": 0, "ok": 0, "invalid": 0, "failed": 0, "latency_ewma": None, "last_error": None})
+            st["attempts"] += 1
+            st[outcome] += 1
+            prev = st["latency_ewma"]
+            st["latency_ewma"] = round(latency if prev is None else
+                                       LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * prev, 3)
+            if error:
+                st["last_error"] = error[:200]
+            st["updated"] = datetime.utcnow().isoformat()
+
+    def success_rate(self, league: str, source: str) -> float:
+        st = self._get(league, source)
+        # Laplace smoothing: unknown sources start at 0.5
+        return (st.get("ok", 0) + 1) / (st.get("attempts", 0) + 2)
+
+    def latency(self, league: str, source: str) -> Optional[float]:
+        return self._get(league, source).get("latency_ewma")
+
+    def order(self, league: str, names: List[str]) -> List[str]:
+        """Most reliable first, then fastest; static priority breaks ties"""
+        def key(item):
+            idx, name = item
+            lat = self.latency(league, name)
+            return (-round(self.success_rate(league, name), 1), lat if lat is not None else float("inf"), idx)
+        return [name for _, name in sorted(enumerate(names), key=key)]
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            try:
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self.data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                logging.warning(f"Save source stats failed: {e}")
+
+def default_sources():
+    """
+    Standings sources in static priority order: (name, fetch(code, slug, season)).
+    A fetch returns None when the source does not cover the league.
+    """
+    return [
+        ("football-data", lambda code, slug, season: get_standings_football_data(code)),
+        ("soccerdata", lambda code, slug, season: get_standings_soccerdata(slug, season)),
+        ("ligue2_scraper", lambda code, slug, season: get_standings_ligue2() if code == "FL2" else None),
+        ("europa_scraper", lambda code, slug, season: get_standings_europa_league() if code == "EL" else None),
+        ("dbfoot", lambda code, slug, season: get_standings_dbfoot(DBFOOT_URLS[code]) if code in DBFOOT_URLS else None),
+    ]
+
+def _source_applies(name: str, code: str) -> bool:
+    if name == "ligue2_scraper":
+        return code == "FL2"
+    if name == "europa_scraper":
+        return code == "EL"
+    if name == "dbfoot":
+        return code in DBFOOT_URLS
+    if name == "soccerdata":
+        return sd is not None
+    if name == "football-data":
+        return bool(FOOTBALL_DATA_API_KEY)
+    return True
+
 # -----------------------
 # Unified Updater class
 # -----------------------
 class UnifiedUpdater:
-    def __init__(self, use_mongo: bool = False):
+    def __init__(self, use_mongo: bool = False, sources=None, stats_path: Optional[str] = SOURCE_STATS_PATH,
+                 hedge_delay: Optional[float] = None):
+        """
+        sources: [(name, fetch(code, slug, season))] in static priority order
+                 (default_sources() if None; stand-ins can be injected for tests)
+        hedge_delay: fixed hedging budget in seconds (adaptive if None)
+        """
+        self.sources = list(sources) if sources is not None else default_sources()
+        self.custom_sources = sources is not None
+        self.stats = SourceStats(stats_path)
+        self.hedge_delay = hedge_delay
         self.cache = load_cache()
         self.daily_requests = 0
         self.last_reset = datetime.utcnow().date()
@@ -552,14 +568,17 @@ class UnifiedUpdater:
             self.last_reset = datetime.utcnow().date()
 
     def increment_request(self):
+        """Compte une requête sur le budget quotidien partagé (tous processus confondus)"""
         self.reset_daily_if_needed()
-        self.daily_requests += 1
-        if self.daily_requests > DAILY_MAX_REQUESTS:
+        if not QUOTA.try_acquire("unified_updater"):
             logging.warning("Daily request budget exceeded")
             raise RuntimeError("Daily request budget exceeded")
+        self.daily_requests += 1  # requêtes de cette instance (rapports)
 
-    def store_cache(self, key: str, data: Any):
+    def store_cache(self, key: str, data: Any, source: Optional[str] = None):
         self.cache[key] = {"timestamp": time.time(), "data": data}
+        if source:
+            self.cache[key]["source"] = source
         save_cache(self.cache)
 
     def load_cache_for(self, key: str, max_age_hours: int = 24):
@@ -572,7 +591,8 @@ class UnifiedUpdater:
 
     def update_league(self, league_api_code: str, league_soccerdata_slug: str, season: str = "2425"):
         """
-        Try Football-Data -> SoccerData -> Custom Scrapers -> DBfoot -> cache
+        Fresh cache -> hedged fetch (Football-Data, SoccerData, custom scrapers,
+        DBfoot) -> stale cache
         Returns dict with source & data
         """
         key = f"league:{league_api_code}"
@@ -582,76 +602,17 @@ class UnifiedUpdater:
             logging.info(f"{league_api_code}: using fresh cache")
             return {"source": "cache", "data": cached}
 
-        # 2) Football-Data
-        try:
-            self.increment_request()
-            fd = get_standings_football_data(league_api_code)
-            if fd:
-                self.store_cache(key, fd)
-                if self.use_mongo:
-                    self.db.standings.update_one({"league": league_api_code}, {"$set": {"updated": datetime.utcnow(), "data": fd}}, upsert=True)
-                logging.info(f"{league_api_code}: Football-Data OK")
-                return {"source": "football-data", "data": fd}
-        except Exception as e:
-            logging.warning(f"Football-Data failed for {league_api_code}: {e}")
-
-        # 3) SoccerData fallback
-        try:
-            self.increment_request()
-            sd_data = get_standings_soccerdata(league_soccerdata_slug, season)
-            if sd_data:
-                self.store_cache(key, sd_data)
-                if self.use_mongo:
-                    self.db.standings.update_one({"league": league_api_code}, {"$set": {"updated": datetime.utcnow(), "data": sd_data}}, upsert=True)
-                logging.info(f"{league_api_code}: SoccerData OK")
-                return {"source": "soccerdata", "data": sd_data}
-        except Exception as e:
-            logging.warning(f"SoccerData failed for {league_api_code}: {e}")
-
-        # 4) Custom scrapers fallback (Ligue 2 et Europa League)
-        custom_scraper_data = None
-        if league_api_code == "FL2":  # Ligue 2
-            try:
-                self.increment_request()
-                custom_scraper_data = get_standings_ligue2()
-                if custom_scraper_data:
-                    self.store_cache(key, custom_scraper_data)
-                    if self.use_mongo:
-                        self.db.standings.update_one({"league": league_api_code}, {"$set": {"updated": datetime.utcnow(), "data": custom_scraper_data}}, upsert=True)
-                    logging.info(f"{league_api_code}: Ligue2 custom scraper OK")
-                    return {"source": "ligue2_scraper", "data": custom_scraper_data}
-            except Exception as e:
-                logging.warning(f"Ligue 2 scraper failed: {e}")
-        
-        elif league_api_code == "EL":  # Europa League
-            try:
-                self.increment_request()
-                custom_scraper_data = get_standings_europa_league()
-                if custom_scraper_data:
-                    self.store_cache(key, custom_scraper_data)
-                    if self.use_mongo:
-                        self.db.standings.update_one({"league": league_api_code}, {"$set": {"updated": datetime.utcnow(), "data": custom_scraper_data}}, upsert=True)
-                    logging.info(f"{league_api_code}: Europa League custom scraper OK")
-                    return {"source": "europa_scraper", "data": custom_scraper_data}
-            except Exception as e:
-                logging.warning(f"Europa League scraper failed: {e}")
-
-        # 5) DBfoot fallback - user must supply appropriate DBfoot URL map externally
-        dbfoot_url = None  # placeholder - caller may extend to provide URLs map
-        if dbfoot_url:
-            try:
-                self.increment_request()
-                dbf = get_standings_dbfoot(dbfoot_url)
-                if dbf:
-                    self.store_cache(key, dbf)
-                    if self.use_mongo:
-                        self.db.standings.update_one({"league": league_api_code}, {"$set": {"updated": datetime.utcnow(), "data": dbf}}, upsert=True)
-                    logging.info(f"{league_api_code}: DBfoot OK")
-                    return {"source": "dbfoot", "data": dbf}
-            except Exception as e:
-                logging.warning(f"DBfoot failed for {league_api_code}: {e}")
-
-        # 6) last resort cache (stale)
+        # 2) Hedged fetch over all sources (ordered by past reliability / latency)
+        winner = self.hedged_fetch(league_api_code, league_soccerdata_slug, season)
+        if winner:
+            source, data, latency = winner
+            self.store_cache(key, data, source=source)
+            if self.use_mongo:
+                self.db.standings.update_one({"league": league_api_code}, {"$set": {"updated": datetime.utcnow(), "data": data}}, upsert=True)
+            logging.info(f"{league_api_code}: {source} OK ({latency:.2f}s)")
+            return {"source": source, "data": data}
+
+        # 3) last resort cache (stale)
         if key in self.cache:
             logging.info(f"{league_api_code}: returning stale cache")
             return {"source": "cache_stale", "data": self.cache[key]["data"]}
@@ -659,6 +620,101 @@ class UnifiedUpdater:
         logging.error(f"{league_api_code}: no source available")
         return {"source": "none", "data": None}
 
+    def _hedge_budget(self, league: str, source: str) -> float:
+        """Time to wait for `source` before launching the next one"""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        lat = self.stats.latency(league, source)
+        if lat is None:
+            return HEDGE_DELAY
+        return max(HEDGE_MIN_DELAY, min(HEDGE_DELAY, HEDGE_LATENCY_FACTOR * lat))
+
+    def hedged_fetch(self, league_api_code: str, league_soccerdata_slug: str, season: str = "2425"):
+        """
+        Start the best source; if it has not answered within its latency budget
+        (or failed / returned an invalid table), launch the next one while the
+        first keeps running. The first result passing validate_standings wins.
+
+        Returns (source, data, latency) or None
+        """
+        code = league_api_code
+        fetchers = dict(self.sources)
+        names = [name for name, _ in self.sources if self.custom_sources or _source_applies(name, code)]
+        queue = self.stats.order(code, names)
+        expected = EXPECTED_TEAMS.get(code)
+        if not queue:
+            return None
+
+        def run(name):
+            t0 = time.perf_counter()
+            try:
+                data = fetchers[name](code, league_soccerdata_slug, season)
+                error = None
+            except Exception as e:
+                data, error = None, f"{type(e).__name__}: {e}"
+            return name, data, time.perf_counter() - t0, error
+
+        def judge(result):
+            name, data, latency, error = result
+            reason = error or validate_standings(data, expected)
+            outcome = "ok" if reason is None else ("invalid" if data else "failed")
+            self.stats.record(code, name, latency, outcome, reason)
+            return reason
+
+        pool = ThreadPoolExecutor(max_workers=len(queue), thread_name_prefix=f"hedge-{code}")
+        pending: Dict[Any, str] = {}
+        last_launched = None
+        winner = None
+
+        def launch_next():
+            nonlocal last_launched
+            while queue:
+                name = queue.pop(0)
+                try:
+                    self.increment_request()
+                except RuntimeError as e:
+                    logging.warning(f"{code}: {name} not launched ({e})")
+                    queue.clear()
+                    return
+                logging.info(f"{code}: launching {name}")
+                pending[pool.submit(run, name)] = name
+                last_launched = name
+                return
+
+        try:
+            launch_next()
+            while pending:
+                budget = self._hedge_budget(code, last_launched) if queue else None
+                done, _ = wait(list(pending), timeout=budget, return_when=FIRST_COMPLETED)
+                if not done:
+                    logging.info(f"{code}: {last_launched} slower than {budget:.1f}s, hedging")
+                    launch_next()
+                    continue
+                for fut in done:
+                    pending.pop(fut)
+                    result = fut.result()
+                    reason = judge(result)
+                    if reason is None and winner is None:
+                        winner = (result[0], result[1], result[2])
+                    elif reason is not None:
+                        logging.warning(f"{code}: {result[0]} rejected ({reason})")
+                if winner:
+                    break
+                # a source failed: no reason to wait for the budget
+                launch_next()
+        finally:
+            # slower sources keep running; their outcome still feeds the stats,
+            # saved as soon as each one settles
+            def settle(fut):
+                judge(fut.result())
+                self.stats.save()
+
+            for fut in pending:
+                fut.add_done_callback(settle)
+            self.stats.save()
+            pool.shutdown(wait=False, cancel_futures=True)
+        return winner
+
     def get_fifa_ranking(self):
         key = "fifa:ranking"
         cached = self.load_cache_for(key, max_age_hours=24*7)  # weekly freshness
@@ -690,18 +746,112 @@ class UnifiedUpdater:
 # -----------------------
 # Simple runner / scheduler utility
 # -----------------------
-def run_daily_update(updater: UnifiedUpdater, leagues_map: Dict[str, str], season: str = "2425"):
+def prefetch_football_data(updater: UnifiedUpdater, league_codes: List[str],
+                           target_path: Optional[Callable[[str], str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Récupère en parallèle les classements Football-Data des ligues dont le cache
+    n'est plus frais (standings_refresh : client mutualisé, limite par hôte,
+    ETag / If-Modified-Since, contenu identique non re-parsé).
+
+    target_path(code) : fichier écrit par l'appelant ; s'il n'existe pas, la
+    requête ignore les validateurs et la ligue est signalée modifiée (un 304
+    ne doit pas laisser un fichier supprimé vide).
+
+    Returns:
+        dict: {code: {"source": "football-data", "data": [...]}} pour les ligues résolues ;
+        les autres passent par la chaîne de fallback de update_league
+    """
+    try:
+        sys.path.insert(0, '/app/backend')
+        from standings_refresh import RefreshJob, run_jobs, run_sync, HTTPX_AVAILABLE
+    except ImportError:
+        HTTPX_AVAILABLE = False
+    if not HTTPX_AVAILABLE or not FOOTBALL_DATA_API_KEY:
+        return {}
+
+    missing = {code for code in league_codes
+               if target_path is not None and not os.path.exists(target_path(code))}
+    jobs = []
+    for code in league_codes:
+        key = f"league:{code}"
+        if updater.load_cache_for(key, max_age_hours=24) and code not in missing:
+            continue
+        try:
+            updater.increment_request()
+        except RuntimeError:
+            break  # budget épuisé : la boucle séquentielle le signalera
+        if not QUOTA.acquire("football_data:1", max_wait=FOOTBALL_DATA_MAX_WAIT):
+            break  # pas de créneau proche : update_league essaiera la clé de secours
+        previous = updater.cache.get(key, {})
+        jobs.append(RefreshJob(
+            key=f"football-data:{code}",
+            url=f"{FOOTBALL_DATA_BASE}/competitions/{code}/standings",
+            parse=lambda text: parse_football_data_standings(json.loads(text)),
+            headers={"X-Auth-Token": FOOTBALL_DATA_API_KEY},
+            # 304 exploitable seulement si le cache contient déjà ces données
+            force=previous.get("source") != "football-data" or not previous.get("data") or code in missing
+        ))
+    if not jobs:
+        return {}
+
+    try:
+        results = run_sync(run_jobs(jobs))
+    except Exception as e:
+        logging.warning(f"Football-Data prefetch failed: {e}")
+        return {}
+
+    resolved = {}
+    for code in league_codes:
+        res = results.get(f"football-data:{code}")
+        if not res:
+            continue
+        key = f"league:{code}"
+        if res["status"] == "updated":
+            data = res["data"]
+            reason = validate_standings(data, EXPECTED_TEAMS.get(code))
+            updater.stats.record(code, "football-data", res["duration"], "ok" if reason is None else "invalid", reason)
+            if reason is not None:
+                logging.warning(f"{code}: football-data rejected ({reason})")
+                continue
+        elif res["status"] in ("not_modified", "unchanged"):
+            data = updater.cache[key]["data"]
+            updater.stats.record(code, "football-data", res["duration"], "ok")
+        else:
+            updater.stats.record(code, "football-data", res.get("duration", 0.0), "failed",
+                                 res.get("error") or res["status"])
+            continue
+        updater.store_cache(key, data, source="football-data")
+        if updater.use_mongo:
+            updater.db.standings.update_one({"league": code}, {"$set": {"updated": datetime.utcnow(), "data": data}}, upsert=True)
+        logging.info(f"{code}: Football-Data {res['status']} ({res['duration']}s)")
+        resolved[code] = {"source": "football-data", "data": data,
+                          "changed": res["status"] == "updated" or code in missing}
+    updater.stats.save()
+    return resolved
+
+def run_daily_update(updater: UnifiedUpdater, leagues_map: Dict[str, str], season: str = "2425",
+                     target_path: Optional[Callable[[str], str]] = None):
     """
     leagues_map: dict mapping API league code -> soccerdata slug
       e.g. {"PL": "ENG-Premier League", "FL1": "FRA-Ligue 1"}
+
+    Football-Data est interrogé en parallèle pour toutes les ligues, seules les
+    ligues non résolues passent ensuite par update_league (fallbacks).
+    target_path(code) : fichier de ligue de l'appelant (voir prefetch_football_data).
     """
     logging.info("Starting daily unified update")
     report = {"timestamp": datetime.utcnow().isoformat(), "results": {}}
+    prefetched = prefetch_football_data(updater, list(leagues_map.keys()), target_path)
     for api_code, sd_slug in leagues_map.items():
         try:
-            random_sleep()
-            res = updater.update_league(api_code, sd_slug, season)
+            if api_code in prefetched:
+                res = prefetched[api_code]
+            else:
+                # chaque source attend son propre créneau (wait_for_slot)
+                res = updater.update_league(api_code, sd_slug, season)
             report["results"][api_code] = {"status": "ok" if res["data"] else "none", "source": res["source"]}
+            if res.get("changed") is False:
+                report["results"][api_code]["changed"] = False
             logging.info(f"Updated {api_code} -> {res['source']}")
         except RuntimeError as re:
             logging.error(f"Daily budget exceeded: {re}")
@@ -18,10 +18,10 @@ from fuzzywuzzy import process, fuzz
 
 # Import de l'intégration Odds API
 from tools.odds_api_integration import (
-    load_latest_odds,
     get_ingestion_stats,
     ingest_odds_once
 )
+from tools.odds_store import get_odds_store
 
 # Configuration
 DATA_DIR = Path("/app/data")
@@ -218,17 +218,13 @@ def _get_reference_teams(source: str = "odds_api") -> List[str]:
         # Rafraîchir le cache si nécessaire
         _refresh_odds_cache_if_needed()
         
-        # Charger les données
-        odds_data = load_latest_odds()
+        # Équipes connues du store (index par équipe, sans relire l'historique)
         teams = set()
         
-        for record in odds_data:
-            home = record.get("home_team", "").strip()
-            away = record.get("away_team", "").strip()
-            if home:
-                teams.add(home)
-            if away:
-                teams.add(away)
+        for name in get_odds_store().teams():
+            name = name.strip()
+            if name:
+                teams.add(name)
         
         # Ajouter les équipes nationales (World Cup)
         for team in WORLD_CUP_TEAMS:
@@ -258,11 +254,10 @@ def _get_reference_leagues(source: str = "odds_api") -> List[str]:
     if source == "odds_api":
         _refresh_odds_cache_if_needed()
         
-        odds_data = load_latest_odds()
         leagues = set()
         
-        for record in odds_data:
-            league = record.get("league_name", "").strip()
+        for league in get_odds_store().leagues():
+            league = league.strip()
             if league:
                 leagues.add(league)
         
@@ -2,18 +2,39 @@
 """
 The Odds API Integration
 Récupère les cotes sportives en temps réel et les stocke pour comparaison avec UFAv3
+
+Les cotes sont stockées dans le store SQLite indexé (tools/odds_store.py) ;
+odds_data.jsonl n'est plus qu'une source d'import initial.
+
+Ingestion : toutes les ligues sont récupérées en parallèle (client httpx
+mutualisé, quota partagé "odds_api"), chaque réponse est parsée dès son
+arrivée et les enregistrements sont écrits par lots. Le rapport de la
+dernière ingestion (latence et nombre de matchs par ligue) est exposé par
+get_ingestion_stats().
 """
 import os
+import sys
 import time
 import json
+import asyncio
 import logging
 from datetime import datetime
 from typing import Optional, List, Dict
 import requests
 
+sys.path.insert(0, '/app/backend')
+from tools.odds_store import get_odds_store
+from quota_manager import get_quota_manager
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 # Configuration
 DATA_DIR = "/app/data"
-ODDS_JSONL = os.path.join(DATA_DIR, "odds_data.jsonl")
+ODDS_JSONL = os.path.join(DATA_DIR, "odds_data.jsonl")  # import initial du store uniquement
 LOG_PATH = "/app/logs/odds_integration.log"
 DEFAULT_REGION = os.getenv("ODDS_API_REGION", "eu")
 
@@ -31,6 +52,24 @@ LEAGUE_MAPPING = {
     "soccer_germany_bundesliga": "Bundesliga"
 }
 
+# Quota partagé (crédits The Odds API : une requête par ligue et par ingestion)
+QUOTA_PROVIDER = "odds_api"
+# plafond quotidien optionnel (non défini = illimité, seule la cadence s'applique)
+ODDS_API_DAILY_CAP = int(os.getenv("ODDS_API_DAILY_CAP")) if os.getenv("ODDS_API_DAILY_CAP") else None
+ODDS_API_RATE = 5.0           # requêtes / seconde
+QUOTA_MAX_WAIT = 10.0         # attente max d'un créneau avant d'abandonner une ligue
+
+REQUEST_TIMEOUT = 20.0
+CONNECT_TIMEOUT = 5.0
+MAX_CONNECTIONS = 8
+WRITE_BATCH_SIZE = 200        # enregistrements par transaction du store
+
+quota = get_quota_manager()
+quota.register(QUOTA_PROVIDER, daily_cap=ODDS_API_DAILY_CAP, rate=ODDS_API_RATE, burst=len(LEAGUE_MAPPING))
+
+_session = requests.Session()   # connexions réutilisées (mode synchrone)
+_last_ingestion = None          # rapport de la dernière ingestion
+
 # Configuration du logging
 os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
 logging.basicConfig(
@@ -46,9 +85,20 @@ def write_jsonl(path: str, obj: dict):
         f.write(json.dumps(obj, ensure_ascii=False) + "\n")
 
 
+def _odds_params(region: str = DEFAULT_REGION, markets: List[str] = None) -> dict:
+    if markets is None:
+        markets = ["h2h"]  # Head-to-head (résultat du match)
+    return {
+        "apiKey": ODDS_API_KEY,
+        "regions": region,
+        "markets": ",".join(markets),
+        "oddsFormat": "decimal"
+    }
+
+
 def fetch_odds_for_sport(sport_key: str, region: str = DEFAULT_REGION, markets: List[str] = None) -> Optional[List[dict]]:
     """
-    Récupère les cotes pour un sport donné depuis The Odds API.
+    Récupère les cotes pour un sport donné depuis The Odds API (session partagée, quota).
     
     Args:
         sport_key: Identifiant du sport (ex: 'soccer_epl')
@@ -58,27 +108,22 @@ def fetch_odds_for_sport(sport_key: str, region: str = DEFAULT_REGION, markets:
     Returns:
         Liste des matchs avec leurs cotes, ou None en cas d'erreur
     """
-    if markets is None:
-        markets = ["h2h"]  # Head-to-head (résultat du match)
-    
-    params = {
-        "apiKey": ODDS_API_KEY,
-        "regions": region,
-        "markets": ",".join(markets),
-        "oddsFormat": "decimal"
-    }
-    
     url = f"{BASE_URL}/{sport_key}/odds"
     
+    if not quota.acquire(QUOTA_PROVIDER, max_wait=QUOTA_MAX_WAIT):
+        logging.warning(f"Odds API quota reached, skipping {sport_key}")
+        return None
+    
     try:
-        r = requests.get(url, params=params, timeout=20)
+        r = _session.get(url, params=_odds_params(region, markets), timeout=REQUEST_TIMEOUT)
         
         if r.status_code != 200:
             logging.error(f"Odds API error {r.status_code}: {r.text}")
             return None
         
-        logging.info(f"Fetched odds for {sport_key}: {len(r.json())} matches")
-        return r.json()
+        data = r.json()
+        logging.info(f"Fetched odds for {sport_key}: {len(data)} matches")
+        return data
         
     except Exception as e:
         logging.exception(f"Exception fetching odds for {sport_key}")
@@ -90,68 +135,176 @@ def normalize_team_name(name: str) -> str:
     return name.strip()
 
 
+def _build_records(data: List[dict], league_name: str, fetched_at: str) -> List[dict]:
+    """Réponse de l'API → enregistrements du store"""
+    return [{
+        "fetched_at": fetched_at,
+        "sport_key": item.get("sport_key"),
+        "league_name": league_name,
+        "commence_time": item.get("commence_time"),
+        "home_team": normalize_team_name(item.get("home_team", "")),
+        "away_team": normalize_team_name(item.get("away_team", "")),
+        "bookmakers": item.get("bookmakers", []),
+        "raw": item
+    } for item in data]
+
+
+async def _fetch_sport_async(client, sport_key: str, league_name: str, fetched_at: str) -> dict:
+    """Une ligue : créneau du quota, requête, parsing. Retourne le rapport + les enregistrements."""
+    report = {"sport_key": sport_key, "league": league_name, "status": "error", "http_status": None,
+              "latency_ms": None, "records": 0, "bytes": 0, "requests_remaining": None, "error": None}
+    delay = await asyncio.to_thread(quota.reserve, QUOTA_PROVIDER, 1, QUOTA_MAX_WAIT)
+    if delay is None:
+        report["status"] = "quota"
+        return {"report": report, "records": []}
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    t0 = time.perf_counter()
+    records = []
+    try:
+        response = await client.get(f"{BASE_URL}/{sport_key}/odds", params=_odds_params())
+        report["http_status"] = response.status_code
+        report["bytes"] = len(response.content)
+        report["requests_remaining"] = response.headers.get("x-requests-remaining")
+        if response.status_code != 200:
+            report["error"] = f"HTTP {response.status_code}: {response.text[:200]}"
+        else:
+            records = _build_records(response.json(), league_name, fetched_at)
+            report["status"] = "ok" if records else "empty"
+            report["records"] = len(records)
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+    report["latency_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return {"report": report, "records": records}
+
+
+def _write_batch(store, batch: List[tuple], reports: Dict[str, dict]) -> int:
+    """
+    Écrit un lot [(sport_key, enregistrements)] en une transaction ; si elle échoue,
+    reprend ligue par ligue : une ligue fautive est journalisée, les autres sont écrites.
+    """
+    try:
+        return store.append([rec for _, records in batch for rec in records])
+    except Exception as e:
+        logging.warning(f"Odds batch write failed ({e}), retrying league by league")
+    written = 0
+    for sport_key, records in batch:
+        try:
+            written += store.append(records)
+        except Exception as e:
+            logging.exception(f"Failed to store odds records for {sport_key}: {e}")
+            reports[sport_key]["status"] = "store_error"
+            reports[sport_key]["error"] = f"{type(e).__name__}: {e}"
+    return written
+
+
+async def ingest_odds_async(sports: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Récupère toutes les ligues en parallèle et écrit les enregistrements par lots,
+    au fil des réponses.
+    
+    Returns:
+        dict: {fetched_at, duration_ms, records, sports: {sport_key: rapport}}
+    """
+    sports = sports or LEAGUE_MAPPING
+    store = get_odds_store()
+    fetched_at = datetime.utcnow().isoformat()
+    t0 = time.perf_counter()
+    reports, pending, pending_count, written = {}, [], 0, 0
+
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    timeout = httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        tasks = [_fetch_sport_async(client, sport_key, league_name, fetched_at)
+                 for sport_key, league_name in sports.items()]
+        for done in asyncio.as_completed(tasks):
+            result = await done
+            report = result["report"]
+            reports[report["sport_key"]] = report
+            logging.info(f"Fetched odds for {report['sport_key']}: {report['status']} "
+                         f"({report['records']} matches, {report['latency_ms']} ms)")
+            if result["records"]:
+                pending.append((report["sport_key"], result["records"]))
+                pending_count += len(result["records"])
+            if pending_count >= WRITE_BATCH_SIZE:
+                written += await asyncio.to_thread(_write_batch, store, pending, reports)
+                pending, pending_count = [], 0
+    if pending:
+        written += await asyncio.to_thread(_write_batch, store, pending, reports)
+
+    return {
+        "fetched_at": fetched_at,
+        "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "records": written,
+        "sports": reports
+    }
+
+
+def _ingest_sequential() -> dict:
+    """Repli sans httpx : une ligue après l'autre (session requests partagée)"""
+    store = get_odds_store()
+    fetched_at = datetime.utcnow().isoformat()
+    t0 = time.perf_counter()
+    reports, written = {}, 0
+    for sport_key, league_name in LEAGUE_MAPPING.items():
+        t1 = time.perf_counter()
+        data = fetch_odds_for_sport(sport_key)
+        records = _build_records(data, league_name, fetched_at) if data else []
+        reports[sport_key] = {"sport_key": sport_key, "league": league_name,
+                              "status": "ok" if records else "error", "records": len(records),
+                              "latency_ms": round((time.perf_counter() - t1) * 1000, 1)}
+        if records:
+            written += _write_batch(store, [(sport_key, records)], reports)
+    return {
+        "fetched_at": fetched_at,
+        "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "records": written,
+        "sports": reports
+    }
+
+
 def ingest_odds_once():
     """
-    Récupère les cotes pour toutes les ligues configurées et les stocke dans odds_data.jsonl.
+    Récupère les cotes pour toutes les ligues configurées (en parallèle) et les stocke
+    dans le store (historique + dernier snapshot par match).
     Cette fonction est appelée périodiquement par le scheduler.
     
     Returns:
         int: Nombre de matchs récupérés
     """
-    os.makedirs(DATA_DIR, exist_ok=True)
-    count = 0
-    fetched_at = datetime.utcnow().isoformat()
-    
+    global _last_ingestion
     logging.info("=== Starting odds ingestion ===")
     
-    for sport_key, league_name in LEAGUE_MAPPING.items():
-        logging.info(f"Fetching odds for {league_name} ({sport_key})")
-        data = fetch_odds_for_sport(sport_key)
-        
-        if not data:
-            logging.warning(f"No data for {sport_key}")
-            continue
-        
-        for item in data:
-            try:
-                record = {
-                    "fetched_at": fetched_at,
-                    "sport_key": item.get("sport_key"),
-                    "league_name": league_name,
-                    "commence_time": item.get("commence_time"),
-                    "home_team": normalize_team_name(item.get("home_team", "")),
-                    "away_team": normalize_team_name(item.get("away_team", "")),
-                    "bookmakers": item.get("bookmakers", []),
-                    "raw": item
-                }
-                write_jsonl(ODDS_JSONL, record)
-                count += 1
-            except Exception as e:
-                logging.exception(f"Failed to write odds record: {e}")
+    if HTTPX_AVAILABLE:
+        from standings_refresh import run_sync
+        report = run_sync(ingest_odds_async())
+    else:
+        report = _ingest_sequential()
+    _last_ingestion = report
     
-    logging.info(f"=== Ingested {count} odds records at {fetched_at} ===")
-    return count
+    for sport_key, sport in report["sports"].items():
+        if sport["status"] != "ok":
+            logging.warning(f"No data for {sport_key} ({sport['status']})")
+    logging.info(f"=== Ingested {report['records']} odds records at {report['fetched_at']} "
+                 f"in {report['duration_ms']} ms ===")
+    return report["records"]
+
+
+def get_last_ingestion() -> Optional[dict]:
+    """Rapport de la dernière ingestion du processus (latence et matchs par ligue)"""
+    return _last_ingestion
 
 
 def load_latest_odds() -> List[dict]:
     """
-    Charge les cotes depuis odds_data.jsonl (les plus récentes en premier).
+    Charge tout l'historique des cotes depuis le store (les plus récentes en premier).
+    Pour une recherche de match, utiliser get_latest_odds_for_match (indexé).
     
     Returns:
         Liste des enregistrements de cotes
     """
-    if not os.path.exists(ODDS_JSONL):
-        return []
-    
-    out = []
-    with open(ODDS_JSONL, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                out.append(json.loads(line))
-            except Exception:
-                continue
-    
-    return out[::-1]  # Plus récent en premier
+    return get_odds_store().history()
 
 
 def find_best_market(bookmakers: List[dict], market="h2h") -> Optional[dict]:
@@ -199,7 +352,7 @@ def implied_prob_from_decimal(odds: float) -> float:
 
 def get_latest_odds_for_match(home: str, away: str, league: Optional[str] = None) -> Optional[dict]:
     """
-    Recherche les cotes les plus récentes pour un match donné.
+    Recherche les cotes les plus récentes pour un match donné (index par équipe du store).
     Utilise un matching partiel (substring) pour la robustesse.
     
     Args:
@@ -210,52 +363,47 @@ def get_latest_odds_for_match(home: str, away: str, league: Optional[str] = None
     Returns:
         Dict avec bookmaker, markets (h2h avec home_odds, away_odds, draw_odds), fetched_at
     """
-    latest = load_latest_odds()
+    rec = get_odds_store().find_latest(home, away, league)
+    if rec is None:
+        return None
+    
     home_l = home.lower().strip()
     away_l = away.lower().strip()
     
-    for rec in latest:
-        h = rec.get("home_team", "").lower()
-        a = rec.get("away_team", "").lower()
+    bookmakers = rec.get("bookmakers", [])
+    best = find_best_market(bookmakers, market="h2h")
+    
+    out = {
+        "fetched_at": rec.get("fetched_at"),
+        "commence_time": rec.get("commence_time"),
+        "league_name": rec.get("league_name"),
+        "bookmaker": None,
+        "markets": {}
+    }
+    
+    if best:
+        out["bookmaker"] = best.get("bookmaker_title") or best.get("bookmaker")
+        outcomes = best.get("market", {}).get("outcomes", [])
+    
+        # Mapper les outcomes
+        m = {}
+        for o in outcomes:
+            name = o.get("name", "").lower()
+            odd = o.get("price")
         
-        # Matching partiel pour robustesse
-        if home_l in h and away_l in a:
-            bookmakers = rec.get("bookmakers", [])
-            best = find_best_market(bookmakers, market="h2h")
-            
-            out = {
-                "fetched_at": rec.get("fetched_at"),
-                "commence_time": rec.get("commence_time"),
-                "league_name": rec.get("league_name"),
-                "bookmaker": None,
-                "markets": {}
-            }
-            
-            if best:
-                out["bookmaker"] = best.get("bookmaker_title") or best.get("bookmaker")
-                outcomes = best.get("market", {}).get("outcomes", [])
-                
-                # Mapper les outcomes
-                m = {}
-                for o in outcomes:
-                    name = o.get("name", "").lower()
-                    odd = o.get("price")
-                    
-                    if home_l in name:
-                        m["home_odds"] = odd
-                        m["home_prob"] = implied_prob_from_decimal(odd)
-                    elif away_l in name:
-                        m["away_odds"] = odd
-                        m["away_prob"] = implied_prob_from_decimal(odd)
-                    elif "draw" in name or name in ["draw", "tie", "x"]:
-                        m["draw_odds"] = odd
-                        m["draw_prob"] = implied_prob_from_decimal(odd)
-                
-                out["markets"]["h2h"] = m
-            
-            return out
+            if home_l in name:
+                m["home_odds"] = odd
+                m["home_prob"] = implied_prob_from_decimal(odd)
+            elif away_l in name:
+                m["away_odds"] = odd
+                m["away_prob"] = implied_prob_from_decimal(odd)
+            elif "draw" in name or name in ["draw", "tie", "x"]:
+                m["draw_odds"] = odd
+                m["draw_prob"] = implied_prob_from_decimal(odd)
     
-    return None
+        out["markets"]["h2h"] = m
+    
+    return out
 
 
 def get_ingestion_stats() -> dict:
@@ -265,28 +413,13 @@ def get_ingestion_stats() -> dict:
     Returns:
         Dict avec nombre total, dernière mise à jour, ligues couvertes
     """
-    if not os.path.exists(ODDS_JSONL):
-        return {
-            "total_records": 0,
-            "last_update": None,
-            "leagues": []
-        }
-    
-    records = load_latest_odds()
-    
-    if not records:
-        return {
-            "total_records": 0,
-            "last_update": None,
-            "leagues": []
-        }
-    
-    leagues = set(r.get("league_name") for r in records if r.get("league_name"))
-    
+    stats = get_odds_store().stats()
     return {
-        "total_records": len(records),
-        "last_update": records[0].get("fetched_at") if records else None,
-        "leagues": list(leagues)
+        "total_records": stats["total_records"],
+        "last_update": stats["last_update"],
+        "leagues": stats["leagues"],
+        "last_ingestion": _last_ingestion,
+        "quota_remaining": quota.remaining(QUOTA_PROVIDER)
     }
 
 
@@ -294,7 +427,7 @@ if __name__ == "__main__":
     # CLI simple : ingestion unique
     print("🔍 Récupération des cotes depuis The Odds API...")
     count = ingest_odds_once()
-    print(f"✅ {count} matchs récupérés et stockés dans {ODDS_JSONL}")
+    print(f"✅ {count} matchs récupérés et stockés dans {get_odds_store().path}")
     
     # Afficher statistiques
     stats = get_ingestion_stats()
@@ -0,0 +1,621 @@
+# /app/backend/tools/odds_store.py
+"""
+Stockage indexé et compact des cotes (The Odds API) — SQLite.
+
+Tables :
+- events         : un match par clé normalisée (domicile, extérieur, ligue,
+                   coup d'envoi), index par équipe, dernier relevé (last_fetch)
+- bookmakers /
+  markets        : dictionnaires (clé → id), chaque nom n'est stocké qu'une fois
+- quotes         : cotes d'un (match, bookmaker, marché), une ligne seulement
+                   quand les prix changent (delta)
+- current_quotes : cote courante de chaque (match, bookmaker, marché)
+- fetches        : un relevé par match et par ingestion → ids des quotes
+                   présentes (snapshot reconstruit sans dupliquer les prix),
+                   last_update du relevé quand ils diffèrent de ceux de la
+                   quote référencée, champs bruts de l'API (extras)
+- extras         : champs bruts hors bookmakers (id, sport_title...), chaque
+                   variante stockée une fois
+- segments       : relevés de plus de FULL_RESOLUTION_DAYS, réduits à un par
+                   match et par heure, compressés (zlib) par jour
+- meta           : version du schéma, import initial de odds_data.jsonl,
+                   génération des dictionnaires (incrémentée quand compact()
+                   en purge)
+
+Rétention : résolution complète pendant FULL_RESOLUTION_DAYS, puis horaire
+dans les segments pendant SEGMENT_RETENTION_DAYS. compact() (compacteur en
+arrière-plan : start_compactor) roule les vieux relevés, retire les matchs
+commencés depuis plus de FULL_RESOLUTION_DAYS (avec leurs cotes, relevés et
+les dictionnaires devenus inutiles) et supprime les segments expirés : le
+stockage reste borné, quelle que soit la durée de fonctionnement.
+
+Usage:
+    from tools.odds_store import get_odds_store
+    store = get_odds_store()
+    store.append(records)                   # une transaction par lot
+    store.find_latest("Chelsea", "Arsenal") # snapshot le plus récent (clés, puis partiel)
+    store.stats()
+"""
+import os
+import json
+import zlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Iterable
+
+from team_keys import normalize_key
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "/app/data"
+ODDS_DB = os.path.join(DATA_DIR, "odds_store.db")
+ODDS_JSONL = os.path.join(DATA_DIR, "odds_data.jsonl")
+
+SCHEMA_VERSION = "1"
+FULL_RESOLUTION_DAYS = 7      # relevés conservés tels quels
+SEGMENT_RETENTION_DAYS = 90   # segments horaires conservés
+COMPACT_INTERVAL = 6 * 3600   # période du compacteur (secondes)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    home_key TEXT NOT NULL,
+    away_key TEXT NOT NULL,
+    league_key TEXT NOT NULL,
+    commence_time TEXT NOT NULL,
+    sport_key TEXT,
+    league_name TEXT,
+    home_team TEXT,
+    away_team TEXT,
+    last_fetch INTEGER,
+    UNIQUE (home_key, away_key, league_key, commence_time)   -- index aussi de find_latest (home_key, away_key)
+);
+CREATE INDEX IF NOT EXISTS idx_events_home ON events(home_team);
+CREATE INDEX IF NOT EXISTS idx_events_away ON events(away_team);
+CREATE INDEX IF NOT EXISTS idx_events_league ON events(league_name);
+
+CREATE TABLE IF NOT EXISTS bookmakers (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS markets (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS quotes (
+    id INTEGER PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    bookmaker_id INTEGER NOT NULL,
+    market_id INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    bookmaker_update TEXT,
+    market_update TEXT,
+    outcomes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS current_quotes (
+    event_id INTEGER NOT NULL,
+    bookmaker_id INTEGER NOT NULL,
+    market_id INTEGER NOT NULL,
+    quote_id INTEGER NOT NULL,
+    PRIMARY KEY (event_id, bookmaker_id, market_id)
+);
+
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    quote_ids TEXT NOT NULL,
+    updates TEXT,
+    extra_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_fetches_fetched ON fetches(fetched_at);
+
+CREATE TABLE IF NOT EXISTS extras (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    raw_bytes INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_segments_day ON segments(day);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT_EVENT = """
+INSERT INTO events (home_key, away_key, league_key, commence_time,
+                    sport_key, league_name, home_team, away_team)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (home_key, away_key, league_key, commence_time) DO UPDATE SET
+    sport_key = excluded.sport_key,
+    league_name = excluded.league_name,
+    home_team = excluded.home_team,
+    away_team = excluded.away_team
+"""
+
+EVENT_COLUMNS = "id, sport_key, league_name, commence_time, home_team, away_team"
+FETCH_COLUMNS = "id, event_id, fetched_at, quote_ids, updates, extra_id"
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class OddsStore:
+    """Store SQLite des cotes ; une connexion par thread (mode WAL)"""
+
+    def __init__(self, path: str = ODDS_DB, legacy_jsonl: Optional[str] = ODDS_JSONL):
+        self.path = path
+        self.legacy_jsonl = legacy_jsonl
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._bookmaker_ids = {}   # clé → id, valables pour la génération _dict_generation
+        self._market_ids = {}
+        self._dict_generation = None
+        self._dict_lock = threading.Lock()
+
+    # -----------------------
+    # Connexion / schéma
+    # -----------------------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # effectif à la création du fichier
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    with conn:
+                        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                                     (SCHEMA_VERSION,))
+                    self._import_legacy(conn)
+                    self._initialized = True
+        return conn
+
+    def _import_legacy(self, conn):
+        """Import unique de odds_data.jsonl (ordre du fichier conservé)"""
+        if not self.legacy_jsonl or not os.path.exists(self.legacy_jsonl):
+            return
+        with conn:
+            # la réservation de la clé sérialise l'import entre processus
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('legacy_import', '')").rowcount
+            if not claimed:
+                return
+            records = []
+            with open(self.legacy_jsonl, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except Exception:
+                        continue
+            self._insert(conn, records)
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'legacy_import'", (str(len(records)),))
+        logger.info(f"📥 {len(records)} enregistrements importés depuis {self.legacy_jsonl}")
+
+    # -----------------------
+    # Dictionnaires
+    # -----------------------
+    def _check_dictionaries(self, conn):
+        """Vide les caches clé → id si compact() a purgé les dictionnaires (tout processus)"""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'dictionaries'").fetchone()
+        generation = row[0] if row else None
+        with self._dict_lock:
+            if generation != self._dict_generation:
+                self._bookmaker_ids.clear()
+                self._market_ids.clear()
+                self._dict_generation = generation
+
+    def _dict_id(self, conn, table, cache, key, title=None):
+        with self._dict_lock:
+            if key in cache:
+                return cache[key]
+        if table == "bookmakers":
+            conn.execute("INSERT OR IGNORE INTO bookmakers (key, title) VALUES (?, ?)", (key, title))
+        else:
+            conn.execute("INSERT OR IGNORE INTO markets (key) VALUES (?)", (key,))
+        row = conn.execute(f"SELECT id FROM {table} WHERE key = ?", (key,)).fetchone()
+        with self._dict_lock:
+            cache[key] = row[0]
+        return row[0]
+
+    def _extra_id(self, conn, extra):
+        if not extra:
+            return None
+        data = _dumps(extra)
+        conn.execute("INSERT OR IGNORE INTO extras (data) VALUES (?)", (data,))
+        return conn.execute("SELECT id FROM extras WHERE data = ?", (data,)).fetchone()[0]
+
+    def _dictionaries(self, conn):
+        """{id: (clé, titre)} des bookmakers, {id: clé} des marchés"""
+        bookmakers = {i: (k, t) for i, k, t in conn.execute("SELECT id, key, title FROM bookmakers")}
+        markets = {i: k for i, k in conn.execute("SELECT id, key FROM markets")}
+        return bookmakers, markets
+
+    # -----------------------
+    # Écriture
+    # -----------------------
+    def _insert(self, conn, records: Iterable[dict]) -> int:
+        self._check_dictionaries(conn)
+        count = 0
+        for rec in records:
+            raw = rec.get("raw") or {}
+            extra = {k: v for k, v in raw.items() if k != "bookmakers"}
+            commence_time = rec.get("commence_time") or ""
+            keys = (normalize_key(rec.get("home_team")), normalize_key(rec.get("away_team")),
+                    normalize_key(rec.get("league_name")), commence_time)
+            conn.execute(UPSERT_EVENT, keys + (
+                rec.get("sport_key"), rec.get("league_name"),
+                rec.get("home_team", ""), rec.get("away_team", "")))
+            event_id = conn.execute(
+                "SELECT id FROM events WHERE home_key = ? AND away_key = ? AND league_key = ? AND commence_time = ?",
+                keys).fetchone()[0]
+
+            current = {
+                (b, m): (quote_id, outcomes, (bookmaker_update, market_update))
+                for b, m, quote_id, outcomes, bookmaker_update, market_update in conn.execute(
+                    "SELECT c.bookmaker_id, c.market_id, c.quote_id, q.outcomes, q.bookmaker_update, "
+                    "q.market_update FROM current_quotes c "
+                    "JOIN quotes q ON q.id = c.quote_id WHERE c.event_id = ?", (event_id,))
+            }
+            quote_ids, updates = [], []
+            for bm in rec.get("bookmakers", []):
+                # clé absente : titre à la place ; ni l'un ni l'autre : entrée ignorée
+                bookmaker_key = bm.get("key") or bm.get("title")
+                if not bookmaker_key:
+                    logger.debug(f"Bookmaker sans clé ignoré ({rec.get('home_team')} - {rec.get('away_team')})")
+                    continue
+                bookmaker_id = self._dict_id(conn, "bookmakers", self._bookmaker_ids, bookmaker_key, bm.get("title"))
+                for market in bm.get("markets", []):
+                    if not market.get("key"):
+                        continue
+                    market_id = self._dict_id(conn, "markets", self._market_ids, market.get("key"))
+                    outcomes = _dumps(market.get("outcomes", []))
+                    seen = (bm.get("last_update"), market.get("last_update"))
+                    known = current.get((bookmaker_id, market_id))
+                    if known and known[1] == outcomes:
+                        # prix inchangés : on référence l'existant, last_update du relevé si différents
+                        quote_ids.append(known[0])
+                        updates.append(None if known[2] == seen else list(seen))
+                        continue
+                    quote_id = conn.execute(
+                        "INSERT INTO quotes (event_id, bookmaker_id, market_id, fetched_at, "
+                        "bookmaker_update, market_update, outcomes) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (event_id, bookmaker_id, market_id, rec.get("fetched_at"),
+                         seen[0], seen[1], outcomes)).lastrowid
+                    conn.execute("INSERT OR REPLACE INTO current_quotes (event_id, bookmaker_id, market_id, quote_id) "
+                                 "VALUES (?, ?, ?, ?)", (event_id, bookmaker_id, market_id, quote_id))
+                    current[(bookmaker_id, market_id)] = (quote_id, outcomes, seen)
+                    quote_ids.append(quote_id)
+                    updates.append(None)
+
+            fetch_id = conn.execute(
+                "INSERT INTO fetches (event_id, fetched_at, quote_ids, updates, extra_id) VALUES (?, ?, ?, ?, ?)",
+                (event_id, rec.get("fetched_at"), ",".join(map(str, quote_ids)),
+                 _dumps(updates) if any(updates) else None, self._extra_id(conn, extra))).lastrowid
+            conn.execute("UPDATE events SET last_fetch = ? WHERE id = ?", (fetch_id, event_id))
+            count += 1
+        return count
+
+    def append(self, records: List[dict]) -> int:
+        """Ajoute un lot de relevés (deltas de prix + snapshot par match) en une transaction"""
+        if not records:
+            return 0
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")   # verrou d'écriture avant la lecture de la génération
+                return self._insert(conn, records)
+        except Exception:
+            # ids de dictionnaire insérés par la transaction annulée
+            with self._dict_lock:
+                self._bookmaker_ids.clear()
+                self._market_ids.clear()
+            raise
+
+    # -----------------------
+    # Reconstruction
+    # -----------------------
+    def _records(self, conn, fetch_rows) -> List[dict]:
+        """Lignes de fetches (FETCH_COLUMNS) → enregistrements au format de odds_data.jsonl"""
+        fetch_rows = list(fetch_rows)
+        if not fetch_rows:
+            return []
+        bookmakers, markets = self._dictionaries(conn)
+        event_ids = {row[1] for row in fetch_rows}
+        quote_ids = {int(q) for row in fetch_rows for q in row[3].split(",") if q}
+        events = {}
+        for event_id in event_ids:
+            row = conn.execute(f"SELECT {EVENT_COLUMNS} FROM events WHERE id = ?", (event_id,)).fetchone()
+            events[event_id] = row
+        quotes = {}
+        ids = sorted(quote_ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for quote in conn.execute(
+                    "SELECT id, bookmaker_id, market_id, bookmaker_update, market_update, outcomes "
+                    f"FROM quotes WHERE id IN ({','.join('?' * len(chunk))})", chunk):
+                quotes[quote[0]] = quote
+        extra_ids = sorted({row[5] for row in fetch_rows if row[5] is not None})
+        extras = {}
+        for start in range(0, len(extra_ids), 500):
+            chunk = extra_ids[start:start + 500]
+            extras.update(conn.execute(
+                f"SELECT id, data FROM extras WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+
+        out = []
+        for _, event_id, fetched_at, ids, updates, extra_id in fetch_rows:
+            _, sport_key, league_name, commence_time, home, away = events[event_id]
+            extra = extras[extra_id] if extra_id is not None else None   # champs bruts de ce relevé
+            updates = json.loads(updates) if updates else None
+            books = []
+            for pos, q in enumerate(q for q in ids.split(",") if q):
+                _, bookmaker_id, market_id, bookmaker_update, market_update, outcomes = quotes[int(q)]
+                if updates and updates[pos]:
+                    bookmaker_update, market_update = updates[pos]
+                key, title = bookmakers[bookmaker_id]
+                if not books or books[-1]["key"] != key:
+                    books.append({"key": key, "title": title, "last_update": bookmaker_update, "markets": []})
+                books[-1]["markets"].append({"key": markets[market_id], "last_update": market_update,
+                                             "outcomes": json.loads(outcomes)})
+            raw = json.loads(extra) if extra else {}
+            raw["bookmakers"] = books
+            out.append({
+                "fetched_at": fetched_at,
+                "sport_key": sport_key,
+                "league_name": league_name,
+                "commence_time": commence_time,
+                "home_team": home,
+                "away_team": away,
+                "bookmakers": books,
+                "raw": raw
+            })
+        return out
+
+    # -----------------------
+    # Lecture
+    # -----------------------
+    def _teams_matching(self, column: str, needle: str) -> List[str]:
+        """Noms distincts (index de la colonne) contenant needle, en minuscules"""
+        rows = self._conn().execute(f"SELECT DISTINCT {column} FROM events")
+        return [name for (name,) in rows if name is not None and needle in name.lower()]
+
+    def _latest_fetch(self, where: str, params: list, league: Optional[str]):
+        """last_fetch du match le plus récent (ligue demandée en priorité)"""
+        if league:
+            return self._conn().execute(
+                f"SELECT last_fetch FROM events WHERE {where} "
+                "ORDER BY (league_key = ?) DESC, last_fetch DESC LIMIT 1",
+                params + [normalize_key(league)]).fetchone()
+        return self._conn().execute(
+            f"SELECT last_fetch FROM events WHERE {where} ORDER BY last_fetch DESC LIMIT 1", params).fetchone()
+
+    def find_latest(self, home: str, away: str, league: Optional[str] = None) -> Optional[dict]:
+        """
+        Snapshot le plus récent d'un match.
+
+        Égalité sur les clés normalisées (accents, ponctuation) via l'index de
+        events, puis, à défaut, règle de l'ancien parcours du JSONL : home/away
+        (minuscules) contenus dans les noms enregistrés. La ligue n'est utilisée
+        que pour départager. Un nom vide ne correspond à aucun match.
+        """
+        home_key, away_key = normalize_key(home), normalize_key(away)
+        home_l = (home or "").lower().strip()
+        away_l = (away or "").lower().strip()
+        if not home_key or not away_key or not home_l or not away_l:
+            return None
+
+        row = self._latest_fetch("home_key = ? AND away_key = ?", [home_key, away_key], league)
+        if row is None:
+            homes = self._teams_matching("home_team", home_l)
+            aways = self._teams_matching("away_team", away_l) if homes else []
+            if homes and aways:
+                row = self._latest_fetch(f"home_team IN ({','.join('?' * len(homes))}) "
+                                         f"AND away_team IN ({','.join('?' * len(aways))})",
+                                         homes + aways, league)
+        if row is None:
+            return None
+        conn = self._conn()
+        fetch = conn.execute(f"SELECT {FETCH_COLUMNS} FROM fetches WHERE id = ?", row).fetchone()
+        records = self._records(conn, [fetch] if fetch else [])
+        return records[0] if records else None
+
+    def history(self, limit: Optional[int] = None) -> List[dict]:
+        """Historique (plus récent en premier) : relevés chauds puis segments compressés"""
+        conn = self._conn()
+        sql = f"SELECT {FETCH_COLUMNS} FROM fetches ORDER BY id DESC"
+        out = self._records(conn, conn.execute(sql + (" LIMIT ?" if limit else ""), (limit,) if limit else ()))
+        if limit and len(out) >= limit:
+            return out
+        for (data,) in conn.execute("SELECT data FROM segments ORDER BY day DESC, id DESC"):
+            lines = zlib.decompress(data).decode("utf-8").splitlines()
+            out.extend(json.loads(line) for line in reversed(lines))
+            if limit and len(out) >= limit:
+                return out[:limit]
+        return out
+
+    def teams(self) -> List[str]:
+        """Toutes les équipes connues (domicile et extérieur, via les index de events)"""
+        rows = self._conn().execute("SELECT home_team FROM events UNION SELECT away_team FROM events")
+        return [name for (name,) in rows if name]
+
+    def leagues(self) -> List[str]:
+        rows = self._conn().execute("SELECT DISTINCT league_name FROM events")
+        return [name for (name,) in rows if name]
+
+    def stats(self) -> Dict:
+        """{total_records, last_update, leagues, matches, storage}"""
+        conn = self._conn()
+        hot = conn.execute("SELECT COUNT(*) FROM fetches").fetchone()[0]
+        rolled, segments, raw_bytes, packed = conn.execute(
+            "SELECT COALESCE(SUM(records), 0), COUNT(*), COALESCE(SUM(raw_bytes), 0), "
+            "COALESCE(SUM(LENGTH(data)), 0) FROM segments").fetchone()
+        last = conn.execute("SELECT fetched_at FROM fetches ORDER BY id DESC LIMIT 1").fetchone()
+        matches = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return {
+            "total_records": hot + rolled,
+            "last_update": last[0] if last else None,
+            "leagues": self.leagues(),
+            "matches": matches,
+            "storage": {
+                "hot_fetches": hot,
+                "quotes": conn.execute("SELECT COUNT(*) FROM quotes").fetchone()[0],
+                "segments": segments,
+                "segment_records": rolled,
+                "segment_bytes": packed,
+                "segment_raw_bytes": raw_bytes,
+                "db_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            }
+        }
+
+    # -----------------------
+    # Rétention / compaction
+    # -----------------------
+    def compact(self, now: Optional[datetime] = None, full_resolution_days: int = FULL_RESOLUTION_DAYS,
+                segment_retention_days: int = SEGMENT_RETENTION_DAYS) -> Dict:
+        """
+        Roule les relevés de plus de full_resolution_days dans des segments
+        journaliers compressés (un relevé par match et par heure), puis supprime
+        les cotes qui ne sont plus référencées. Le dernier relevé de chaque match
+        reste chaud tant que le match n'a pas commencé depuis plus de
+        full_resolution_days ; au-delà, le match est roulé en entier puis retiré
+        (events, current_quotes, quotes, fetches), avec les extras et les
+        bookmakers / marchés qui ne sont plus référencés. Les segments de plus
+        de segment_retention_days sont supprimés.
+
+        Returns:
+            dict: {rolled, dropped, quotes_deleted, segments, events_deleted, segments_deleted}
+        """
+        now = now or datetime.utcnow()
+        cutoff = (now - timedelta(days=full_resolution_days)).isoformat()
+        segment_cutoff = (now - timedelta(days=segment_retention_days)).date().isoformat()
+        conn = self._conn()
+        report = {"rolled": 0, "dropped": 0, "quotes_deleted": 0, "segments": 0,
+                  "events_deleted": 0, "segments_deleted": 0}
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")   # une seule compaction à la fois (threads / processus)
+            # coup d'envoi inconnu ('') : le match n'expire pas
+            expired = [event_id for (event_id,) in conn.execute(
+                "SELECT id FROM events WHERE commence_time != '' AND commence_time < ?", (cutoff,))]
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS expired_events (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM expired_events")
+            conn.executemany("INSERT INTO expired_events (id) VALUES (?)", [(e,) for e in expired])
+            old = conn.execute(
+                f"SELECT {FETCH_COLUMNS} FROM fetches WHERE event_id IN (SELECT id FROM expired_events) "
+                "OR (fetched_at < ? AND id NOT IN (SELECT last_fetch FROM events WHERE last_fetch IS NOT NULL)) "
+                "ORDER BY id", (cutoff,)).fetchall()
+            report["segments_deleted"] = conn.execute(
+                "DELETE FROM segments WHERE day < ?", (segment_cutoff,)).rowcount
+            if not old and not expired:
+                return report
+
+            kept, seen = [], set()
+            for row in old:
+                bucket = (row[1], row[2][:13])   # (match, heure)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    kept.append(row)
+            by_day = {}
+            for record in self._records(conn, kept):
+                if record["fetched_at"][:10] >= segment_cutoff:   # sinon déjà hors rétention
+                    by_day.setdefault(record["fetched_at"][:10], []).append(_dumps(record))
+            for day, lines in sorted(by_day.items()):
+                payload = "\n".join(lines).encode("utf-8")
+                conn.execute("INSERT INTO segments (day, records, raw_bytes, data) VALUES (?, ?, ?, ?)",
+                             (day, len(lines), len(payload), zlib.compress(payload, 9)))
+
+            candidates = {int(q) for row in old for q in row[3].split(",") if q}
+            conn.executemany("DELETE FROM fetches WHERE id = ?", [(row[0],) for row in old])
+            conn.execute("DELETE FROM current_quotes WHERE event_id IN (SELECT id FROM expired_events)")
+            quotes_deleted = conn.execute(
+                "DELETE FROM quotes WHERE event_id IN (SELECT id FROM expired_events)").rowcount
+            conn.execute("DELETE FROM events WHERE id IN (SELECT id FROM expired_events)")
+            for (ids,) in conn.execute("SELECT quote_ids FROM fetches"):
+                candidates.difference_update(int(q) for q in ids.split(",") if q)
+            candidates.difference_update(q for (q,) in conn.execute("SELECT quote_id FROM current_quotes"))
+            quotes_deleted += conn.executemany("DELETE FROM quotes WHERE id = ?",
+                                               [(q,) for q in candidates]).rowcount
+            conn.execute("DELETE FROM extras WHERE id NOT IN "
+                         "(SELECT extra_id FROM fetches WHERE extra_id IS NOT NULL)")
+            pruned = conn.execute("DELETE FROM bookmakers WHERE id NOT IN "
+                                  "(SELECT DISTINCT bookmaker_id FROM quotes)").rowcount
+            pruned += conn.execute("DELETE FROM markets WHERE id NOT IN "
+                                   "(SELECT DISTINCT market_id FROM quotes)").rowcount
+            if pruned:
+                # les caches clé → id des autres écrivains sont invalidés (_check_dictionaries)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('dictionaries', '1') "
+                             "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+            conn.execute("DELETE FROM expired_events")
+
+            report.update(rolled=len(kept), dropped=len(old) - len(kept), quotes_deleted=quotes_deleted,
+                          segments=len(by_day), events_deleted=len(expired))
+        # executescript : la pragma doit être exécutée jusqu'au bout pour libérer toutes les pages
+        conn.executescript("PRAGMA incremental_vacuum; PRAGMA wal_checkpoint(TRUNCATE);")
+        logger.info(f"🗜️ Cotes compactées: {report['rolled']} relevés roulés, {report['dropped']} écartés, "
+                    f"{report['quotes_deleted']} cotes supprimées, {report['events_deleted']} matchs expirés, "
+                    f"{report['segments_deleted']} segments supprimés")
+        return report
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_odds_store() -> OddsStore:
+    """Store partagé du processus"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = OddsStore()
+        return _store
+
+
+# -----------------------
+# Compacteur en arrière-plan
+# -----------------------
+_compactor = None
+_compactor_stop = threading.Event()
+
+
+def _compactor_loop(interval):
+    while not _compactor_stop.is_set():
+        try:
+            get_odds_store().compact()
+        except Exception as e:
+            logger.error(f"❌ Erreur compaction des cotes: {e}")
+        _compactor_stop.wait(interval)
+
+
+def start_compactor(interval: int = COMPACT_INTERVAL):
+    """Démarre (une fois par processus) le thread de compaction périodique"""
+    global _compactor
+    with _store_lock:
+        if _compactor is not None and _compactor.is_alive():
+            return _compactor
+        _compactor_stop.clear()
+        _compactor = threading.Thread(target=_compactor_loop, args=(interval,), daemon=True,
+                                      name="odds-compactor")
+        _compactor.start()
+        logger.info(f"✅ Compacteur des cotes démarré (toutes les {interval // 3600}h)")
+        return _compactor
+
+
+def stop_compactor():
+    _compactor_stop.set()
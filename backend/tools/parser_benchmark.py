@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark des parseurs de classements sur pages enregistrées
+============================================================
+
+Rejoue les pages d'un dossier de fixtures (ex: enregistrées par
+standings_refresh.py --record) dans chaque scraper concerné et rapporte,
+par page et par scraper : taille, temps de parsing (médiane sur N passes)
+et nombre de lignes extraites. Option --bs4 : temps de construction d'un
+arbre BeautifulSoup sur la même page, pour comparaison.
+
+Fixtures reconnues (nom du fichier sans extension) :
+- {Ligue}.html (clé de LEAGUE_CONFIG) : scraper league_fetcher + tableau
+  wikitable (league_unified.fetch_standings)
+- lfp*.html, uefa*.html, dbfoot*.html, soccerwiki*.html : parseurs partagés
+  de html_parsing (ligue_europa_scraper / multi_source_updater)
+
+Usage:
+    python parser_benchmark.py /app/data/leagues/fixtures --repeat 20 --bs4
+    python parser_benchmark.py --synthetic          # pages générées, sans réseau
+    python parser_benchmark.py DIR --json /app/logs/parser_benchmark.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, '/app/backend')
+import league_fetcher
+from html_parsing import (parse_wikitable_teams, parse_lfp_standings, parse_uefa_standings,
+                          parse_dbfoot_standings, parse_soccerwiki_info)
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+FIXTURES_DIR = "/app/data/leagues/fixtures"
+DEFAULT_REPEAT = 10
+
+# scrapers league_fetcher réellement implémentés (les autres sont des placeholders)
+LEAGUE_SCRAPERS = ("scrape_laliga", "scrape_premier_league",
+                   "scrape_champions_league", "scrape_europa_league")
+EXPECTED_TEAMS = {"Bundesliga": 18, "Ligue2": 18, "PrimeiraLiga": 18,
+                  "ChampionsLeague": 36, "EuropaLeague": 36}
+SHARED_PARSERS = {
+    "lfp": ("html_parsing.parse_lfp_standings", parse_lfp_standings),
+    "uefa": ("html_parsing.parse_uefa_standings", parse_uefa_standings),
+    "dbfoot": ("html_parsing.parse_dbfoot_standings", parse_dbfoot_standings),
+    "soccerwiki": ("html_parsing.parse_soccerwiki_info", parse_soccerwiki_info),
+}
+
+
+def scrapers_for(stem):
+    """[(nom, fonction(html))] applicables à une fixture"""
+    config = league_fetcher.LEAGUE_CONFIG.get(stem)
+    if config:
+        scrapers = []
+        if config["method"] in LEAGUE_SCRAPERS:
+            scrapers.append((f"league_fetcher.{config['method']}", getattr(league_fetcher, config["method"])))
+        expected = EXPECTED_TEAMS.get(stem, 20)
+        scrapers.append(("league_unified.wikitable",
+                         lambda html: parse_wikitable_teams(html, expected, league_fetcher._normalize_name)))
+        return scrapers
+    for prefix, scraper in SHARED_PARSERS.items():
+        if stem.lower().startswith(prefix):
+            return [scraper]
+    return []
+
+
+def _median_ms(func, repeat):
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 3), result
+
+
+def benchmark(directory, repeat=DEFAULT_REPEAT, with_bs4=False):
+    """
+    Returns:
+        list: [{fixture, scraper, size_kb, parse_ms, rows, bs4_tree_ms}]
+    """
+    report = []
+    logging.disable(logging.WARNING)  # fallbacks CL/EL et logs par page
+    try:
+        for filename in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(filename)
+            if ext != ".html":
+                continue
+            scrapers = scrapers_for(stem)
+            if not scrapers:
+                continue
+            with open(os.path.join(directory, filename), "rb") as f:
+                body = f.read()
+            page = body.decode("utf-8", errors="replace")
+
+            bs4_ms = None
+            if with_bs4 and BS4_AVAILABLE:
+                bs4_ms, _ = _median_ms(lambda: BeautifulSoup(page, "lxml"), repeat)
+
+            for name, scraper in scrapers:
+                parse_ms, rows = _median_ms(lambda: scraper(page), repeat)
+                report.append({
+                    "fixture": filename,
+                    "scraper": name,
+                    "size_kb": round(len(body) / 1024, 1),
+                    "parse_ms": parse_ms,
+                    "rows": len(rows) if rows else 0,
+                    "bs4_tree_ms": bs4_ms
+                })
+    finally:
+        logging.disable(logging.NOTSET)
+    return report
+
+
+# -----------------------
+# Pages synthétiques (structure des sources, sans réseau)
+# -----------------------
+def _noise_links(n):
+    return "".join(f'<li><a href="/wiki/Page_{i}" title="Page {i}">Page {i}</a></li>' for i in range(n))
+
+
+def _wiki_page(teams, row_class=""):
+    rows = "".join(
+        f'<tr class="{row_class}"><th>{i}</th><td><a href="/wiki/{t.replace(" ", "_")}" title="{t}">{t}</a></td>'
+        f'<td>{30 - i}</td><td>{60 - i}</td></tr>'
+        for i, t in enumerate(teams, 1))
+    return (f"<html><body><div id='content'><ul>{_noise_links(800)}</ul>"
+            f"<table class='wikitable sortable'><tr><th>Pos</th><th>Team</th><th>Pld</th><th>Pts</th></tr>{rows}</table>"
+            f"<ul class='navbox'>{_noise_links(400)}</ul></div></body></html>")
+
+
+def _standings_rows(teams, team_class="club-name"):
+    return "".join(
+        f'<tr><td class="position">{i}</td><td><span class="{team_class}">{t}</span></td>'
+        f'<td>{34 - i}</td><td class="points">{80 - 2 * i}</td></tr>'
+        for i, t in enumerate(teams, 1))
+
+
+def write_synthetic_fixtures(directory):
+    """Génère une page par format de source dans directory"""
+    clubs = [f"FC Club {i}" for i in range(1, 21)]
+    european = [f"{c} United" for c in clubs] + [f"CF Team {i}" for i in range(16)]
+    pages = {
+        "LaLiga.html": _wiki_page(clubs, "standing-row"),
+        "PremierLeague.html": _wiki_page(clubs, "table__row").replace("<td><a", '<td class="team"><a'),
+        "ChampionsLeague.html": _wiki_page(european),
+        "lfp_ligue2.html": f"<table class='standings-table'><tbody>{_standings_rows(clubs[:18])}</tbody></table>",
+        "uefa_europa.html": "".join(
+            f"<section class='standings-group'><h3>Groupe {g}</h3><table class='standings-table'><tbody>"
+            f"{_standings_rows(european[g * 4:g * 4 + 4], 'team-name')}</tbody></table></section>"
+            for g in range(9)),
+        "dbfoot_premier.html": "<table><tr><th>#</th><th>Team</th><th>P</th><th>Pts</th></tr>" + "".join(
+            f"<tr><td>{i}</td><td>{t}</td><td>34</td><td>{80 - i}</td></tr>" for i, t in enumerate(clubs, 1)) + "</table>",
+        "soccerwiki_club.html": "<table>" + "".join(
+            f"<tr><th>Champ {i}:</th><td>Valeur {i}</td></tr>" for i in range(30)) + "</table>",
+    }
+    os.makedirs(directory, exist_ok=True)
+    for filename, page in pages.items():
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+            f.write(page)
+    return directory
+
+
+def print_report(report):
+    has_bs4 = any(r["bs4_tree_ms"] is not None for r in report)
+    header = f"{'Fixture':<24} {'Scraper':<40} {'Ko':>7} {'Parse ms':>9} {'Lignes':>7}"
+    print(header + (f" {'bs4 arbre ms':>13}" if has_bs4 else ""))
+    print("-" * (len(header) + (14 if has_bs4 else 0)))
+    for r in report:
+        line = f"{r['fixture']:<24} {r['scraper']:<40} {r['size_kb']:>7} {r['parse_ms']:>9} {r['rows']:>7}"
+        if has_bs4:
+            line += f" {r['bs4_tree_ms'] if r['bs4_tree_ms'] is not None else '-':>13}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des parseurs de classements")
+    parser.add_argument("directory", nargs="?", default=FIXTURES_DIR, help="Dossier des pages enregistrées")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Passes par page (médiane)")
+    parser.add_argument("--bs4", action="store_true", help="Mesurer aussi la construction d'un arbre BeautifulSoup")
+    parser.add_argument("--synthetic", action="store_true", help="Générer des pages synthétiques (sans réseau)")
+    parser.add_argument("--json", help="Écrire le rapport JSON dans ce fichier")
+    args = parser.parse_args()
+
+    directory = args.directory
+    if args.synthetic:
+        directory = write_synthetic_fixtures(tempfile.mkdtemp(prefix="standings_fixtures_"))
+        print(f"🧪 Pages synthétiques générées dans {directory}")
+    if not os.path.isdir(directory):
+        print(f"❌ Dossier introuvable: {directory} (enregistrer des pages avec standings_refresh.py --record)")
+        sys.exit(1)
+    if args.bs4 and not BS4_AVAILABLE:
+        print("⚠️ BeautifulSoup non installé, comparaison ignorée")
+
+    report = benchmark(directory, repeat=args.repeat, with_bs4=args.bs4)
+    if not report:
+        print(f"⚠️ Aucune fixture reconnue dans {directory}")
+        sys.exit(1)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Rapport écrit: {args.json}")
@@ -17,12 +17,15 @@ Documentation: https://www.sofascore.com
 import requests
 from bs4 import BeautifulSoup
 import re
-import time
 import logging
 import json
 from datetime import datetime, timezone
 from pathlib import Path
 import os
+import sys
+
+sys.path.insert(0, '/app/backend')
+from quota_manager import get_quota_manager
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +44,7 @@ REQUEST_LOG_FILE = "/app/logs/sofascore_requests.log"
 # Limite de sécurité: max 300 requêtes/jour
 MAX_REQUESTS_PER_DAY = 300
 REQUEST_DELAY = 1.2  # secondes entre chaque requête
+QUOTA_PROVIDER = "sofascore"
 
 # Mapping des ligues vers les URLs SofaScore
 LEAGUE_URLS = {
@@ -59,8 +63,8 @@ LEAGUE_URLS = {
 # 📊 GESTION DES REQUÊTES
 # =========================================
 
-def get_request_count_today():
-    """Compte le nombre de requêtes effectuées aujourd'hui"""
+def _count_logged_requests_today():
+    """Requêtes du jour d'après le journal (amorçage unique du quota partagé)"""
     if not os.path.exists(REQUEST_LOG_FILE):
         return 0
     
@@ -82,6 +86,14 @@ def get_request_count_today():
     
     return count
 
+quota = get_quota_manager()
+quota.register(QUOTA_PROVIDER, daily_cap=MAX_REQUESTS_PER_DAY, rate=1 / REQUEST_DELAY,
+               burst=1, seed=_count_logged_requests_today)
+
+def get_request_count_today():
+    """Nombre de requêtes effectuées aujourd'hui (quota partagé, sans relire le journal)"""
+    return quota.used_today(QUOTA_PROVIDER)
+
 def log_request(league, url, status):
     """Enregistre une requête dans le log"""
     os.makedirs(os.path.dirname(REQUEST_LOG_FILE), exist_ok=True)
@@ -98,15 +110,21 @@ def log_request(league, url, status):
 
 def can_make_request():
     """Vérifie si on peut faire une requête (limite quotidienne)"""
-    count = get_request_count_today()
-    if count >= MAX_REQUESTS_PER_DAY:
+    if quota.remaining(QUOTA_PROVIDER) <= 0:
         logger.warning(f"⚠️ Limite quotidienne SofaScore atteinte ({MAX_REQUESTS_PER_DAY})")
         return False
     return True
 
-def rate_limit_pause():
-    """Pause entre les requêtes pour éviter le bannissement"""
-    time.sleep(REQUEST_DELAY)
+def wait_for_slot():
+    """
+    Réserve une requête et attend son créneau (une requête toutes les
+    REQUEST_DELAY secondes, tous threads / processus confondus).
+    False si la limite quotidienne est atteinte.
+    """
+    if not quota.acquire(QUOTA_PROVIDER):
+        logger.warning(f"⚠️ Limite quotidienne SofaScore atteinte ({MAX_REQUESTS_PER_DAY})")
+        return False
+    return True
 
 # =========================================
 # 🌐 SCRAPER - CLASSEMENTS
@@ -122,13 +140,13 @@ def get_league_standings(league_name):
     Returns:
         dict: Données du classement ou None en cas d'erreur
     """
-    if not can_make_request():
-        return None
-    
     if league_name not in LEAGUE_URLS:
         logger.error(f"❌ Ligue inconnue: {league_name}")
         return None
     
+    if not wait_for_slot():
+        return None
+    
     league_url = LEAGUE_URLS[league_name]
     url = f"{SOFA_BASE}{league_url}/standings"
     
@@ -137,7 +155,6 @@ def get_league_standings(league_name):
         response = requests.get(url, headers=HEADERS, timeout=30)
         
         log_request(league_name, url, response.status_code)
-        rate_limit_pause()
         
         if response.status_code != 200:
             logger.error(f"❌ HTTP {response.status_code} for {league_name}")
@@ -252,12 +269,14 @@ def save_league_standings(league_name, data):
     os.makedirs(DATA_DIR, exist_ok=True)
     file_path = os.path.join(DATA_DIR, f"{league_name}.json")
     
-    # Backup de l'ancien fichier
+    # Backup de l'ancien fichier (aussi l'ancien classement pour le diff)
+    previous = None
     if os.path.exists(file_path):
         backup_path = file_path + ".backup_sofascore"
         try:
             with open(file_path, 'r') as f:
                 old_data = json.load(f)
+            previous = old_data
             with open(backup_path, 'w') as f:
                 json.dump(old_data, f, indent=2)
             logger.info(f"💾 Backup créé: {backup_path}")
@@ -271,6 +290,13 @@ def save_league_standings(league_name, data):
     
     os.replace(tmp_path, file_path)
     logger.info(f"💾 Saved {league_name} standings to {file_path}")
+
+    # Diff avec l'ancien classement -> invalidation ciblée des caches abonnés
+    try:
+        from standings_events import notify_league_saved
+        notify_league_saved(league_name, previous, data)
+    except Exception as e:
+        logger.warning(f"⚠️ Événement de classement non publié pour {league_name}: {e}")
     return True
 
 # =========================================
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Serveur HTTP local rejouant des pages de classement enregistrées
+================================================================
+
+Sert les fichiers d'un dossier (ex: pages enregistrées par
+standings_refresh.py --record) avec ETag (hash du contenu) et Last-Modified
+(mtime), et répond 304 aux requêtes conditionnelles : permet de tester le
+rafraîchissement concurrent sans réseau.
+
+Usage:
+    python standings_fixture_server.py /app/data/leagues/fixtures --port 8765
+    python /app/backend/standings_refresh.py --base-url http://127.0.0.1:8765
+
+En Python:
+    server, base_url = start_fixture_server("/app/data/leagues/fixtures")
+    ...
+    server.shutdown()
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".json": "application/json"}
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """GET avec validateurs ; latence simulée via l'attribut serveur `delay`"""
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        mtime = int(os.path.getmtime(path))
+        self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        if self._not_modified(etag, mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream"))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag, mtime):
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            return etag in [t.strip() for t in inm.split(",")]
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                return mtime <= parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+def start_fixture_server(directory, port=0, delay=0.0, verbose=False):
+    """
+    Démarre le serveur dans un thread.
+
+    Returns:
+        (server, base_url) — server.hits compte les requêtes par chemin,
+        server.shutdown() l'arrête
+    """
+    handler = lambda *a, **kw: FixtureHandler(*a, directory=directory, **kw)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.verbose = verbose
+    server.hits = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur de pages de classement enregistrées")
+    parser.add_argument("directory", help="Dossier des pages ({ligue}.html / .json)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Latence simulée par requête (s)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"❌ Dossier introuvable: {args.directory}")
+        sys.exit(1)
+
+    server, base_url = start_fixture_server(args.directory, args.port, args.delay, verbose=True)
+    print(f"🧪 Fixtures {args.directory} servies sur {base_url} (Ctrl+C pour arrêter)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
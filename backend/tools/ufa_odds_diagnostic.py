@@ -90,6 +90,13 @@ def test_odds_data_file():
                 log(f"   Ligue : {sample.get('league_name')}")
         else:
             log(f"❌ Fichier odds_data.jsonl n'existe pas")
+        
+        # Store indexé (source des lectures depuis l'import du JSONL)
+        import sys
+        sys.path.insert(0, '/app/backend')
+        from tools.odds_store import get_odds_store
+        stats = get_odds_store().stats()
+        log(f"✅ Store des cotes - {stats['total_records']} snapshots, {stats['matches']} matchs")
             
     except Exception as e:
         log(f"⚠️ Erreur lecture fichier odds: {e}")
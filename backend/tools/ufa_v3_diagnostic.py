@@ -150,11 +150,16 @@ def count_lines(path):
     except Exception:
         return 0
 
-cache = count_lines("/app/data/analysis_cache.jsonl")
+try:
+    from ufa.analysis_store import get_analysis_store
+    cache = get_analysis_store().count()
+except Exception as e:
+    log(section, f"Store des analyses illisible: {e}", ok=False)
+    cache = count_lines("/app/data/analysis_cache.jsonl")
 real = count_lines("/app/data/real_scores.jsonl")
 train = count_lines("/app/data/training_set.jsonl")
 
-log(section, f"Analysis cache: {cache} lignes")
+log(section, f"Analysis cache: {cache} analyses")
 log(section, f"Real scores: {real} lignes")
 log(section, f"Training set: {train} lignes")
 
@@ -0,0 +1,346 @@
+# /app/backend/ufa/analysis_store.py
+"""
+Stockage indexé du cache d'analyses (unified analyzer) — SQLite.
+
+Remplace l'ajout en fin de /app/data/analysis_cache.jsonl et la relecture
+complète du fichier par chaque lecteur.
+
+Table analyses :
+- une ligne par analyse, dans l'ordre d'ajout (id)
+- colonnes indexées : horodatage, équipes et ligue (clés normalisées),
+  hash de l'image, segment
+- data : l'entrée JSON sans la prédiction ; prediction : la prédiction en
+  binaire compact (compact_analysis)
+
+Segments : les lectures ne voient que le segment courant. Vider le cache
+(rotate) passe au segment suivant en une écriture : l'ancien segment reste
+dans la base comme sauvegarde, sans copie du fichier.
+
+Pagination : query() retourne (entrées, curseur) ; le curseur (horodatage|id)
+reprend la lecture juste après la dernière entrée rendue (pas d'OFFSET).
+
+Usage:
+    from ufa.analysis_store import get_analysis_store
+    store = get_analysis_store()
+    store.append(entry)
+    store.tail(5)                                   # 5 dernières analyses
+    page, cursor = store.query(league="LaLiga", start="2025-11-01", limit=50)
+    page, cursor = store.query(league="LaLiga", start="2025-11-01", limit=50, cursor=cursor)
+    store.find_by_image(image_hash)
+    store.rotate()                                  # vider (segment suivant)
+"""
+import os
+import sys
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from compact_analysis import pack_value, unpack_value, to_api
+from team_keys import normalize_key
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "/app/data"
+ANALYSIS_DB = os.path.join(DATA_DIR, "analysis_cache.db")
+ANALYSIS_JSONL = os.path.join(DATA_DIR, "analysis_cache.jsonl")   # ancien cache (import unique)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    home_key TEXT NOT NULL,
+    away_key TEXT NOT NULL,
+    league_key TEXT NOT NULL,
+    source TEXT,
+    image_hash TEXT,
+    data TEXT NOT NULL,
+    prediction BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_seq ON analyses(segment, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_ts ON analyses(segment, ts, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_home ON analyses(segment, home_key, ts);
+CREATE INDEX IF NOT EXISTS idx_analyses_away ON analyses(segment, away_key, ts);
+CREATE INDEX IF NOT EXISTS idx_analyses_league ON analyses(segment, league_key, ts);
+CREATE INDEX IF NOT EXISTS idx_analyses_image ON analyses(image_hash);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+INSERT_ANALYSIS = """
+INSERT INTO analyses (segment, ts, home_key, away_key, league_key, source, image_hash, data, prediction)
+VALUES ((SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'segment'), ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _row_values(entry: dict) -> tuple:
+    """Entrée d'analyse → valeurs de la ligne (la prédiction garde sa place dans data)"""
+    data = dict(entry)
+    prediction = data.get("prediction")
+    if "prediction" in data:
+        data["prediction"] = None
+    return (entry.get("timestamp") or "",
+            normalize_key(entry.get("home_team")), normalize_key(entry.get("away_team")),
+            normalize_key(entry.get("league")), entry.get("source"), entry.get("image_hash"),
+            _dumps(data), None if prediction is None else pack_value(prediction))
+
+
+def _entry(data: str, prediction) -> dict:
+    entry = json.loads(data)
+    if prediction is not None:
+        entry["prediction"] = to_api(unpack_value(prediction))
+    return entry
+
+
+def _cursor(ts: str, row_id: int) -> str:
+    return f"{ts}|{row_id}"
+
+
+def _parse_cursor(cursor: str) -> Tuple[str, int]:
+    ts, _, row_id = cursor.rpartition("|")
+    return ts, int(row_id)
+
+
+class AnalysisStore:
+    """Store SQLite des analyses ; une connexion par thread (mode WAL)"""
+
+    def __init__(self, path: str = ANALYSIS_DB, legacy_jsonl: Optional[str] = ANALYSIS_JSONL):
+        self.path = path
+        self.legacy_jsonl = legacy_jsonl
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # -----------------------
+    # Connexion / schéma
+    # -----------------------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    with conn:
+                        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('segment', '0')")
+                    self._import_legacy(conn)
+                    self._initialized = True
+        return conn
+
+    def _import_legacy(self, conn):
+        """Import unique de analysis_cache.jsonl (ordre du fichier conservé)"""
+        if not self.legacy_jsonl or not os.path.exists(self.legacy_jsonl):
+            return
+        with conn:
+            # la réservation de la clé sérialise l'import entre processus
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('legacy_import', '')").rowcount
+            if not claimed:
+                return
+            entries = []
+            with open(self.legacy_jsonl, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except Exception:
+                        continue
+            conn.executemany(INSERT_ANALYSIS, (_row_values(e) for e in entries if isinstance(e, dict)))
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'legacy_import'", (str(len(entries)),))
+        logger.info(f"📥 {len(entries)} analyses importées depuis {self.legacy_jsonl}")
+
+    @staticmethod
+    def _segment(conn) -> int:
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'segment'").fetchone()[0])
+
+    # -----------------------
+    # Écriture
+    # -----------------------
+    def append(self, entry: dict) -> int:
+        """Ajoute une analyse ; retourne son id"""
+        conn = self._conn()
+        with conn:
+            return conn.execute(INSERT_ANALYSIS, _row_values(entry)).lastrowid
+
+    def extend(self, entries: Iterable[dict]) -> int:
+        """Ajoute plusieurs analyses en une transaction"""
+        conn = self._conn()
+        with conn:
+            return conn.executemany(INSERT_ANALYSIS, (_row_values(e) for e in entries)).rowcount
+
+    def rotate(self) -> Dict:
+        """
+        Vide le cache : les analyses suivantes vont dans un nouveau segment.
+
+        Returns:
+            dict: {"archived_segment", "archived_entries", "segment"}
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            segment = self._segment(conn)
+            archived = conn.execute("SELECT COUNT(*) FROM analyses WHERE segment = ?", (segment,)).fetchone()[0]
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'segment'", (str(segment + 1),))
+        logger.info(f"🗂️ Cache d'analyses vidé : segment {segment} archivé ({archived} analyses)")
+        return {"archived_segment": segment, "archived_entries": archived, "segment": segment + 1}
+
+    # -----------------------
+    # Lecture
+    # -----------------------
+    def _where(self, conn, start=None, end=None, home=None, away=None, team=None, league=None,
+               source=None, image_hash=None, segment=None) -> Tuple[List[str], list]:
+        clauses, params = ["segment = ?"], [self._segment(conn) if segment is None else segment]
+        if start:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end:
+            clauses.append("ts <= ?")
+            params.append(end)
+        if home:
+            clauses.append("home_key = ?")
+            params.append(normalize_key(home))
+        if away:
+            clauses.append("away_key = ?")
+            params.append(normalize_key(away))
+        if team:
+            clauses.append("(home_key = ? OR away_key = ?)")
+            params += [normalize_key(team)] * 2
+        if league:
+            clauses.append("league_key = ?")
+            params.append(normalize_key(league))
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if image_hash:
+            clauses.append("image_hash = ?")
+            params.append(image_hash)
+        return clauses, params
+
+    def query(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+              descending: bool = False, **filters) -> Tuple[List[dict], Optional[str]]:
+        """
+        Page d'analyses triées par horodatage.
+
+        Args:
+            limit: taille de page (≤ MAX_PAGE_SIZE)
+            cursor: curseur rendu par la page précédente
+            descending: plus récentes d'abord
+            **filters: start, end (ISO), home, away, team, league, source, image_hash, segment
+
+        Returns:
+            tuple: (entrées, curseur de la page suivante ou None)
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        conn = self._conn()
+        clauses, params = self._where(conn, **filters)
+        if cursor:
+            clauses.append("(ts, id) < (?, ?)" if descending else "(ts, id) > (?, ?)")
+            params += list(_parse_cursor(cursor))
+        order = "DESC" if descending else "ASC"
+        rows = conn.execute(
+            f"SELECT id, ts, data, prediction FROM analyses WHERE {' AND '.join(clauses)} "
+            f"ORDER BY ts {order}, id {order} LIMIT ?", params + [limit + 1]).fetchall()
+        next_cursor = _cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return [_entry(data, prediction) for _, _, data, prediction in rows[:limit]], next_cursor
+
+    def tail(self, n: int = 1, **filters) -> List[dict]:
+        """n dernières analyses ajoutées (filtrées), de la plus ancienne à la plus récente"""
+        conn = self._conn()
+        clauses, params = self._where(conn, **filters)
+        rows = conn.execute(
+            f"SELECT data, prediction FROM analyses WHERE {' AND '.join(clauses)} ORDER BY id DESC LIMIT ?",
+            params + [n]).fetchall()
+        return [_entry(data, prediction) for data, prediction in reversed(rows)]
+
+    def find_by_image(self, image_hash: str) -> Optional[dict]:
+        """Dernière analyse d'une image (tous segments)"""
+        row = self._conn().execute(
+            "SELECT data, prediction FROM analyses WHERE image_hash = ? ORDER BY id DESC LIMIT 1",
+            (image_hash,)).fetchone()
+        return _entry(*row) if row else None
+
+    def exists(self, home: Optional[str], away: Optional[str], league: Optional[str], day: str) -> bool:
+        """Une analyse du même match (équipes + ligue) existe-t-elle ce jour-là ?"""
+        conn = self._conn()
+        return conn.execute(
+            "SELECT 1 FROM analyses WHERE segment = ? AND home_key = ? AND away_key = ? AND league_key = ? "
+            "AND ts >= ? AND ts < ? LIMIT 1",
+            (self._segment(conn), normalize_key(home), normalize_key(away), normalize_key(league),
+             day, day + "\uffff")).fetchone() is not None
+
+    def iter_entries(self, **filters) -> Iterator[dict]:
+        """Toutes les analyses (filtrées) dans l'ordre d'ajout, sans tout charger"""
+        conn = self._conn()
+        clauses, params = self._where(conn, **filters)
+        cursor = conn.execute(
+            f"SELECT data, prediction FROM analyses WHERE {' AND '.join(clauses)} ORDER BY id", params)
+        for data, prediction in cursor:
+            yield _entry(data, prediction)
+
+    def count(self, **filters) -> int:
+        conn = self._conn()
+        clauses, params = self._where(conn, **filters)
+        return conn.execute(f"SELECT COUNT(*) FROM analyses WHERE {' AND '.join(clauses)}", params).fetchone()[0]
+
+    def counts_by(self, field: str) -> Dict[str, int]:
+        """{valeur: nombre} pour "league" ou "source" (segment courant)"""
+        conn = self._conn()
+        if field not in ("league", "source"):
+            raise ValueError(f"champ non agrégeable : {field}")
+        counts = {}
+        for value, count in conn.execute(
+                f"SELECT json_extract(data, '$.{field}'), COUNT(*) FROM analyses WHERE segment = ? "
+                f"GROUP BY 1", (self._segment(conn),)):
+            label = value or ("Unknown" if field == "league" else "unknown")
+            counts[label] = counts.get(label, 0) + count
+        return counts
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        segment = self._segment(conn)
+        first, last = conn.execute("SELECT MIN(ts), MAX(ts) FROM analyses WHERE segment = ?",
+                                   (segment,)).fetchone()
+        return {
+            "path": self.path,
+            "segment": segment,
+            "entries": self.count(),
+            "archived_entries": conn.execute("SELECT COUNT(*) FROM analyses WHERE segment < ?",
+                                             (segment,)).fetchone()[0],
+            "first_timestamp": first,
+            "last_timestamp": last,
+            "db_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_analysis_store() -> AnalysisStore:
+    """Store partagé du processus"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AnalysisStore()
+        return _store
@@ -7,8 +7,13 @@ Vérifie automatiquement les nouveaux scores réels depuis l'API Football-Data.o
 compare avec les matchs OCR avant-match, valide les correspondances,
 et déclenche l'apprentissage UFA.
 
-Intègre la clé API et un délai automatique entre chaque requête pour rester
-dans les limites du forfait gratuit.
+L'appel API passe par le quota partagé Football-Data (quota_manager, même
+seau que le multi-source updater pour cette clé) : on n'attend qu'avant la
+requête, jamais par match validé.
+
+Doublons : index (domicile, extérieur, jour) des scores réels, clés normalisées,
+tenu à jour en ne relisant que les lignes ajoutées à real_scores.jsonl ; les
+nouveaux matchs sont ajoutés en fin de fichier (plus de réécriture complète).
 
 Usage:
     python /app/backend/ufa/ufa_auto_validate.py
@@ -16,10 +21,10 @@ Usage:
 
 import os
 import json
-import time
+import zlib
 import logging
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from fuzzywuzzy import fuzz, process
 import sys
 from pathlib import Path
@@ -27,6 +32,9 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from quota_manager import get_quota_manager
+from team_keys import normalize_key
+
 # =========================================
 # ⚙️ CONFIGURATION GÉNÉRALE
 # =========================================
@@ -39,6 +47,8 @@ LOG_FILE = "/app/logs/ufa_auto_train.log"
 
 # Délai entre requêtes (6 sec minimum pour plan gratuit)
 REQUEST_DELAY = 6
+QUOTA_PROVIDER = "football_data:1"   # même clé que FOOTBALL_DATA_API_KEY du multi-source updater
+QUOTA_MAX_WAIT = 60.0                # au-delà, la validation est reportée au prochain passage
 
 # Thresholds
 FUZZY_THRESHOLD = 80
@@ -54,6 +64,9 @@ logging.basicConfig(
     format="%(asctime)s [AUTO-VALIDATE] %(message)s",
 )
 
+quota = get_quota_manager()
+quota.register(QUOTA_PROVIDER, rate=1 / REQUEST_DELAY, burst=10)
+
 # =========================================
 # 🧩 OUTILS
 # =========================================
@@ -64,11 +77,100 @@ def load_jsonl(path):
     with open(path, "r", encoding="utf-8") as f:
         return [json.loads(line) for line in f if line.strip()]
 
-def save_jsonl(path, data):
-    """Sauvegarde un fichier JSONL"""
-    with open(path, "w", encoding="utf-8") as f:
-        for d in data:
-            f.write(json.dumps(d, ensure_ascii=False) + "\n")
+def append_jsonl(path, entries):
+    """Ajoute des entrées en fin de fichier JSONL (une seule écriture)"""
+    if not entries:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+b") as f:
+        # ligne précédente incomplète : on ne colle pas la suivante dessus
+        f.seek(0, os.SEEK_END)
+        prefix = b""
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            prefix = b"" if f.read(1) == b"\n" else b"\n"
+        payload = "".join(json.dumps(d, ensure_ascii=False) + "\n" for d in entries)
+        f.write(prefix + payload.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+def _day(value):
+    """Jour (ordinal) d'une date ISO ; None si illisible"""
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+def _within_window(keys, home, away, match_date, window_days=DUPLICATE_WINDOW_DAYS):
+    """Même affiche (clés normalisées) à ± window_days jours de match_date parmi keys ?"""
+    day = _day(match_date)
+    if day is None:
+        return False
+    home_key, away_key = normalize_key(home), normalize_key(away)
+    return any((home_key, away_key, d) in keys for d in range(day - window_days, day + window_days + 1))
+
+class RealScoresIndex:
+    """
+    Index des scores réels : (domicile, extérieur, jour) → présent.
+    Mis à jour en ne lisant que les lignes ajoutées depuis le dernier passage ;
+    un fichier réécrit (début modifié ou plus court) est réindexé en entier.
+    """
+
+    HEAD_BYTES = 4096
+
+    def __init__(self, path=DATA_FILE):
+        self.path = path
+        self.offset = 0
+        self.head = None
+        self.keys = set()
+        self.entries = 0
+
+    @staticmethod
+    def key(home, away, day):
+        return (normalize_key(home), normalize_key(away), day)
+
+    def _add(self, entry):
+        day = _day(entry.get("date") or entry.get("timestamp"))
+        if day is not None:
+            self.keys.add(self.key(entry.get("home_team"), entry.get("away_team"), day))
+        self.entries += 1
+
+    def refresh(self):
+        """Intègre les lignes ajoutées ; retourne le nombre de lignes lues"""
+        if not os.path.exists(self.path):
+            self.offset, self.head, self.keys, self.entries = 0, None, set(), 0
+            return 0
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            start = f.read(min(self.offset, self.HEAD_BYTES))
+            if size < self.offset or (self.offset and f"{zlib.crc32(start):08x}" != self.head):
+                logging.info("real_scores.jsonl rewritten, rebuilding duplicate index")
+                self.offset, self.keys, self.entries = 0, set(), 0
+            f.seek(self.offset)
+            chunk = f.read()
+            # ligne incomplète en fin de fichier : relue au prochain passage
+            complete = chunk[:chunk.rfind(b"\n") + 1]
+            self.offset += len(complete)
+            f.seek(0)
+            self.head = f"{zlib.crc32(f.read(min(self.offset, self.HEAD_BYTES))):08x}"
+        read = 0
+        for line in complete.decode("utf-8", errors="replace").splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                self._add(entry)
+                read += 1
+        return read
+
+    def contains(self, home, away, match_date, window_days=DUPLICATE_WINDOW_DAYS):
+        """Même affiche (clés normalisées) à ± window_days jours de match_date ?"""
+        return _within_window(self.keys, home, away, match_date, window_days)
+
+_index = RealScoresIndex()
 
 def fuzzy_match_team(name, team_map):
     """Trouve la meilleure correspondance d'équipe avec fuzzy matching"""
@@ -88,6 +190,11 @@ def fetch_real_scores():
     to_date = today
     url = f"{API_URL}?dateFrom={from_date}&dateTo={to_date}"
 
+    # Créneau du quota partagé (on n'attend que le temps restant jusqu'au créneau)
+    if not quota.acquire(QUOTA_PROVIDER, max_wait=QUOTA_MAX_WAIT):
+        logging.warning(f"Football-Data quota: no slot within {QUOTA_MAX_WAIT}s, validation postponed")
+        return []
+
     logging.info(f"Fetching results from {url}")
     try:
         resp = requests.get(url, headers=headers, timeout=30)
@@ -112,8 +219,9 @@ def auto_validate_scores():
     """
     logging.info("Starting UFA Auto-Validate process...")
 
-    # Charger base locale
-    data = load_jsonl(DATA_FILE)
+    # Index local des doublons (seules les lignes ajoutées depuis le dernier passage sont lues)
+    read = _index.refresh()
+    logging.info(f"Duplicate index: {read} new line(s), {_index.entries} real scores indexed")
     team_map = {}
     if os.path.exists(TEAM_MAP_FILE):
         with open(TEAM_MAP_FILE, "r", encoding="utf-8") as f:
@@ -129,6 +237,13 @@ def auto_validate_scores():
     validated = 0
     duplicates = 0
     new_entries = []
+    new_keys = set()
+    resolved = {}   # nom API → (nom normalisé, ligue), un seul fuzzy match par équipe
+
+    def resolve(name):
+        if name not in resolved:
+            resolved[name] = fuzzy_match_team(name, team_map)
+        return resolved[name]
 
     for match in api_matches:
         if match["status"] != "FINISHED":
@@ -146,18 +261,15 @@ def auto_validate_scores():
             continue
 
         # Normalisation fuzzy
-        home_norm, league_home = fuzzy_match_team(home, team_map)
-        away_norm, league_away = fuzzy_match_team(away, team_map)
+        home_norm, league_home = resolve(home)
+        away_norm, league_away = resolve(away)
         final_league = league_home if league_home != "Unknown" else league_away
 
-        # Éviter doublons (fenêtre 7 jours)
-        exists = any(
-            d for d in data
-            if d.get("home_team") == (home_norm or home) 
-            and d.get("away_team") == (away_norm or away)
-            and abs((datetime.utcnow() - datetime.fromisoformat(d.get("date", d.get("timestamp", "2000-01-01T00:00:00")))).days) <= DUPLICATE_WINDOW_DAYS
-        )
-        if exists:
+        # Éviter doublons (même affiche à ± DUPLICATE_WINDOW_DAYS jours) : dans l'index
+        # comme parmi les matchs déjà ajoutés pendant ce passage
+        key = RealScoresIndex.key(home_norm or home, away_norm or away, _day(utc_date))
+        if (_index.contains(home_norm or home, away_norm or away, utc_date)
+                or _within_window(new_keys, home_norm or home, away_norm or away, utc_date)):
             duplicates += 1
             continue
 
@@ -173,17 +285,16 @@ def auto_validate_scores():
             "validated": True,
             "validated_at": datetime.utcnow().isoformat()
         }
-        data.append(entry)
         new_entries.append(entry)
+        new_keys.add(key)
         validated += 1
 
         logging.info(f"✅ Added {home_norm or home} vs {away_norm or away} ({home_score}-{away_score}) [{final_league if final_league != 'Unknown' else league}]")
-        
-        # Respecter la limite API (6 secondes entre requêtes)
-        time.sleep(REQUEST_DELAY)
 
     if validated > 0:
-        save_jsonl(DATA_FILE, data)
+        # Ajout en fin de fichier, puis l'index lit ces nouvelles lignes
+        append_jsonl(DATA_FILE, new_entries)
+        _index.refresh()
         logging.info(f"Auto-validation terminée : {validated} nouveaux matchs ajoutés, {duplicates} doublons ignorés.")
         
         # Entraînement auto
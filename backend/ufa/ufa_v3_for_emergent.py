@@ -360,6 +360,42 @@ def predict_single(home: str, away: str, league: str, home_coeff: float, away_co
     scored.sort(key=lambda x: x[1], reverse=True)
     return scored[:topk]
 
+
+def predict_batch(rows: List[Tuple[str, str, str, float, float]], topk: int = 10) -> List[List[Tuple[str,float]]]:
+    """Batch version of predict_single.
+    rows: list of (home, away, league, home_coeff, away_coeff)
+    The model is loaded once and every row goes through a single forward pass.
+    Returns one top-k list per row, in the same order (same ranking as predict_single).
+    """
+    if not rows:
+        return []
+    meta = load_meta()
+    team2idx = meta.get('team2idx', {})
+    league2idx = meta.get('league2idx', {})
+
+    model = UFAv3(n_teams=max(2, len(team2idx)), n_leagues=max(1, len(league2idx))).to(DEVICE)
+    model_path = os.path.join(MODELS_DIR, MODEL_FILE)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError('Model not found. Please train first.')
+    model.load_state_dict(torch.load(model_path, map_location=DEVICE))
+    model.eval()
+
+    unk_home = team2idx.get('UNK_TEAM', 0)
+    unk_away = team2idx.get('UNK_TEAM', 1)
+    unk_league = league2idx.get('UNK_LEAGUE', 0)
+    tensor_home = torch.tensor([team2idx.get(r[0], unk_home) for r in rows], dtype=torch.long).to(DEVICE)
+    tensor_away = torch.tensor([team2idx.get(r[1], unk_away) for r in rows], dtype=torch.long).to(DEVICE)
+    tensor_league = torch.tensor([league2idx.get(r[2], unk_league) for r in rows], dtype=torch.long).to(DEVICE)
+    tensor_coeffs = torch.tensor([[r[3], r[4]] for r in rows], dtype=torch.float).to(DEVICE)
+
+    with torch.no_grad():
+        logits = model(tensor_home, tensor_away, tensor_league, tensor_coeffs)
+        probs = torch.softmax(logits, dim=1).cpu().numpy()
+
+    # stable sort -> same tie order as predict_single
+    order = np.argsort(-probs, axis=1, kind='stable')[:, :topk]
+    return [[(SCORES[i], float(row_probs[i])) for i in row_order] for row_probs, row_order in zip(probs, order)]
+
 # --------------------------- Integration Helper ---------------------------
 
 def auto_retrain(epochs: int = 10):
@@ -5,10 +5,12 @@ UEFA Unified Analyzer
 - Single endpoint that replaces both Analyzer UEFA and Mode Production.
 - Applies league coefficients, saves analysis to cache, and optionally persists real scores.
 - Compatible with existing pipeline (ocr_parser, analyzer_integration, ufa_auto_validate, train scripts).
+- Analysis cache: indexed SQLite store (ufa.analysis_store), analysis_cache.jsonl is imported once.
 """
 
 import json
 import sys
+import hashlib
 import traceback
 from pathlib import Path
 from typing import Optional
@@ -24,9 +26,12 @@ from ocr_parser import extract_match_info
 from score_predictor import calculate_probabilities
 from learning import get_diff_expected
 
+# Indexed analysis cache
+from ufa.analysis_store import get_analysis_store, ANALYSIS_DB
+
 # Paths
 UPLOADS = Path("/app/uploads/unified")
-ANALYSIS_CACHE = Path("/app/data/analysis_cache.jsonl")   # analyses (pre-match predictions)
+ANALYSIS_CACHE = Path("/app/data/analysis_cache.jsonl")   # legacy analyses file (imported into ANALYSIS_DB)
 REAL_SCORES = Path("/app/data/real_scores.jsonl")        # confirmed real scores (for training)
 TEAM_MAP_FILE = Path("/app/data/team_map.json")          # generated team map
 LOGS_DIR = Path("/app/logs")
@@ -59,8 +64,24 @@ def read_jsonl(path: Path):
                     continue
     return out
 
-def make_analysis_entry(info: dict, prediction: dict, source: str = "ocr_unified"):
-    """Create an analysis entry for the cache"""
+def read_analyses(n: Optional[int] = None, **filters):
+    """Analyses from the indexed cache (oldest first); n = only the last n"""
+    store = get_analysis_store()
+    if n is not None:
+        return store.tail(n, **filters)
+    return list(store.iter_entries(**filters))
+
+def file_md5(file_path: str) -> Optional[str]:
+    """MD5 of the image file (index key of the analysis cache)"""
+    try:
+        with open(file_path, "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def make_analysis_entry(info: dict, prediction: dict, source: str = "ocr_unified", scores: Optional[list] = None,
+                        image_hash: Optional[str] = None):
+    """Create an analysis entry for the cache (scores = odds grid, kept for backtesting)"""
     return {
         "timestamp": datetime.utcnow().isoformat(),
         "source": source,
@@ -70,6 +91,8 @@ def make_analysis_entry(info: dict, prediction: dict, source: str = "ocr_unified
         "home_goals_detected": info.get("home_goals"),
         "away_goals_detected": info.get("away_goals"),
         "raw_text": info.get("raw_text", ""),
+        "scores": scores,
+        "image_hash": image_hash,
         "prediction": prediction
     }
 
@@ -167,11 +190,12 @@ def analyze_image(
         prediction = predict_with_coeffs(home, away, league, scores)
         
         # Assemble analysis entry
-        entry = make_analysis_entry(info, prediction, source="ocr_unified")
+        entry = make_analysis_entry(info, prediction, source="ocr_unified", scores=scores,
+                                    image_hash=file_md5(file_path))
         
         # Persist analysis cache (always if persist_cache True)
         if persist_cache:
-            append_jsonl(ANALYSIS_CACHE, entry)
+            get_analysis_store().append(entry)
         
         # If OCR detected an actual score (rare pre-match), save to real_scores for training pipeline
         if info.get("home_goals") is not None and info.get("away_goals") is not None:
@@ -208,4 +232,4 @@ def analyze_image(
         }
 
 # For direct import and use
-__all__ = ['analyze_image', 'ANALYSIS_CACHE', 'REAL_SCORES']
+__all__ = ['analyze_image', 'read_analyses', 'ANALYSIS_CACHE', 'ANALYSIS_DB', 'REAL_SCORES']
@@ -8,6 +8,11 @@ from pathlib import Path
 import requests
 from dotenv import load_dotenv
 
+try:
+    from ufa.world_coeffs import refresh_index as refresh_world_index
+except ImportError:
+    refresh_world_index = None
+
 load_dotenv()
 
 LOG_FILE = "/app/logs/fifa_update.log"
@@ -120,6 +125,8 @@ def save_coeffs(coeff_map, source="api"):
             json.dump(payload, f, ensure_ascii=False, indent=2)
         TMP_FILE.replace(OUT_FILE)
         logging.info("Saved world coeffs to %s (%d teams).", OUT_FILE, len(coeff_map))
+        if refresh_world_index:
+            refresh_world_index(force=True)
     except Exception:
         logging.exception("Error saving world coeffs")
 
@@ -1,65 +1,159 @@
 #!/usr/bin/env python3
 # /app/backend/ufa/world_coeffs.py
+"""
+Coefficients mondiaux des équipes nationales (world_coeffs.json).
+
+Le fichier est chargé une fois dans un index (WorldCoeffIndex) :
+- clés exactes, minuscules, puis normalisées (casse repliée, sans accents)
+- index des mots pour le match partiel (substring)
+- mémoire des noms déjà résolus
+Il est vérifié (mtime, taille) au plus une fois par INDEX_CHECK_INTERVAL et
+reconstruit immédiatement par les écrivains (world_coeffs_updater,
+update_fifa_rankings) via refresh_index(force=True).
+"""
 import json
-from pathlib import Path
 import os
+import sys
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from team_keys import normalize_key, file_signature, FileIndex
+
+logger = logging.getLogger(__name__)
 
 OUT_FILE = Path(os.getenv("WORLD_COEFF_FILE", "/app/data/world_coeffs.json"))
+INDEX_CHECK_INTERVAL = 1.0   # fréquence max de vérification du fichier (secondes)
+RESOLVED_MEMO_SIZE = 4096
 
-def load_world_coeffs():
-    """Charge les coefficients mondiaux depuis le fichier JSON."""
+
+def _read_world_coeffs():
+    """Lit et parse le fichier (équipes uniquement)"""
     if not OUT_FILE.exists():
         return {}
     with OUT_FILE.open("r", encoding="utf-8") as f:
         try:
             data = json.load(f)
-        except:
+        except Exception:
             return {}
-    return data.get("teams", {})
+    return data.get("teams", {}) if isinstance(data, dict) else {}
+
+
+class WorldCoeffIndex:
+    """Vue immuable du fichier ; seule la mémoire des résolutions évolue"""
+
+    def __init__(self, signature, teams):
+        self.signature = signature
+        self.teams = teams
+        self._lower = {}      # nom en minuscules -> nom du fichier
+        self._keys = {}       # clé normalisée -> nom du fichier
+        self._ordered = []    # [(minuscules, nom)] dans l'ordre du fichier
+        self._tokens = {}     # mot -> positions dans _ordered
+        self._resolved = {}   # (nom demandé, partiel) -> nom du fichier ou None
+
+        for pos, name in enumerate(teams):
+            lower = name.lower()
+            self._lower.setdefault(lower, name)
+            self._keys.setdefault(normalize_key(name), name)
+            self._ordered.append((lower, name))
+            for token in normalize_key(name).split():
+                self._tokens.setdefault(token, []).append(pos)
+
+    def resolve(self, team_name, partial=True):
+        """
+        Nom du fichier correspondant à team_name : exact, minuscules, clé
+        normalisée, puis (si partial) match partiel. None si introuvable.
+        """
+        if not team_name:
+            return None
+        if team_name in self.teams:
+            return team_name
+        memo_key = (team_name, partial)
+        if memo_key in self._resolved:
+            return self._resolved[memo_key]
+
+        lower = team_name.lower()
+        name = self._lower.get(lower) or self._keys.get(normalize_key(team_name))
+        if name is None and partial:
+            name = self._partial(lower, normalize_key(team_name))
+
+        if len(self._resolved) >= RESOLVED_MEMO_SIZE:
+            self._resolved.clear()
+        self._resolved[memo_key] = name
+        return name
+
+    def _partial(self, lower, key):
+        """Premier nom (ordre du fichier) contenant la requête ou contenu dedans"""
+        candidates = sorted({pos for token in key.split() for pos in self._tokens.get(token, ())})
+        for pos in candidates:
+            t, name = self._ordered[pos]
+            if lower in t or t in lower:
+                return name
+        # aucun mot commun : parcours complet (résultat mémorisé par resolve)
+        for t, name in self._ordered:
+            if lower in t or t in lower:
+                return name
+        return None
+
+    def info(self):
+        return {"teams": len(self.teams), "keys": len(self._keys), "resolved_memo": len(self._resolved)}
+
+
+def _build_index(signature):
+    index = WorldCoeffIndex(signature, _read_world_coeffs())
+    logger.info(f"📇 Index des coefficients mondiaux reconstruit: {len(index.teams)} équipes")
+    return index
+
+
+_index = FileIndex(_build_index, lambda: file_signature(OUT_FILE), INDEX_CHECK_INTERVAL)
+
+
+def refresh_index(force=False):
+    """
+    Reconstruit l'index si le fichier a changé (ou si force=True).
+    À appeler après chaque écriture de world_coeffs.json.
+    """
+    return _index.refresh(force)
+
+
+def get_world_index():
+    """Index courant (vérification du fichier au plus une fois par INDEX_CHECK_INTERVAL)"""
+    return _index.get()
+
+
+def get_index_info():
+    info = get_world_index().info()
+    info["rebuilds"] = _index.rebuilds
+    return info
+
+
+def load_world_coeffs():
+    """Coefficients mondiaux {équipe: {rank, coeff}} (depuis l'index, sans relire le fichier)."""
+    return dict(get_world_index().teams)
+
 
 def get_world_coeff(team_name):
     """
     Retourne le coefficient mondial pour une équipe nationale.
     Utilise plusieurs stratégies de matching:
     1. Match exact
-    2. Match case-insensitive
+    2. Match case-insensitive (puis sans accents / ponctuation)
     3. Match partiel (substring)
-    
+
     Retourne 1.0 par défaut si aucune correspondance.
     """
-    teams = load_world_coeffs()
-    if not teams:
+    index = get_world_index()
+    name = index.resolve(team_name)
+    if name is None:
         return 1.0
-    
-    # Direct exact match
-    if team_name in teams:
-        return float(teams[team_name].get("coeff", 1.0))
-    
-    # Case-insensitive match
-    for t in teams:
-        if t.lower() == (team_name or "").lower():
-            return float(teams[t].get("coeff", 1.0))
-    
-    # Try partial match (substring)
-    for t in teams:
-        if (team_name or "").lower() in t.lower() or t.lower() in (team_name or "").lower():
-            return float(teams[t].get("coeff", 1.0))
-    
-    return 1.0
+    return float(index.teams[name].get("coeff", 1.0))
+
 
 def get_world_rank(team_name):
-    """Retourne le rang mondial d'une équipe."""
-    teams = load_world_coeffs()
-    if not teams:
+    """Retourne le rang mondial d'une équipe (sans match partiel)."""
+    index = get_world_index()
+    name = index.resolve(team_name, partial=False)
+    if name is None:
         return None
-    
-    # Direct exact match
-    if team_name in teams:
-        return teams[team_name].get("rank")
-    
-    # Case-insensitive match
-    for t in teams:
-        if t.lower() == (team_name or "").lower():
-            return teams[t].get("rank")
-    
-    return None
+    return index.teams[name].get("rank")
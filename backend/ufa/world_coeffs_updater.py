@@ -6,8 +6,25 @@ import json
 import os
 import time
 
+try:
+    from ufa.world_coeffs import refresh_index as refresh_world_index
+except ImportError:
+    refresh_world_index = None
+
 DATA_PATH = "/app/data/world_coeffs.json"
 
+
+def _write_coeffs(obj):
+    """Écriture atomique puis reconstruction de l'index de lecture (ufa.world_coeffs)"""
+    tmp = DATA_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, DATA_PATH)
+    if refresh_world_index:
+        refresh_world_index(force=True)
+
 def adjust_coeffs_from_results(results_file="/app/data/real_scores.jsonl"):
     """
     Ajuste automatiquement les coefficients FIFA selon les matchs réels (sans API externe).
@@ -39,8 +56,7 @@ def adjust_coeffs_from_results(results_file="/app/data/real_scores.jsonl"):
                 "Uruguay": {"rank": 12, "coeff": 1.15}
             }
         }
-        with open(DATA_PATH, "w", encoding="utf-8") as f:
-            json.dump(base, f, indent=2, ensure_ascii=False)
+        _write_coeffs(base)
 
     # Charger les coefficients actuels
     with open(DATA_PATH, "r", encoding="utf-8") as f:
@@ -127,8 +143,7 @@ def adjust_coeffs_from_results(results_file="/app/data/real_scores.jsonl"):
         # Format simple
         output = coeffs
     
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    _write_coeffs(output)
     
     print(f"[FIFA] Mise à jour automatique terminée. {updated_count} ajustements effectués sur {len(coeffs)} équipes.")
     return coeffs
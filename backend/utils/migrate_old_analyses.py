@@ -2,18 +2,24 @@
 # /app/backend/utils/migrate_old_analyses.py
 """
 Migration des anciennes analyses vers le cache unifié UFA.
-Fusionne : analyzer_uefa.jsonl, production_cache.jsonl → analysis_cache.jsonl
-Évite les doublons automatiquement.
+Fusionne : analyzer_uefa.jsonl, production_cache.jsonl → store d'analyses indexé
+(analysis_cache.db, qui importe lui-même l'ancien analysis_cache.jsonl).
+Évite les doublons automatiquement (index équipes + ligue + jour du store) :
+seules les nouvelles entrées sont ajoutées, le cache n'est plus réécrit.
 Génère un rapport statistique détaillé.
 """
 
+import sys
 import json
 from pathlib import Path
 from datetime import datetime
-from collections import Counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ufa.analysis_store import get_analysis_store, ANALYSIS_DB
 
 BASE = Path("/app/data")
-TARGET = BASE / "analysis_cache.jsonl"
+TARGET = Path(ANALYSIS_DB)
 REPORT_LOG = Path("/app/logs/migration_report.log")
 OLD_FILES = [
     BASE / "analyzer_uefa.jsonl",
@@ -50,12 +56,6 @@ def read_json(path):
         print(f"⚠️  Erreur lecture {path.name}: {e}")
         return None
 
-def write_jsonl(path, data):
-    """Écrit une liste d'objets dans un fichier JSONL"""
-    with path.open("w", encoding="utf-8") as f:
-        for d in data:
-            f.write(json.dumps(d, ensure_ascii=False) + "\n")
-
 def normalize_entry(entry, source_file):
     """Normalise une entrée d'analyse pour le nouveau format"""
     # Format cible : celui de unified_analyzer
@@ -95,14 +95,13 @@ def generate_key(entry):
     date_part = timestamp[:10] if timestamp and len(timestamp) >= 10 else "?"
     return f"{home}-{away}-{league}-{date_part}"
 
-def generate_report(combined, stats):
+def generate_report(store, stats):
     """Génère un rapport statistique détaillé de la migration"""
+    total = store.count()
     
-    # Statistiques par ligue
-    leagues = Counter([e.get("league", "Unknown") for e in combined])
-    
-    # Statistiques par source
-    sources = Counter([e.get("source", "unknown") for e in combined])
+    # Statistiques par ligue / par source (agrégats du store)
+    leagues = sorted(store.counts_by("league").items(), key=lambda x: x[1], reverse=True)
+    sources = sorted(store.counts_by("source").items(), key=lambda x: x[1], reverse=True)
     
     # Créer le rapport
     report = []
@@ -113,17 +112,17 @@ def generate_report(combined, stats):
     report.append(f"📅 Date : {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
     report.append("")
     report.append("📈 RÉSULTATS GLOBAUX:")
-    report.append(f"   • Total analyses : {len(combined)}")
+    report.append(f"   • Total analyses : {total}")
     report.append(f"   • Entrées lues : {stats['total_read']}")
     report.append(f"   • Doublons évités : {stats['duplicates']}")
     report.append(f"   • Nouvelles entrées : {stats['migrated']}")
     report.append("")
     report.append("🏆 RÉPARTITION PAR LIGUE:")
-    for league, count in leagues.most_common():
+    for league, count in leagues:
         report.append(f"   • {league}: {count} analyses")
     report.append("")
     report.append("📁 RÉPARTITION PAR SOURCE:")
-    for source, count in sources.most_common():
+    for source, count in sources:
         report.append(f"   • {source}: {count} analyses")
     report.append("")
     report.append(f"💾 Fichier final : {TARGET}")
@@ -140,8 +139,8 @@ def generate_report(combined, stats):
     print(report_text)
     
     # Retourner le résumé court pour les logs
-    summary = f"✅ Migration réussie : {len(combined)} analyses totales ({stats['migrated']} nouvelles)"
-    league_summary = " | ".join([f"{league}: {count}" for league, count in leagues.most_common(6)])
+    summary = f"✅ Migration réussie : {total} analyses totales ({stats['migrated']} nouvelles)"
+    league_summary = " | ".join([f"{league}: {count}" for league, count in leagues[:6]])
     return f"{summary}\n   → {league_summary}\n📅 Dernière mise à jour : {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
 
 def migrate_and_report():
@@ -154,6 +153,7 @@ def migrate_and_report():
     print("=" * 60)
     print()
     
+    store = get_analysis_store()
     combined = []
     seen_keys = set()
     stats = {
@@ -195,10 +195,13 @@ def migrate_and_report():
             # Normaliser l'entrée
             normalized = normalize_entry(e, f.stem)
             
-            # Générer clé pour détection doublons
+            # Générer clé pour détection doublons (fichiers lus + cache existant)
             key = generate_key(normalized)
+            timestamp = normalized.get("timestamp") or ""
+            day = timestamp[:10] if len(timestamp) >= 10 else None
             
-            if key in seen_keys:
+            if key in seen_keys or (day and store.exists(normalized.get("home_team"), normalized.get("away_team"),
+                                                         normalized.get("league"), day)):
                 stats["duplicates"] += 1
                 continue
             
@@ -206,27 +209,14 @@ def migrate_and_report():
             seen_keys.add(key)
             stats["migrated"] += 1
     
-    # Ajouter ceux déjà dans le nouveau cache (éviter écrasement)
-    if TARGET.exists():
-        print(f"📖 Lecture du cache actuel {TARGET.name}...")
-        current = read_jsonl(TARGET)
-        stats["total_read"] += len(current)
-        print(f"   ✅ {len(current)} entrées existantes")
-        
-        for e in current:
-            key = generate_key(e)
-            if key not in seen_keys:
-                combined.append(e)
-                seen_keys.add(key)
-                stats["migrated"] += 1
-            else:
-                stats["duplicates"] += 1
+    print(f"📖 Cache actuel {TARGET.name} : {store.count()} entrées existantes")
     
-    # Écrire le fichier final
-    write_jsonl(TARGET, combined)
+    # Ajouter les nouvelles entrées (une transaction)
+    if combined:
+        store.extend(combined)
     
     # Générer et afficher le rapport
-    summary = generate_report(combined, stats)
+    summary = generate_report(store, stats)
     
     return summary
 
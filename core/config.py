@@ -1,40 +1,183 @@
 """
 Module de gestion de configuration des paramètres par ligue
 Lecture/écriture thread-safe du fichier leagues_params.json
+
+Service de configuration "à chaud" :
+- leagues_params.json et learning_meta.json (diffExpected) sont gardés en mémoire
+  sous forme de snapshots immuables (MappingProxyType / tuples) : les lecteurs
+  ne prennent aucun verrou et ne font ni I/O ni parsing JSON
+- Rechargement automatique si le fichier change sur disque (mtime/inode/taille),
+  vérifié au plus une fois toutes les RELOAD_CHECK_INTERVAL secondes
+- Les écritures relisent le fichier sous verrou, l'écrivent de manière atomique
+  (tmp + os.replace) puis publient le nouveau snapshot
 """
+import os
 import json
+import time
 from pathlib import Path
 from threading import RLock
+from types import MappingProxyType
 import logging
 
 logger = logging.getLogger(__name__)
 
 CONFIG_FILE = Path("/app/config/leagues_params.json")
-_lock = RLock()
-
-def _load():
-    """Charge la configuration depuis le fichier JSON"""
-    if not CONFIG_FILE.exists():
-        CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        # Configuration par défaut
-        default_config = {
-            "default": {
-                "diffExpected": 2.1380,
-                "base_expected": 1.4,
-                "coeff_min": 0.85,
-                "coeff_max": 1.30,
-                "coeff_home": 1.0,
-                "coeff_away": 1.0
-            }
+META_FILE = Path("/app/data/learning_meta.json")
+RELOAD_CHECK_INTERVAL = 1.0  # fréquence max de vérification du fichier (secondes)
+
+DEFAULT_LEAGUE_PARAMS = {
+    "diffExpected": 2.1380,
+    "base_expected": 1.4,
+    "coeff_min": 0.85,
+    "coeff_max": 1.30,
+    "coeff_home": 1.0,
+    "coeff_away": 1.0
+}
+DEFAULT_META = {"diffExpected": 2.0, "schema_version": 2}
+
+
+def _freeze(obj):
+    """Copie immuable (dict -> MappingProxyType, list -> tuple)"""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _thaw(obj):
+    """Copie modifiable d'un snapshot (inverse de _freeze)"""
+    if isinstance(obj, MappingProxyType):
+        return {k: _thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [_thaw(v) for v in obj]
+    return obj
+
+
+class HotJsonConfig:
+    """Fichier JSON gardé en mémoire, rechargé à chaud quand il change"""
+
+    def __init__(self, path, default=None, create_if_missing=False,
+                 reload_interval=RELOAD_CHECK_INTERVAL):
+        self.path = Path(path)
+        self.default = default or {}
+        self.create_if_missing = create_if_missing
+        self.reload_interval = reload_interval
+        self._lock = RLock()       # écrivains et rechargements uniquement
+        self._snapshot = None      # MappingProxyType publié en bloc
+        self._signature = None
+        self._last_check = 0.0
+        self.reloads = 0
+        self.writes = 0
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _read_file(self):
+        """Lit le fichier (crée les valeurs par défaut si absent et autorisé)"""
+        if not self.path.exists():
+            if self.create_if_missing:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._write_file(self.default)
+            return json.loads(json.dumps(self.default))
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except Exception as e:
+            logger.error(f"Erreur lecture config {self.path}: {e}")
+            return {}
+
+    def _write_file(self, data):
+        """Écriture atomique avec tmp + rename"""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _reload(self):
+        with self._lock:
+            signature = self._stat_signature()
+            if self._snapshot is not None and signature == self._signature:
+                return self._snapshot
+            data = self._read_file()
+            self._signature = self._stat_signature()
+            self._snapshot = _freeze(data)
+            self._last_check = time.monotonic()
+            self.reloads += 1
+            return self._snapshot
+
+    def snapshot(self):
+        """Snapshot immuable courant (sans verrou, sans I/O hors vérification périodique)"""
+        snap = self._snapshot
+        if snap is None:
+            return self._reload()
+        now = time.monotonic()
+        if now - self._last_check >= self.reload_interval:
+            self._last_check = now
+            if self._stat_signature() != self._signature:
+                logger.info(f"🔄 {self.path} modifié sur disque, rechargement de la configuration")
+                return self._reload()
+        return snap
+
+    def update(self, mutate):
+        """
+        Modifie la configuration de manière atomique.
+
+        Args:
+            mutate: fonction recevant une copie modifiable des données (dict)
+
+        Returns:
+            Valeur retournée par mutate
+        """
+        with self._lock:
+            data = self._read_file()
+            result = mutate(data)
+            self._write_file(data)
+            self._signature = self._stat_signature()
+            self._snapshot = _freeze(data)
+            self._last_check = time.monotonic()
+            self.writes += 1
+            return result
+
+    def invalidate(self):
+        """Force la relecture au prochain accès"""
+        with self._lock:
+            self._signature = None
+            self._last_check = 0.0
+
+    def info(self):
+        """État du cache (pour diagnostic)"""
+        return {
+            "path": str(self.path),
+            "loaded": self._snapshot is not None,
+            "reloads": self.reloads,
+            "writes": self.writes
         }
-        CONFIG_FILE.write_text(json.dumps(default_config, indent=2))
-        return default_config
-    
-    try:
-        return json.loads(CONFIG_FILE.read_text(encoding='utf-8'))
-    except Exception as e:
-        logger.error(f"Erreur lecture config: {e}")
-        return {}
+
+
+_leagues = HotJsonConfig(CONFIG_FILE, {"default": DEFAULT_LEAGUE_PARAMS}, create_if_missing=True)
+_meta = HotJsonConfig(META_FILE, DEFAULT_META)
+
+
+def get_leagues_snapshot():
+    """Snapshot immuable de leagues_params.json (lecture sans verrou)"""
+    return _leagues.snapshot()
+
+
+def get_learning_meta_snapshot():
+    """Snapshot immuable de learning_meta.json (diffExpected, schema_version)"""
+    return _meta.snapshot()
+
+
+def get_config_cache_info() -> dict:
+    """État des caches de configuration"""
+    return {"leagues_params": _leagues.info(), "learning_meta": _meta.info()}
+
 
 def get_league_params(league_name: str) -> dict:
     """
@@ -46,25 +189,17 @@ def get_league_params(league_name: str) -> dict:
     Returns:
         dict: Paramètres de la ligue ou None si non trouvée
     """
-    with _lock:
-        data = _load()
-        params = data.get(league_name)
-        
-        if params:
-            logger.info(f"📋 Paramètres chargés pour {league_name}: diffExpected={params.get('diffExpected')}")
-        else:
-            logger.warning(f"⚠️ Aucun paramètre trouvé pour {league_name}, utilisation des valeurs par défaut")
-            # Retourner les paramètres par défaut
-            params = data.get("default", {
-                "diffExpected": 2.1380,
-                "base_expected": 1.4,
-                "coeff_min": 0.85,
-                "coeff_max": 1.30,
-                "coeff_home": 1.0,
-                "coeff_away": 1.0
-            })
-        
-        return params
+    data = _leagues.snapshot()
+    params = data.get(league_name)
+    
+    if params:
+        logger.info(f"📋 Paramètres chargés pour {league_name}: diffExpected={params.get('diffExpected')}")
+    else:
+        logger.warning(f"⚠️ Aucun paramètre trouvé pour {league_name}, utilisation des valeurs par défaut")
+        # Retourner les paramètres par défaut
+        params = data.get("default", DEFAULT_LEAGUE_PARAMS)
+    
+    return _thaw(params) if isinstance(params, MappingProxyType) else dict(params)
 
 def set_league_params(league_name: str, params: dict):
     """
@@ -74,11 +209,11 @@ def set_league_params(league_name: str, params: dict):
         league_name: Nom de la ligue
         params: Dictionnaire complet des paramètres
     """
-    with _lock:
-        data = _load()
+    def mutate(data):
         data[league_name] = params
-        CONFIG_FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-        logger.info(f"✅ Paramètres mis à jour pour {league_name}")
+
+    _leagues.update(mutate)
+    logger.info(f"✅ Paramètres mis à jour pour {league_name}")
 
 def update_league_param(league_name: str, key: str, value):
     """
@@ -89,36 +224,31 @@ def update_league_param(league_name: str, key: str, value):
         key: Nom du paramètre (ex: "diffExpected")
         value: Nouvelle valeur
     """
-    with _lock:
-        data = _load()
+    def mutate(data):
         league = data.get(league_name, {})
-        
         old_value = league.get(key)
         league[key] = value
         data[league_name] = league
-        
-        CONFIG_FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-        logger.info(f"✅ {league_name}.{key}: {old_value} → {value}")
+        return old_value
+
+    old_value = _leagues.update(mutate)
+    logger.info(f"✅ {league_name}.{key}: {old_value} → {value}")
 
 def get_all_leagues() -> list:
     """Retourne la liste de toutes les ligues configurées"""
-    with _lock:
-        data = _load()
-        return [k for k in data.keys() if k != "default"]
+    return [k for k in _leagues.snapshot().keys() if k != "default"]
 
 def get_all_params() -> dict:
     """Retourne tous les paramètres de toutes les ligues"""
-    with _lock:
-        return _load()
+    return _thaw(_leagues.snapshot())
 
 def reset_league_to_default(league_name: str):
     """Réinitialise une ligue aux paramètres par défaut"""
-    with _lock:
-        data = _load()
-        default = data.get("default", {})
-        data[league_name] = default.copy()
-        CONFIG_FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-        logger.info(f"🔄 {league_name} réinitialisée aux valeurs par défaut")
+    def mutate(data):
+        data[league_name] = dict(data.get("default", {}))
+
+    _leagues.update(mutate)
+    logger.info(f"🔄 {league_name} réinitialisée aux valeurs par défaut")
 
 # Test du module
 if __name__ == "__main__":
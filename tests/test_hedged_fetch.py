@@ -0,0 +1,185 @@
+"""
+Hedged fetch de UnifiedUpdater avec des sources locales
+=======================================================
+
+Chaque source est une fonction locale (UnifiedUpdater(sources=[...])) :
+aucun appel réseau, statistiques dans tmp_path, budget quotidien partagé
+non consommé (increment_request neutralisé).
+
+Usage:
+    python -m pytest tests/test_hedged_fetch.py -q
+"""
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(BACKEND / "tools"))
+
+from multi_source_updater import UnifiedUpdater, validate_standings
+
+CODE = "PL"   # 20 équipes attendues
+
+
+def table(n=20):
+    return [{"team": f"Team {i}", "position": i, "points": 60 - i} for i in range(1, n + 1)]
+
+
+class Source:
+    """Source de substitution : délai, résultat ou exception, appels comptés"""
+
+    def __init__(self, result=None, delay=0.0, error=None):
+        self.result = result if result is not None else table()
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.done = threading.Event()
+
+    def __call__(self, code, slug, season):
+        self.calls += 1
+        try:
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return self.result
+        finally:
+            self.done.set()
+
+
+def make_updater(stats_path, sources, hedge_delay=None):
+    updater = UnifiedUpdater(sources=list(sources.items()), stats_path=str(stats_path), hedge_delay=hedge_delay)
+    updater.increment_request = lambda: None
+    return updater
+
+
+def read_stats(stats_path):
+    return json.loads(Path(stats_path).read_text(encoding="utf-8"))
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_slow_primary_triggers_hedge(tmp_path):
+    stats_path = tmp_path / "source_stats.json"
+    primary, backup = Source(delay=1.0), Source(delay=0.05)
+    updater = make_updater(stats_path, {"primary": primary, "backup": backup}, hedge_delay=0.2)
+
+    t0 = time.perf_counter()
+    source, data, latency = updater.hedged_fetch(CODE, "ENG-Premier League")
+    elapsed = time.perf_counter() - t0
+
+    assert source == "backup"
+    assert data == table()
+    assert elapsed < 0.9                       # n'a pas attendu la source lente
+    assert primary.calls == 1 and backup.calls == 1
+
+    # la source lente termine après le retour : son résultat est enregistré et sauvegardé
+    assert primary.done.wait(3.0)
+    assert wait_for(lambda: read_stats(stats_path)[CODE].get("primary", {}).get("attempts") == 1)
+    stats = read_stats(stats_path)[CODE]
+    assert stats["primary"]["ok"] == 1 and stats["primary"]["latency_ewma"] >= 1.0
+    assert stats["backup"]["ok"] == 1
+
+
+def test_fast_primary_is_not_hedged(tmp_path):
+    primary, backup = Source(delay=0.01), Source()
+    updater = make_updater(tmp_path / "source_stats.json", {"primary": primary, "backup": backup}, hedge_delay=1.0)
+
+    source, _, _ = updater.hedged_fetch(CODE, "ENG-Premier League")
+    assert source == "primary"
+    assert backup.calls == 0
+
+
+def test_failing_source_falls_through_without_waiting(tmp_path):
+    stats_path = tmp_path / "source_stats.json"
+    primary, backup = Source(error=ConnectionError("refused")), Source()
+    # budget long : la source suivante doit partir dès l'échec, pas après 5 s
+    updater = make_updater(stats_path, {"primary": primary, "backup": backup}, hedge_delay=5.0)
+
+    t0 = time.perf_counter()
+    source, _, _ = updater.hedged_fetch(CODE, "ENG-Premier League")
+    assert source == "backup"
+    assert time.perf_counter() - t0 < 1.0
+
+    stats = read_stats(stats_path)[CODE]
+    assert stats["primary"]["failed"] == 1
+    assert stats["primary"]["last_error"] == "ConnectionError: refused"
+
+
+def test_all_sources_failing_returns_none(tmp_path):
+    updater = make_updater(tmp_path / "source_stats.json",
+                           {"primary": Source(error=TimeoutError("slow")), "backup": Source(result=[])},
+                           hedge_delay=5.0)
+    assert updater.hedged_fetch(CODE, "ENG-Premier League") is None
+
+
+def test_invalid_table_is_rejected(tmp_path):
+    stats_path = tmp_path / "source_stats.json"
+    short = table(5)
+    assert validate_standings(short, 20) == "too few teams (5)"
+
+    primary, backup = Source(result=short), Source()
+    updater = make_updater(stats_path, {"primary": primary, "backup": backup}, hedge_delay=5.0)
+
+    source, data, _ = updater.hedged_fetch(CODE, "ENG-Premier League")
+    assert source == "backup"
+    assert data == table()
+
+    stats = read_stats(stats_path)[CODE]
+    assert stats["primary"]["invalid"] == 1
+    assert stats["primary"]["last_error"] == "too few teams (5)"
+
+
+def test_validate_standings_rules():
+    assert validate_standings(table(), 20) is None
+    assert validate_standings(None) == "empty"
+    assert validate_standings(table(30), 20) == "team count 30 != 20"
+    gap = table()
+    gap[3]["position"] = 40
+    assert validate_standings(gap, 20) == "ranks not continuous"
+    unnamed = table()
+    unnamed[0]["team"] = ""
+    assert validate_standings(unnamed, 20) == "missing team name"
+
+
+def test_stats_order_sources_on_next_run(tmp_path):
+    stats_path = tmp_path / "source_stats.json"
+
+    # 1er passage : la source prioritaire échoue
+    first = make_updater(stats_path, {"primary": Source(error=ConnectionError("down")), "backup": Source()},
+                         hedge_delay=5.0)
+    assert first.hedged_fetch(CODE, "ENG-Premier League")[0] == "backup"
+
+    # 2e passage (nouvelle instance, stats relues du fichier) : backup passe en tête
+    primary, backup = Source(), Source()
+    second = make_updater(stats_path, {"primary": primary, "backup": backup}, hedge_delay=5.0)
+    assert second.stats.order(CODE, ["primary", "backup"]) == ["backup", "primary"]
+
+    assert second.hedged_fetch(CODE, "ENG-Premier League")[0] == "backup"
+    assert primary.calls == 0
+
+    # une autre ligue garde l'ordre statique
+    assert second.stats.order("FL1", ["primary", "backup"]) == ["primary", "backup"]
+
+
+def test_faster_source_first_at_equal_reliability(tmp_path):
+    stats_path = tmp_path / "source_stats.json"
+    slow, fast = Source(delay=0.3), Source(delay=0.01)
+    updater = make_updater(stats_path, {"slow": slow, "fast": fast}, hedge_delay=0.05)
+    updater.hedged_fetch(CODE, "ENG-Premier League")
+    assert slow.done.wait(3.0)
+    assert wait_for(lambda: read_stats(stats_path)[CODE].get("slow", {}).get("attempts") == 1)
+
+    nxt = make_updater(stats_path, {"slow": Source(), "fast": Source()})
+    assert nxt.stats.order(CODE, ["slow", "fast"]) == ["fast", "slow"]
@@ -0,0 +1,162 @@
+"""
+Rafraîchissement concurrent des classements contre le serveur de fixtures
+=========================================================================
+
+Les pages enregistrées de tests/fixtures/standings sont servies par
+tools/standings_fixture_server.py (ETag / Last-Modified) et passent par
+standings_refresh.run_jobs avec les vrais parseurs de league_fetcher et de
+multi_source_updater. Aucune écriture dans /app/data : les sauvegardes sont
+collectées en mémoire et les validateurs vont dans tmp_path.
+
+Usage:
+    python -m pytest tests/test_standings_refresh.py -q
+"""
+import os
+import sys
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(BACKEND / "tools"))
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "standings"
+
+standings_refresh = pytest.importorskip("standings_refresh")
+if not standings_refresh.HTTPX_AVAILABLE:
+    pytest.skip("httpx non disponible", allow_module_level=True)
+
+import league_fetcher
+from standings_refresh import RefreshJob, run_jobs, run_sync
+from standings_fixture_server import start_fixture_server
+from multi_source_updater import parse_football_data_standings
+
+LEAGUES = ("LaLiga", "PremierLeague", "EuropaLeague")
+
+
+@pytest.fixture
+def fixture_server(tmp_path):
+    pages = tmp_path / "pages"
+    shutil.copytree(FIXTURES, pages)
+    server, base_url = start_fixture_server(str(pages))
+    yield server, base_url, pages
+    server.shutdown()
+    server.server_close()
+
+
+def make_jobs(base_url, saved):
+    """Parseurs réels, sauvegarde collectée dans `saved` au lieu du fichier de ligue"""
+    jobs = []
+    for league in LEAGUES:
+        parser = getattr(league_fetcher, league_fetcher.LEAGUE_CONFIG[league]["method"])
+        jobs.append(RefreshJob(
+            key=league,
+            url=f"{base_url}/{league}.html",
+            parse=parser,
+            save=lambda teams, name=league: saved.setdefault(name, []).append(teams),
+        ))
+    jobs.append(RefreshJob(
+        key="football-data:PL",
+        url=f"{base_url}/football-data_PL.json",
+        parse=lambda body: parse_football_data_standings(json.loads(body)),
+        save=lambda rows: saved.setdefault("football-data:PL", []).append(rows),
+    ))
+    return jobs
+
+
+def refresh(base_url, validators, saved):
+    return run_sync(run_jobs(make_jobs(base_url, saved), validators_path=str(validators)))
+
+
+def test_recorded_pages_are_parsed(fixture_server, tmp_path):
+    server, base_url, _ = fixture_server
+    saved = {}
+    results = refresh(base_url, tmp_path / "validators.json", saved)
+
+    assert {key: res["status"] for key, res in results.items()} == {
+        "LaLiga": "updated", "PremierLeague": "updated",
+        "EuropaLeague": "updated", "football-data:PL": "updated"}
+
+    laliga = saved["LaLiga"][0]
+    assert len(laliga) == 20
+    assert laliga[0] == {"name": "Real Madrid", "rank": 1, "points": 0}
+    assert laliga[3]["name"] == "Atletico Madrid"   # accents retirés par _normalize_name
+    assert laliga[-1] == {"name": "Real Oviedo", "rank": 20, "points": 0}
+
+    premier = saved["PremierLeague"][0]
+    assert [t["name"] for t in premier[:3]] == ["Arsenal", "Manchester City", "Chelsea"]
+    assert premier[-1]["rank"] == 20
+
+    europa = [t["name"] for t in saved["EuropaLeague"][0]]
+    assert europa[:2] == ["AS Roma", "Villarreal CF"]
+    assert "UEFA" not in europa and "England" not in europa   # liens de navigation filtrés
+    assert "Stade Rennais" not in europa                      # aucun mot-clé de club
+    assert len(europa) == 18
+
+    rows = saved["football-data:PL"][0]
+    assert len(rows) == 20
+    assert rows[0]["team"] == "Arsenal FC" and rows[0]["position"] == 1 and rows[0]["points"] == 26
+    assert [r["position"] for r in rows] == list(range(1, 21))
+
+    assert all(hits == 1 for hits in server.hits.values())
+
+
+def test_conditional_requests_skip_parsing(fixture_server, tmp_path):
+    _, base_url, _ = fixture_server
+    validators = tmp_path / "validators.json"
+    saved = {}
+    refresh(base_url, validators, saved)
+
+    stored = json.loads(validators.read_text(encoding="utf-8"))
+    assert stored["LaLiga"]["etag"] and stored["LaLiga"]["hash"]
+
+    saved.clear()
+    results = refresh(base_url, validators, saved)
+    assert {res["status"] for res in results.values()} == {"not_modified"}
+    assert all(res["http_status"] == 304 for res in results.values())
+    assert saved == {}
+
+
+def test_changed_page_is_parsed_again(fixture_server, tmp_path):
+    _, base_url, pages = fixture_server
+    validators = tmp_path / "validators.json"
+    refresh(base_url, validators, {})
+
+    # Barcelona passe devant le Real Madrid
+    page = pages / "LaLiga.html"
+    html = page.read_text(encoding="utf-8")
+    html = html.replace("Real Madrid", "@@").replace("Barcelona", "Real Madrid").replace("@@", "Barcelona")
+    page.write_text(html, encoding="utf-8")
+
+    saved = {}
+    results = refresh(base_url, validators, saved)
+    assert results["LaLiga"]["status"] == "updated"
+    assert results["PremierLeague"]["status"] == "not_modified"
+    assert list(saved) == ["LaLiga"]
+    assert [t["name"] for t in saved["LaLiga"][0][:2]] == ["Barcelona", "Real Madrid"]
+
+
+def test_force_ignores_validators(fixture_server, tmp_path):
+    _, base_url, _ = fixture_server
+    validators = tmp_path / "validators.json"
+    refresh(base_url, validators, {})
+
+    saved = {}
+    jobs = make_jobs(base_url, saved)
+    for job in jobs:
+        job.force = True
+    results = run_sync(run_jobs(jobs, validators_path=str(validators)))
+    assert {res["status"] for res in results.values()} == {"updated"}
+    assert set(saved) == set(LEAGUES) | {"football-data:PL"}
+
+
+def test_missing_page_is_an_error(fixture_server, tmp_path):
+    _, base_url, pages = fixture_server
+    os.remove(pages / "EuropaLeague.html")
+    results = refresh(base_url, tmp_path / "validators.json", {})
+    assert results["EuropaLeague"]["status"] == "error"
+    assert results["EuropaLeague"]["error"] == "HTTP 404"
+    assert results["LaLiga"]["status"] == "updated"